@@ -461,10 +461,17 @@ async def _setup_services(host: str, port: int, _httpd, server_thread, url: str)
         await client.send_json({"type": "welcome", "version": VERSION, "session": client.session_id})
 
     # ── Phase 7: RAG Engine ──
-    try:
-        rag_engine.reindex(force=True)
-    except Exception as e:
-        log.warning(f"RAG init error: {e}")
+    # Indexing runs off the event loop; progress is reported by /api/rag.
+    # Only changed sources are re-indexed; an empty index is bulk-built and an
+    # interrupted rebuild resumed, while searches keep using the live index.
+    def _rag_init() -> None:
+        """Bring the RAG index up to date."""
+        try:
+            rag_engine.reindex()
+        except Exception as e:
+            log.warning(f"RAG init error: {e}")
+
+    threading.Thread(target=_rag_init, daemon=True, name="rag-ingest").start()
 
     # ── Phase 8: MCP (Model Context Protocol) ──
     try:
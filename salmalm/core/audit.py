@@ -109,7 +109,8 @@ def _init_audit_db():
 def _flush_audit_buffer() -> None:
     """Write buffered audit entries to SQLite in a single transaction.
 
-    Safe to call from atexit — checks DB availability before writing.
+    The insert is a job on the audit.db writer thread (group-committed with
+    other writes); this waits for it. Safe to call from atexit.
     """
     global _audit_flush_timer
     with _audit_lock:
@@ -120,19 +121,20 @@ def _flush_audit_buffer() -> None:
         _audit_buffer.clear()
         _audit_flush_timer = None
 
-    try:
-        conn = _audit_get_db()
-    except Exception as _db_err:
-        log.warning(f"[AUDIT] DB unavailable during flush (atexit?): {_db_err}")
-        return
     # v2 only — v1 hash-chain table retained for schema compat but no longer written.
     # Removing dual-write halves audit storage overhead.
-    for ts, event, detail, session_id, json_detail in entries:
-        conn.execute(
+    def _insert(conn):
+        conn.executemany(
             "INSERT INTO audit_log_v2 (timestamp, event_type, session_id, detail) VALUES (?,?,?,?)",
-            (ts, event, session_id, json_detail),
+            [(ts, event, session_id, json_detail) for ts, event, _detail, session_id, json_detail in entries],
         )
-    conn.commit()
+
+    try:
+        from salmalm.db.aio import audit_db
+
+        audit_db.submit(_insert).result(timeout=30)
+    except Exception as _db_err:
+        log.warning(f"[AUDIT] flush failed (DB unavailable / atexit?): {_db_err}")
 
 
 def audit_log(
@@ -303,9 +303,7 @@ def compact_messages(
 
 
 # TFIDFSearch extracted to salmalm/core/search.py
-from salmalm.core.search import TFIDFSearch  # noqa: E402
-
-_tfidf = TFIDFSearch()
+from salmalm.core.search import TFIDFSearch, _tfidf  # noqa: E402, F401
 
 # ============================================================
 # LLM CRON MANAGER — Scheduled tasks with LLM execution
@@ -1,19 +1,16 @@
 """SalmAlm core — audit, cache, usage, router, compaction, search,
 subagent, skills, session, cron, daily."""
 
-import hashlib
-import json
 import os
 import sqlite3
 import threading
 import time
-from collections import OrderedDict
 from datetime import datetime
 from typing import Optional
 
 from salmalm.constants import (
     AUDIT_DB,
-    CACHE_TTL,
+    CACHE_DB,
     COMPLEX_INDICATORS,
     DATA_DIR,
     KST,
@@ -33,6 +30,7 @@ from salmalm.core.audit import (  # noqa: F401
     _flush_audit_buffer,
 )
 from salmalm.core.core_messages import search_messages, delete_message, edit_message  # noqa: F401
+from salmalm.core.usage_ledger import usage_ledger
 
 # ============================================================
 _usage_lock = threading.Lock()  # Usage tracking (separate to avoid contention)
@@ -136,6 +134,20 @@ def _get_db() -> sqlite3.Connection:
             conn.execute("ALTER TABLE session_store ADD COLUMN session_meta TEXT DEFAULT '{}'")
         except sqlite3.OperationalError:
             pass  # Column already exists (idempotent)
+        # Session-list index columns (NULL message_count = not indexed yet, see backfill_session_index)
+        for _col in ("first_user_text TEXT DEFAULT NULL", "message_count INTEGER DEFAULT NULL", "hidden INTEGER DEFAULT 0"):
+            try:
+                conn.execute(f"ALTER TABLE session_store ADD COLUMN {_col}")
+            except sqlite3.OperationalError:
+                pass  # Column already exists (idempotent)
+        # Copy-on-write branches: inherit the parent's live log rows with seq <= fork_seq
+        try:
+            conn.execute("ALTER TABLE session_store ADD COLUMN fork_seq INTEGER DEFAULT NULL")
+        except sqlite3.OperationalError:
+            pass  # Column already exists (idempotent)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_session_store_parent ON session_store(parent_session_id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_session_store_user_updated ON session_store(user_id, updated_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_session_store_updated ON session_store(updated_at, session_id)")
         conn.execute("""CREATE TABLE IF NOT EXISTS session_message_backup (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             session_id TEXT NOT NULL,
@@ -143,7 +155,42 @@ def _get_db() -> sqlite3.Connection:
             removed_at TEXT NOT NULL,
             reason TEXT DEFAULT 'rollback'
         )""")
+        # Append-only message log (see Session._persist); deleted=1 marks tombstones
+        conn.execute("""CREATE TABLE IF NOT EXISTS session_messages (
+            session_id TEXT NOT NULL,
+            seq INTEGER NOT NULL,
+            role TEXT NOT NULL,
+            message TEXT NOT NULL,
+            deleted INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (session_id, seq)
+        )""")
+        # Deleting a parent hands its own rows to the branches that inherit them
+        # and re-points those branches at the grandparent (or detaches them).
+        conn.execute("""CREATE TRIGGER IF NOT EXISTS session_store_detach_forks
+            BEFORE DELETE ON session_store BEGIN
+                INSERT OR IGNORE INTO session_messages (session_id, seq, role, message)
+                    SELECT c.session_id, m.seq, m.role, m.message
+                    FROM session_store c JOIN session_messages m
+                        ON m.session_id = OLD.session_id AND m.deleted = 0 AND m.seq <= c.fork_seq
+                    WHERE c.parent_session_id = OLD.session_id AND c.fork_seq IS NOT NULL;
+                UPDATE session_store SET
+                    parent_session_id = CASE WHEN OLD.fork_seq IS NULL THEN parent_session_id
+                                             ELSE OLD.parent_session_id END,
+                    fork_seq = CASE WHEN OLD.fork_seq IS NULL THEN NULL ELSE MIN(fork_seq, OLD.fork_seq) END
+                WHERE parent_session_id = OLD.session_id AND fork_seq IS NOT NULL;
+            END""")
+        conn.execute("""CREATE TRIGGER IF NOT EXISTS session_store_delete_messages
+            AFTER DELETE ON session_store BEGIN
+                DELETE FROM session_messages WHERE session_id = OLD.session_id;
+            END""")
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_session_store_unindexed ON session_store(session_id) "
+            "WHERE message_count IS NULL"
+        )
         conn.commit()
+        from salmalm.core.session_store import backfill_session_index
+
+        backfill_session_index(conn)
         _thread_local.audit_conn = conn
     return conn
 
@@ -185,78 +232,9 @@ def close_all_db_connections() -> None:
     log.info("[DB] All database connections closed")
 
 
-class ResponseCache:
-    """Simple TTL cache for LLM responses to avoid duplicate calls."""
+from salmalm.core.llm_cache import RESPONSE_CACHE_DISK_ENABLED, ResponseCache  # noqa: E402, F401
 
-    def __init__(self, max_size=100, ttl=CACHE_TTL):  # noqa: F405
-        """Init  ."""
-        self._cache: OrderedDict = OrderedDict()
-        self._max_size = max_size
-        self._ttl = ttl
-
-    def _key(
-        self,
-        model: str,
-        messages: list,
-        session_id: str = "",
-        system_prompt: str = "",
-        tools: list | None = None,
-        temperature: float | None = None,
-        max_tokens: int | None = None,
-    ) -> str:
-        """Build cache key including model params for correctness."""
-        key_data: dict = {"s": session_id, "m": model, "msgs": messages[-5:]}
-        if system_prompt:
-            key_data["sp"] = hashlib.sha256(system_prompt.encode()).hexdigest()[:12]
-        if tools:
-            key_data["tools"] = hashlib.sha256(json.dumps(tools, sort_keys=True).encode()).hexdigest()[:12]
-        if temperature is not None:
-            key_data["temp"] = temperature
-        if max_tokens is not None:
-            key_data["mt"] = max_tokens
-        content = json.dumps(key_data, sort_keys=True)
-        return hashlib.sha256(content.encode()).hexdigest()[:16]
-
-    def get(
-        self,
-        model: str,
-        messages: list,
-        session_id: str = "",
-        system_prompt: str = "",
-        tools: list | None = None,
-        temperature: float | None = None,
-        max_tokens: int | None = None,
-    ) -> Optional[str]:
-        """Get a cached response by key, or None if expired/missing."""
-        k = self._key(model, messages, session_id, system_prompt, tools, temperature, max_tokens)
-        if k in self._cache:
-            entry = self._cache[k]
-            if time.time() - entry["ts"] < self._ttl:
-                self._cache.move_to_end(k)
-                log.info("[COST] Cache hit -- saved API call")
-                return entry["response"]  # type: ignore[no-any-return]
-            del self._cache[k]
-        return None
-
-    def put(
-        self,
-        model: str,
-        messages: list,
-        response: str,
-        session_id: str = "",
-        system_prompt: str = "",
-        tools: list | None = None,
-        temperature: float | None = None,
-        max_tokens: int | None = None,
-    ) -> None:
-        """Store a response in cache with TTL."""
-        k = self._key(model, messages, session_id, system_prompt, tools, temperature, max_tokens)
-        self._cache[k] = {"response": response, "ts": time.time()}
-        if len(self._cache) > self._max_size:
-            self._cache.popitem(last=False)
-
-
-response_cache = ResponseCache()
+response_cache = ResponseCache(db_path=CACHE_DB if RESPONSE_CACHE_DISK_ENABLED else None)
 
 # _usage_lock already defined at top of file
 _usage = {
@@ -370,39 +348,19 @@ def track_usage(model: str, input_tokens: int, output_tokens: int, user_id: Opti
         _usage["by_model"][short]["output"] += output_tokens  # type: ignore[index]
         _usage["by_model"][short]["cost"] += cost  # type: ignore[index]
         _usage["by_model"][short]["calls"] += 1  # type: ignore[index]
-        # Persist to SQLite (with user_id for multi-tenant tracking)
-        try:
-            conn = _get_db()
-            conn.execute(
-                "INSERT INTO usage_stats (ts, model, input_tokens, output_tokens, cost, user_id) VALUES (?,?,?,?,?,?)",
-                (
-                    datetime.now(KST).isoformat(),
-                    model,
-                    input_tokens,
-                    output_tokens,
-                    cost,
-                    user_id,
-                ),
-            )  # noqa: F405
-            conn.commit()
-        except sqlite3.OperationalError:
-            pass  # Column already exists (idempotent)
-        # Also record to usage_detail for dashboard daily/monthly charts
-        # Table is created in _get_db() init — no CREATE TABLE needed here
-        try:
-            conn2 = _get_db()
-            conn2.execute(
-                "INSERT INTO usage_detail (ts, session_id, model, input_tokens, output_tokens, cost) "
-                "VALUES (?,?,?,?,?,?)",
-                (datetime.now(KST).isoformat(), "", model, input_tokens, output_tokens, cost),
-            )
-            conn2.commit()
-        except Exception as e:
-            log.debug(f"usage_detail write: {e}")
     # ── Side effects OUTSIDE _usage_lock ─────────────────────────────────────
     # record_cost() and add_usage() acquire their own locks.  Calling them
-    # inside _usage_lock creates a lock-ordering hazard (potential deadlock)
-    # and holds the global usage lock while doing DB I/O.
+    # inside _usage_lock creates a lock-ordering hazard (potential deadlock).
+    # All three are queued on the usage ledger and written behind in batches.
+    # Persist to SQLite: usage_stats (with user_id for multi-tenant tracking) and
+    # usage_detail (dashboard daily/monthly charts)
+    try:
+        _get_db()  # tables are created in _get_db() init, before the ledger flushes
+        usage_ledger.record_usage(
+            AUDIT_DB, datetime.now(KST).isoformat(), model, input_tokens, output_tokens, cost, user_id
+        )
+    except Exception as e:
+        log.debug(f"usage write: {e}")
     if user_id:
         try:
             from salmalm.features.users import user_manager
@@ -550,9 +508,7 @@ from salmalm.core.compaction import (  # noqa: E402, F401
     _msg_content_str,
 )
 
-from salmalm.core.search import TFIDFSearch  # noqa: E402
-
-_tfidf = TFIDFSearch()
+from salmalm.core.search import TFIDFSearch, _tfidf  # noqa: E402, F401
 
 
 # Session + session management extracted to salmalm/core/session_store.py
@@ -561,7 +517,6 @@ from salmalm.core.session_store import (  # noqa: E402, F401
     _tg_bot,
     get_telegram_bot,
     set_telegram_bot,
-    _llm_cron,
     _sessions,
     _session_lock,
     _cleanup_sessions,
@@ -23,6 +23,7 @@ def edit_message(session_id: str, message_index: int, new_content: str) -> dict:
     Returns {'ok': True, 'index': int} or {'ok': False, 'error': ...}.
     """
     session = get_session(session_id)
+    session.hydrate()
     if message_index < 0 or message_index >= len(session.messages):
         return {"ok": False, "error": f"Invalid message_index: {message_index}"}
     msg = session.messages[message_index]
@@ -65,6 +66,7 @@ def delete_message(session_id: str, message_index: int) -> dict:
     Returns {'ok': True, 'removed': int} or {'ok': False, 'error': ...}.
     """
     session = get_session(session_id)
+    session.hydrate()
     if message_index < 0 or message_index >= len(session.messages):
         return {"ok": False, "error": f"Invalid message_index: {message_index}"}
     msg = session.messages[message_index]
@@ -114,14 +116,15 @@ def search_messages(query: str, limit: int = 20) -> list:
     results = []
     try:
         conn = _get_db()
-        rows = conn.execute(
-            "SELECT session_id, messages, updated_at FROM session_store ORDER BY updated_at DESC"
-        ).fetchall()
-        for sid, msgs_json, updated_at in rows:
+        from salmalm.core.session_store import load_session_messages
+
+        rows = conn.execute("SELECT session_id, updated_at FROM session_store ORDER BY updated_at DESC").fetchall()
+        for sid, updated_at in rows:
             try:
-                msgs = json.loads(msgs_json)
+                msgs = load_session_messages(conn, sid)
             except Exception as e:  # noqa: broad-except
                 log.debug(f"Suppressed: {e}")
+                continue
             for msg in msgs:
                 role = msg.get("role", "")
                 if role not in ("user", "assistant"):
@@ -742,6 +742,7 @@ If the answer is insufficient, improve it now. If satisfactory, return it as-is.
         self, session, user_message, model_override, on_tool, classification, tier, on_token=None, on_status=None
     ):
         """Execute loop."""
+        from salmalm.features.abort import abort_controller
         from salmalm.core.loop_helpers import (
             check_abort,
             select_model,
@@ -809,15 +810,33 @@ If the answer is insufficient, improve it now. If satisfactory, return it as-is.
                 "Never stop mid-sentence.]",
             }
             _msgs_with_budget = list(pruned_messages) + [_budget_hint]
-            result, _failover_warn = await self._call_with_failover(
-                _msgs_with_budget,
-                model=model,
-                tools=tools,
-                max_tokens=_dynamic_max_tokens,
-                thinking=think_this_call,
-                on_token=on_token,
-                on_status=on_status,
+            # Run as a task bound to the session: an abort cancels it, which
+            # closes the provider stream instead of waiting for it to finish.
+            _llm_call = asyncio.ensure_future(
+                self._call_with_failover(
+                    _msgs_with_budget,
+                    model=model,
+                    tools=tools,
+                    max_tokens=_dynamic_max_tokens,
+                    thinking=think_this_call,
+                    on_token=on_token,
+                    on_status=on_status,
+                )
             )
+            abort_controller.bind_task(_session_id, _llm_call)
+            try:
+                result, _failover_warn = await _llm_call
+            except asyncio.CancelledError:
+                _current = asyncio.current_task()
+                if (
+                    not _llm_call.cancelled()
+                    or not abort_controller.is_aborted(_session_id)
+                    or getattr(_current, "cancelling", lambda: 0)()
+                ):
+                    raise
+                continue  # abort check at the top of the loop returns the partial text
+            finally:
+                abort_controller.unbind_task(_session_id, _llm_call)
             result.pop("_failed", None)
             _record_api_call_time()
 
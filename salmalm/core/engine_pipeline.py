@@ -148,6 +148,12 @@ async def _process_message_guarded(
     else:
         _lock_acquired = True
 
+    # Keep the session resident while the turn runs: an evicted copy and
+    # its restored replacement would both append at the same log seq.
+    from salmalm.core.session_store import _sessions as _pin_cache
+
+    _pin_cache.pin(session_id)
+
     with _active_requests_lock:
         global _active_requests
         _active_requests += 1
@@ -181,6 +187,7 @@ async def _process_message_guarded(
         traceback.print_exc()
         return f"❌ Internal error / 내부 오류: {type(e).__name__}. Please try again."
     finally:
+        _pin_cache.unpin(session_id)
         with _active_requests_lock:
             _active_requests -= 1
             if _active_requests == 0:
@@ -250,6 +257,10 @@ def _prepare_context(session, user_message: str, lang, on_status) -> None:
     from salmalm.core.compaction import compact_messages
     from salmalm.core.prompt import build_system_prompt
 
+    # A restored session holds only its active window; code/analysis/search
+    # turns use the full history, so bring back the rest first.
+    session.hydrate()
+
     if lang and lang in ("en", "ko"):
         lang_directive = "Respond in English." if lang == "en" else "한국어로 응답하세요."
         lang_content = f"[Language: {lang_directive}]"
@@ -261,13 +272,20 @@ def _prepare_context(session, user_message: str, lang, on_status) -> None:
     if len(session.messages) % 20 == 0:
         session.add_system(build_system_prompt(full=False))
 
+    # One pooled retrieval per turn feeds both RAG injection and auto-recall
+    turn_hits = None
     try:
-        from salmalm.features.rag import inject_rag_context
+        from salmalm.core.retrieval_cache import RETRIEVAL_POOL
+        from salmalm.features.rag import inject_rag_context, rag_engine, rag_query_for
 
+        rag_query = rag_query_for(session.messages)
+        turn_hits = rag_engine.search(rag_query, max_results=RETRIEVAL_POOL) if rag_query else []
         for i, m in enumerate(session.messages):
             if m.get("role") == "system":
                 session.messages[i] = dict(m)
-                session.messages[i]["content"] = inject_rag_context(session.messages, m["content"], max_chars=1500)
+                session.messages[i]["content"] = inject_rag_context(
+                    session.messages, m["content"], max_chars=1500, results=turn_hits
+                )
                 break
     except Exception as e:
         log.warning(f"RAG injection skipped: {e}")
@@ -278,7 +296,7 @@ def _prepare_context(session, user_message: str, lang, on_status) -> None:
     try:
         from salmalm.core.memory import memory_manager
 
-        recall = memory_manager.auto_recall(user_message)
+        recall = memory_manager.auto_recall(user_message, results=turn_hits)
         if recall:
             # Strip stale recall messages from previous turns
             session.messages = [m for m in session.messages if not m.get("_recall")]
@@ -558,7 +576,7 @@ async def _process_message_inner(
             delta = event.get("delta", {})
             if isinstance(delta, dict) and delta.get("type") == "text_delta":
                 _abort_ctl.accumulate_token(session_id, delta.get("text", ""))
-            elif event.get("type") == "text" and event.get("text"):
+            elif event.get("type") in ("text", "text_delta") and event.get("text"):
                 _abort_ctl.accumulate_token(session_id, event["text"])
         if _orig_on_token:
             _orig_on_token(event)
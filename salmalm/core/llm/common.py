@@ -15,6 +15,7 @@ import urllib.request
 import os as _os
 
 from salmalm.constants import DEFAULT_MAX_TOKENS, FALLBACK_MODELS
+from salmalm.utils import http_pool
 
 # Models confirmed to use v1/responses endpoint (auto-populated on first 404).
 _RESPONSES_API_MODELS: set = set()
@@ -68,7 +69,7 @@ def _http_post(url: str, headers: Dict[str, str], body: dict, timeout: int = 120
         headers.setdefault("User-Agent", _UA)
         req = urllib.request.Request(url, data=data, headers=headers, method="POST")
         try:
-            with urllib.request.urlopen(req, timeout=timeout) as resp:
+            with http_pool.urlopen(req, timeout=timeout) as resp:
                 return json.loads(resp.read().decode("utf-8"))
         except urllib.error.HTTPError as e:
             err_body = e.read().decode("utf-8", errors="replace")
@@ -97,7 +98,7 @@ def _http_get(url: str, headers: Optional[Dict[str, str]] = None, timeout: int =
     h: Dict[str, str] = headers or {}
     h.setdefault("User-Agent", _UA)
     req = urllib.request.Request(url, headers=h)
-    with urllib.request.urlopen(req, timeout=timeout) as resp:
+    with http_pool.urlopen(req, timeout=timeout) as resp:
         return json.loads(resp.read().decode("utf-8"))  # type: ignore[no-any-return]
 
 
@@ -308,9 +309,11 @@ def call_llm(
         last_user = next((m["content"] for m in reversed(messages) if m["role"] == "user"), "")
         model = router.route(last_user, has_tools=bool(tools))
 
-    # Check cache (only for tool-free queries, scoped by last few messages)
-    if not tools:
-        cached = response_cache.get(model, messages)
+    # Check cache (only for tool-free queries). The key is taken before alias
+    # resolution and sanitizing so the store below lands on the same entry.
+    cache_key = None if tools else response_cache.key(model, messages, max_tokens=max_tokens)
+    if cache_key:
+        cached = response_cache.lookup(cache_key)
         if cached:
             return {
                 "content": cached,
@@ -394,8 +397,8 @@ def call_llm(
                 pass
         except Exception as e:
             log.warning(f"[COST] Usage tracking failed (ignored): {e}")
-        if not result.get("tool_calls") and result.get("content"):
-            response_cache.put(model, messages, result["content"])
+        if cache_key and not result.get("tool_calls") and result.get("content"):
+            response_cache.store(cache_key, result["content"])
         return result
     except Exception as e:
         with _metrics_lock:
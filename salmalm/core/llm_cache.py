@@ -0,0 +1,536 @@
+"""Two-tier cache for tool-free LLM responses.
+
+``call_llm`` asks this cache before paying for a tool-free completion.
+Cron jobs, briefings and repeated questions often send identical prompts.
+Entries live in an in-memory LRU tier, bounded by entry count and bytes,
+and in a SQLite table in ``cache.db`` (``CACHE_DB``, memory-mapped reads).
+The SQLite tier survives restarts and is bounded by
+``SALMALM_RESPONSE_CACHE_DISK_MB``. A disk hit is promoted back into memory.
+
+Keys are SHA-256 digests fed one message at a time, so the whole message
+history is never joined into a single string. Text is trimmed, runs of
+spaces inside a line are collapsed and dicts are key-sorted, so prompts
+that differ only in spacing or field order share an entry (*normalized*
+key). Line breaks and indentation are kept, and fenced code and ``code``
+intent requests are not normalized at all, so snippets that differ only in
+layout never collide. The raw form is hashed alongside it (*exact* key) so
+normalized-only hits can be told apart in stats.
+
+The TTL is ``CACHE_TTL`` (``SALMALM_CACHE_TTL``, read at store time) capped
+per intent: ``search`` answers go stale quickly, and ``system`` / ``memory``
+requests depend on local state so they are never cached. Override with
+``SALMALM_CACHE_TTL_<INTENT>``. ``SALMALM_RESPONSE_CACHE_DISK=0`` keeps the
+cache in memory only.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional
+
+from salmalm.db import get_connection
+
+log = logging.getLogger(__name__)
+
+RESPONSE_CACHE_SIZE = 100  # in-memory entries
+RESPONSE_CACHE_MEM_BYTES = int(float(os.environ.get("SALMALM_RESPONSE_CACHE_MEM_MB", "8")) * 1024 * 1024)
+RESPONSE_CACHE_DISK_BYTES = int(float(os.environ.get("SALMALM_RESPONSE_CACHE_DISK_MB", "64")) * 1024 * 1024)
+RESPONSE_CACHE_DISK_ENABLED = os.environ.get("SALMALM_RESPONSE_CACHE_DISK", "1") != "0"
+_EVICT_TO = 0.9  # disk eviction frees down to this share of the limit
+_MMAP_SIZE = 64 * 1024 * 1024
+
+# Upper bound on TTL (seconds) per classifier intent; 0 = never cached.
+INTENT_TTL: Dict[str, float] = {"search": 300, "system": 0, "memory": 0}
+for _intent in ("code", "analysis", "creative", "search", "system", "memory", "chat"):
+    _env = os.environ.get(f"SALMALM_CACHE_TTL_{_intent.upper()}")
+    if _env:
+        INTENT_TTL[_intent] = float(_env)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS response_cache (
+    key TEXT PRIMARY KEY,
+    exact TEXT NOT NULL,
+    model TEXT NOT NULL,
+    intent TEXT NOT NULL,
+    response TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    expires REAL NOT NULL,
+    last_hit REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_response_cache_last_hit ON response_cache(last_hit);
+"""
+
+
+_INNER_SPACE = re.compile(r"(?<=\S)[ \t]+")
+
+
+def normalize_text(text: str) -> str:
+    """Strip the ends and collapse runs of spaces within each line.
+
+    Newlines and leading indentation are kept; text containing a code fence
+    is only stripped.
+    """
+    text = text.strip()
+    if "```" in text:
+        return text
+    return "\n".join(_INNER_SPACE.sub(" ", line.rstrip()) for line in text.splitlines())
+
+
+def _normalize(obj):
+    if isinstance(obj, str):
+        return normalize_text(obj)
+    if isinstance(obj, dict):
+        return {k: _normalize(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_normalize(v) for v in obj]
+    return obj
+
+
+def _dumps(obj, sort_keys: bool) -> bytes:
+    return json.dumps(obj, sort_keys=sort_keys, ensure_ascii=False, separators=(",", ":"), default=str).encode()
+
+
+def _base_ttl() -> float:
+    from salmalm import constants
+
+    return float(constants.CACHE_TTL)
+
+
+def _intent_of(messages: list) -> str:
+    last_user = next((m.get("content") for m in reversed(messages) if m.get("role") == "user"), "")
+    if not isinstance(last_user, str):
+        last_user = " ".join(
+            b.get("text", "") for b in last_user or [] if isinstance(b, dict) and b.get("type") == "text"
+        )
+    try:
+        from salmalm.core.classifier import classify_task
+
+        return classify_task(last_user)["intent"]  # type: ignore[no-any-return]
+    except Exception:
+        return "chat"
+
+
+class CacheKey(NamedTuple):
+    key: str  # normalized digest: the lookup key
+    exact: str  # digest of the request as sent
+    model: str
+    intent: str
+
+
+class ResponseCache:
+    """Thread-safe LRU (memory) + SQLite (disk) cache of LLM responses."""
+
+    def __init__(
+        self,
+        max_size: int = RESPONSE_CACHE_SIZE,
+        ttl: Optional[float] = None,
+        max_bytes: int = RESPONSE_CACHE_MEM_BYTES,
+        db_path=None,
+        disk_max_bytes: int = RESPONSE_CACHE_DISK_BYTES,
+    ) -> None:
+        """*ttl* ``None`` follows ``CACHE_TTL``; *db_path* ``None`` keeps it in memory only."""
+        self._mem: OrderedDict = OrderedDict()  # key -> (expires, response, size, exact, model, intent, created)
+        self._lock = threading.Lock()
+        self._max_size = max_size
+        self._max_bytes = max_bytes
+        self._ttl = ttl
+        self._mem_bytes = 0
+        self._db_path = str(db_path) if db_path else None
+        self._disk_max_bytes = disk_max_bytes
+        self._disk_lock = threading.Lock()  # serializes disk writes and the byte count
+        self._disk_bytes: Optional[int] = None  # None until the schema is ready
+        self.hits = {"memory": 0, "disk": 0}
+        self.misses = 0
+        self.normalized_hits = 0  # hits whose exact request differed
+        self.bytes_saved = 0
+        self.evictions = {"memory": 0, "disk": 0}
+
+    # ── keys ──
+
+    def key(
+        self,
+        model: str,
+        messages: list,
+        session_id: str = "",
+        system_prompt: str = "",
+        tools: list | None = None,
+        temperature: float | None = None,
+        max_tokens: int | None = None,
+        intent: Optional[str] = None,
+    ) -> CacheKey:
+        """Hash the request incrementally into normalized and exact digests."""
+        head: dict = {"s": session_id, "m": model}
+        if system_prompt:
+            head["sp"] = system_prompt
+        if tools:
+            head["tools"] = sorted(tools, key=lambda t: str(t.get("name", "")) if isinstance(t, dict) else str(t))
+        if temperature is not None:
+            head["temp"] = temperature
+        if max_tokens is not None:
+            head["mt"] = max_tokens
+        intent = intent or _intent_of(messages)
+        # Code is whitespace-sensitive: only field order is normalized
+        norm_fn = (lambda obj: obj) if intent == "code" else _normalize
+        norm, exact = hashlib.sha256(), hashlib.sha256()
+        norm.update(_dumps(norm_fn(head), True))
+        exact.update(_dumps(head, False))
+        for msg in messages:
+            norm.update(b"\x1e")
+            norm.update(_dumps(norm_fn(msg), True))
+            exact.update(b"\x1e")
+            exact.update(_dumps(msg, False))
+        return CacheKey(norm.hexdigest(), exact.hexdigest(), model, intent)
+
+    def ttl_for(self, intent: str) -> float:
+        """Effective TTL for *intent*: the base TTL capped by :data:`INTENT_TTL`."""
+        base = _base_ttl() if self._ttl is None else self._ttl
+        cap = INTENT_TTL.get(intent)
+        return base if cap is None else min(base, cap)
+
+    # ── lookup / store ──
+
+    def lookup(self, ck: CacheKey) -> Optional[str]:
+        """Return the cached response for *ck*, or None if missing/expired."""
+        now = time.time()
+        with self._lock:
+            entry = self._mem.get(ck.key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._mem.move_to_end(ck.key)
+                    self._hit("memory", entry[1], entry[2], entry[3] != ck.exact)
+                    return entry[1]  # type: ignore[no-any-return]
+                self._drop(ck.key)
+        row = self._disk_get(ck.key, now)
+        if row is not None:
+            response, exact, created, expires = row
+            size = len(response.encode())
+            with self._lock:
+                self._mem_put(ck.key, (expires, response, size, exact, ck.model, ck.intent, created))
+                self._hit("disk", response, size, exact != ck.exact)
+            return response  # type: ignore[no-any-return]
+        with self._lock:
+            self.misses += 1
+        self._count("miss")
+        return None
+
+    def store(self, ck: CacheKey, response: str) -> None:
+        """Cache *response* under *ck* in both tiers, honoring the intent TTL."""
+        ttl = self.ttl_for(ck.intent)
+        if ttl <= 0 or not response:
+            return
+        now = time.time()
+        size = len(response.encode())
+        with self._lock:
+            self._mem_put(ck.key, (now + ttl, response, size, ck.exact, ck.model, ck.intent, now))
+        self._disk_put(ck, response, size, now, now + ttl)
+
+    def get(
+        self,
+        model: str,
+        messages: list,
+        session_id: str = "",
+        system_prompt: str = "",
+        tools: list | None = None,
+        temperature: float | None = None,
+        max_tokens: int | None = None,
+    ) -> Optional[str]:
+        """Get a cached response, or None if expired/missing."""
+        return self.lookup(self.key(model, messages, session_id, system_prompt, tools, temperature, max_tokens))
+
+    def put(
+        self,
+        model: str,
+        messages: list,
+        response: str,
+        session_id: str = "",
+        system_prompt: str = "",
+        tools: list | None = None,
+        temperature: float | None = None,
+        max_tokens: int | None = None,
+    ) -> None:
+        """Store a response in the cache."""
+        self.store(self.key(model, messages, session_id, system_prompt, tools, temperature, max_tokens), response)
+
+    # ── admin ──
+
+    def stats(self) -> dict:
+        """Hit/miss counters and tier sizes."""
+        disk_entries = 0
+        conn = self._conn()
+        if conn is not None:
+            try:
+                disk_entries = conn.execute("SELECT COUNT(*) FROM response_cache").fetchone()[0]
+            except sqlite3.Error as e:
+                log.debug(f"[CACHE] stats: {e}")
+            finally:
+                conn.close()
+        with self._lock:
+            lookups = sum(self.hits.values()) + self.misses
+            return {
+                "hits": dict(self.hits),
+                "misses": self.misses,
+                "normalized_hits": self.normalized_hits,
+                "hit_rate": round(sum(self.hits.values()) / lookups, 4) if lookups else 0.0,
+                "bytes_saved": self.bytes_saved,
+                "evictions": dict(self.evictions),
+                "memory": {"entries": len(self._mem), "bytes": self._mem_bytes, "max_bytes": self._max_bytes},
+                "disk": {
+                    "enabled": self._db_path is not None,
+                    "entries": disk_entries,
+                    "bytes": self._disk_bytes or 0,
+                    "max_bytes": self._disk_max_bytes,
+                },
+            }
+
+    def inspect(self, limit: int = 50) -> List[dict]:
+        """Most recently used entries across both tiers, without response bodies."""
+        now = time.time()
+        seen: Dict[str, dict] = {}
+        with self._lock:
+            for k, (expires, response, size, _exact, model, intent, created) in reversed(self._mem.items()):
+                if len(seen) >= limit:
+                    break
+                seen[k] = {
+                    "key": k[:16],
+                    "tier": "memory",
+                    "model": model,
+                    "intent": intent,
+                    "bytes": size,
+                    "age": round(now - created, 1),
+                    "expires_in": round(expires - now, 1),
+                    "preview": response[:80],
+                }
+        conn = self._conn()
+        if conn is not None:
+            try:
+                rows = conn.execute(
+                    "SELECT key, model, intent, size, created, expires, hits, substr(response, 1, 80)"
+                    " FROM response_cache ORDER BY last_hit DESC LIMIT ?",
+                    (limit,),
+                ).fetchall()
+                for k, model, intent, size, created, expires, hits, preview in rows:
+                    if k in seen:
+                        seen[k]["tier"] = "memory+disk"
+                        seen[k]["disk_hits"] = hits
+                    elif len(seen) < limit:
+                        seen[k] = {
+                            "key": k[:16],
+                            "tier": "disk",
+                            "model": model,
+                            "intent": intent,
+                            "bytes": size,
+                            "age": round(now - created, 1),
+                            "expires_in": round(expires - now, 1),
+                            "disk_hits": hits,
+                            "preview": preview,
+                        }
+            except sqlite3.Error as e:
+                log.debug(f"[CACHE] inspect: {e}")
+            finally:
+                conn.close()
+        return list(seen.values())
+
+    def purge(self, model: Optional[str] = None, intent: Optional[str] = None, expired_only: bool = False) -> int:
+        """Remove matching entries from both tiers; returns how many were removed."""
+        now = time.time()
+
+        def _match(expires, m, i) -> bool:
+            return (
+                (not expired_only or expires <= now)
+                and (model is None or m == model)
+                and (intent is None or i == intent)
+            )
+
+        with self._lock:
+            doomed = [k for k, e in self._mem.items() if _match(e[0], e[4], e[5])]
+            for k in doomed:
+                self._drop(k)
+        removed = len(doomed)
+        conn = self._conn()
+        if conn is not None:
+            clauses, args = [], []  # type: ignore[var-annotated]
+            if expired_only:
+                clauses.append("expires <= ?")
+                args.append(now)
+            if model is not None:
+                clauses.append("model = ?")
+                args.append(model)
+            if intent is not None:
+                clauses.append("intent = ?")
+                args.append(intent)
+            where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+            try:
+                with self._disk_lock:
+                    keys = {r[0] for r in conn.execute(f"SELECT key FROM response_cache{where}", args)}
+                    conn.execute(f"DELETE FROM response_cache{where}", args)
+                    conn.commit()
+                    self._disk_bytes = self._disk_size(conn)
+                removed += len(keys - set(doomed))
+            except sqlite3.Error as e:
+                log.warning(f"[CACHE] purge failed: {e}")
+            finally:
+                conn.close()
+        self._gauges()
+        return removed
+
+    def clear(self) -> None:
+        """Clear both tiers."""
+        self.purge()
+
+    # ── memory tier (call with self._lock held) ──
+
+    def _mem_put(self, key: str, entry: tuple) -> None:
+        if key in self._mem:
+            self._drop(key)
+        if entry[2] > self._max_bytes:
+            return
+        self._mem[key] = entry
+        self._mem_bytes += entry[2]
+        while len(self._mem) > self._max_size or self._mem_bytes > self._max_bytes:
+            self._drop(next(iter(self._mem)))
+            self.evictions["memory"] += 1
+            self._count_eviction("memory")
+
+    def _drop(self, key: str) -> None:
+        entry = self._mem.pop(key, None)
+        if entry is not None:
+            self._mem_bytes -= entry[2]
+
+    def _hit(self, tier: str, response: str, size: int, normalized: bool) -> None:
+        self.hits[tier] += 1
+        self.bytes_saved += size
+        if normalized:
+            self.normalized_hits += 1
+        self._count(tier, size)
+        log.info(f"[COST] Cache hit ({tier}) -- saved API call")
+
+    # ── disk tier ──
+
+    def _conn(self) -> Optional[sqlite3.Connection]:
+        """Pooled connection with the schema in place, or None if the disk tier is off."""
+        if self._db_path is None:
+            return None
+        try:
+            conn = get_connection(self._db_path)
+        except sqlite3.Error as e:
+            log.warning(f"[CACHE] disk tier disabled: {e}")
+            self._db_path = None
+            return None
+        try:
+            conn.execute(f"PRAGMA mmap_size={_MMAP_SIZE}")
+            if self._disk_bytes is None:
+                with self._disk_lock:
+                    if self._disk_bytes is None:
+                        conn.executescript(_SCHEMA)
+                        self._disk_bytes = self._disk_size(conn)
+        except sqlite3.Error as e:
+            log.warning(f"[CACHE] disk tier disabled: {e}")
+            conn.close()
+            self._db_path = None
+            return None
+        return conn
+
+    @staticmethod
+    def _disk_size(conn) -> int:
+        return conn.execute("SELECT COALESCE(SUM(size), 0) FROM response_cache").fetchone()[0]  # type: ignore[no-any-return]
+
+    def _disk_get(self, key: str, now: float) -> Optional[tuple]:
+        conn = self._conn()
+        if conn is None:
+            return None
+        try:
+            row = conn.execute(
+                "SELECT response, exact, created, expires FROM response_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[3] <= now:
+                return None
+            conn.execute("UPDATE response_cache SET last_hit = ?, hits = hits + 1 WHERE key = ?", (now, key))
+            conn.commit()
+            return tuple(row)
+        except sqlite3.Error as e:
+            log.debug(f"[CACHE] disk read failed: {e}")
+            return None
+        finally:
+            conn.close()
+
+    def _disk_put(self, ck: CacheKey, response: str, size: int, now: float, expires: float) -> None:
+        conn = self._conn()
+        if conn is None:
+            return
+        try:
+            with self._disk_lock:
+                old = conn.execute("SELECT size FROM response_cache WHERE key = ?", (ck.key,)).fetchone()
+                conn.execute(
+                    "INSERT OR REPLACE INTO response_cache"
+                    " (key, exact, model, intent, response, size, created, expires, last_hit, hits)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 0)",
+                    (ck.key, ck.exact, ck.model, ck.intent, response, size, now, expires, now),
+                )
+                self._disk_bytes = (self._disk_bytes or 0) + size - (old[0] if old else 0)
+                if self._disk_bytes > self._disk_max_bytes:
+                    self._disk_evict(conn, now)
+                conn.commit()
+        except sqlite3.Error as e:
+            log.debug(f"[CACHE] disk write failed: {e}")
+        finally:
+            conn.close()
+        self._gauges()
+
+    def _disk_evict(self, conn, now: float) -> None:
+        """Drop expired rows, then least recently hit ones, down to ``_EVICT_TO`` of the limit."""
+        n = conn.execute("DELETE FROM response_cache WHERE expires <= ?", (now,)).rowcount
+        total = self._disk_size(conn)
+        target = int(self._disk_max_bytes * _EVICT_TO)
+        doomed = []
+        if total > target:
+            for k, size in conn.execute("SELECT key, size FROM response_cache ORDER BY last_hit"):
+                doomed.append((k,))
+                total -= size
+                if total <= target:
+                    break
+            conn.executemany("DELETE FROM response_cache WHERE key = ?", doomed)
+        self._disk_bytes = total
+        self.evictions["disk"] += n + len(doomed)
+        self._count_eviction("disk", n + len(doomed))
+
+    # ── metrics ──
+
+    def _count(self, result: str, saved: int = 0) -> None:
+        try:
+            from salmalm.monitoring.metrics import response_cache_bytes_saved, response_cache_lookups
+
+            response_cache_lookups.inc(result=result)
+            if saved:
+                response_cache_bytes_saved.inc(saved)
+        except Exception:
+            pass
+        self._gauges()
+
+    def _count_eviction(self, tier: str, n: int = 1) -> None:
+        try:
+            from salmalm.monitoring.metrics import response_cache_evictions
+
+            if n:
+                response_cache_evictions.inc(n, tier=tier)
+        except Exception:
+            pass
+
+    def _gauges(self) -> None:
+        try:
+            from salmalm.monitoring.metrics import response_cache_bytes
+
+            response_cache_bytes.set(self._mem_bytes, tier="memory")
+            if self._db_path is not None:
+                response_cache_bytes.set(self._disk_bytes or 0, tier="disk")
+        except Exception:
+            pass
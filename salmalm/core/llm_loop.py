@@ -15,9 +15,9 @@ from typing import Any, Callable, Dict, Optional, Tuple
 from salmalm.security.crypto import log
 from salmalm.core.llm import (
     call_llm as _call_llm_sync,
-    stream_anthropic as _stream_anthropic,
-    stream_google as _stream_google,
-    stream_openai as _stream_openai,
+    astream_anthropic as _astream_anthropic,
+    astream_google as _astream_google,
+    astream_openai as _astream_openai,
 )
 
 # ============================================================
@@ -232,49 +232,46 @@ async def _call_llm_async(*args, **kwargs):
 async def _call_google_streaming(messages: list, model=None, tools=None, max_tokens=4096, on_token=None) -> dict:
     """Streaming Google Gemini call — yields tokens via on_token callback, returns final result.
 
-    Handles streaming interruptions gracefully — preserves partial content.
+    Runs on the event loop (on_token is called there too). Handles streaming
+    interruptions gracefully — preserves partial content.
     """
-
-    def _run() -> dict:
-        """Run."""
-        final_result = None
-        accumulated_text = []
-        try:
-            for event in _stream_google(messages, model=model, tools=tools, max_tokens=max_tokens):
-                if on_token:
-                    on_token(event)
-                if event.get("type") == "content_block_delta":
-                    delta = event.get("delta", {})
-                    if delta.get("type") == "text_delta":
-                        accumulated_text.append(delta.get("text", ""))
-                if event.get("type") == "message_end":
-                    final_result = event
-                elif event.get("type") == "error":
-                    return {
-                        "content": event.get("error", "❌ Google streaming error"),
-                        "tool_calls": [],
-                        "usage": {"input": 0, "output": 0},
-                        "model": model or "?",
-                    }
-        except Exception as e:
-            partial = "".join(accumulated_text)
-            if partial:
-                log.warning(f"[STREAM] Google streaming interrupted with {len(partial)} chars: {e}")
+    final_result = None
+    accumulated_text = []
+    stream = _astream_google(messages, model=model, tools=tools, max_tokens=max_tokens)
+    try:
+        async for event in stream:
+            if on_token:
+                on_token(event)
+            if event.get("type") == "text_delta":
+                accumulated_text.append(event.get("text", ""))
+            if event.get("type") == "message_end":
+                final_result = event
+            elif event.get("type") == "error":
                 return {
-                    "content": partial + "\n\n⚠️ [Streaming interrupted]",
+                    "content": event.get("error", "❌ Google streaming error"),
                     "tool_calls": [],
                     "usage": {"input": 0, "output": 0},
                     "model": model or "?",
                 }
-            raise
-        return final_result or {
-            "content": "".join(accumulated_text) if accumulated_text else "",
-            "tool_calls": [],
-            "usage": {"input": 0, "output": 0},
-            "model": model or "?",
-        }
-
-    return await asyncio.to_thread(_run)
+    except Exception as e:
+        partial = "".join(accumulated_text)
+        if partial:
+            log.warning(f"[STREAM] Google streaming interrupted with {len(partial)} chars: {e}")
+            return {
+                "content": partial + "\n\n⚠️ [Streaming interrupted]",
+                "tool_calls": [],
+                "usage": {"input": 0, "output": 0},
+                "model": model or "?",
+            }
+        raise
+    finally:
+        await stream.aclose()  # early return/break: release the provider connection now
+    return final_result or {
+        "content": "".join(accumulated_text) if accumulated_text else "",
+        "tool_calls": [],
+        "usage": {"input": 0, "output": 0},
+        "model": model or "?",
+    }
 
 
 async def _call_llm_streaming(
@@ -282,69 +279,62 @@ async def _call_llm_streaming(
 ) -> dict:
     """Streaming LLM call — yields tokens via on_token callback, returns final result.
 
-    on_token: callback(event_dict) called for each streaming event.
+    on_token: callback(event_dict) called on the event loop for each streaming event.
     Returns the same dict format as call_llm.
     Handles streaming interruptions gracefully — preserves partial content.
+    Cancelling the calling task closes the provider connection.
     """
+    import os as _os
 
-    def _run() -> dict:
-        """Run."""
-        import os as _os
-
-        _early_stop = _os.environ.get("SALMALM_EARLY_STOP", "0") == "1"
-        final_result = None
-        accumulated_text = []
-        _has_tool_calls = False
-        try:
-            for event in _stream_anthropic(
-                messages, model=model, tools=tools, max_tokens=max_tokens, thinking=thinking
-            ):
-                if on_token:
-                    on_token(event)
-                # Track text deltas for recovery
-                if event.get("type") == "content_block_delta":
-                    delta = event.get("delta", {})
-                    if delta.get("type") == "text_delta":
-                        accumulated_text.append(delta.get("text", ""))
-                if event.get("type") == "content_block_start":
-                    cb = event.get("content_block", {})
-                    if cb.get("type") == "tool_use":
-                        _has_tool_calls = True
-                # Early stop: if text-only response looks complete, break
-                if _early_stop and not _has_tool_calls and not tools and len(accumulated_text) > 5:
-                    tail = "".join(accumulated_text[-3:]).rstrip()
-                    if tail.endswith((".", "!", "?", "。", "！", "？", "```")) and len("".join(accumulated_text)) > 200:
-                        log.info("[EARLY_STOP] Response looks complete, stopping stream")
-                        break
-                if event.get("type") == "message_end":
-                    final_result = event
-                elif event.get("type") == "error":
-                    return {
-                        "content": event.get("error", "❌ Streaming error"),
-                        "tool_calls": [],
-                        "usage": {"input": 0, "output": 0},
-                        "model": model or "?",
-                    }
-        except Exception as e:
-            # Streaming interrupted — return partial content if available
-            partial = "".join(accumulated_text)
-            if partial:
-                log.warning(f"[STREAM] Interrupted with {len(partial)} chars partial: {e}")
+    _early_stop = _os.environ.get("SALMALM_EARLY_STOP", "0") == "1"
+    final_result = None
+    accumulated_text = []
+    _has_tool_calls = False
+    stream = _astream_anthropic(messages, model=model, tools=tools, max_tokens=max_tokens, thinking=thinking)
+    try:
+        async for event in stream:
+            if on_token:
+                on_token(event)
+            # Track text deltas for recovery
+            if event.get("type") == "text_delta":
+                accumulated_text.append(event.get("text", ""))
+            if event.get("type") == "tool_use_start":
+                _has_tool_calls = True
+            # Early stop: if text-only response looks complete, break
+            if _early_stop and not _has_tool_calls and not tools and len(accumulated_text) > 5:
+                tail = "".join(accumulated_text[-3:]).rstrip()
+                if tail.endswith((".", "!", "?", "。", "！", "？", "```")) and len("".join(accumulated_text)) > 200:
+                    log.info("[EARLY_STOP] Response looks complete, stopping stream")
+                    break
+            if event.get("type") == "message_end":
+                final_result = event
+            elif event.get("type") == "error":
                 return {
-                    "content": partial + "\n\n⚠️ [Streaming interrupted]",
+                    "content": event.get("error", "❌ Streaming error"),
                     "tool_calls": [],
                     "usage": {"input": 0, "output": 0},
                     "model": model or "?",
                 }
-            raise
-        return final_result or {
-            "content": "".join(accumulated_text) if accumulated_text else "",
-            "tool_calls": [],
-            "usage": {"input": 0, "output": 0},
-            "model": model or "?",
-        }
-
-    return await asyncio.to_thread(_run)
+    except Exception as e:
+        # Streaming interrupted — return partial content if available
+        partial = "".join(accumulated_text)
+        if partial:
+            log.warning(f"[STREAM] Interrupted with {len(partial)} chars partial: {e}")
+            return {
+                "content": partial + "\n\n⚠️ [Streaming interrupted]",
+                "tool_calls": [],
+                "usage": {"input": 0, "output": 0},
+                "model": model or "?",
+            }
+        raise
+    finally:
+        await stream.aclose()  # early return/break: release the provider connection now
+    return final_result or {
+        "content": "".join(accumulated_text) if accumulated_text else "",
+        "tool_calls": [],
+        "usage": {"input": 0, "output": 0},
+        "model": model or "?",
+    }
 
 
 async def _call_openai_streaming(messages: list, model=None, tools=None, max_tokens=4096, on_token=None) -> dict:
@@ -352,50 +342,50 @@ async def _call_openai_streaming(messages: list, model=None, tools=None, max_tok
 
     Supports: openai, xai, deepseek, openrouter, meta-llama, mistralai, qwen, ollama.
     """
-    def _run() -> dict:
-        accumulated_text = []
-        tool_calls_out = []
-        final_result = None
-        try:
-            for event in _stream_openai(messages, model=model, tools=tools, max_tokens=max_tokens):
-                if on_token:
-                    on_token(event)
-                if event.get("type") == "text_delta":
-                    accumulated_text.append(event.get("text", ""))
-                elif event.get("type") == "tool_use_end":
-                    tool_calls_out.append({
-                        "id": event["id"],
-                        "name": event["name"],
-                        "arguments": event["arguments"],
-                    })
-                elif event.get("type") == "message_end":
-                    final_result = event
-                elif event.get("type") == "error":
-                    return {
-                        "content": event.get("error", "❌ OpenAI streaming error"),
-                        "tool_calls": [],
-                        "usage": {"input": 0, "output": 0},
-                        "model": model or "?",
-                    }
-        except Exception as e:
-            partial = "".join(accumulated_text)
-            if partial:
-                log.warning(f"[STREAM] OpenAI interrupted with {len(partial)} chars partial: {e}")
+    accumulated_text = []
+    tool_calls_out = []
+    final_result = None
+    stream = _astream_openai(messages, model=model, tools=tools, max_tokens=max_tokens)
+    try:
+        async for event in stream:
+            if on_token:
+                on_token(event)
+            if event.get("type") == "text_delta":
+                accumulated_text.append(event.get("text", ""))
+            elif event.get("type") == "tool_use_end":
+                tool_calls_out.append({
+                    "id": event["id"],
+                    "name": event["name"],
+                    "arguments": event["arguments"],
+                })
+            elif event.get("type") == "message_end":
+                final_result = event
+            elif event.get("type") == "error":
                 return {
-                    "content": partial + "\n\n⚠️ [Streaming interrupted]",
+                    "content": event.get("error", "❌ OpenAI streaming error"),
                     "tool_calls": [],
                     "usage": {"input": 0, "output": 0},
                     "model": model or "?",
                 }
-            raise
-        return final_result or {
-            "content": "".join(accumulated_text),
-            "tool_calls": tool_calls_out,
-            "usage": {"input": 0, "output": 0},
-            "model": model or "?",
-        }
-
-    return await asyncio.to_thread(_run)
+    except Exception as e:
+        partial = "".join(accumulated_text)
+        if partial:
+            log.warning(f"[STREAM] OpenAI interrupted with {len(partial)} chars partial: {e}")
+            return {
+                "content": partial + "\n\n⚠️ [Streaming interrupted]",
+                "tool_calls": [],
+                "usage": {"input": 0, "output": 0},
+                "model": model or "?",
+            }
+        raise
+    finally:
+        await stream.aclose()  # early return/break: release the provider connection now
+    return final_result or {
+        "content": "".join(accumulated_text),
+        "tool_calls": tool_calls_out,
+        "usage": {"input": 0, "output": 0},
+        "model": model or "?",
+    }
 
 
 # OpenAI-compatible providers that support our streaming implementation
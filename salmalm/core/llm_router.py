@@ -19,6 +19,8 @@ import urllib.parse
 import urllib.request
 from typing import Any, Dict, List, Optional, Tuple
 
+from salmalm.utils import http_pool
+
 log = logging.getLogger(__name__)
 
 # ---------------------------------------------------------------------------
@@ -741,7 +743,7 @@ class LLMRouter:
         data = json.dumps(body).encode()
         req = urllib.request.Request(url, data=data, headers=headers, method="POST")
         try:
-            with urllib.request.urlopen(req, timeout=timeout) as resp:
+            with http_pool.urlopen(req, timeout=timeout) as resp:
                 result = json.loads(resp.read().decode())
         except Exception as _e:
             # Mask API keys in exception context — tracebacks must not leak secrets
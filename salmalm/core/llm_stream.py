@@ -1,16 +1,143 @@
-"""LLM streaming response handlers."""
-
+"""LLM streaming response handlers.
+
+Each provider has a synchronous generator (``stream_*``, urllib over the
+keep-alive pool) and an async generator (``astream_*``, on
+:class:`~salmalm.utils.async_http.AsyncHTTPClient`) that yield the same
+events. Both share the request builders (``_*_request``) and per-event
+parsers, so only the transport differs. The async variants hold no thread
+while the provider is generating, and cancelling the consuming task closes
+the socket immediately. ``AsyncHTTPClient`` connects directly, so when the
+provider is reached through a proxy (``HTTPS_PROXY``/``HTTP_PROXY``) the
+async variants run the sync generator on worker threads instead.
+"""
+
+import asyncio
 import json
 import logging
 import time
+import urllib.error
+import urllib.parse
 import urllib.request
-from typing import Any, Dict, Generator, List, Optional
+from typing import Any, AsyncGenerator, Dict, Generator, Iterator, List, NamedTuple, Optional, Union
 
 log = logging.getLogger(__name__)
 
 from salmalm.core.core import CostCapExceeded, check_cost_cap, router  # noqa: E402
 
 from salmalm.constants import DEFAULT_MAX_TOKENS  # noqa: E402
+from salmalm.utils import http_pool  # noqa: E402
+from salmalm.utils.async_http import AsyncHTTPClient  # noqa: E402
+
+_aclient = AsyncHTTPClient(default_timeout=180)
+
+
+class _StreamRequest(NamedTuple):
+    """A prepared provider streaming request."""
+
+    provider: str
+    model: str
+    url: str
+    headers: Dict[str, str]
+    data: bytes
+    timeout: float
+
+
+def _urlopen(req: _StreamRequest):
+    """Open *req* synchronously over the keep-alive pool."""
+    return http_pool.urlopen(
+        urllib.request.Request(req.url, data=req.data, headers=req.headers, method="POST"), timeout=req.timeout
+    )
+
+
+async def _apost(req: _StreamRequest):
+    """Send *req* on the shared async client; returns the response once headers arrive."""
+    return await _aclient.request("POST", req.url, headers=req.headers, body=req.data, timeout=req.timeout)
+
+
+def _proxied(req: _StreamRequest) -> bool:
+    """True if *req* must go through a configured proxy (not supported by ``_aclient``)."""
+    parts = urllib.parse.urlsplit(req.url)
+    return http_pool._via_proxy(parts.scheme, parts.hostname or "")
+
+
+async def _athreaded(gen: Generator[Dict[str, Any], None, None]) -> AsyncGenerator[Dict[str, Any], None]:
+    """Yield the events of the sync generator *gen*, advancing it on worker threads."""
+    done = object()
+    try:
+        while True:
+            event = await asyncio.to_thread(next, gen, done)
+            if event is done:
+                return
+            yield event
+    finally:
+        try:
+            gen.close()
+        except ValueError:
+            pass  # still running in the worker (cancelled mid-step); it ends with the response
+
+
+class _SSEParser:
+    """Incremental bytes-level SSE parser: feed raw chunks, get ``data:`` payloads back.
+
+    Lines are cut from a bytearray with a moving offset and only the
+    unterminated tail is kept between feeds, so parsing is linear in the
+    stream size. Payloads are decoded per complete line, which never splits
+    a multibyte character.
+    """
+
+    __slots__ = ("_buf",)
+
+    def __init__(self) -> None:
+        self._buf = bytearray()
+
+    def feed(self, data: bytes) -> List[str]:
+        """Append *data*; return the payloads of all complete ``data:`` lines."""
+        buf = self._buf
+        scan = len(buf)  # the kept tail holds no newline
+        buf += data
+        payloads = []
+        pos = 0
+        nl = buf.find(b"\n", scan)
+        while nl != -1:
+            if buf.startswith(b"data:", pos):
+                start = pos + 5
+                if start < nl and buf[start] == 0x20:
+                    start += 1
+                end = nl - 1 if nl > start and buf[nl - 1] == 0x0D else nl
+                payloads.append(buf[start:end].decode("utf-8", "replace"))
+            pos = nl + 1
+            nl = buf.find(b"\n", pos)
+        if pos:
+            del buf[:pos]
+        return payloads
+
+
+def _payloads(resp, chunk_size: int = 4096) -> Generator[str, None, None]:
+    """SSE ``data:`` payloads of a synchronous response."""
+    sse = _SSEParser()
+    while True:
+        chunk = resp.read(chunk_size)
+        if not chunk:
+            break
+        yield from sse.feed(chunk)
+
+
+async def _apayloads(resp) -> AsyncGenerator[str, None]:
+    """SSE ``data:`` payloads of an :class:`AsyncHTTPResponse`."""
+    sse = _SSEParser()
+    async for chunk in resp.iter_chunks():
+        for payload in sse.feed(chunk):
+            yield payload
+
+
+def _sse_json(payload: str) -> Optional[dict]:
+    """Decode one payload; ``None`` for ``[DONE]`` and malformed JSON."""
+    if payload.strip() == "[DONE]":
+        return None
+    try:
+        return json.loads(payload)
+    except json.JSONDecodeError:
+        return None
 
 
 def _lazy_track_usage(model, inp, out):
@@ -44,21 +171,10 @@ def _lazy_build_gemini_tools(tools):
     return _build_gemini_tools(tools)  # noqa: E402
 
 
-def stream_google(
-    messages: List[Dict[str, Any]],
-    model: Optional[str] = None,
-    tools: Optional[List[dict]] = None,
-    max_tokens: int = DEFAULT_MAX_TOKENS,
-) -> Generator[Dict[str, Any], None, None]:
-    """Stream Google Gemini API responses using streamGenerateContent SSE.
-
-    Yields events compatible with the Anthropic streaming interface:
-        {'type': 'text_delta', 'text': '...'}
-        {'type': 'tool_use_start', 'id': '...', 'name': '...'}
-        {'type': 'tool_use_end', 'id': '...', 'name': '...', 'arguments': {...}}
-        {'type': 'message_end', 'content': '...', 'tool_calls': [...], 'usage': {...}, 'model': '...'}
-        {'type': 'error', 'error': '...'}
-    """
+def _google_request(
+    messages: List[Dict[str, Any]], model: Optional[str], tools: Optional[List[dict]], max_tokens: int
+) -> Union[_StreamRequest, Dict[str, Any]]:
+    """Build the streamGenerateContent request, or return an error event."""
     if not model:
         from salmalm.constants import MODEL_GEMINI_FLASH
 
@@ -69,13 +185,11 @@ def stream_google(
     try:
         check_cost_cap()
     except CostCapExceeded as e:
-        yield {"type": "error", "error": str(e)}
-        return
+        return {"type": "error", "error": str(e)}
 
     api_key = vault.get("google_api_key") or vault.get("gemini_api_key")
     if not api_key:
-        yield {"type": "error", "error": "❌ Google API key not configured. Set GOOGLE_API_KEY or GEMINI_API_KEY."}
-        return
+        return {"type": "error", "error": "❌ Google API key not configured. Set GOOGLE_API_KEY or GEMINI_API_KEY."}
 
     from salmalm.core.llm import _build_gemini_contents
 
@@ -91,73 +205,88 @@ def stream_google(
     data = json.dumps(body).encode("utf-8")
     # NOTE: Google REST API requires the key as a query param — there is no
     # header-based auth alternative for this endpoint. Ensure the URL is never
-    # logged in full; use the masked form for any debug output.
+    # logged in full; mask it (url.split("&key=")[0]) for any debug output.
     url = (
         f"https://generativelanguage.googleapis.com/v1beta/models/"
         f"{model_id}:streamGenerateContent?alt=sse&key={api_key}"
     )
-    _url_safe = url.split("&key=")[0] + "&key=***"  # mask for logs
     headers = {"Content-Type": "application/json", "User-Agent": _UA}
-    req = urllib.request.Request(url, data=data, headers=headers, method="POST")
+    return _StreamRequest(provider, model, url, headers, data, 180)
+
 
-    content_text = ""
-    tool_calls: List[dict] = []
-    usage = {"input": 0, "output": 0}
+def _google_events(event: dict, state: dict) -> Iterator[Dict[str, Any]]:
+    """UI events for one Gemini SSE event; updates *state* (content, tool_calls, usage)."""
+    for cand in event.get("candidates", []):
+        for part in cand.get("content", {}).get("parts", []):
+            if "text" in part:
+                text = part["text"]
+                state["content"].append(text)
+                yield {"type": "text_delta", "text": text}
+            elif "functionCall" in part:
+                fc = part["functionCall"]
+                tc_id = f"google_{fc['name']}_{int(time.time() * 1000)}"
+                args = fc.get("args", {})
+                state["tool_calls"].append(
+                    {
+                        "id": tc_id,
+                        "name": fc["name"],
+                        "arguments": args,
+                    }
+                )
+                yield {"type": "tool_use_start", "id": tc_id, "name": fc["name"]}
+                yield {"type": "tool_use_end", "id": tc_id, "name": fc["name"], "arguments": args}
+
+    # Update usage from metadata
+    usage = state["usage"]
+    usage_meta = event.get("usageMetadata", {})
+    if usage_meta:
+        usage["input"] = usage_meta.get("promptTokenCount", usage["input"])
+        usage["output"] = usage_meta.get("candidatesTokenCount", usage["output"])
+
+
+def _google_state() -> dict:
+    return {"content": [], "tool_calls": [], "usage": {"input": 0, "output": 0}}
+
+
+def _google_end(state: dict, model: str) -> Dict[str, Any]:
+    return {
+        "type": "message_end",
+        "content": "".join(state["content"]),
+        "tool_calls": state["tool_calls"],
+        "usage": state["usage"],
+        "model": model,
+    }
+
+
+def stream_google(
+    messages: List[Dict[str, Any]],
+    model: Optional[str] = None,
+    tools: Optional[List[dict]] = None,
+    max_tokens: int = DEFAULT_MAX_TOKENS,
+) -> Generator[Dict[str, Any], None, None]:
+    """Stream Google Gemini API responses using streamGenerateContent SSE.
 
+    Yields events compatible with the Anthropic streaming interface:
+        {'type': 'text_delta', 'text': '...'}
+        {'type': 'tool_use_start', 'id': '...', 'name': '...'}
+        {'type': 'tool_use_end', 'id': '...', 'name': '...', 'arguments': {...}}
+        {'type': 'message_end', 'content': '...', 'tool_calls': [...], 'usage': {...}, 'model': '...'}
+        {'type': 'error', 'error': '...'}
+    """
+    req = _google_request(messages, model, tools, max_tokens)
+    if isinstance(req, dict):
+        yield req
+        return
+    state = _google_state()
     try:
-        resp = urllib.request.urlopen(req, timeout=180)
-        buffer = ""
-        for raw_chunk in _iter_chunks(resp):
-            buffer += raw_chunk
-            while "\n" in buffer:
-                line, buffer = buffer.split("\n", 1)
-                line = line.strip()
-                if not line or not line.startswith("data: "):
-                    continue
-                json_str = line[6:]
-                if json_str.strip() == "[DONE]":
-                    continue
-                try:
-                    event = json.loads(json_str)
-                except json.JSONDecodeError:
-                    continue
-
-                # Process candidates
-                for cand in event.get("candidates", []):
-                    for part in cand.get("content", {}).get("parts", []):
-                        if "text" in part:
-                            text = part["text"]
-                            content_text += text
-                            yield {"type": "text_delta", "text": text}
-                        elif "functionCall" in part:
-                            fc = part["functionCall"]
-                            tc_id = f"google_{fc['name']}_{int(time.time() * 1000)}"
-                            args = fc.get("args", {})
-                            tool_calls.append(
-                                {
-                                    "id": tc_id,
-                                    "name": fc["name"],
-                                    "arguments": args,
-                                }
-                            )
-                            yield {"type": "tool_use_start", "id": tc_id, "name": fc["name"]}
-                            yield {"type": "tool_use_end", "id": tc_id, "name": fc["name"], "arguments": args}
-
-                # Update usage from metadata
-                usage_meta = event.get("usageMetadata", {})
-                if usage_meta:
-                    usage["input"] = usage_meta.get("promptTokenCount", usage["input"])
-                    usage["output"] = usage_meta.get("candidatesTokenCount", usage["output"])
-
-        _lazy_track_usage(model, usage["input"], usage["output"])
-
-        yield {
-            "type": "message_end",
-            "content": content_text,
-            "tool_calls": tool_calls,
-            "usage": usage,
-            "model": model,
-        }
+        with _urlopen(req) as resp:
+            for payload in _payloads(resp):
+                event = _sse_json(payload)
+                if event is not None:
+                    yield from _google_events(event, state)
+
+        _lazy_track_usage(req.model, state["usage"]["input"], state["usage"]["output"])
+        yield _google_end(state, req.model)
 
     except urllib.error.HTTPError as e:
         err_body = e.read().decode("utf-8", errors="replace")
@@ -168,113 +297,115 @@ def stream_google(
         yield {"type": "error", "error": str(e)[:200]}
 
 
-def _iter_sse_events(resp, tool_calls, accum, usage):
-    """Parse SSE stream and yield events, updating accumulators in-place."""
-    buffer = ""
-    for raw_chunk in _iter_chunks(resp):
-        buffer += raw_chunk
-        while "\n" in buffer:
-            line, buffer = buffer.split("\n", 1)
-            line = line.strip()
-            if not line or not line.startswith("data: "):
-                continue
-            json_str = line[6:]
-            if json_str.strip() == "[DONE]":
-                continue
-            try:
-                event = json.loads(json_str)
-            except json.JSONDecodeError:
-                continue
-            yield from _process_stream_event(
-                event, accum["content"], accum["thinking"], tool_calls, accum["tool"], accum.get("tool_json", ""), usage
-            )
-            accum["content"], accum["thinking"], accum["tool"], accum["tool_json"] = _update_stream_accumulators(
-                event, accum["content"], accum["thinking"], tool_calls, accum["tool"], accum.get("tool_json", ""), usage
-            )
+async def astream_google(
+    messages: List[Dict[str, Any]],
+    model: Optional[str] = None,
+    tools: Optional[List[dict]] = None,
+    max_tokens: int = DEFAULT_MAX_TOKENS,
+) -> AsyncGenerator[Dict[str, Any], None]:
+    """Async :func:`stream_google` (same events, no worker thread)."""
+    req = _google_request(messages, model, tools, max_tokens)
+    if isinstance(req, dict):
+        yield req
+        return
+    if _proxied(req):
+        async for event in _athreaded(stream_google(messages, model, tools, max_tokens)):
+            yield event
+        return
+    state = _google_state()
+    try:
+        async with await _apost(req) as resp:
+            if resp.status >= 400:
+                err_body = (await resp.read()).decode("utf-8", errors="replace")
+                log.error(f"[STREAM-GOOGLE] HTTP {resp.status}: {err_body[:300]}")
+                yield {"type": "error", "error": f"HTTP {resp.status}: {err_body[:200]}"}
+                return
+            async for payload in _apayloads(resp):
+                event = _sse_json(payload)
+                if event is not None:
+                    for ui_event in _google_events(event, state):
+                        yield ui_event
+
+        await asyncio.to_thread(_lazy_track_usage, req.model, state["usage"]["input"], state["usage"]["output"])
+        yield _google_end(state, req.model)
+    except Exception as e:
+        log.error(f"[STREAM-GOOGLE] Error: {e}")
+        yield {"type": "error", "error": str(e)[:200]}
+
 
+def _anthropic_events(event: dict, state: dict) -> Iterator[Dict[str, Any]]:
+    """UI events for one Anthropic SSE event; updates *state* in-place.
 
-def _update_stream_accumulators(event, content_text, thinking_text, tool_calls, current_tool, current_tool_json, usage):
-    """Update streaming accumulators from an SSE event. Returns updated (content, thinking, tool, tool_json)."""
+    Text, thinking and tool-input fragments are appended to lists and
+    joined once (at ``content_block_stop`` / message end).
+    """
     etype = event.get("type", "")
+
     if etype == "content_block_delta":
         delta = event.get("delta", {})
         dt = delta.get("type", "")
         if dt == "text_delta":
-            content_text += delta.get("text", "")
+            text = delta.get("text", "")
+            if text:
+                state["content"].append(text)
+                yield {"type": "text_delta", "text": text}
         elif dt == "thinking_delta":
-            thinking_text += delta.get("thinking", "")
+            text = delta.get("thinking", "")
+            if text:
+                state["thinking"].append(text)
+                yield {"type": "thinking_delta", "text": text}
         elif dt == "input_json_delta":
-            current_tool_json += delta.get("partial_json", "")
+            partial = delta.get("partial_json", "")
+            state["tool_json"].append(partial)
+            yield {"type": "tool_use_delta", "partial_json": partial}
+
     elif etype == "content_block_start":
         cb = event.get("content_block", {})
         if cb.get("type") == "tool_use":
-            current_tool = {"id": cb["id"], "name": cb["name"]}
-            current_tool_json = ""
+            state["tool"] = {"id": cb["id"], "name": cb["name"]}
+            state["tool_json"] = []
+            yield {"type": "tool_use_start", "id": cb["id"], "name": cb["name"]}
+
     elif etype == "content_block_stop":
+        current_tool = state["tool"]
         if current_tool:
+            tool_json = "".join(state["tool_json"])
             try:
-                args = json.loads(current_tool_json) if current_tool_json else {}
+                args = json.loads(tool_json) if tool_json else {}
             except json.JSONDecodeError:
                 args = {}
-            tool_calls.append({**current_tool, "arguments": args})
-            current_tool = None
-            current_tool_json = ""
+            state["tool_calls"].append({**current_tool, "arguments": args})
+            state["tool"] = None
+            state["tool_json"] = []
+            yield {"type": "tool_use_end", "id": current_tool["id"], "name": current_tool["name"], "arguments": args}
+
     elif etype == "message_delta":
+        usage = state["usage"]
         u = event.get("usage", {})
         usage["output"] = u.get("output_tokens", usage["output"])
+
     elif etype == "message_start":
-        msg = event.get("message", {})
-        u = msg.get("usage", {})
+        usage = state["usage"]
+        u = event.get("message", {}).get("usage", {})
         usage["input"] = u.get("input_tokens", 0)
         usage["cache_creation_input_tokens"] = u.get("cache_creation_input_tokens", 0)
         usage["cache_read_input_tokens"] = u.get("cache_read_input_tokens", 0)
-    return content_text, thinking_text, current_tool, current_tool_json
-
-
-def stream_anthropic(
-    messages: List[Dict[str, Any]],
-    model: Optional[str] = None,
-    tools: Optional[List[dict]] = None,
-    max_tokens: int = DEFAULT_MAX_TOKENS,
-    thinking: bool = False,
-) -> Generator[Dict[str, Any], None, None]:
-    """Stream Anthropic API responses token-by-token using raw urllib SSE.
-
-    Yields events:
-        {'type': 'text_delta', 'text': '...'}
-        {'type': 'thinking_delta', 'text': '...'}
-        {'type': 'tool_use_start', 'id': '...', 'name': '...'}
-        {'type': 'tool_use_delta', 'partial_json': '...'}
-        {'type': 'tool_use_end', 'id': '...', 'name': '...', 'arguments': {...}}
-        {'type': 'message_end', 'content': '...', 'tool_calls': [...], 'usage': {...}, 'model': '...'}
-        {'type': 'error', 'error': '...'}
-    """
-    if not model:
-        last_user = next((m["content"] for m in reversed(messages) if m["role"] == "user"), "")
-        model = router.route(last_user, has_tools=bool(tools))
 
-    # Hard cost cap check before streaming
-    try:
-        check_cost_cap()
-    except CostCapExceeded as e:
-        yield {"type": "error", "error": str(e)}
-        return
 
-    provider, model_id = model.split("/", 1) if "/" in model else ("anthropic", model)
+def _iter_sse_events(resp, state: dict) -> Generator[Dict[str, Any], None, None]:
+    """Parse an Anthropic SSE response and yield UI events, updating *state* in-place."""
+    for payload in _payloads(resp):
+        event = _sse_json(payload)
+        if event is not None:
+            yield from _anthropic_events(event, state)
 
-    # Only Anthropic supports our streaming implementation
-    if provider != "anthropic":
-        # Fallback: non-streaming call, yield as single chunk
-        result = call_llm(messages, model=model, tools=tools, max_tokens=max_tokens, thinking=thinking)
-        if result.get("content"):
-            yield {"type": "text_delta", "text": result["content"]}
-        yield {"type": "message_end", **result}
-        return
 
+def _anthropic_request(
+    messages: List[Dict[str, Any]], model: str, tools: Optional[List[dict]], max_tokens: int, thinking: bool
+) -> _StreamRequest:
+    """Build the Messages API streaming request (prompt caching enabled)."""
+    model_id = model.split("/", 1)[1] if "/" in model else model
     api_key = vault.get("anthropic_api_key")
-    if not api_key:
-        yield {"type": "error", "error": "❌ Anthropic API key not configured."}
-        return
 
     from salmalm.core.llm import _sanitize_messages_for_provider
     messages = _sanitize_messages_for_provider(messages, "anthropic")
@@ -319,121 +450,163 @@ def stream_anthropic(
         "anthropic-beta": "prompt-caching-2024-07-31",
         "User-Agent": _UA,
     }
-    req = urllib.request.Request("https://api.anthropic.com/v1/messages", data=data, headers=headers, method="POST")
+    return _StreamRequest("anthropic", model, "https://api.anthropic.com/v1/messages", headers, data, 180)
 
-    # Accumulators
-    content_text = ""
-    thinking_text = ""
-    tool_calls: List[dict] = []
-    current_tool: Optional[dict] = None
-    current_tool_json = ""
-    usage = {"input": 0, "output": 0}
-
-    try:
-        resp = urllib.request.urlopen(req, timeout=180)
-        accum = {"content": "", "thinking": "", "tool": None, "tool_json": ""}
-        yield from _iter_sse_events(resp, tool_calls, accum, usage)
-        _lazy_track_usage(model, usage["input"], usage["output"])
-        result = {
-            "type": "message_end",
-            "content": accum["content"],
-            "tool_calls": tool_calls,
-            "usage": usage,
-            "model": model,
-        }
-        if accum["thinking"]:
-            result["thinking"] = accum["thinking"]
-        yield result
-    except urllib.error.HTTPError as e:
-        err_body = e.read().decode("utf-8", errors="replace")
-        log.error(f"[STREAM] HTTP {e.code}: {err_body[:300]}")
-        yield {"type": "error", "error": f"HTTP {e.code}: {err_body[:200]}"}
-    except Exception as e:
-        log.error(f"[STREAM] Error: {e}")
-        yield {"type": "error", "error": str(e)[:200]}
 
+def _anthropic_preflight(
+    messages: List[Dict[str, Any]], model: Optional[str], tools: Optional[List[dict]]
+) -> Union[str, Dict[str, Any]]:
+    """Resolve the model and run the pre-stream checks; returns the model or an error event."""
+    if not model:
+        last_user = next((m["content"] for m in reversed(messages) if m["role"] == "user"), "")
+        model = router.route(last_user, has_tools=bool(tools))
 
-def _iter_chunks(resp, chunk_size: int = 4096) -> Generator[str, None, None]:
-    """Read HTTP response in chunks, decode to str.
+    # Hard cost cap check before streaming
+    try:
+        check_cost_cap()
+    except CostCapExceeded as e:
+        return {"type": "error", "error": str(e)}
+
+    provider = model.split("/", 1)[0] if "/" in model else "anthropic"
+    if provider == "anthropic" and not vault.get("anthropic_api_key"):
+        return {"type": "error", "error": "❌ Anthropic API key not configured."}
+    return model
+
+
+def _anthropic_state() -> dict:
+    return {
+        "content": [],
+        "thinking": [],
+        "tool": None,
+        "tool_json": [],
+        "tool_calls": [],
+        "usage": {"input": 0, "output": 0},
+    }
 
-    Uses an incremental UTF-8 decoder to avoid splitting multibyte characters
-    (e.g. Korean 3-byte sequences) at chunk boundaries.
-    """
-    import codecs
 
-    decoder = codecs.getincrementaldecoder("utf-8")("replace")
-    while True:
-        chunk = resp.read(chunk_size)
-        if not chunk:
-            text = decoder.decode(b"", final=True)
-            if text:
-                yield text
-            break
-        text = decoder.decode(chunk, final=False)
-        if text:
-            yield text
-
-
-def _process_stream_event(
-    event: dict,
-    content_text: str,
-    thinking_text: str,
-    tool_calls: list,
-    current_tool: Optional[dict],
-    current_tool_json: str,
-    usage: dict,
-) -> Generator[Dict[str, Any], None, None]:
-    """Process a single SSE event from Anthropic stream and yield UI events."""
-    etype = event.get("type", "")
-
-    if etype == "content_block_delta":
-        delta = event.get("delta", {})
-        dt = delta.get("type", "")
-        if dt == "text_delta":
-            text = delta.get("text", "")
-            if text:
-                yield {"type": "text_delta", "text": text}
-        elif dt == "thinking_delta":
-            text = delta.get("thinking", "")
-            if text:
-                yield {"type": "thinking_delta", "text": text}
-        elif dt == "input_json_delta":
-            yield {"type": "tool_use_delta", "partial_json": delta.get("partial_json", "")}
+def _anthropic_end(state: dict, model: str) -> Dict[str, Any]:
+    result = {
+        "type": "message_end",
+        "content": "".join(state["content"]),
+        "tool_calls": state["tool_calls"],
+        "usage": state["usage"],
+        "model": model,
+    }
+    if state["thinking"]:
+        result["thinking"] = "".join(state["thinking"])
+    return result
 
-    elif etype == "content_block_start":
-        cb = event.get("content_block", {})
-        if cb.get("type") == "tool_use":
-            yield {"type": "tool_use_start", "id": cb["id"], "name": cb["name"]}
 
-    elif etype == "content_block_stop":
-        if current_tool:
-            try:
-                args = json.loads(current_tool_json) if current_tool_json else {}
-            except json.JSONDecodeError:
-                args = {}
-            yield {"type": "tool_use_end", "id": current_tool["id"], "name": current_tool["name"], "arguments": args}
+def _fallback_events(result: dict) -> Iterator[Dict[str, Any]]:
+    """Non-streaming result as a single text chunk plus ``message_end``."""
+    if result.get("content"):
+        yield {"type": "text_delta", "text": result["content"]}
+    yield {"type": "message_end", **result}
 
 
-def stream_openai(
+def stream_anthropic(
     messages: List[Dict[str, Any]],
     model: Optional[str] = None,
     tools: Optional[List[dict]] = None,
     max_tokens: int = DEFAULT_MAX_TOKENS,
     thinking: bool = False,
 ) -> Generator[Dict[str, Any], None, None]:
-    """Stream OpenAI-compatible API responses token-by-token using SSE.
-
-    Supports: openai, xai, deepseek, openrouter, meta-llama, mistralai, qwen, ollama.
-    Yields same event format as stream_anthropic/stream_google for uniform consumer.
+    """Stream Anthropic API responses token-by-token using raw urllib SSE.
 
     Yields events:
         {'type': 'text_delta', 'text': '...'}
+        {'type': 'thinking_delta', 'text': '...'}
         {'type': 'tool_use_start', 'id': '...', 'name': '...'}
         {'type': 'tool_use_delta', 'partial_json': '...'}
         {'type': 'tool_use_end', 'id': '...', 'name': '...', 'arguments': {...}}
         {'type': 'message_end', 'content': '...', 'tool_calls': [...], 'usage': {...}, 'model': '...'}
         {'type': 'error', 'error': '...'}
     """
+    model = _anthropic_preflight(messages, model, tools)
+    if isinstance(model, dict):
+        yield model
+        return
+
+    # Only Anthropic supports our streaming implementation
+    provider = model.split("/", 1)[0] if "/" in model else "anthropic"
+    if provider != "anthropic":
+        # Fallback: non-streaming call, yield as single chunk
+        from salmalm.core.llm import call_llm
+
+        yield from _fallback_events(
+            call_llm(messages, model=model, tools=tools, max_tokens=max_tokens, thinking=thinking)
+        )
+        return
+
+    req = _anthropic_request(messages, model, tools, max_tokens, thinking)
+    state = _anthropic_state()
+    try:
+        with _urlopen(req) as resp:
+            yield from _iter_sse_events(resp, state)
+        _lazy_track_usage(model, state["usage"]["input"], state["usage"]["output"])
+        yield _anthropic_end(state, model)
+    except urllib.error.HTTPError as e:
+        err_body = e.read().decode("utf-8", errors="replace")
+        log.error(f"[STREAM] HTTP {e.code}: {err_body[:300]}")
+        yield {"type": "error", "error": f"HTTP {e.code}: {err_body[:200]}"}
+    except Exception as e:
+        log.error(f"[STREAM] Error: {e}")
+        yield {"type": "error", "error": str(e)[:200]}
+
+
+async def astream_anthropic(
+    messages: List[Dict[str, Any]],
+    model: Optional[str] = None,
+    tools: Optional[List[dict]] = None,
+    max_tokens: int = DEFAULT_MAX_TOKENS,
+    thinking: bool = False,
+) -> AsyncGenerator[Dict[str, Any], None]:
+    """Async :func:`stream_anthropic` (same events, no worker thread)."""
+    model = _anthropic_preflight(messages, model, tools)
+    if isinstance(model, dict):
+        yield model
+        return
+
+    provider = model.split("/", 1)[0] if "/" in model else "anthropic"
+    if provider != "anthropic":
+        from salmalm.core.llm import call_llm
+
+        result = await asyncio.to_thread(
+            call_llm, messages, model=model, tools=tools, max_tokens=max_tokens, thinking=thinking
+        )
+        for event in _fallback_events(result):
+            yield event
+        return
+
+    req = _anthropic_request(messages, model, tools, max_tokens, thinking)
+    if _proxied(req):
+        async for event in _athreaded(stream_anthropic(messages, model, tools, max_tokens, thinking)):
+            yield event
+        return
+    state = _anthropic_state()
+    try:
+        async with await _apost(req) as resp:
+            if resp.status >= 400:
+                err_body = (await resp.read()).decode("utf-8", errors="replace")
+                log.error(f"[STREAM] HTTP {resp.status}: {err_body[:300]}")
+                yield {"type": "error", "error": f"HTTP {resp.status}: {err_body[:200]}"}
+                return
+            async for payload in _apayloads(resp):
+                event = _sse_json(payload)
+                if event is not None:
+                    for ui_event in _anthropic_events(event, state):
+                        yield ui_event
+        await asyncio.to_thread(_lazy_track_usage, model, state["usage"]["input"], state["usage"]["output"])
+        yield _anthropic_end(state, model)
+    except Exception as e:
+        log.error(f"[STREAM] Error: {e}")
+        yield {"type": "error", "error": str(e)[:200]}
+
+
+def _openai_request(
+    messages: List[Dict[str, Any]], model: Optional[str], tools: Optional[List[dict]], max_tokens: int
+) -> Union[_StreamRequest, Dict[str, Any]]:
+    """Build the chat/completions streaming request, or return an error event."""
     if not model:
         last_user = next((m["content"] for m in reversed(messages) if m["role"] == "user"), "")
         model = router.route(last_user, has_tools=bool(tools))
@@ -441,8 +614,7 @@ def stream_openai(
     try:
         check_cost_cap()
     except CostCapExceeded as e:
-        yield {"type": "error", "error": str(e)}
-        return
+        return {"type": "error", "error": str(e)}
 
     provider, model_id = model.split("/", 1) if "/" in model else ("openai", model)
 
@@ -474,8 +646,7 @@ def stream_openai(
         base_url = _PROVIDER_BASE_URL.get(provider, "https://api.openai.com/v1")
 
     if not api_key and provider not in ("ollama",):
-        yield {"type": "error", "error": f"❌ {provider} API key not configured."}
-        return
+        return {"type": "error", "error": f"❌ {provider} API key not configured."}
 
     from salmalm.core.llm import _sanitize_messages_for_provider
     messages = _sanitize_messages_for_provider(messages, provider)
@@ -499,96 +670,173 @@ def stream_openai(
         headers["X-Title"] = "SalmAlm"
 
     url = f"{base_url}/chat/completions"
-    req = urllib.request.Request(url, data=json.dumps(body).encode(), headers=headers, method="POST")
+    return _StreamRequest(provider, model, url, headers, json.dumps(body).encode(), 120)
 
-    # ── Stream SSE ──
-    full_text = ""
-    tool_calls_buf: dict = {}   # index → {id, name, json_buf}
-    in_tokens = 0
-    out_tokens = 0
-    finish_reason = ""
 
-    try:
-        with urllib.request.urlopen(req, timeout=120) as resp:
-            for raw_line in resp:
-                line = raw_line.decode("utf-8", errors="replace").rstrip("\r\n")
-                if not line.startswith("data: "):
-                    continue
-                data_str = line[6:]
-                if data_str.strip() == "[DONE]":
-                    break
-                try:
-                    event = json.loads(data_str)
-                except json.JSONDecodeError:
-                    continue
-
-                usage = event.get("usage") or {}
-                if usage:
-                    in_tokens = usage.get("prompt_tokens", in_tokens)
-                    out_tokens = usage.get("completion_tokens", out_tokens)
-
-                choices = event.get("choices", [])
-                if not choices:
-                    continue
-                choice = choices[0]
-                finish_reason = choice.get("finish_reason") or finish_reason
-                delta = choice.get("delta", {})
-
-                # ── Text delta ──
-                text_chunk = delta.get("content") or ""
-                if text_chunk:
-                    full_text += text_chunk
-                    yield {"type": "text_delta", "text": text_chunk}
-
-                # ── Tool call deltas ──
-                for tc_delta in delta.get("tool_calls", []):
-                    idx = tc_delta.get("index", 0)
-                    if idx not in tool_calls_buf:
-                        tool_calls_buf[idx] = {"id": "", "name": "", "json_buf": ""}
-                        tc_id = tc_delta.get("id") or f"call_{idx}_{int(time.time()*1000)}"
-                        tc_name = (tc_delta.get("function") or {}).get("name", "")
-                        tool_calls_buf[idx]["id"] = tc_id
-                        tool_calls_buf[idx]["name"] = tc_name
-                        yield {"type": "tool_use_start", "id": tc_id, "name": tc_name}
-                    else:
-                        tc_name = (tc_delta.get("function") or {}).get("name", "")
-                        if tc_name:
-                            tool_calls_buf[idx]["name"] = tc_name
-                    args_chunk = (tc_delta.get("function") or {}).get("arguments", "")
-                    if args_chunk:
-                        tool_calls_buf[idx]["json_buf"] += args_chunk
-                        yield {"type": "tool_use_delta", "partial_json": args_chunk}
+def _openai_state() -> dict:
+    return {
+        "full_text": [],
+        "tool_calls_buf": {},  # index → {id, name, json_buf: [fragments]}
+        "in_tokens": 0,
+        "out_tokens": 0,
+        "finish_reason": "",
+    }
 
-    except urllib.error.HTTPError as e:
-        err_body = ""
-        try:
-            err_body = e.read().decode("utf-8", errors="replace")[:300]
-        except Exception:
-            pass
-        yield {"type": "error", "error": f"❌ {provider} HTTP {e.code}: {err_body}"}
-        return
-    except Exception as e:
-        yield {"type": "error", "error": f"❌ {provider} streaming error: {e}"}
+
+def _openai_events(event: dict, state: dict) -> Iterator[Dict[str, Any]]:
+    """UI events for one chat.completion.chunk; updates *state* in-place."""
+    usage = event.get("usage") or {}
+    if usage:
+        state["in_tokens"] = usage.get("prompt_tokens", state["in_tokens"])
+        state["out_tokens"] = usage.get("completion_tokens", state["out_tokens"])
+
+    choices = event.get("choices", [])
+    if not choices:
         return
+    choice = choices[0]
+    state["finish_reason"] = choice.get("finish_reason") or state["finish_reason"]
+    delta = choice.get("delta", {})
+
+    # ── Text delta ──
+    text_chunk = delta.get("content") or ""
+    if text_chunk:
+        state["full_text"].append(text_chunk)
+        yield {"type": "text_delta", "text": text_chunk}
+
+    # ── Tool call deltas ──
+    tool_calls_buf = state["tool_calls_buf"]
+    for tc_delta in delta.get("tool_calls", []):
+        idx = tc_delta.get("index", 0)
+        if idx not in tool_calls_buf:
+            tool_calls_buf[idx] = {"id": "", "name": "", "json_buf": []}
+            tc_id = tc_delta.get("id") or f"call_{idx}_{int(time.time()*1000)}"
+            tc_name = (tc_delta.get("function") or {}).get("name", "")
+            tool_calls_buf[idx]["id"] = tc_id
+            tool_calls_buf[idx]["name"] = tc_name
+            yield {"type": "tool_use_start", "id": tc_id, "name": tc_name}
+        else:
+            tc_name = (tc_delta.get("function") or {}).get("name", "")
+            if tc_name:
+                tool_calls_buf[idx]["name"] = tc_name
+        args_chunk = (tc_delta.get("function") or {}).get("arguments", "")
+        if args_chunk:
+            tool_calls_buf[idx]["json_buf"].append(args_chunk)
+            yield {"type": "tool_use_delta", "partial_json": args_chunk}
 
-    # ── Finalize tool calls ──
+
+def _openai_finish(state: dict, model: str) -> Iterator[Dict[str, Any]]:
+    """Closing ``tool_use_end`` events and ``message_end`` (usage tracked by the caller)."""
     tool_calls_out = []
+    tool_calls_buf = state["tool_calls_buf"]
     for idx in sorted(tool_calls_buf.keys()):
         tc = tool_calls_buf[idx]
+        json_buf = "".join(tc["json_buf"])
         try:
-            args = json.loads(tc["json_buf"]) if tc["json_buf"] else {}
+            args = json.loads(json_buf) if json_buf else {}
         except json.JSONDecodeError:
             args = {}
         yield {"type": "tool_use_end", "id": tc["id"], "name": tc["name"], "arguments": args}
         tool_calls_out.append({"id": tc["id"], "name": tc["name"], "arguments": args})
 
-    _lazy_track_usage(model, in_tokens, out_tokens)
-
     yield {
         "type": "message_end",
-        "content": full_text,
+        "content": "".join(state["full_text"]),
         "tool_calls": tool_calls_out,
-        "stop_reason": finish_reason,
-        "usage": {"input": in_tokens, "output": out_tokens},
+        "stop_reason": state["finish_reason"],
+        "usage": {"input": state["in_tokens"], "output": state["out_tokens"]},
         "model": model,
     }
+
+
+def stream_openai(
+    messages: List[Dict[str, Any]],
+    model: Optional[str] = None,
+    tools: Optional[List[dict]] = None,
+    max_tokens: int = DEFAULT_MAX_TOKENS,
+    thinking: bool = False,
+) -> Generator[Dict[str, Any], None, None]:
+    """Stream OpenAI-compatible API responses token-by-token using SSE.
+
+    Supports: openai, xai, deepseek, openrouter, meta-llama, mistralai, qwen, ollama.
+    Yields same event format as stream_anthropic/stream_google for uniform consumer.
+
+    Yields events:
+        {'type': 'text_delta', 'text': '...'}
+        {'type': 'tool_use_start', 'id': '...', 'name': '...'}
+        {'type': 'tool_use_delta', 'partial_json': '...'}
+        {'type': 'tool_use_end', 'id': '...', 'name': '...', 'arguments': {...}}
+        {'type': 'message_end', 'content': '...', 'tool_calls': [...], 'usage': {...}, 'model': '...'}
+        {'type': 'error', 'error': '...'}
+    """
+    req = _openai_request(messages, model, tools, max_tokens)
+    if isinstance(req, dict):
+        yield req
+        return
+    provider = req.provider
+
+    # ── Stream SSE ──
+    state = _openai_state()
+    try:
+        with _urlopen(req) as resp:
+            for payload in _payloads(resp):
+                if payload.strip() == "[DONE]":
+                    break
+                event = _sse_json(payload)
+                if event is not None:
+                    yield from _openai_events(event, state)
+
+    except urllib.error.HTTPError as e:
+        err_body = ""
+        try:
+            err_body = e.read().decode("utf-8", errors="replace")[:300]
+        except Exception:
+            pass
+        yield {"type": "error", "error": f"❌ {provider} HTTP {e.code}: {err_body}"}
+        return
+    except Exception as e:
+        yield {"type": "error", "error": f"❌ {provider} streaming error: {e}"}
+        return
+
+    _lazy_track_usage(req.model, state["in_tokens"], state["out_tokens"])
+    yield from _openai_finish(state, req.model)
+
+
+async def astream_openai(
+    messages: List[Dict[str, Any]],
+    model: Optional[str] = None,
+    tools: Optional[List[dict]] = None,
+    max_tokens: int = DEFAULT_MAX_TOKENS,
+    thinking: bool = False,
+) -> AsyncGenerator[Dict[str, Any], None]:
+    """Async :func:`stream_openai` (same events, no worker thread)."""
+    req = _openai_request(messages, model, tools, max_tokens)
+    if isinstance(req, dict):
+        yield req
+        return
+    if _proxied(req):
+        async for event in _athreaded(stream_openai(messages, model, tools, max_tokens, thinking)):
+            yield event
+        return
+    provider = req.provider
+
+    state = _openai_state()
+    try:
+        async with await _apost(req) as resp:
+            if resp.status >= 400:
+                err_body = (await resp.read()).decode("utf-8", errors="replace")[:300]
+                yield {"type": "error", "error": f"❌ {provider} HTTP {resp.status}: {err_body}"}
+                return
+            async for payload in _apayloads(resp):
+                if payload.strip() == "[DONE]":
+                    break
+                event = _sse_json(payload)
+                if event is not None:
+                    for ui_event in _openai_events(event, state):
+                        yield ui_event
+    except Exception as e:
+        yield {"type": "error", "error": f"❌ {provider} streaming error: {e}"}
+        return
+
+    await asyncio.to_thread(_lazy_track_usage, req.model, state["in_tokens"], state["out_tokens"])
+    for ui_event in _openai_finish(state, req.model):
+        yield ui_event
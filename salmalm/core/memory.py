@@ -12,6 +12,7 @@ from __future__ import annotations
 
 import re
 from datetime import datetime, timedelta
+from typing import Optional
 
 from salmalm.constants import MEMORY_FILE, MEMORY_DIR, KST
 from salmalm import log
@@ -101,9 +102,8 @@ class MemoryManager:
             existing = fpath.read_text(encoding="utf-8", errors="replace")
             content = existing + "\n" + content
         fpath.write_text(content, encoding="utf-8")
-        # Invalidate search index
-        search = self._get_search()
-        search._built = False
+        # Re-index just this file (the watcher would catch it a few seconds later)
+        self._get_search().refresh_path(fpath)
         return f"✅ Written to {filename} ({len(content)} chars)"
 
     # ── Search ────────────────────────────────────────────────
@@ -174,11 +174,14 @@ class MemoryManager:
 
     # ── Auto-Recall (OpenClaw-style mandatory memory search) ──
 
-    def auto_recall(self, user_message: str, max_results: int = 3) -> str:
+    def auto_recall(self, user_message: str, max_results: int = 3, results: Optional[list] = None) -> str:
         """Search memory for context relevant to user message.
 
         Like OpenClaw's memory_search, but automatic — runs before each
-        response to inject relevant prior context.
+        response to inject relevant prior context. The pipeline passes the
+        turn's RAG hits as *results* (retrieved for the last few user
+        messages, see ``rag_query_for``) so a turn runs one retrieval;
+        without them *user_message* is searched.
 
         Returns formatted context string or empty string.
         """
@@ -187,7 +190,9 @@ class MemoryManager:
         try:
             from salmalm.features.rag import rag_engine
 
-            results = rag_engine.search(user_message, max_results=max_results)
+            if results is None:
+                results = rag_engine.search(user_message, max_results=max_results)
+            results = results[:max_results]
             if not results:
                 return ""
             parts = ["[Memory Recall]"]
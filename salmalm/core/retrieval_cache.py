@@ -0,0 +1,88 @@
+"""Shared retrieval-result cache for RAG and memory search.
+
+A single chat turn asks for context several times (RAG injection,
+auto-recall, ``memory_search``). Results are cached per
+(namespace, normalized query, generation) with LRU + TTL eviction.
+Indexers take a fresh generation from :func:`next_generation` on every
+write, so a stale result can never be served — entries for old
+generations simply age out. A generation may be any hashable; callers
+whose ranking depends on settings fold those in (e.g. a tuple of the
+index generation and a config fingerprint).
+"""
+
+from __future__ import annotations
+
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+RETRIEVAL_CACHE_SIZE = 256
+RETRIEVAL_CACHE_TTL = 120.0  # seconds
+
+# Results are computed for at least this many hits so callers asking for
+# different max_results (RAG context: 6, auto-recall: 3) share one entry.
+RETRIEVAL_POOL = 8
+
+_generations = itertools.count(1)
+
+
+def next_generation() -> int:
+    """Process-wide unique index generation (never reused across indexes)."""
+    return next(_generations)
+
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive cache form of a query."""
+    return " ".join(query.lower().split())
+
+
+class RetrievalCache:
+    """Thread-safe LRU + TTL cache of retrieval results."""
+
+    def __init__(self, max_size: int = RETRIEVAL_CACHE_SIZE, ttl: float = RETRIEVAL_CACHE_TTL) -> None:
+        """Init  ."""
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._max_size = max_size
+        self._ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, namespace: str, query: str, generation: Hashable) -> Optional[Any]:
+        """Return the cached value, or None if missing/expired."""
+        key = (namespace, normalize_query(query), generation)
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and now - entry[0] < self._ttl:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, namespace: str, query: str, generation: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entries."""
+        key = (namespace, normalize_query(query), generation)
+        with self._lock:
+            self._data[key] = (time.time(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self._max_size:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        """Clear."""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current size."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._data)}
+
+
+retrieval_cache = RetrievalCache()
@@ -1,22 +1,66 @@
-"""TF-IDF search engine — pure Python, no external deps."""
+"""TF-IDF search engine — pure Python, no external deps.
+
+The index is built once, then kept current per file from
+``features.watcher.FileWatcher`` events (and explicit :meth:`refresh_path`
+calls from memory writes). Each chunk keeps three IDF-independent sums so
+its TF-IDF norm can be derived in O(1) for the current corpus size:
+
+    idf_t = log N - g_t,  g_t = log(1 + df_t)
+    |d|^2 = A (log N)^2 - 2 B log N + C
+    A = sum tf^2,  B = sum tf^2 g_t,  C = sum tf^2 g_t^2
+
+A file edit only adjusts B/C for chunks sharing a term whose df changed,
+and search walks the query terms' postings instead of every chunk.
+
+Only the module-level ``_tfidf`` watches the filesystem; instances built
+elsewhere default to ``watch=False`` and rebuild periodically.
+"""
 
 import math
 import re
+import threading
 import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 
 from salmalm.constants import MEMORY_FILE, MEMORY_DIR, WORKSPACE_DIR
+from salmalm.core.retrieval_cache import RETRIEVAL_POOL, next_generation, retrieval_cache
 from salmalm.security.crypto import log
 
+_UPLOAD_EXTENSIONS = (
+    ".txt",
+    ".md",
+    ".py",
+    ".js",
+    ".json",
+    ".csv",
+    ".html",
+    ".css",
+    ".log",
+    ".xml",
+    ".yaml",
+    ".yml",
+)
+# Fallback full rebuild interval, used only when the file watcher is not running.
+_REBUILD_INTERVAL = 300
+
 
 class TFIDFSearch:
     """Lightweight TF-IDF + cosine similarity search. No external deps."""
 
-    def __init__(self) -> None:
+    def __init__(self, watch: bool = False) -> None:
         """Init  ."""
-        self._docs: list = []  # [(label, line_no, text, tokens)]
-        self._idf: dict = {}  # term -> IDF score
+        # doc_id -> [label, line_no, text, tf, A, B, C]
+        self._docs: Dict[int, list] = {}
+        self._postings: Dict[str, Dict[int, int]] = {}  # term -> {doc_id: tf}
+        self._files: Dict[str, List[int]] = {}  # label -> doc_ids
+        self._next_id = 0
         self._built = False
         self._last_index_time = 0
+        self._generation = 0
+        self._watch = watch
+        self._watcher = None
+        self._lock = threading.RLock()  # watcher thread vs. searchers
         self._stop_words = frozenset(
             [
                 "의",
@@ -78,16 +122,12 @@ class TFIDFSearch:
         tokens = re.findall(r"[\w가-힣]+", text)
         return [t for t in tokens if len(t) > 1 and t not in self._stop_words]
 
-    def _index_files(self) -> None:
-        """Build index from MEMORY.md, memory/*.md, uploads/*.txt etc."""
-        now = time.time()
-        if self._built and now - self._last_index_time < 300:  # Re-index every 5 min
-            return
+    # ── Discovery ──
 
-        self._docs = []
-        doc_freq: dict = {}  # term -> number of docs containing it  # type: ignore[var-annotated]
+    @staticmethod
+    def _discover() -> List[Tuple[str, Path]]:
+        """Files to index: MEMORY.md, memory/*.md, uploads/*, skills/**/*.md."""
         search_files = []
-
         if MEMORY_FILE.exists():  # noqa: F405
             search_files.append(("MEMORY.md", MEMORY_FILE))  # noqa: F405
         for f in sorted(MEMORY_DIR.glob("*.md")):  # noqa: F405
@@ -95,87 +135,229 @@ class TFIDFSearch:
         uploads_dir = WORKSPACE_DIR / "uploads"  # noqa: F405
         if uploads_dir.exists():
             for f in uploads_dir.glob("*"):
-                if f.suffix.lower() in (
-                    ".txt",
-                    ".md",
-                    ".py",
-                    ".js",
-                    ".json",
-                    ".csv",
-                    ".html",
-                    ".css",
-                    ".log",
-                    ".xml",
-                    ".yaml",
-                    ".yml",
-                ):
+                if f.suffix.lower() in _UPLOAD_EXTENSIONS:
                     search_files.append((f"uploads/{f.name}", f))
         # Also index skills
         skills_dir = WORKSPACE_DIR / "skills"  # noqa: F405
         if skills_dir.exists():
             for f in skills_dir.glob("**/*.md"):
                 search_files.append((f"skills/{f.relative_to(skills_dir)}", f))
+        return search_files
 
-        for label, fpath in search_files:
-            try:
-                text = fpath.read_text(encoding="utf-8", errors="replace")
-                lines = text.splitlines()
-                # Index in chunks of 3 lines for context
-                for i in range(0, len(lines), 2):
-                    chunk = "\n".join(lines[i : i + 3])
-                    if not chunk.strip():
-                        continue
-                    tokens = self._tokenize(chunk)
-                    if not tokens:
-                        continue
-                    # TF for this chunk
-                    tf = {}  # type: ignore[var-annotated]
-                    for t in tokens:
-                        tf[t] = tf.get(t, 0) + 1
-                    self._docs.append((label, i + 1, chunk, tf))
-                    # Doc frequency
-                    for t in set(tokens):
-                        doc_freq[t] = doc_freq.get(t, 0) + 1
-            except Exception as e:  # noqa: broad-except
-                log.debug(f"Suppressed: {e}")
-
-        # Compute IDF
-        n_docs = len(self._docs)
-        if n_docs > 0:
-            self._idf = {t: math.log(n_docs / (1 + df)) for t, df in doc_freq.items()}
-        self._built = True
-        self._last_index_time = now  # type: ignore[assignment]
+    @staticmethod
+    def _label_for(fpath: Path) -> Optional[str]:
+        """Index label for *fpath*, or None if it is not an indexed file (same rules as _discover)."""
+        fpath = Path(fpath)
+        if fpath == MEMORY_FILE:
+            return "MEMORY.md"
+        if fpath.parent == MEMORY_DIR and fpath.suffix == ".md":
+            return f"memory/{fpath.name}"
+        if fpath.parent == WORKSPACE_DIR / "uploads" and fpath.suffix.lower() in _UPLOAD_EXTENSIONS:
+            return f"uploads/{fpath.name}"
+        skills_dir = WORKSPACE_DIR / "skills"
+        if fpath.suffix == ".md" and skills_dir in fpath.parents:
+            return f"skills/{fpath.relative_to(skills_dir)}"
+        return None
+
+    # ── Index maintenance ──
+
+    def _index_files(self) -> None:
+        """Build the index once; afterwards the file watcher keeps it current."""
+        now = time.time()
+        watching = self._watcher is not None and self._watcher.running
+        if self._built and (watching or now - self._last_index_time < _REBUILD_INTERVAL):
+            return
+
+        search_files = self._discover()
+        with self._lock:
+            self._docs.clear()
+            self._postings.clear()
+            self._files.clear()
+            for label, fpath in search_files:
+                try:
+                    self._add_file(label, fpath.read_text(encoding="utf-8", errors="replace"))
+                except Exception as e:  # noqa: broad-except
+                    log.debug(f"Suppressed: {e}")
+            for doc_id in self._docs:
+                self._recompute_sums(doc_id)
+            self._built = True
+            self._last_index_time = now  # type: ignore[assignment]
+            self._generation = next_generation()
         log.info(f"[SEARCH] TF-IDF index built: {len(self._docs)} chunks from {len(search_files)} files")
+        if self._watch and not watching:
+            self._start_watcher()
+
+    def _start_watcher(self) -> None:
+        """Subscribe to FileWatcher change events for the indexed locations."""
+        try:
+            from salmalm.features.watcher import FileWatcher
+
+            self._watcher = FileWatcher(
+                paths=[
+                    str(MEMORY_FILE),
+                    str(MEMORY_DIR),
+                    str(WORKSPACE_DIR / "uploads"),
+                    str(WORKSPACE_DIR / "skills"),
+                ],
+                extensions=set(_UPLOAD_EXTENSIONS),
+                on_change=self._on_file_change,
+            )
+            self._watcher.start()
+        except Exception as e:  # noqa: broad-except
+            self._watcher = None
+            log.debug(f"[SEARCH] File watcher unavailable, using periodic rebuild: {e}")
+
+    def _on_file_change(self, path: str, event: str) -> None:
+        """FileWatcher callback."""
+        self.refresh_path(Path(path))
+
+    def refresh_path(self, fpath: Path) -> None:
+        """Re-index (or drop) one file; cost is proportional to that file only."""
+        if not self._built:
+            return  # first search builds everything anyway
+        label = self._label_for(fpath)
+        if label is None:
+            return
+        try:
+            text = fpath.read_text(encoding="utf-8", errors="replace") if fpath.exists() else None
+        except OSError:
+            text = None
+        with self._lock:
+            # df of every touched term before the edit
+            old_df: Dict[str, int] = {}
+            for doc_id in self._files.get(label, ()):
+                for t in self._docs[doc_id][3]:
+                    old_df.setdefault(t, len(self._postings[t]))
+            self._remove_file(label)
+            new_ids = self._add_file(label, text) if text is not None else []
+            added: Dict[str, int] = {}
+            for doc_id in new_ids:
+                for t in self._docs[doc_id][3]:
+                    added[t] = added.get(t, 0) + 1
+            for t, n in added.items():
+                old_df.setdefault(t, len(self._postings[t]) - n)
+            self._apply_df_changes(old_df, set(new_ids))
+            for doc_id in new_ids:
+                self._recompute_sums(doc_id)
+            self._generation = next_generation()
+
+    def _add_file(self, label: str, text: str) -> List[int]:
+        """Chunk *text* into docs + postings (sums are filled in by the caller)."""
+        lines = text.splitlines()
+        doc_ids = []
+        # Index in chunks of 3 lines for context
+        for i in range(0, len(lines), 2):
+            chunk = "\n".join(lines[i : i + 3])
+            if not chunk.strip():
+                continue
+            tokens = self._tokenize(chunk)
+            if not tokens:
+                continue
+            tf: Dict[str, int] = {}
+            for t in tokens:
+                tf[t] = tf.get(t, 0) + 1
+            doc_id = self._next_id
+            self._next_id += 1
+            self._docs[doc_id] = [label, i + 1, chunk, tf, 0.0, 0.0, 0.0]
+            for t, c in tf.items():
+                self._postings.setdefault(t, {})[doc_id] = c
+            doc_ids.append(doc_id)
+        self._files[label] = doc_ids
+        return doc_ids
+
+    def _remove_file(self, label: str) -> None:
+        for doc_id in self._files.pop(label, ()):
+            for t in self._docs.pop(doc_id)[3]:
+                plist = self._postings[t]
+                del plist[doc_id]
+                if not plist:
+                    del self._postings[t]
+
+    def _recompute_sums(self, doc_id: int) -> None:
+        doc = self._docs[doc_id]
+        a = b = c = 0.0
+        for t, tf in doc[3].items():
+            w = tf * tf
+            g = math.log(1 + len(self._postings[t]))
+            a += w
+            b += w * g
+            c += w * g * g
+        doc[4], doc[5], doc[6] = a, b, c
+
+    def _apply_df_changes(self, old_df: Dict[str, int], skip: set) -> None:
+        """Shift B/C of surviving chunks whose terms changed df."""
+        for t, before in old_df.items():
+            plist = self._postings.get(t)
+            after = len(plist) if plist else 0
+            if after == before or not plist:
+                continue
+            g0, g1 = math.log(1 + before), math.log(1 + after)
+            for doc_id, tf in plist.items():
+                if doc_id in skip:
+                    continue
+                doc = self._docs[doc_id]
+                w = tf * tf
+                doc[5] += w * (g1 - g0)
+                doc[6] += w * (g1 * g1 - g0 * g0)
+
+    def _idf(self, term: str, log_n: float) -> float:
+        plist = self._postings.get(term)
+        return log_n - math.log(1 + len(plist)) if plist else 0.0
+
+    # ── Search ──
 
     def search(self, query: str, max_results: int = 5) -> list:
-        """Search with TF-IDF + cosine similarity. Returns [(score, label, lineno, snippet)]."""
+        """Search with TF-IDF + cosine similarity. Returns [(score, label, lineno, snippet)].
+
+        Results are shared through the retrieval cache until the index changes.
+        """
         self._index_files()
         if not self._docs:
             return []
 
+        cached = retrieval_cache.get("tfidf", query, self._generation)
+        if cached is None or cached[0] < max_results:
+            pool = max(max_results, RETRIEVAL_POOL)
+            cached = (pool, self._search(query, pool))
+            retrieval_cache.put("tfidf", query, self._generation, cached)
+        return cached[1][:max_results]
+
+    def _search(self, query: str, max_results: int) -> list:
+        """Uncached TF-IDF cosine search over the query terms' postings."""
         query_tokens = self._tokenize(query)
         if not query_tokens:
             return []
+        with self._lock:
+            return self._score(query_tokens, max_results)
 
+    def _score(self, query_tokens: list, max_results: int) -> list:
+        if not self._docs:
+            return []
+        log_n = math.log(len(self._docs))
         # Query TF-IDF vector
-        query_tf = {}  # type: ignore[var-annotated]
+        query_tf: Dict[str, int] = {}
         for t in query_tokens:
             query_tf[t] = query_tf.get(t, 0) + 1
-        query_vec = {t: tf * self._idf.get(t, 0) for t, tf in query_tf.items()}
+        query_vec = {t: tf * self._idf(t, log_n) for t, tf in query_tf.items()}
         query_norm = math.sqrt(sum(v**2 for v in query_vec.values()))
         if query_norm == 0:
             return []
 
-        # Score each document
+        dots: Dict[int, float] = {}
+        for t, qv in query_vec.items():
+            if not qv:
+                continue
+            idf = self._idf(t, log_n)
+            for doc_id, tf in self._postings.get(t, {}).items():
+                dots[doc_id] = dots.get(doc_id, 0.0) + qv * tf * idf
+
         scored = []
-        for label, lineno, chunk, doc_tf in self._docs:
-            doc_vec = {t: tf * self._idf.get(t, 0) for t, tf in doc_tf.items()}
-            # Cosine similarity
-            dot = sum(query_vec.get(t, 0) * doc_vec.get(t, 0) for t in set(query_vec) | set(doc_vec))
-            doc_norm = math.sqrt(sum(v**2 for v in doc_vec.values()))
-            if doc_norm == 0:
+        for doc_id in sorted(dots):
+            label, lineno, chunk, _tf, a, b, c = self._docs[doc_id]
+            doc_norm = math.sqrt(max(0.0, a * log_n * log_n - 2 * b * log_n + c))
+            if doc_norm < 1e-12:
                 continue
-            similarity = dot / (query_norm * doc_norm)
+            similarity = dots[doc_id] / (query_norm * doc_norm)
             if similarity > 0.05:  # Threshold
                 scored.append((similarity, label, lineno, chunk))
 
@@ -183,7 +365,8 @@ class TFIDFSearch:
         return scored[:max_results]
 
 
-_tfidf = TFIDFSearch()
+# The one watched instance; other modules import it rather than build their own.
+_tfidf = TFIDFSearch(watch=True)
 
 
 # ============================================================
@@ -0,0 +1,273 @@
+"""Memory-budgeted LRU cache for in-memory chat sessions.
+
+``SessionCache`` keeps the ``dict`` interface that ``_sessions`` has
+always had (``in``, ``[]``, ``get``, ``del``, ``values()``...), so callers
+are unchanged. Differences:
+
+  - Entries are kept in LRU order (``OrderedDict``). ``[]`` / ``get``
+    touch an entry, ``in`` does not.
+  - The total is bounded by an estimated byte budget
+    (``SALMALM_SESSION_CACHE_MB``, default 256) instead of a session count.
+    Inserting or growing past the budget evicts from the cold end in O(1)
+    per eviction.
+  - Evicted sessions are written back with ``Session._persist()`` if they
+    have unsaved changes; the next ``get_session`` restores them from the
+    message log.
+
+Sizes are estimates (message text and payload lengths plus a fixed
+per-message overhead), recomputed only when a session's message list
+changes.
+
+Sessions with a turn in flight (``pin``) or a write in progress (their
+``_persist_lock`` is held) are never evicted: a restored copy would
+allocate the same log seqs as the live one. The cache may run over budget
+until they are released.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Iterator, List, Optional
+
+log = logging.getLogger(__name__)
+
+_SESSION_OVERHEAD = 4096  # Session object, metadata, system prompt bookkeeping
+_MESSAGE_OVERHEAD = 200  # dict + role + small fields
+
+
+def _block_bytes(block) -> int:
+    if not isinstance(block, dict):
+        return len(block) if isinstance(block, str) else 0
+    n = 0
+    for v in block.values():
+        if isinstance(v, str):
+            n += len(v)
+        elif isinstance(v, (dict, list)):
+            n += _content_bytes(v)
+    return n
+
+
+def _content_bytes(content) -> int:
+    if isinstance(content, str):
+        return len(content)
+    if isinstance(content, list):
+        return sum(_block_bytes(b) for b in content)
+    if isinstance(content, dict):
+        return _block_bytes(content)
+    return 0
+
+
+def estimate_session_bytes(session) -> int:
+    """Approximate memory held by a session's messages.
+
+    Memoized on the session against ``(id(messages), len(messages),
+    _revision)``, so repeated lookups of an unchanged session are O(1).
+    ``Session._revision`` is bumped on every persist and hydrate, which
+    covers messages edited or replaced in place.
+    """
+    msgs = session.messages
+    key = (id(msgs), len(msgs), getattr(session, "_revision", 0))
+    cached = getattr(session, "_size_estimate", None)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    size = _SESSION_OVERHEAD + sum(_MESSAGE_OVERHEAD + _content_bytes(m.get("content")) for m in msgs)
+    try:
+        session._size_estimate = (key, size)
+    except AttributeError:
+        pass
+    return size
+
+
+class SessionCache:
+    """LRU mapping ``session_id → Session`` bounded by estimated bytes."""
+
+    def __init__(self, budget_bytes: Optional[int] = None, on_evict: Optional[Callable] = None) -> None:
+        """Init  ."""
+        if budget_bytes is None:
+            budget_bytes = int(float(os.environ.get("SALMALM_SESSION_CACHE_MB", "256")) * 1024 * 1024)
+        self.budget_bytes = budget_bytes
+        self._on_evict = on_evict
+        self._data: "OrderedDict[str, object]" = OrderedDict()
+        self._sizes: dict = {}
+        self._pins: dict = {}
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # ── accounting ──
+
+    def _account(self, key: str, session) -> None:
+        size = estimate_session_bytes(session)
+        self._bytes += size - self._sizes.get(key, 0)
+        self._sizes[key] = size
+
+    def _is_pinned(self, key: str, session) -> bool:
+        if self._pins.get(key):
+            return True
+        lock = getattr(session, "_persist_lock", None)
+        return lock is not None and lock.locked()
+
+    def _evict_over_budget(self, keep: Optional[str] = None) -> List[object]:
+        evicted = []
+        # Each pass either evicts the coldest entry or rotates a pinned one
+        # to the warm end, so this stops after len(_data) steps at most.
+        budget = len(self._data)
+        while self._bytes > self.budget_bytes and budget > 0:
+            budget -= 1
+            key = next(iter(self._data))
+            session = self._data[key]
+            if key == keep or self._is_pinned(key, session):
+                self._data.move_to_end(key)
+                continue
+            del self._data[key]
+            self._bytes -= self._sizes.pop(key, 0)
+            self.evictions += 1
+            evicted.append(session)
+        if keep in self._data:
+            self._data.move_to_end(keep)
+        return evicted
+
+    def _write_back(self, evicted: List[object]) -> None:
+        for session in evicted:
+            if self._on_evict is not None:
+                try:
+                    self._on_evict(session)
+                except Exception as e:  # noqa: broad-except
+                    log.warning(f"[SESSION] Write-back failed for {getattr(session, 'id', '?')}: {e}")
+
+    def touch(self, key: str):
+        """Return the session for *key* (or None), marking it most recently used.
+
+        Re-estimates its size, since callers append messages in place.
+        """
+        with self._lock:
+            session = self._data.get(key)
+            if session is None:
+                return None
+            self._data.move_to_end(key)
+            self._account(key, session)
+            evicted = self._evict_over_budget(keep=key)
+        self._write_back(evicted)
+        return session
+
+    def pin(self, key: str) -> None:
+        """Keep *key* resident (turn in flight) until a matching :meth:`unpin`."""
+        with self._lock:
+            self._pins[key] = self._pins.get(key, 0) + 1
+
+    def unpin(self, key: str) -> None:
+        """Release one :meth:`pin` of *key*."""
+        with self._lock:
+            n = self._pins.get(key, 0) - 1
+            if n > 0:
+                self._pins[key] = n
+            else:
+                self._pins.pop(key, None)
+
+    def peek(self, key: str):
+        """Return the session for *key* (or None) without touching it."""
+        return self._data.get(key)
+
+    def record(self, hit: bool) -> None:
+        """Count a ``get_session`` lookup."""
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    @property
+    def bytes(self) -> int:
+        """Estimated bytes currently held."""
+        return self._bytes
+
+    def stats(self) -> dict:
+        """Counters for /metrics and diagnostics."""
+        return {
+            "sessions": len(self._data),
+            "bytes": self._bytes,
+            "budget_bytes": self.budget_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def expire(self, is_stale: Callable[[object], bool]) -> List[object]:
+        """Remove sessions from the cold end while *is_stale* holds; returns them."""
+        removed = []
+        with self._lock:
+            while self._data:
+                key = next(iter(self._data))
+                if not is_stale(self._data[key]):
+                    break
+                removed.append(self._data.pop(key))
+                self._bytes -= self._sizes.pop(key, 0)
+        return removed
+
+    # ── dict interface ──
+
+    def __getitem__(self, key: str):
+        session = self.touch(key)
+        if session is None:
+            raise KeyError(key)
+        return session
+
+    def get(self, key: str, default=None):
+        """Get (touches the entry)."""
+        session = self.touch(key)
+        return default if session is None else session
+
+    def __setitem__(self, key: str, session) -> None:
+        with self._lock:
+            self._data[key] = session
+            self._data.move_to_end(key)
+            self._account(key, session)
+            evicted = self._evict_over_budget(keep=key)
+        self._write_back(evicted)
+
+    def __delitem__(self, key: str) -> None:
+        with self._lock:
+            del self._data[key]
+            self._bytes -= self._sizes.pop(key, 0)
+
+    def pop(self, key: str, *default):
+        """Remove and return (no write-back)."""
+        with self._lock:
+            if key not in self._data:
+                if default:
+                    return default[0]
+                raise KeyError(key)
+            self._bytes -= self._sizes.pop(key, 0)
+            return self._data.pop(key)
+
+    def __contains__(self, key) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._data))
+
+    def keys(self) -> list:
+        """Snapshot of session ids, coldest first."""
+        return list(self._data.keys())
+
+    def values(self) -> list:
+        """Snapshot of sessions, coldest first."""
+        return list(self._data.values())
+
+    def items(self) -> list:
+        """Snapshot of (id, session) pairs, coldest first."""
+        return list(self._data.items())
+
+    def clear(self) -> None:
+        """Drop everything (no write-back)."""
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+            self._bytes = 0
@@ -5,6 +5,7 @@ use lazy imports to avoid circular import issues.
 """
 
 import json
+import os
 import re
 import threading
 import time
@@ -13,12 +14,23 @@ from datetime import datetime
 from typing import Optional
 
 from salmalm.constants import DATA_DIR, KST
+from salmalm.core.session_cache import SessionCache
 from salmalm.security.crypto import log
 
 
 # ── Lazy accessors for core.py globals (break circular import) ──
 
 
+def _write(fn, *args):
+    """Run ``fn(conn, *args)`` on the audit.db writer thread and wait for its commit.
+
+    Raises ``TimeoutError`` after ``_WRITE_TIMEOUT``; the job stays queued.
+    """
+    from salmalm.db.aio import audit_db
+
+    return audit_db.submit(fn, *args).result(timeout=_WRITE_TIMEOUT)
+
+
 def _get_db():
     """Get db."""
     from salmalm.core.core import _get_db as _impl
@@ -40,7 +52,284 @@ def _restore_compaction_summary(session_id: str) -> Optional[str]:
     return _impl(session_id)
 
 
-_PERSIST_MESSAGE_LIMIT = 50  # Max messages to persist to SQLite
+_PERSIST_MESSAGE_LIMIT = 50  # Messages a restored session can hold after hydrate()
+# Messages loaded eagerly on restore. Enough for listing and for chat/memory/
+# creative turns (trim_history keeps <= 20); anything that needs the full
+# history or addresses messages by index calls hydrate() first.
+_ACTIVE_WINDOW = 20
+_LOG_RETAIN = 1000  # Live log rows kept per session by purge_message_log()
+_WRITE_TIMEOUT = 30.0  # Seconds to wait on the audit.db writer, as the audit flush and usage ledger do
+
+
+def _saveable_message(m: dict) -> Optional[dict]:
+    """Persistable form of a message (base64 images replaced), or None to skip it."""
+    content = m.get("content")
+    if isinstance(content, list):
+        # Multimodal — replace base64 images with placeholder, keep text
+        parts = []
+        for b in content:
+            if b.get("type") == "text":
+                parts.append(b)
+            elif b.get("type") == "image":
+                # Replace heavy base64 with marker so context is preserved
+                parts.append({"type": "text", "text": "[Image was attached to this message]"})
+        return {**m, "content": parts} if parts else None
+    if isinstance(content, str):
+        return m
+    return None
+
+
+# ── Session index (denormalized list columns on session_store) ──
+
+# Internal/ephemeral sessions — never shown in the sidebar
+_HIDDEN_PREFIXES = ("agent_", "subagent_", "subagent-", "cron-", "test_msg_", "e2e-", "save_test")
+_RE_BOLD = re.compile(r"\*\*([^*]+)\*\*")
+_RE_ITALIC = re.compile(r"\*([^*]+)\*")
+_RE_CODE = re.compile(r"`([^`]+)`")
+
+
+def _is_hidden(session_id: str) -> int:
+    return int(session_id.startswith(_HIDDEN_PREFIXES))
+
+
+def _title_text(m: dict) -> str:
+    """Sidebar title candidate from a user message ("" if it has none)."""
+    if m.get("role") != "user" or not isinstance(m.get("content"), str):
+        return ""
+    raw = m["content"].strip()
+    # Skip file upload info lines as title
+    if raw.startswith("[") and ("uploaded" in raw or "📎" in raw or "🖼" in raw):
+        return ""
+    raw = _RE_BOLD.sub(r"\1", raw)
+    raw = _RE_ITALIC.sub(r"\1", raw)
+    raw = _RE_CODE.sub(r"\1", raw)
+    return raw.replace("*", "").replace("`", "")[:60]
+
+
+def _index_values(messages) -> tuple:
+    """(first_user_text, message_count) for a message list."""
+    messages = [m for m in messages if isinstance(m, dict)]
+    count = sum(1 for m in messages if m.get("role") in ("user", "assistant"))
+    first = next((t for t in map(_title_text, messages) if t), "")
+    return first, count
+
+
+def reindex_session(conn, session_id: str) -> None:
+    """Recompute the index columns of one session from its stored messages (no commit)."""
+    first, count = _index_values(load_session_messages(conn, session_id))
+    conn.execute(
+        "UPDATE session_store SET first_user_text=?, message_count=?, hidden=? WHERE session_id=?",
+        (first, count, _is_hidden(session_id), session_id),
+    )
+
+
+def backfill_session_index(conn) -> int:
+    """Index rows whose ``message_count`` is still NULL; returns how many (commits).
+
+    Run by the schema migration in ``_get_db``: it covers rows written
+    before the index columns existed. Writers fill the columns themselves
+    (``_persist``, branch, import), and the partial index
+    ``idx_session_store_unindexed`` makes the no-op case a single lookup.
+    """
+    stale = conn.execute("SELECT session_id FROM session_store WHERE message_count IS NULL").fetchall()
+    for (sid,) in stale:
+        try:
+            reindex_session(conn, sid)
+        except (json.JSONDecodeError, TypeError, ValueError, AttributeError) as e:
+            log.debug(f"[SESSION] Index backfill failed for {sid}: {e}")
+            conn.execute(
+                "UPDATE session_store SET first_user_text='', message_count=0, hidden=? WHERE session_id=?",
+                (_is_hidden(sid), sid),
+            )
+    if stale:
+        conn.commit()
+    return len(stale)
+
+
+def list_sessions(
+    conn,
+    user_id: Optional[int] = None,
+    limit: Optional[int] = None,
+    before: Optional[str] = None,
+    since: Optional[str] = None,
+) -> dict:
+    """Sidebar session list, newest first, from the denormalized index columns.
+
+    *before* is the ``next_before`` cursor of a previous page (keyset
+    pagination on ``(updated_at, session_id)``); *since* returns only
+    sessions updated after that ``updated_at``. Read-only: the columns are
+    maintained on write (see :func:`backfill_session_index`).
+    """
+    # Skip ghost sessions: no title and no user/assistant messages
+    where = ["hidden=0", "(COALESCE(title, '')!='' OR message_count>0 OR session_id='web')"]
+    params: list = []
+    if user_id:
+        where.append("(user_id=? OR user_id IS NULL)")
+        params.append(user_id)
+    if before:
+        b_ts, _, b_sid = before.partition("|")
+        where.append("(updated_at<? OR (updated_at=? AND session_id<?))")
+        params += [b_ts, b_ts, b_sid]
+    if since:
+        where.append("updated_at>?")
+        params.append(since)
+    sql = (
+        "SELECT session_id, updated_at, title, parent_session_id, first_user_text, message_count "
+        f"FROM session_store WHERE {' AND '.join(where)} ORDER BY updated_at DESC, session_id DESC"
+    )
+    if limit:
+        sql += " LIMIT ?"
+        params.append(limit)
+    rows = conn.execute(sql, params).fetchall()
+
+    sessions = []
+    for sid, updated_at, title, parent_sid, first_text, count in rows:
+        entry = {"id": sid, "title": title or first_text or sid, "updated_at": updated_at, "messages": count}
+        if parent_sid:
+            entry["parent_session_id"] = parent_sid
+        sessions.append(entry)
+    next_before = f"{rows[-1][1]}|{rows[-1][0]}" if limit and len(rows) == limit else None
+    latest = max((r[1] for r in rows), default=since)
+    return {"sessions": sessions, "next_before": next_before, "latest": latest}
+
+
+def _fork_chain(conn, session_id: str) -> list:
+    """``[(session_id, upto), ...]`` whose live log rows make up *session_id*, root first.
+
+    A branch stores only its own suffix plus a ``(parent_session_id,
+    fork_seq)`` pointer: it inherits the parent's live rows with
+    ``seq <= fork_seq`` (recursively), and its own rows start above that.
+    *upto* is None for the session itself. Seqs never overlap between
+    links, so the rows of the whole chain sort by seq alone.
+    """
+    chain, upto, seen = [], None, set()
+    sid = session_id
+    while sid and sid not in seen:
+        seen.add(sid)
+        chain.append((sid, upto))
+        row = conn.execute("SELECT parent_session_id, fork_seq FROM session_store WHERE session_id=?", (sid,)).fetchone()
+        if not row or row[1] is None:
+            break
+        upto = row[1] if upto is None else min(upto, row[1])
+        sid = row[0]
+    chain.reverse()
+    return chain
+
+
+def _chain_where(chain: list) -> tuple:
+    """SQL condition (and params) selecting the log rows of a fork chain."""
+    clauses, params = [], []
+    for sid, upto in chain:
+        if upto is None:
+            clauses.append("session_id=?")
+            params.append(sid)
+        else:
+            clauses.append("(session_id=? AND seq<=?)")
+            params += [sid, upto]
+    return "(" + " OR ".join(clauses) + ")", params
+
+
+def _next_log_seq(conn, session_id: str) -> int:
+    """First unused seq of a session (above its own rows and its fork point)."""
+    return conn.execute(
+        """SELECT MAX(COALESCE((SELECT MAX(seq) FROM session_messages WHERE session_id=?), -1),
+                      COALESCE((SELECT fork_seq FROM session_store WHERE session_id=?), -1)) + 1""",
+        (session_id, session_id),
+    ).fetchone()[0]
+
+
+def _has_log(conn, session_id: str) -> bool:
+    """True if the session's messages live in the log (own rows or a fork pointer)."""
+    return bool(
+        conn.execute(
+            """SELECT EXISTS(SELECT 1 FROM session_messages WHERE session_id=?)
+                   OR EXISTS(SELECT 1 FROM session_store WHERE session_id=? AND fork_seq IS NOT NULL)""",
+            (session_id, session_id),
+        ).fetchone()[0]
+    )
+
+
+def _materialize(conn, session_id: str, from_seq: Optional[int] = None) -> None:
+    """Copy the rows a branch inherits (seq >= *from_seq*) into its own log and drop its fork pointer."""
+    chain = _fork_chain(conn, session_id)[:-1]
+    if chain:
+        where, params = _chain_where(chain)
+        sql = (
+            "INSERT OR IGNORE INTO session_messages (session_id, seq, role, message) "
+            f"SELECT ?, seq, role, message FROM session_messages WHERE deleted=0 AND {where}"
+        )
+        params = [session_id] + params
+        if from_seq is not None:
+            sql += " AND seq>=?"
+            params.append(from_seq)
+        conn.execute(sql, params)
+    conn.execute("UPDATE session_store SET fork_seq=NULL WHERE session_id=?", (session_id,))
+
+
+def detach_forks(conn, session_id: str, from_seq: Optional[int] = None) -> int:
+    """Give branches of *session_id* forked at or above *from_seq* their own copy of what they inherit.
+
+    Called (without commit) before the session rewrites its log from
+    *from_seq* on (everything if None), so those branches keep their view.
+    This is the copy in copy-on-write: it only happens when a parent's
+    history changes below a fork point. Returns the number of branches.
+    """
+    sql = "SELECT session_id FROM session_store WHERE parent_session_id=? AND fork_seq IS NOT NULL"
+    params: list = [session_id]
+    if from_seq is not None:
+        sql += " AND fork_seq>=?"
+        params.append(from_seq)
+    children = conn.execute(sql, params).fetchall()
+    for (child,) in children:
+        _materialize(conn, child)
+    return len(children)
+
+
+def load_session_messages(conn, session_id: str, limit: Optional[int] = None) -> list:
+    """Live messages of a session from the append-only log, oldest first.
+
+    *limit* keeps only the newest messages. Branches resolve their fork
+    pointer through the parent chain. Sessions written before the log
+    existed (or imported as a blob) fall back to ``session_store.messages``.
+    """
+    if _has_log(conn, session_id):
+        where, params = _chain_where(_fork_chain(conn, session_id))
+        rows = conn.execute(
+            f"SELECT message FROM session_messages WHERE deleted=0 AND {where} ORDER BY seq DESC LIMIT ?",
+            (*params, -1 if limit is None else limit),
+        ).fetchall()
+        return [json.loads(r[0]) for r in reversed(rows)]
+    row = conn.execute("SELECT messages FROM session_store WHERE session_id=?", (session_id,)).fetchone()
+    if not row or not row[0]:
+        return []
+    msgs = json.loads(row[0])
+    return msgs[-limit:] if limit else msgs
+
+
+def purge_message_log(conn) -> int:
+    """Delete tombstoned log rows and live rows beyond the newest ``_LOG_RETAIN`` per session.
+
+    Rows a branch still inherits are kept.
+    """
+    n = _purge_log_rows(conn)
+    conn.commit()
+    return n
+
+
+def _purge_log_rows(conn) -> int:
+    """The DELETE behind :func:`purge_message_log` (no commit)."""
+    return conn.execute(
+        """DELETE FROM session_messages WHERE deleted=1 OR rowid IN (
+               SELECT rowid FROM (
+                   SELECT m.rowid, m.session_id, m.seq,
+                          ROW_NUMBER() OVER (PARTITION BY m.session_id ORDER BY m.seq DESC) AS rn
+                   FROM session_messages m WHERE m.deleted=0
+               ) r WHERE rn > ? AND NOT EXISTS (
+                   SELECT 1 FROM session_store c
+                   WHERE c.parent_session_id=r.session_id AND c.fork_seq>=r.seq
+               ))""",
+        (_LOG_RETAIN,),
+    ).rowcount
 
 
 class Session:
@@ -70,6 +359,13 @@ class Session:
         self._thinking_suggested = False  # Track if thinking suggestion shown this session
         self.last_model = "auto"  # Last used model (for UI display)
         self.last_complexity = "auto"  # Last complexity level
+        # Append-only log bookkeeping: (message, content, seq) per logged message
+        self._logged: list = []
+        self._next_seq: Optional[int] = None  # None = not yet synced with session_messages
+        self._saved_meta: Optional[str] = None
+        self._unhydrated = False  # Older log rows not loaded yet (see hydrate)
+        self._persist_lock = threading.Lock()
+        self._revision = 0  # Bumped on persist/hydrate; keys the cache size estimate
 
     def add_system(self, content: str) -> None:
         # Replace existing system message
@@ -77,63 +373,246 @@ class Session:
         self.messages = [m for m in self.messages if m["role"] != "system"]
         self.messages.insert(0, {"role": "system", "content": content})
 
+    def _meta_json(self) -> str:
+        return json.dumps(
+            {
+                "model_override": self.model_override if self.model_override and self.model_override != "auto" else None,
+                "thinking_enabled": self.thinking_enabled,
+                "thinking_level": self.thinking_level,
+                "tts_enabled": self.tts_enabled,
+                "tts_voice": self.tts_voice,
+            },
+            ensure_ascii=False,
+        )
+
+    def _diverge(self, entries: list) -> tuple:
+        """``(k, p)``: ``entries[:p]`` are the logged rows ``_logged[k:k + p]``.
+
+        ``k > 0`` means the first *k* logged messages were dropped from the
+        head of the list; ``(0, 0)`` if the list no longer starts with a
+        logged message. A row matches when both the message dict and its
+        content object are the ones that were written.
+        """
+        logged = self._logged
+        k = 0
+        if entries and logged and entries[0] is not logged[0][0]:
+            first = entries[0]
+            k = next((i for i, e in enumerate(logged) if e[0] is first), 0)
+        p, n = 0, min(len(entries), len(logged) - k)
+        while p < n and entries[p] is logged[k + p][0] and entries[p].get("content") is logged[k + p][1]:
+            p += 1
+        return k, p
+
+    def _is_dirty(self) -> bool:
+        """True if :meth:`_persist` has anything to write."""
+        entries = [m for m in self.messages if m.get("role") != "system"]
+        if self._next_seq is None:
+            return bool(entries)
+        k, p = self._diverge(entries)
+        return k > 0 or p != len(entries) or k + p != len(self._logged) or self._meta_json() != self._saved_meta
+
+    def hydrate(self) -> None:
+        """Load older messages that a restore left in the log (up to ``_PERSIST_MESSAGE_LIMIT``).
+
+        Restores only bring back the active window; call this before
+        anything that addresses messages by index.
+        """
+        if not self._unhydrated:
+            return
+        with self._persist_lock:
+            self._unhydrated = False
+            entries = [m for m in self.messages if m.get("role") != "system"]
+            room = _PERSIST_MESSAGE_LIMIT - len(entries)
+            if room <= 0 or not self._logged or not entries or entries[0] is not self._logged[0][0]:
+                return
+            first_seq = next((seq for _, _, seq in self._logged if seq is not None), None)
+            if first_seq is None:
+                return
+            try:
+                older = self._read_log(_get_db(), room, before=first_seq)
+            except Exception as e:
+                log.warning(f"[SESSION] Hydrate failed for {self.id}: {e}")
+                return
+            if older:
+                pos = self.messages.index(entries[0])
+                self.messages[pos:pos] = [m for m, _, _ in older]
+                self._logged = older + self._logged
+                self._revision += 1
+
+    def _read_log(self, conn, limit: int, before: Optional[int] = None) -> list:
+        """Newest *limit* live log rows (below seq *before*) as ``(message, content, seq)``, oldest first.
+
+        Rows inherited from a parent that is in memory reuse its content
+        objects instead of decoding a second copy (structural sharing; each
+        session still gets its own message dicts).
+        """
+        chain = _fork_chain(conn, self.id)
+        where, params = _chain_where(chain)
+        sql = f"SELECT session_id, seq, message FROM session_messages WHERE deleted=0 AND {where}"
+        if before is not None:
+            sql += " AND seq<?"
+            params.append(before)
+        rows = conn.execute(sql + " ORDER BY seq DESC LIMIT ?", (*params, limit)).fetchall()
+        shared = {}
+        for sid, _ in chain[:-1]:
+            parent = _sessions.peek(sid)
+            if parent is not None:
+                for m, content, seq in parent._logged:
+                    if seq is not None and isinstance(content, str) and m.get("content") is content:
+                        shared[(sid, seq)] = m
+        _ALLOWED_ROLES = {"user", "assistant", "system", "tool"}
+        out = []
+        for sid, seq, raw in reversed(rows):
+            m = shared.get((sid, seq))
+            if m is not None:
+                m = dict(m)
+            else:
+                try:
+                    m = json.loads(raw)
+                except (json.JSONDecodeError, TypeError):
+                    continue
+            # Sanitize: only allow known roles from DB
+            if isinstance(m, dict) and m.get("role") in _ALLOWED_ROLES:
+                out.append((m, m.get("content"), seq))
+        if len(out) != len(rows):
+            log.warning("[SESSION] Dropped %d invalid messages from DB for %s", len(rows) - len(out), self.id)
+        return out
+
     def _persist(self):
         """Save session to SQLite (only text messages, skip image data).
 
+        Messages live in the append-only ``session_messages`` log, one row
+        per message keyed by (session_id, seq). Only the difference against
+        what was already written is stored: appended messages are inserted,
+        and if earlier messages were removed or replaced (rollback, edit,
+        compaction) the diverged tail is tombstoned by seq range and
+        rewritten. Messages dropped from the head (history trims) are
+        tombstoned as one range without rewriting anything. System messages
+        are not logged — the system prompt is rebuilt on restore.
+
+        Branches share their parent's rows up to ``fork_seq``: diverging
+        below the fork point lowers the pointer, and a parent rewriting
+        rows a branch inherits first copies them to that branch
+        (:func:`detach_forks`).
+
+        The writes run as one job on the audit.db writer thread, group-
+        committed with other subsystems' writes; this waits until they are
+        durable, at most ``_WRITE_TIMEOUT`` seconds. A job that times out may
+        still commit later, so the log is resynced on the next persist.
+
         Handles: disk full (OSError), DB lock (sqlite3.OperationalError).
         """
-        try:
-            # Filter out large binary data from messages
-            saveable = []
-            for m in self.messages[-_PERSIST_MESSAGE_LIMIT:]:  # Keep last 50 messages
-                if isinstance(m.get("content"), list):
-                    # Multimodal — replace base64 images with placeholder, keep text
-                    parts = []
-                    for b in m["content"]:
-                        if b.get("type") == "text":
-                            parts.append(b)
-                        elif b.get("type") == "image":
-                            # Replace heavy base64 with marker so context is preserved
-                            parts.append({"type": "text", "text": "[Image was attached to this message]"})
-                    if parts:
-                        saveable.append({**m, "content": parts})
-                elif isinstance(m.get("content"), str):
-                    saveable.append(m)
-            conn = _get_db()
-            # Persist session metadata (model_override, thinking, tts)
-            _meta = json.dumps(
-                {
-                    "model_override": self.model_override if self.model_override and self.model_override != "auto" else None,
-                    "thinking_enabled": self.thinking_enabled,
-                    "thinking_level": self.thinking_level,
-                    "tts_enabled": self.tts_enabled,
-                    "tts_voice": self.tts_voice,
-                },
-                ensure_ascii=False,
+        with self._persist_lock:
+            self._revision += 1
+            try:
+                self._logged, self._next_seq, self._saved_meta = _write(self._persist_job)
+            except TimeoutError:
+                # Unknown outcome: rewrite from memory next time, after the queued job
+                self._logged, self._next_seq = [], None
+                log.warning(f"Session persist timed out after {_WRITE_TIMEOUT:.0f}s: {self.id}")
+            except Exception as e:
+                log.warning(f"Session persist error: {e}")
+
+    def _persist_job(self, conn) -> tuple:
+        """Write the log diff on *conn* (no commit); returns the new (logged, next_seq, saved_meta)."""
+        entries = [m for m in self.messages if m.get("role") != "system"]
+        logged = self._logged
+        k, p = self._diverge(entries)
+        next_seq = self._next_seq
+        rewrote = next_seq is None
+        if next_seq is None:
+            # Not synced with the log yet: in-memory messages are authoritative
+            detach_forks(conn, self.id)
+            next_seq = _next_log_seq(conn, self.id)
+            conn.execute("UPDATE session_messages SET deleted=1 WHERE session_id=? AND deleted=0", (self.id,))
+            conn.execute("UPDATE session_store SET fork_seq=NULL WHERE session_id=?", (self.id,))
+        else:
+            if k:
+                # Head dropped (trim): everything before the first kept row.
+                # A branch takes its own copy of the inherited rows it keeps.
+                keep = next((seq for _, _, seq in logged[k:] if seq is not None), next_seq)
+                detach_forks(conn, self.id)
+                _materialize(conn, self.id, from_seq=keep)
+                conn.execute(
+                    "UPDATE session_messages SET deleted=1 WHERE session_id=? AND seq<? AND deleted=0",
+                    (self.id, keep),
+                )
+                rewrote = True
+            first = next((seq for _, _, seq in logged[k + p :] if seq is not None), None)
+            if first is not None:
+                # Diverged below a fork point: move the pointer down instead
+                detach_forks(conn, self.id, first)
+                conn.execute(
+                    "UPDATE session_store SET fork_seq=? WHERE session_id=? AND fork_seq>=?",
+                    (first - 1, self.id, first),
+                )
+                conn.execute(
+                    "UPDATE session_messages SET deleted=1 WHERE session_id=? AND seq>=? AND deleted=0",
+                    (self.id, first),
+                )
+                rewrote = True
+        tail, rows = [], []
+        for m in entries[p:]:
+            saveable = _saveable_message(m)
+            seq = None
+            if saveable is not None:
+                seq = next_seq
+                next_seq += 1
+                rows.append((self.id, seq, m.get("role"), json.dumps(saveable, ensure_ascii=False)))
+            tail.append((m, m.get("content"), seq))
+        if rows:
+            conn.executemany(
+                "INSERT INTO session_messages (session_id, seq, role, message) VALUES (?,?,?,?)", rows
             )
-            # Use UPSERT (INSERT ... ON CONFLICT DO UPDATE) instead of INSERT OR REPLACE.
-            # INSERT OR REPLACE = DELETE + INSERT → wipes columns not in the INSERT list
-            # (title, parent_session_id, branch_index → all reset to DEFAULT on every save).
-            # UPSERT only overwrites the columns we explicitly set, preserving the rest.
+        # Persist session metadata (model_override, thinking, tts)
+        _meta = self._meta_json()
+        # Use UPSERT (INSERT ... ON CONFLICT DO UPDATE) instead of INSERT OR REPLACE.
+        # INSERT OR REPLACE = DELETE + INSERT → wipes columns not in the INSERT list
+        # (title, parent_session_id, branch_index → all reset to DEFAULT on every save).
+        # UPSERT only overwrites the columns we explicitly set, preserving the rest.
+        # The legacy messages blob is emptied; the log is authoritative.
+        conn.execute(
+            """INSERT INTO session_store (session_id, messages, updated_at, user_id, session_meta, hidden)
+               VALUES (?,'[]',?,?,?,?)
+               ON CONFLICT(session_id) DO UPDATE SET
+                   messages='[]',
+                   updated_at=excluded.updated_at,
+                   user_id=excluded.user_id,
+                   session_meta=excluded.session_meta""",
+            (
+                self.id,
+                datetime.now(KST).isoformat(),
+                self.user_id,
+                _meta,
+                _is_hidden(self.id),
+            ),
+        )  # noqa: F405
+        # Keep the session-list index columns current
+        if rewrote:
+            reindex_session(conn, self.id)
+        elif tail:
+            first, count = _index_values([m for m, _, seq in tail if seq is not None])
             conn.execute(
-                """INSERT INTO session_store (session_id, messages, updated_at, user_id, session_meta)
-                   VALUES (?,?,?,?,?)
-                   ON CONFLICT(session_id) DO UPDATE SET
-                       messages=excluded.messages,
-                       updated_at=excluded.updated_at,
-                       user_id=excluded.user_id,
-                       session_meta=excluded.session_meta""",
-                (
-                    self.id,
-                    json.dumps(saveable, ensure_ascii=False),
-                    datetime.now(KST).isoformat(),
-                    self.user_id,
-                    _meta,
-                ),
-            )  # noqa: F405
-            conn.commit()
-        except Exception as e:
-            log.warning(f"Session persist error: {e}")
+                """UPDATE session_store SET
+                       message_count=message_count+?,
+                       first_user_text=CASE WHEN COALESCE(first_user_text, '')='' THEN ?
+                                            ELSE first_user_text END
+                   WHERE session_id=?""",
+                (count, first, self.id),
+            )
+        return logged[k : k + p] + tail, next_seq, _meta
+
+    def _load_log(self, conn) -> None:
+        """Restore the active window (last ``_ACTIVE_WINDOW`` live messages) from the log.
+
+        Older messages stay in the log until :meth:`hydrate`.
+        """
+        logged = self._read_log(conn, _ACTIVE_WINDOW)
+        self.messages = [m for m, _, _ in logged]
+        self._logged = logged
+        self._unhydrated = len(logged) == _ACTIVE_WINDOW
+        self._next_seq = _next_log_seq(conn, self.id)
+        self._saved_meta = self._meta_json()
 
     def add_user(self, content: str) -> None:
         """Add a user message to the session.
@@ -196,45 +675,70 @@ def set_telegram_bot(bot: object) -> None:
 
 
 _llm_cron = None  # Set during startup by __main__ (LLMCron instance)
-_sessions = {}  # type: ignore[var-annotated]
-_session_lock = threading.Lock()  # Protects _sessions dict
 _session_cleanup_ts = 0.0
 _SESSION_TTL = 3600 * 8  # 8 hours
-_SESSION_MAX = 200
+
+
+def _evict_timing(sid: str) -> None:
+    try:
+        from salmalm.core.session_manager import evict_session_timing
+
+        evict_session_timing(sid)
+    except Exception:
+        pass
+
+
+def _write_back(session: Session) -> None:
+    """Cache eviction hook: persist unsaved changes, then forget the session."""
+    if session._is_dirty():
+        session._persist()
+    _evict_timing(session.id)
+    try:
+        from salmalm.monitoring.metrics import session_cache_evictions
+
+        session_cache_evictions.inc()
+    except Exception:
+        pass
+
+
+# LRU, bounded by estimated bytes (SALMALM_SESSION_CACHE_MB); see session_cache.py
+_sessions = SessionCache(on_evict=_write_back)
+_session_lock = threading.Lock()  # Serializes create-or-restore in get_session
 
 
 def _cleanup_sessions():
-    """Remove inactive sessions older than TTL."""
+    """Remove inactive sessions older than TTL and purge the message log."""
     global _session_cleanup_ts
     now = time.time()
     if now - _session_cleanup_ts < 600:  # Check every 10 min
         return
     _session_cleanup_ts = now
-    with _session_lock:
-        stale = [sid for sid, s in _sessions.items() if now - s.last_active > _SESSION_TTL]
-        for sid in stale:
-            try:
-                _sessions[sid]._persist()
-            except Exception as e:
-                log.debug(f"Suppressed: {e}")
-            del _sessions[sid]
-            try:
-                from salmalm.core.session_manager import evict_session_timing
-                evict_session_timing(sid)
-            except Exception:
-                pass
-        if stale:
-            log.info(f"[CLEAN] Session cleanup: removed {len(stale)} inactive sessions")
-        # Hard cap
-        if len(_sessions) > _SESSION_MAX:
-            by_age = sorted(_sessions.items(), key=lambda x: x[1].last_active)
-            for sid, _ in by_age[: len(_sessions) - _SESSION_MAX]:
-                del _sessions[sid]
-                try:
-                    from salmalm.core.session_manager import evict_session_timing
-                    evict_session_timing(sid)
-                except Exception:
-                    pass
+    try:
+        _write(_purge_log_rows)
+    except Exception as e:
+        log.debug(f"Suppressed: {e}")
+    # Cold end of the LRU first; stops at the first session still in use
+    stale = _sessions.expire(lambda s: now - s.last_active > _SESSION_TTL)
+    for session in stale:
+        try:
+            if session._is_dirty():
+                session._persist()
+        except Exception as e:
+            log.debug(f"Suppressed: {e}")
+        _evict_timing(session.id)
+    if stale:
+        log.info(f"[CLEAN] Session cleanup: removed {len(stale)} inactive sessions")
+
+
+def _record_lookup(hit: bool) -> None:
+    _sessions.record(hit)
+    try:
+        from salmalm.monitoring.metrics import session_cache_bytes, session_cache_lookups
+
+        session_cache_lookups.inc(result="hit" if hit else "miss")
+        session_cache_bytes.set(_sessions.bytes)
+    except Exception:
+        pass
 
 
 def get_session(session_id: str, user_id: Optional[int] = None) -> Session:
@@ -250,8 +754,9 @@ def get_session(session_id: str, user_id: Optional[int] = None) -> Session:
         session_id = re.sub(r"[^a-zA-Z0-9_\-\.@:]", "_", session_id)[:128]
     _cleanup_sessions()
     with _session_lock:
-        if session_id in _sessions:
-            existing = _sessions[session_id]
+        existing = _sessions.get(session_id)
+        _record_lookup(existing is not None)
+        if existing is not None:
             # Access control: deny if owned by a *different* authenticated user.
             if user_id is not None:
                 _owner_conflict = (
@@ -272,7 +777,8 @@ def get_session(session_id: str, user_id: Optional[int] = None) -> Session:
                     return _sessions[isolated_id]
             return existing
         if session_id not in _sessions:
-            _sessions[session_id] = Session(session_id, user_id=user_id)
+            session = Session(session_id, user_id=user_id)
+            _sessions[session_id] = session
             # Try to restore from SQLite
             try:
                 conn = _get_db()
@@ -280,55 +786,69 @@ def get_session(session_id: str, user_id: Optional[int] = None) -> Session:
                     "SELECT messages, session_meta FROM session_store WHERE session_id=?",
                     (session_id,),
                 ).fetchone()
+                has_log = _has_log(conn, session_id)
                 if row:
-                    try:
-                        restored = json.loads(row[0])
-                        if not isinstance(restored, list):
-                            raise ValueError("Session data is not a list")
-                        # Sanitize: only allow known roles from DB
-                        _ALLOWED_ROLES = {"user", "assistant", "system", "tool"}
-                        sanitized = [m for m in restored if isinstance(m, dict) and m.get("role") in _ALLOWED_ROLES]
-                        if len(sanitized) != len(restored):
-                            log.warning("[SESSION] Dropped %d invalid-role messages from DB for %s",
-                                        len(restored) - len(sanitized), session_id)
-                        _sessions[session_id].messages = sanitized
-                        log.info(f"[NOTE] Session restored: {session_id} ({len(sanitized)} msgs)")
-                    except (json.JSONDecodeError, ValueError, TypeError) as je:
-                        # Corrupted session JSON — start fresh
-                        log.warning(f"[SESSION] Corrupt session JSON for {session_id}: {je}")
-                        _sessions[session_id].messages = []
+                    if has_log:
+                        session._load_log(conn)
+                        log.info(f"[NOTE] Session restored: {session_id} ({len(session.messages)} msgs)")
+                    else:
+                        # Legacy blob — moved into the log by the next _persist()
+                        try:
+                            restored = json.loads(row[0])
+                            if not isinstance(restored, list):
+                                raise ValueError("Session data is not a list")
+                            # Sanitize: only allow known roles from DB
+                            _ALLOWED_ROLES = {"user", "assistant", "system", "tool"}
+                            sanitized = [m for m in restored if isinstance(m, dict) and m.get("role") in _ALLOWED_ROLES]
+                            if len(sanitized) != len(restored):
+                                log.warning("[SESSION] Dropped %d invalid-role messages from DB for %s",
+                                            len(restored) - len(sanitized), session_id)
+                            session.messages = sanitized
+                            log.info(f"[NOTE] Session restored: {session_id} ({len(sanitized)} msgs)")
+                        except (json.JSONDecodeError, ValueError, TypeError) as je:
+                            # Corrupted session JSON — start fresh
+                            log.warning(f"[SESSION] Corrupt session JSON for {session_id}: {je}")
+                            session.messages = []
                     # Restore session metadata (model_override, thinking, tts)
                     try:
                         _meta_json = row[1] if len(row) > 1 and row[1] else "{}"
                         _meta = json.loads(_meta_json)
                         _saved_ov = _meta.get("model_override")
                         if _saved_ov and _saved_ov != "auto":
-                            _sessions[session_id].model_override = _saved_ov
+                            session.model_override = _saved_ov
                         if _meta.get("thinking_enabled") is not None:
-                            _sessions[session_id].thinking_enabled = _meta["thinking_enabled"]
+                            session.thinking_enabled = _meta["thinking_enabled"]
                         if _meta.get("thinking_level"):
-                            _sessions[session_id].thinking_level = _meta["thinking_level"]
+                            session.thinking_level = _meta["thinking_level"]
                         if _meta.get("tts_enabled") is not None:
-                            _sessions[session_id].tts_enabled = _meta["tts_enabled"]
+                            session.tts_enabled = _meta["tts_enabled"]
                         if _meta.get("tts_voice"):
-                            _sessions[session_id].tts_voice = _meta["tts_voice"]
+                            session.tts_voice = _meta["tts_voice"]
                     except (json.JSONDecodeError, IndexError, TypeError) as me:
                         log.debug(f"Session meta restore: {me}")
+                    if has_log:
+                        session._saved_meta = session._meta_json()
                     # Refresh system prompt
                     from salmalm.core.prompt import build_system_prompt
 
-                    _sessions[session_id].add_system(build_system_prompt(full=False))
-                    return _sessions[session_id]
+                    session.add_system(build_system_prompt(full=False))
+                    _sessions.touch(session_id)  # account the restored size
+                    return session
             except Exception as e:
                 log.warning(f"Session restore error: {e}")
+            # Not in SQLite: fall back to the JSON snapshot indexed at startup
+            disk_path = _disk_path(session_id)
+            if disk_path.stem in _disk_manifest and _load_disk_snapshot(session, disk_path):
+                _sessions.touch(session_id)
+                return session
             from salmalm.core.prompt import build_system_prompt
 
-            _sessions[session_id].add_system(build_system_prompt(full=True))
+            session.add_system(build_system_prompt(full=True))
 
             # Cross-session continuity: inject last compaction summary
             prev_summary = _restore_compaction_summary(session_id)
             if prev_summary:
-                _sessions[session_id].messages.append(
+                session.messages.append(
                     {
                         "role": "system",
                         "content": f"[Previous session context]\n{prev_summary}",
@@ -343,7 +863,7 @@ def get_session(session_id: str, user_id: Optional[int] = None) -> Session:
                 if vault.is_unlocked:
                     dm = vault.get("default_model")
                     if dm and dm != "auto":
-                        _sessions[session_id]._default_model = dm
+                        session._default_model = dm
                         # Don't set model_override here — let user's explicit
                         # UI selection (persisted in DB) take precedence.
                         # _default_model is used as fallback in auto-routing only.
@@ -351,7 +871,7 @@ def get_session(session_id: str, user_id: Optional[int] = None) -> Session:
                 log.debug(f"Suppressed: {e}")
 
             log.info(
-                f"[NOTE] New session: {session_id} (system prompt: {len(_sessions[session_id].messages[0]['content'])} chars)"
+                f"[NOTE] New session: {session_id} (system prompt: {len(session.messages[0]['content'])} chars)"
             )
             _audit_log(
                 "session_create",
@@ -364,16 +884,19 @@ def get_session(session_id: str, user_id: Optional[int] = None) -> Session:
             active_sessions.set(len(_sessions))
         except Exception:
             pass
-        return _sessions[session_id]
+        _sessions.touch(session_id)
+        return session
 
 
 def rollback_session(session_id: str, count: int) -> dict:
     """Roll back the last `count` user+assistant message pairs.
 
-    Removed messages are backed up in session_message_backup table.
+    Removed messages are backed up in session_message_backup table; their
+    log rows are tombstoned by seq range on the next persist.
     Returns {'ok': True, 'removed': <int>} or {'ok': False, 'error': ...}.
     """
     session = get_session(session_id)
+    session.hydrate()
     non_system = [(i, m) for i, m in enumerate(session.messages) if m.get("role") != "system"]
     pairs_removed = 0
     indices_to_remove = []
@@ -399,17 +922,17 @@ def rollback_session(session_id: str, count: int) -> dict:
         return {"ok": False, "error": "No messages to rollback"}
 
     removed_msgs = [session.messages[i] for i in sorted(indices_to_remove)]
-    conn = _get_db()
-    conn.execute(
-        "INSERT INTO session_message_backup (session_id, messages_json, removed_at, reason) VALUES (?,?,?,?)",
-        (
-            session_id,
-            json.dumps(removed_msgs, ensure_ascii=False),
-            datetime.now(KST).isoformat(),
-            "rollback",
-        ),
-    )  # noqa: F405
-    conn.commit()
+    _write(
+        lambda conn: conn.execute(
+            "INSERT INTO session_message_backup (session_id, messages_json, removed_at, reason) VALUES (?,?,?,?)",
+            (
+                session_id,
+                json.dumps(removed_msgs, ensure_ascii=False),
+                datetime.now(KST).isoformat(),
+                "rollback",
+            ),
+        )
+    )
 
     for i in sorted(indices_to_remove, reverse=True):
         session.messages.pop(i)
@@ -426,7 +949,10 @@ def rollback_session(session_id: str, count: int) -> dict:
 def branch_session(session_id: str, message_index: int, user_id: int | None = None) -> dict:
     """Create a new session branching from session_id at message_index.
 
-    Copies messages[0:message_index+1] into a new session.
+    The branch is stored copy-on-write: a ``session_store`` row pointing at
+    the parent's log (``parent_session_id``, ``fork_seq``), with no messages
+    of its own until it diverges. Nothing is copied and the branch is not
+    loaded; ``get_session`` resolves it on first use.
     Returns {'ok': True, 'new_session_id': ...} or error.
     """
 
@@ -435,40 +961,66 @@ def branch_session(session_id: str, message_index: int, user_id: int | None = No
     if user_id is not None and session.user_id is not None and session.user_id != user_id:
         log.warning("[BRANCH] User %s denied branch of session %s (owned by %s)", user_id, session_id, session.user_id)
         return {"ok": False, "error": "Access denied — session belongs to another user"}
+    session.hydrate()
     if message_index < 0 or message_index >= len(session.messages):
         return {"ok": False, "error": f"Invalid message_index: {message_index}"}
 
     new_id = f"branch-{_uuid.uuid4().hex[:8]}"
-    new_session = Session(new_id)
-    new_session.messages = json.loads(json.dumps(session.messages[: message_index + 1]))
-    new_session.metadata["parent_session_id"] = session_id
-    new_session.metadata["branch_index"] = message_index
-
-    with _session_lock:
-        _sessions[new_id] = new_session
-
-    new_session._persist()
-
-    conn = _get_db()
-    conn.execute(
-        "UPDATE session_store SET parent_session_id=?, branch_index=? WHERE session_id=?",
-        (session_id, message_index, new_id),
-    )
-    conn.commit()
+    # The fork point must be in the log: flush the parent first
+    if session._is_dirty():
+        session._persist()
+    with session._persist_lock:
+        prefix = [m for m in session.messages[: message_index + 1] if m.get("role") != "system"]
+        k, p = session._diverge(prefix)
+        logged = session._logged[:p] if k == 0 and p == len(prefix) else None
+    if logged is None:
+        # Parent could not be persisted: fall back to writing the prefix out
+        log.warning(f"[BRANCH] {session_id} is not fully logged, copying prefix into {new_id}")
+        new_session = Session(new_id)
+        new_session.messages = [dict(m) for m in session.messages[: message_index + 1]]
+        with _session_lock:
+            _sessions[new_id] = new_session
+        new_session._persist()
+        fork_seq = None
+    else:
+        fork_seq = next((seq for _, _, seq in reversed(logged) if seq is not None), None)
+    first, count = _index_values(prefix)
+
+    def _insert_branch(conn):
+        conn.execute(
+            """INSERT INTO session_store (session_id, messages, updated_at, hidden) VALUES (?,'[]',?,?)
+               ON CONFLICT(session_id) DO NOTHING""",
+            (new_id, datetime.now(KST).isoformat(), _is_hidden(new_id)),
+        )
+        conn.execute(
+            "UPDATE session_store SET parent_session_id=?, branch_index=?, fork_seq=?, first_user_text=?, "
+            "message_count=? WHERE session_id=?",
+            (session_id, message_index, fork_seq, first, count, new_id),
+        )
 
     try:
-        save_session_to_disk(new_id)
-    except Exception as e:
-        log.debug(f"Suppressed: {e}")
+        _write(_insert_branch)
+    except TimeoutError:
+        log.warning(f"[BRANCH] {session_id} -> {new_id} timed out after {_WRITE_TIMEOUT:.0f}s")
+        return {"ok": False, "error": "Session store busy, try again"}
+
     _audit_log("session_branch", f"{session_id} -> {new_id} at index {message_index}")
     return {"ok": True, "new_session_id": new_id, "parent_session_id": session_id}
 
 
 _SESSIONS_DIR = DATA_DIR / "sessions"
+_disk_manifest: dict = {}  # session_id -> (mtime, size) of sessions/{id}.json; loaded on first access
+_restore_stats: dict = {}  # timing of the last restore_all_sessions_from_disk(), shown by doctor
+
+
+def _disk_path(session_id: str):
+    # Path traversal guard: sanitize session_id before using as filename
+    _safe_sid = re.sub(r"[^a-zA-Z0-9_\-\.]", "_", session_id)[:128]
+    return _SESSIONS_DIR / f"{_safe_sid}.json"
 
 
 def save_session_to_disk(session_id: str) -> None:
-    """Serialize session state to ~/.salmalm/sessions/{id}.json."""
+    """Serialize session state to ~/.salmalm/sessions/{id}.json (compact JSON)."""
     with _session_lock:
         session = _sessions.get(session_id)
         if not session:
@@ -490,43 +1042,78 @@ def save_session_to_disk(session_id: str) -> None:
             "last_active": session.last_active,
             "metadata": session.metadata,
         }
-        # Path traversal guard: sanitize session_id before using as filename
-        _safe_sid = re.sub(r"[^a-zA-Z0-9_\-\.]", "_", session_id)[:128]
-        path = _SESSIONS_DIR / f"{_safe_sid}.json"
-        path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+        path = _disk_path(session_id)
+        path.write_text(json.dumps(data, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+        st = path.stat()
+        _disk_manifest[path.stem] = (st.st_mtime, st.st_size)
     except Exception as e:
         log.warning(f"[DISK] Failed to save session {session_id}: {e}")
 
 
-def restore_session(session_id: str) -> Optional[Session]:
-    """Load session from ~/.salmalm/sessions/{id}.json."""
-    path = _SESSIONS_DIR / f"{session_id}.json"
-    if not path.exists():
-        return None
+def _load_disk_snapshot(session: "Session", path) -> bool:
+    """Fill *session* from a sessions/{id}.json snapshot; False if unreadable."""
     try:
         data = json.loads(path.read_text(encoding="utf-8"))
-        session = Session(session_id)
         session.messages = data.get("messages", [])
         session.created = data.get("created", time.time())
         session.last_active = data.get("last_active", time.time())
         session.metadata = data.get("metadata", {})
-        with _session_lock:
-            _sessions[session_id] = session
-        log.info(f"[DISK] Restored session from disk: {session_id} ({len(session.messages)} msgs)")
-        return session
     except Exception as e:
-        log.warning(f"[DISK] Failed to restore session {session_id}: {e}")
+        log.warning(f"[DISK] Failed to restore session {session.id}: {e}")
+        return False
+    log.info(f"[DISK] Restored session from disk: {session.id} ({len(session.messages)} msgs)")
+    return True
+
+
+def restore_session(session_id: str) -> Optional[Session]:
+    """Load session from ~/.salmalm/sessions/{id}.json."""
+    path = _SESSIONS_DIR / f"{session_id}.json"
+    if not path.exists():
+        return None
+    session = Session(session_id)
+    if not _load_disk_snapshot(session, path):
         return None
+    with _session_lock:
+        _sessions[session_id] = session
+    return session
+
+
+def scan_session_files() -> dict:
+    """``{session_id: (mtime, size)}`` for ``sessions/*.json`` — stat only, nothing parsed."""
+    manifest = {}
+    try:
+        with os.scandir(_SESSIONS_DIR) as it:
+            for entry in it:
+                if entry.name.endswith(".json") and entry.is_file():
+                    st = entry.stat()
+                    manifest[entry.name[:-5]] = (st.st_mtime, st.st_size)
+    except FileNotFoundError:
+        pass
+    return manifest
 
 
 def restore_all_sessions_from_disk() -> None:
-    """On startup, restore all sessions from disk."""
-    if not _SESSIONS_DIR.exists():
-        return
-    count = 0
-    for path in _SESSIONS_DIR.glob("*.json"):
-        sid = path.stem
-        if restore_session(sid):
-            count += 1
-    if count:
-        log.info(f"[DISK] Restored {count} sessions from disk")
+    """On startup, index session files on disk; get_session() loads each on first access.
+
+    Only a manifest of (id, mtime, size) is built here, so boot time and
+    memory no longer grow with the number of saved sessions. The whole call
+    is timed into ``_restore_stats`` (``seconds``, with the directory scan
+    alone as ``scan_seconds``) for doctor.
+    """
+    t0 = time.perf_counter()
+    manifest = scan_session_files()
+    scanned = time.perf_counter()
+    _disk_manifest.clear()
+    _disk_manifest.update(manifest)
+    _restore_stats.update(
+        sessions=len(manifest),
+        bytes=sum(size for _, size in manifest.values()),
+        scan_seconds=scanned - t0,
+        seconds=time.perf_counter() - t0,
+        at=time.time(),
+    )
+    if manifest:
+        log.info(
+            f"[DISK] Indexed {len(manifest)} session files in {_restore_stats['seconds'] * 1000:.1f} ms"
+            " (loaded on first access)"
+        )
@@ -90,6 +90,14 @@ class ShutdownManager:
         except Exception as e:
             log.warning(f"[SHUTDOWN] Session flush error: {e}")
 
+        # Flush write-behind usage/cost/quota accounting
+        try:
+            from salmalm.core.usage_ledger import usage_ledger
+
+            usage_ledger.close()
+        except Exception as e:
+            log.warning(f"[SHUTDOWN] Usage ledger flush error: {e}")
+
         # Phase 5: Notify WebSocket clients
         log.info("[SHUTDOWN] Phase 5: Notify WebSocket clients")
         try:
@@ -0,0 +1,241 @@
+"""Write-behind ledger for usage, cost and quota accounting.
+
+A single LLM call used to commit up to four transactions: ``usage_stats``
+and ``usage_detail`` in audit.db, ``user_quotas`` (cost) and
+``daily_quota`` (tokens) in auth.db. :data:`usage_ledger` collects these
+writes in memory instead. A background thread applies them with one
+transaction per database when ``_BATCH_SIZE`` events are pending or
+``_FLUSH_INTERVAL`` seconds (``SALMALM_USAGE_FLUSH_INTERVAL``) have
+passed, whichever comes first. This follows the same thresholds as the
+audit buffer in ``core/audit.py``.
+
+Quota checks stay exact: readers hold :attr:`UsageLedger.flush_lock`
+around their DB read and add :meth:`UsageLedger.pending_tokens` /
+:meth:`UsageLedger.pending_cost`. Pending writes are flushed by the
+shutdown sequence and at interpreter exit.
+"""
+
+from __future__ import annotations
+
+import atexit
+import logging
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from salmalm.db import get_connection
+
+log = logging.getLogger(__name__)
+
+_FLUSH_INTERVAL = float(os.environ.get("SALMALM_USAGE_FLUSH_INTERVAL", "2"))
+_BATCH_SIZE = 50  # flush early once this many events are pending
+_MAX_RETRIES = 3  # consecutive failed flushes before a database's pending writes are dropped
+
+
+class UsageLedger:
+    """In-memory usage/cost/quota deltas, flushed in batches per database."""
+
+    def __init__(self, interval: float = _FLUSH_INTERVAL, batch_size: int = _BATCH_SIZE) -> None:
+        """Init  ."""
+        self._interval = interval
+        self._batch_size = batch_size
+        self._lock = threading.Lock()
+        self.flush_lock = threading.RLock()  # held for a whole flush
+        self._usage: Dict[str, List[tuple]] = {}  # audit.db -> [(ts, model, in, out, cost, user_id)]
+        self._costs: Dict[Tuple[str, int], float] = {}  # (users db, user_id) -> USD
+        self._tokens: Dict[Tuple[str, str, str], int] = {}  # (auth.db, user_id, date) -> tokens
+        self._events = 0
+        self._failures: Dict[str, int] = {}  # db path -> consecutive failed flushes
+        self._pending = threading.Event()  # something to flush
+        self._full = threading.Event()  # batch size reached or closing
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self.flushes = 0
+        self.flushed_events = 0
+
+    # ── recording ──
+
+    def record_usage(
+        self, db_path, ts: str, model: str, input_tokens: int, output_tokens: int, cost: float, user_id=None
+    ) -> None:
+        """Queue one ``usage_stats`` + ``usage_detail`` row pair."""
+        with self._lock:
+            self._usage.setdefault(str(db_path), []).append((ts, model, input_tokens, output_tokens, cost, user_id))
+            self._added()
+
+    def record_cost(self, db_path, user_id: int, cost: float) -> None:
+        """Queue a cost increment for ``user_quotas`` (daily and monthly)."""
+        key = (str(db_path), int(user_id))
+        with self._lock:
+            self._costs[key] = self._costs.get(key, 0.0) + cost
+            self._added()
+
+    def record_tokens(self, db_path, user_id: str, date: str, tokens: int) -> None:
+        """Queue a ``daily_quota`` token increment."""
+        key = (str(db_path), user_id, date)
+        with self._lock:
+            self._tokens[key] = self._tokens.get(key, 0) + tokens
+            self._added()
+
+    def pending_cost(self, db_path, user_id: int) -> float:
+        """Cost recorded for *user_id* but not yet flushed."""
+        with self._lock:
+            return self._costs.get((str(db_path), int(user_id)), 0.0)
+
+    def pending_tokens(self, db_path, user_id: str, date: str) -> int:
+        """Tokens recorded for *user_id* on *date* but not yet flushed."""
+        with self._lock:
+            return self._tokens.get((str(db_path), user_id, date), 0)
+
+    def _added(self) -> None:
+        # Called with self._lock held
+        self._events += 1
+        if self._events == 1:
+            self._pending.set()
+            if self._thread is None or not self._thread.is_alive():
+                self._start()
+        if self._events >= self._batch_size:
+            self._full.set()
+
+    # ── flushing ──
+
+    def _start(self) -> None:
+        if self._thread is None:
+            atexit.register(self.close)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="usage-ledger", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            self._pending.wait()
+            self._full.wait(self._interval)
+            self._pending.clear()
+            self._full.clear()
+            try:
+                self.flush()
+            except Exception as e:  # noqa: broad-except
+                log.warning("[USAGE] ledger flush failed: %s", e)
+            if self._closed:
+                return
+
+    def flush(self) -> int:
+        """Write everything pending now; returns the number of events written."""
+        with self.flush_lock:
+            with self._lock:
+                usage, costs, tokens, events = self._usage, self._costs, self._tokens, self._events
+                self._usage, self._costs, self._tokens, self._events = {}, {}, {}, 0
+            if not events:
+                return 0
+            by_db: Dict[str, dict] = {}
+            for path, rows in usage.items():
+                by_db.setdefault(path, {})["usage"] = rows
+            for (path, uid), cost in costs.items():
+                by_db.setdefault(path, {}).setdefault("costs", {})[uid] = cost
+            for (path, uid, date), n in tokens.items():
+                by_db.setdefault(path, {}).setdefault("tokens", {})[(uid, date)] = n
+            for path, parts in by_db.items():
+                try:
+                    self._write(path, parts)
+                    self._failures.pop(path, None)
+                except Exception as e:  # noqa: broad-except
+                    self._requeue(path, parts, e)
+            self.flushes += 1
+            self.flushed_events += events
+            return events
+
+    @classmethod
+    def _write(cls, path: str, parts: dict) -> None:
+        """Apply one database's pending writes in a single transaction.
+
+        audit.db writes go through its writer thread (group commit).
+        """
+        from salmalm.core import core as _core
+
+        if path == str(_core.AUDIT_DB):
+            from salmalm.db.aio import audit_db
+
+            audit_db.submit(cls._apply, parts).result(timeout=30)
+            return
+        conn = get_connection(path)
+        try:
+            cls._apply(conn, parts)
+            conn.commit()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _apply(conn, parts: dict) -> None:
+        """The SQL for one database's pending writes (no commit)."""
+        rows = parts.get("usage")
+        if rows:
+            conn.executemany(
+                "INSERT INTO usage_stats (ts, model, input_tokens, output_tokens, cost, user_id) VALUES (?,?,?,?,?,?)",
+                rows,
+            )
+            conn.executemany(
+                "INSERT INTO usage_detail (ts, session_id, model, input_tokens, output_tokens, cost) "
+                "VALUES (?,'',?,?,?,?)",
+                [r[:5] for r in rows],
+            )
+        costs = parts.get("costs")
+        if costs:
+            from datetime import datetime
+
+            from salmalm.constants import KST
+            from salmalm.features.users import UserManager
+
+            now = datetime.now(KST).isoformat()
+            conn.executemany(
+                "INSERT OR IGNORE INTO user_quotas (user_id, daily_limit, monthly_limit, current_daily, "
+                "current_monthly, last_daily_reset, last_monthly_reset) VALUES (?,?,?,0,0,?,?)",
+                [(uid, UserManager.DEFAULT_DAILY_LIMIT, UserManager.DEFAULT_MONTHLY_LIMIT, now, now) for uid in costs],
+            )
+            conn.executemany(
+                "UPDATE user_quotas SET current_daily = current_daily + ?, "
+                "current_monthly = current_monthly + ? WHERE user_id=?",
+                [(c, c, uid) for uid, c in costs.items()],
+            )
+        tokens = parts.get("tokens")
+        if tokens:
+            from salmalm.web.auth import DailyQuotaManager
+
+            conn.execute(DailyQuotaManager._DB_TABLE)
+            conn.executemany(
+                """INSERT INTO daily_quota (user_id, date, tokens) VALUES (?,?,?)
+                   ON CONFLICT(user_id, date) DO UPDATE SET tokens = tokens + excluded.tokens""",
+                [(uid, date, n) for (uid, date), n in tokens.items()],
+            )
+
+    def _requeue(self, path: str, parts: dict, error: Exception) -> None:
+        failures = self._failures[path] = self._failures.get(path, 0) + 1
+        if failures >= _MAX_RETRIES:
+            self._failures.pop(path, None)
+            log.error("[USAGE] dropping pending usage for %s after %d failed flushes: %s", path, failures, error)
+            return
+        log.warning("[USAGE] flush to %s failed (attempt %d), will retry: %s", path, failures, error)
+        with self._lock:
+            if parts.get("usage"):
+                self._usage[path] = parts["usage"] + self._usage.get(path, [])
+            for uid, c in parts.get("costs", {}).items():
+                self._costs[(path, uid)] = self._costs.get((path, uid), 0.0) + c
+            for (uid, date), n in parts.get("tokens", {}).items():
+                self._tokens[(path, uid, date)] = self._tokens.get((path, uid, date), 0) + n
+            self._events += 1
+            self._pending.set()
+
+    def close(self) -> None:
+        """Flush synchronously and stop the background thread."""
+        self._closed = True
+        self._pending.set()
+        self._full.set()
+        self.flush()
+
+    def stats(self) -> dict:
+        """Pending events and flush counters."""
+        with self._lock:
+            pending = self._events
+        return {"pending": pending, "flushes": self.flushes, "flushed_events": self.flushed_events}
+
+
+usage_ledger = UsageLedger()
@@ -1,3 +1,4 @@
 from .connection import get_connection, db_conn
+from .aio import AsyncDB
 
-__all__ = ["get_connection", "db_conn"]
+__all__ = ["get_connection", "db_conn", "AsyncDB"]
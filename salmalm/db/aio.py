@@ -0,0 +1,307 @@
+"""Async facade over SQLite for FastAPI routes.
+
+``async def`` handlers must not run ``sqlite3`` calls on the event loop: a
+slow query (or a writer waiting on the database lock) stalls every other
+request and WebSocket stream. :class:`AsyncDB` moves that work off the
+loop:
+
+  - reads run on a bounded thread pool, one connection per worker thread;
+  - writes are queued to a single writer thread that owns the write
+    connection. It takes whatever is queued (up to ``_MAX_BATCH`` jobs),
+    runs each inside a savepoint and commits them together — one fsync and
+    one write-lock acquisition per group instead of per caller. A failing
+    job is rolled back to its savepoint without affecting the others.
+
+Threaded code uses :meth:`AsyncDB.submit`, which returns a
+``concurrent.futures.Future`` resolved once the group commit is durable;
+``.result()`` waits for it, or the future can be dropped to fire and forget.
+Queue-to-commit latency (with a rolling p99), write-lock wait and group
+sizes are exported as metrics.
+
+Usage::
+
+    rows = await audit_db.fetchall("SELECT ... WHERE id=?", (sid,))
+    await audit_db.execute("UPDATE ...", params)
+    audit_db.submit(insert_rows, rows).result()                 # from a plain thread
+    result = await audit_db.read(list_sessions, user_id=uid)   # fn(conn, ...)
+    await audit_db.write(some_helper, arg)                     # committed
+    user = await auth_db.call(auth_manager.authenticate, u, p)  # own connections
+
+``connect`` is called in the worker thread and must return a connection
+usable from that thread; callers that already cache per thread (like
+``core._get_db``) are used as-is.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Optional, Union
+
+_STOP = object()
+_MAX_BATCH = 64  # write jobs folded into one commit
+
+
+def _observe(kind: str, seconds: float) -> None:
+    try:
+        from salmalm.monitoring.metrics import db_op_duration
+
+        db_op_duration.observe(seconds, kind=kind)
+    except Exception:
+        pass
+
+
+def _p99(values) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] if ordered else 0.0
+
+
+class AsyncDB:
+    """Bounded read pool plus a single writer thread for one SQLite database."""
+
+    def __init__(self, connect: Callable[[], Any], readers: Optional[int] = None, name: str = "db") -> None:
+        """Init  ."""
+        self._connect = connect
+        self._readers = readers or int(os.environ.get("SALMALM_DB_READERS", "4"))
+        self.name = name
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._queue: "queue.Queue" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._writer_ident: Optional[int] = None
+        self._lock = threading.Lock()
+        self._latencies: deque = deque(maxlen=1000)  # queue-to-commit seconds, recent writes
+        self.commits = 0
+        self.writes = 0
+        self.lock_wait_max = 0.0
+
+    @classmethod
+    def for_path(cls, path: Union[str, Path, Callable[[], Union[str, Path]]], **kwargs) -> "AsyncDB":
+        """Facade opening one WAL connection per worker thread to *path* (or a path callable)."""
+        local = threading.local()
+
+        def connect():
+            target = str(path() if callable(path) else path)
+            conn = getattr(local, "conn", None)
+            if conn is None or getattr(local, "path", None) != target:
+                from salmalm.db.connection import get_connection
+
+                conn = get_connection(target)
+                local.conn, local.path = conn, target
+            return conn
+
+        return cls(connect, **kwargs)
+
+    # ── threads ──
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(self._readers, thread_name_prefix=f"{self.name}-read")
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._write_loop, name=f"{self.name}-writer", daemon=True)
+                self._writer.start()
+
+    def _write_loop(self) -> None:
+        self._writer_ident = threading.get_ident()
+        try:
+            while True:
+                job = self._queue.get()
+                if job is _STOP:
+                    return
+                batch, stop = [job], False
+                while len(batch) < _MAX_BATCH:
+                    try:
+                        job = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if job is _STOP:
+                        stop = True
+                        break
+                    batch.append(job)
+                self._commit_batch(batch)
+                if stop:
+                    return
+        finally:
+            self._writer_ident = None
+
+    def _commit_batch(self, batch: list) -> None:
+        """Run queued jobs, each in a savepoint, and commit them as one transaction."""
+        batch = [job for job in batch if job[0].set_running_or_notify_cancel()]
+        if not batch:
+            return
+        outcomes = []
+        conn = None
+        try:
+            conn = self._connect()
+            t0 = time.perf_counter()
+            if not conn.in_transaction:
+                conn.execute("BEGIN IMMEDIATE")  # blocks while another connection holds the write lock
+            lock_wait = time.perf_counter() - t0
+            for _fut, fn, args, kwargs, _queued in batch:
+                t1 = time.perf_counter()
+                conn.execute("SAVEPOINT write_job")
+                try:
+                    outcomes.append((True, fn(conn, *args, **kwargs)))
+                    if conn.in_transaction:  # the job may have committed on its own
+                        conn.execute("RELEASE write_job")
+                except BaseException as e:  # noqa: broad-except — delivered to the caller
+                    if conn.in_transaction:
+                        conn.execute("ROLLBACK TO write_job")
+                        conn.execute("RELEASE write_job")
+                    outcomes.append((False, e))
+                _observe("write", time.perf_counter() - t1)
+            conn.commit()
+        except BaseException as e:  # noqa: broad-except — the whole group failed
+            if conn is not None:
+                try:
+                    conn.rollback()
+                except Exception:
+                    pass
+            for job in batch:
+                job[0].set_exception(e)
+            return
+        done = time.perf_counter()
+        self._record_commit(lock_wait, [done - job[4] for job in batch])
+        for job, (ok, value) in zip(batch, outcomes):
+            if ok:
+                job[0].set_result(value)
+            else:
+                job[0].set_exception(value)
+
+    def _record_commit(self, lock_wait: float, latencies: list) -> None:
+        self.commits += 1
+        self.writes += len(latencies)
+        self.lock_wait_max = max(self.lock_wait_max, lock_wait)
+        self._latencies.extend(latencies)
+        try:
+            from salmalm.monitoring.metrics import db_commit_batch, db_lock_wait, db_write_latency, db_write_latency_p99
+
+            db_commit_batch.observe(len(latencies), db=self.name)
+            db_lock_wait.observe(lock_wait, db=self.name)
+            for seconds in latencies:
+                db_write_latency.observe(seconds, db=self.name)
+            db_write_latency_p99.set(_p99(self._latencies), db=self.name)
+        except Exception:
+            pass
+
+    def write_stats(self) -> dict:
+        """Group-commit counters and recent queue-to-commit p99 (seconds)."""
+        return {
+            "commits": self.commits,
+            "writes": self.writes,
+            "p99": _p99(list(self._latencies)),
+            "lock_wait_max": self.lock_wait_max,
+        }
+
+    def _run_read(self, fn: Callable, args: tuple, kwargs: dict):
+        t0 = time.perf_counter()
+        try:
+            return fn(self._connect(), *args, **kwargs)
+        finally:
+            _observe("read", time.perf_counter() - t0)
+
+    def close(self) -> None:
+        """Stop the writer (after queued writes) and the read pool."""
+        with self._lock:
+            writer, self._writer = self._writer, None
+            pool, self._pool = self._pool, None
+        if writer is not None and writer.is_alive():
+            self._queue.put(_STOP)
+            writer.join(timeout=5)
+        if pool is not None:
+            pool.shutdown(wait=False)
+
+    # ── primitives ──
+
+    async def read(self, fn: Callable, *args, **kwargs):
+        """Run ``fn(conn, *args, **kwargs)`` on a read connection."""
+        self._start()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, self._run_read, fn, args, kwargs)
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """Queue ``fn(conn, *args, **kwargs)`` for the writer thread (no commit inside *fn*).
+
+        The returned future resolves with *fn*'s result once its group commit
+        is durable, or with its exception (its changes rolled back). A job
+        that submits another runs it inline, as part of the same group.
+        """
+        fut: Future = Future()
+        if threading.get_ident() == self._writer_ident:
+            try:
+                fut.set_result(fn(self._connect(), *args, **kwargs))
+            except BaseException as e:  # noqa: broad-except — delivered to the caller
+                fut.set_exception(e)
+            return fut
+        self._start()
+        self._queue.put((fut, fn, args, kwargs, time.perf_counter()))
+        return fut
+
+    async def write(self, fn: Callable, *args, **kwargs):
+        """Run ``fn(conn, *args, **kwargs)`` on the writer thread and commit."""
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    async def call(self, fn: Callable, *args, **kwargs):
+        """Run a blocking callable that manages its own connections on the read pool.
+
+        For existing helpers (auth, quota) that open their own connections;
+        their writes are not serialized through the writer thread.
+        """
+        self._start()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, functools.partial(fn, *args, **kwargs))
+
+    # ── convenience ──
+
+    async def fetchall(self, sql: str, params: tuple = ()) -> list:
+        """SELECT → all rows."""
+        return await self.read(lambda conn: conn.execute(sql, params).fetchall())
+
+    async def fetchone(self, sql: str, params: tuple = ()):
+        """SELECT → first row or None."""
+        return await self.read(lambda conn: conn.execute(sql, params).fetchone())
+
+    async def execute(self, sql: str, params: tuple = ()) -> int:
+        """Write statement through the writer thread; returns the row count."""
+        return await self.write(lambda conn: conn.execute(sql, params).rowcount)
+
+    async def executemany(self, sql: str, rows) -> int:
+        """Batched write statement; returns the row count."""
+        return await self.write(lambda conn: conn.executemany(sql, rows).rowcount)
+
+
+_audit_local = threading.local()
+
+
+def _audit_connect():
+    from salmalm.core import core as _core
+
+    # Reopen if AUDIT_DB was repointed (tests, data-dir changes) since this thread connected
+    path = str(_core.AUDIT_DB)
+    if getattr(_audit_local, "path", path) != path:
+        old = getattr(_core._thread_local, "audit_conn", None)
+        _core._thread_local.audit_conn = None
+        if old is not None:
+            old.close()
+    _audit_local.path = path
+    return _core._get_db()
+
+
+def _auth_path():
+    from salmalm.web.auth import AUTH_DB
+
+    return AUTH_DB
+
+
+# audit.db (sessions, usage): core._get_db keeps one connection per thread and
+# creates the schema on first use.
+audit_db = AsyncDB(_audit_connect, name="audit-db")
+# auth.db (users, tokens, quotas)
+auth_db = AsyncDB.for_path(_auth_path, name="auth-db")
@@ -1,19 +1,50 @@
-"""WAL-mode SQLite connection helpers."""
+"""WAL-mode SQLite connection helpers.
+
+``get_connection`` hands out pooled connections: each database path has a
+:class:`ConnectionPool` that keeps a few idle connections per thread, so
+the usual ``conn = get_connection(p) ... conn.close()`` pattern reuses an
+open connection (PRAGMAs applied once, prepared statements cached) instead
+of reconnecting on every call. ``close()`` returns the connection to the
+pool, rolling back anything left uncommitted — the same outcome as closing
+it. A connection is never shared while checked out, so nested
+``get_connection`` calls on one thread get separate connections.
+
+Idle connections are health-checked on checkout: they are replaced if the
+database file was deleted or swapped out, and pinged after a long idle
+period. ``:memory:`` databases are never pooled. Set ``SALMALM_DB_POOL=0``
+to open a fresh connection per call.
+"""
 from __future__ import annotations
 
+import os
 import sqlite3
 import threading
+import time
 from contextlib import contextmanager
 from pathlib import Path
+from typing import Optional
 
 _lock = threading.Lock()
-_connections: dict = {}
+_connections: dict = {}  # path -> ConnectionPool
 
+_POOL_ENABLED = os.environ.get("SALMALM_DB_POOL", "1") != "0"
+_CACHED_STATEMENTS = 256
+_MAX_IDLE = 4  # idle connections kept per thread and path
+_PING_AFTER = 30.0  # seconds idle before a checkout runs SELECT 1
 
-def get_connection(db_path: str | Path, *, timeout: float = 30.0) -> sqlite3.Connection:
-    """Get a WAL-mode SQLite connection."""
-    path = str(db_path)
-    conn = sqlite3.connect(path, timeout=timeout, check_same_thread=False)
+
+def _file_id(path: str) -> Optional[tuple]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_dev, st.st_ino)
+
+
+def _open(path: str, timeout: float, factory=sqlite3.Connection) -> sqlite3.Connection:
+    conn = sqlite3.connect(
+        path, timeout=timeout, check_same_thread=False, factory=factory, cached_statements=_CACHED_STATEMENTS
+    )
     conn.execute("PRAGMA journal_mode=WAL")
     conn.execute("PRAGMA synchronous=NORMAL")
     conn.execute("PRAGMA busy_timeout=10000")
@@ -22,6 +53,118 @@ def get_connection(db_path: str | Path, *, timeout: float = 30.0) -> sqlite3.Con
     return conn
 
 
+class PooledConnection(sqlite3.Connection):
+    """Connection whose ``close()`` gives it back to its pool."""
+
+    _pool: Optional["ConnectionPool"] = None
+    _checked_out = False
+    _file_id: Optional[tuple] = None
+    _idle_since = 0.0
+
+    def close(self) -> None:
+        """Return to the pool (uncommitted changes are rolled back)."""
+        pool = self._pool
+        if pool is None:
+            super().close()
+        elif self._checked_out:
+            pool.release(self)
+
+    def discard(self) -> None:
+        """Really close the connection."""
+        self._pool = None
+        self._checked_out = False
+        super().close()
+
+
+class ConnectionPool:
+    """Per-thread idle connections to one SQLite database."""
+
+    def __init__(self, path: str, timeout: float = 30.0, max_idle: int = _MAX_IDLE) -> None:
+        """Init  ."""
+        self.path = path
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self._local = threading.local()
+        self.opened = 0
+        self.reused = 0
+        self.replaced = 0
+
+    def _idle(self) -> list:
+        idle = getattr(self._local, "idle", None)
+        if idle is None:
+            idle = self._local.idle = []
+        return idle
+
+    def _healthy(self, conn: PooledConnection) -> bool:
+        if conn._file_id != _file_id(self.path):
+            return False  # database file deleted or replaced
+        if time.monotonic() - conn._idle_since > _PING_AFTER:
+            try:
+                conn.execute("SELECT 1").fetchone()
+            except sqlite3.Error:
+                return False
+        return True
+
+    def acquire(self) -> PooledConnection:
+        """Check out a connection for the calling thread."""
+        idle = self._idle()
+        while idle:
+            conn = idle.pop()
+            if self._healthy(conn):
+                self.reused += 1
+                break
+            self.replaced += 1
+            conn.discard()
+        else:
+            conn = _open(self.path, self.timeout, factory=PooledConnection)
+            conn._pool = self
+            conn._file_id = _file_id(self.path)
+            self.opened += 1
+        conn.row_factory = sqlite3.Row
+        conn._checked_out = True
+        return conn
+
+    def release(self, conn: PooledConnection) -> None:
+        """Give a connection back; it is closed instead if broken or the pool is full."""
+        conn._checked_out = False
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            conn.discard()
+            return
+        idle = self._idle()
+        if len(idle) >= self.max_idle:
+            conn.discard()
+            return
+        conn._idle_since = time.monotonic()
+        idle.append(conn)
+
+    def stats(self) -> dict:
+        """Connections opened, reused and replaced by health checks."""
+        return {"path": self.path, "opened": self.opened, "reused": self.reused, "replaced": self.replaced}
+
+
+def get_pool(db_path: str | Path, *, timeout: float = 30.0) -> ConnectionPool:
+    """The pool for *db_path* (created on first use)."""
+    path = str(db_path)
+    pool = _connections.get(path)
+    if pool is None:
+        with _lock:
+            pool = _connections.get(path)
+            if pool is None:
+                pool = _connections[path] = ConnectionPool(path, timeout=timeout)
+    return pool
+
+
+def get_connection(db_path: str | Path, *, timeout: float = 30.0) -> sqlite3.Connection:
+    """Get a WAL-mode SQLite connection (pooled; ``close()`` returns it)."""
+    path = str(db_path)
+    if not _POOL_ENABLED or path == ":memory:" or path.startswith("file:") or not path:
+        return _open(path, timeout)
+    return get_pool(path, timeout=timeout).acquire()
+
+
 @contextmanager
 def db_conn(db_path: str | Path, *, timeout: float = 30.0):
     """Context manager for SQLite connection with WAL mode."""
@@ -4,11 +4,13 @@ Features:
 - Per-session abort flags
 - Partial response preservation (streaming tokens accumulated)
 - Streaming token accumulator for abort recovery
+- In-flight LLM calls are cancelled (closes the provider connection)
 - Thread-safe with fine-grained locking
 """
 
 from __future__ import annotations
 
+import asyncio
 import threading
 import time
 from typing import Dict, Optional
@@ -31,6 +33,7 @@ class AbortController:
         self._partial_responses: Dict[str, str] = {}
         self._accumulators: Dict[str, list] = {}
         self._abort_times: Dict[str, float] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
 
     def set_abort(self, session_id: str) -> None:
         """Set abort."""
@@ -41,7 +44,22 @@ class AbortController:
             if session_id in self._accumulators:
                 self._partial_responses[session_id] = "".join(self._accumulators[session_id])
                 del self._accumulators[session_id]
+            task = self._tasks.get(session_id)
             log.info(f"[ABORT] Generation abort requested: session={session_id}")
+        if task is not None and not task.done():
+            # May be called from another thread (HTTP handler); cancel on the task's own loop.
+            task.get_loop().call_soon_threadsafe(task.cancel)
+
+    def bind_task(self, session_id: str, task: asyncio.Task) -> None:
+        """Register the in-flight LLM call of *session_id* so set_abort can cancel it."""
+        with self._lock:
+            self._tasks[session_id] = task
+
+    def unbind_task(self, session_id: str, task: asyncio.Task) -> None:
+        """Forget *task* once the call has finished."""
+        with self._lock:
+            if self._tasks.get(session_id) is task:
+                del self._tasks[session_id]
 
     def is_aborted(self, session_id: str) -> bool:
         """Is aborted."""
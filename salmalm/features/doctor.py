@@ -100,6 +100,7 @@ class Doctor:
             self.check_config_integrity,
             self.check_database_integrity,
             self.check_session_integrity,
+            self.check_session_startup,
             self.check_api_keys,
             self.check_channels,
             self.check_port_availability,
@@ -177,6 +178,22 @@ class Doctor:
             return _status(False, f"Bad sessions: {', '.join(bad)}", fixable=True, issue_id="bad_sessions")
         return _status(True, f"{len(files)} session files OK")
 
+    def check_session_startup(self) -> dict:
+        """세션 시작 복원 시간 (sessions/*.json은 첫 접근 시 로드)."""
+        from salmalm.core import session_store
+
+        source = "at startup"
+        if not session_store._restore_stats:  # CLI doctor: run the same restore the server runs at boot
+            session_store.restore_all_sessions_from_disk()
+            source = "measured now"
+        stats = dict(session_store._restore_stats)
+        msg = (
+            f"Session restore: {stats['sessions']} files ({stats['bytes'] / 1e6:.1f} MB) in "
+            f"{stats['seconds'] * 1000:.1f} ms {source} (scan {stats['scan_seconds'] * 1000:.1f} ms), "
+            "loaded on first access"
+        )
+        return _status(stats["seconds"] < 1.0, msg)
+
     def check_api_keys(self) -> dict:
         """API 키 설정 여부 + 실제 유효성 검증."""
         import urllib.request
@@ -101,6 +101,7 @@ class ConversationFork:
         from salmalm.core import get_session
 
         session = get_session(session_id)
+        session.hydrate()  # message_index counts from the start of the history
         msgs = session.messages
 
         ua_indices = [(i, m) for i, m in enumerate(msgs) if m.get("role") in ("user", "assistant")]
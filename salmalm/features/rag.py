@@ -23,7 +23,9 @@ Usage:
   context = rag_engine.build_context("DB schema", max_chars=3000)
 """
 
+import functools
 import hashlib
+import heapq
 import json
 import math
 import re
@@ -147,6 +149,32 @@ _STOP_WORDS = frozenset(
 
 # Korean jamo constants moved to rag_utils.py
 
+# ── Tokenizer ──
+
+_WORD_RE = re.compile(r"[\w가-힣]+")
+_SPACE_RE = re.compile(r"\s+")
+_HANGUL_RE = re.compile(r"[가-힣]+")
+_ASCII_WORD_RE = re.compile(r"[a-z]+")
+_TOKEN_CACHE_SIZE = 65536
+
+
+@functools.lru_cache(maxsize=_TOKEN_CACHE_SIZE)
+def _word_units(word: str) -> tuple:
+    """Unigrams for one lowercased word: (), (word,), (stem,) or (stem, word)."""
+    if len(word) <= 1 or word in _STOP_WORDS:
+        return ()
+    # Apply stemming for English words
+    if _ASCII_WORD_RE.fullmatch(word):
+        stemmed = simple_stem(word)
+        return (stemmed,) if stemmed == word else (stemmed, word)
+    return (word,)
+
+
+@functools.lru_cache(maxsize=_TOKEN_CACHE_SIZE)
+def _jamo_token(word: str) -> str:
+    """Jamo token for a Hangul run."""
+    return f"j:{decompose_jamo(word)}"
+
 
 # ── English Stemming (simple Porter-like) ──
 
@@ -165,6 +193,12 @@ from salmalm.features.rag_utils import _DEFAULT_CONFIG  # noqa: F401
 
 
 from salmalm.features.rag_indexer import RAGIndexerMixin
+from salmalm.features.rag_embeddings import migrate_embeddings
+from salmalm.features.rag_vectors import EmbeddingMatrix
+from salmalm.features.rag_ann import IVFIndex
+from salmalm.features.rag_ingest import IngestPipeline
+from salmalm.features.rag_terms import _POSTINGS_DDL, _POSTINGS_INDEX_DDL, TermDictionary, migrate_compact, unpack_tf
+from salmalm.core.retrieval_cache import RETRIEVAL_POOL, next_generation, retrieval_cache
 
 
 class RAGEngine(RAGIndexerMixin):
@@ -175,12 +209,24 @@ class RAGEngine(RAGIndexerMixin):
         self._db_path = db_path or (DATA_DIR / "rag.db")
         self._config_path = config_path
         self._conn: Optional[sqlite3.Connection] = None
-        self._db_lock = threading.Lock()
+        self._db_lock = threading.RLock()  # self._conn and the in-memory index state below
         self._mtimes: Dict[str, float] = {}
+        self._discovered: set = set()  # labels found by the last file discovery
         self._last_check = 0
         self._doc_count = 0
+        self._total_len = 0
         self._avg_dl = 0.0
-        self._idf_cache: Dict[str, float] = {}
+        self._df: Dict[str, int] = {}
+        self._idf_cache: Dict[str, float] = {}  # lazily memoized from _df, see _idf()
+        self._index_gen = 0
+        self._emb_matrix: Optional[EmbeddingMatrix] = None
+        self._emb_matrix_gen = -1
+        self._emb_added: set = set()  # chunk ids written since the matrix was last refreshed
+        self._emb_dropped: set = set()  # chunk ids removed since then
+        self._ann: Optional[IVFIndex] = None
+        self._terms = TermDictionary()
+        self._ingest_lock = threading.Lock()  # one reindex/rebuild at a time
+        self._ingest_progress: Dict[str, object] = {"state": "idle"}
         self._initialized = False
         self._config: Optional[dict] = None
 
@@ -193,8 +239,13 @@ class RAGEngine(RAGIndexerMixin):
 
     def _ensure_db(self):
         """Ensure db."""
-        if self._conn:
-            return
+        with self._db_lock:
+            if self._conn:
+                return
+            self._open_db()
+
+    def _open_db(self) -> None:
+        """Open the connection, create/migrate the schema and load the index state."""
         self._conn = get_connection(self._db_path)
         self._conn.execute("PRAGMA journal_mode=WAL")
         self._conn.execute("PRAGMA synchronous=NORMAL")
@@ -224,80 +275,130 @@ class RAGEngine(RAGIndexerMixin):
         )""")
         self._conn.execute("""CREATE TABLE IF NOT EXISTS rag_embeddings (
             chunk_hash TEXT PRIMARY KEY,
-            embedding TEXT NOT NULL,
+            embedding BLOB NOT NULL,
             provider TEXT,
             dimensions INTEGER,
             created_at TEXT DEFAULT CURRENT_TIMESTAMP
         )""")
+        self._conn.execute("""CREATE TABLE IF NOT EXISTS terms (
+            id INTEGER PRIMARY KEY,
+            term TEXT NOT NULL UNIQUE
+        )""")
+        self._conn.execute(_POSTINGS_DDL)
+        self._conn.execute("""CREATE TABLE IF NOT EXISTS ann_centroids (
+            list_id INTEGER PRIMARY KEY,
+            centroid BLOB NOT NULL
+        )""")
+        self._conn.execute("""CREATE TABLE IF NOT EXISTS ann_assign (
+            chunk_id INTEGER PRIMARY KEY,
+            list_id INTEGER NOT NULL
+        )""")
         self._conn.execute("""CREATE INDEX IF NOT EXISTS idx_chunks_source
             ON chunks(source)""")
         self._conn.commit()
+        migrate_compact(self._conn, self._terms)
+        self._conn.execute(_POSTINGS_INDEX_DDL)
+        self._conn.commit()
+        self._backfill_postings()
+        migrate_embeddings(self._conn)
         self._load_stats()
+        self._mtimes = dict(self._conn.execute("SELECT source, MAX(mtime) FROM chunks GROUP BY source").fetchall())
+        self._discovered = set(self._mtimes)
         self._initialized = True
 
     def _load_stats(self):
-        """Load cached statistics."""
-        row = self._conn.execute("SELECT COUNT(*), AVG(token_count) FROM chunks").fetchone()
-        self._doc_count = row[0] or 0
-        self._avg_dl = row[1] or 1.0
-        self._idf_cache.clear()
-        for term, df in self._conn.execute("SELECT term, df FROM doc_freq"):
-            self._idf_cache[term] = math.log((self._doc_count - df + 0.5) / (df + 0.5) + 1)
+        """Load corpus statistics from disk and start a new index generation."""
+        with self._db_lock:
+            self._index_gen = next_generation()
+            row = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(token_count), 0) FROM chunks").fetchone()
+            self._doc_count = row[0] or 0
+            self._total_len = row[1] or 0
+            self._avg_dl = self._total_len / self._doc_count if self._doc_count else 1.0
+            self._df = {term: df for term, df in self._conn.execute("SELECT term, df FROM doc_freq")}
+            self._idf_cache.clear()
+            self._emb_matrix = None  # bulk swap: reload the matrix on the next semantic search
+
+    def _apply_stats_delta(self, d_docs: int, d_len: int, df_delta: Dict[str, int]) -> None:
+        """Fold an indexing delta into the in-memory statistics.
+
+        IDF depends on N, so a change in chunk count drops the whole memo
+        (refilled lazily per query term); otherwise only the touched terms
+        are invalidated.
+        """
+        with self._db_lock:
+            self._index_gen = next_generation()
+            self._doc_count += d_docs
+            self._total_len += d_len
+            self._avg_dl = self._total_len / self._doc_count if self._doc_count else 1.0
+            for term, d in df_delta.items():
+                df = self._df.get(term, 0) + d
+                if df > 0:
+                    self._df[term] = df
+                else:
+                    self._df.pop(term, None)
+            if d_docs:
+                self._idf_cache.clear()
+            else:
+                for term in df_delta:
+                    self._idf_cache.pop(term, None)
+
+    def _idf(self, term: str) -> float:
+        """BM25 IDF of *term* (0 for unknown terms), memoized until stats change."""
+        idf = self._idf_cache.get(term)
+        if idf is None:
+            df = self._df.get(term)
+            if df is None:
+                return 0.0
+            idf = self._idf_cache[term] = math.log((self._doc_count - df + 0.5) / (df + 0.5) + 1)
+        return idf
 
     @staticmethod
     def _tokenize(text: str) -> List[str]:
-        """Tokenize with unigrams + bigrams + char 3-grams + jamo + stemming."""
+        """Tokenize with unigrams + bigrams + char 3-grams + jamo + stemming.
+
+        Per-word work (stop words, stemming, jamo) is memoized in bounded
+        LRU caches; each n-gram family is emitted straight into the output
+        list.
+        """
         text_lower = text.lower()
-        # Split on non-word chars (keeping Korean)
-        raw = re.findall(r"[\w가-힣]+", text_lower)
-        unigrams = []
-        for t in raw:
-            if len(t) <= 1 or t in _STOP_WORDS:
-                continue
-            # Apply stemming for English words
-            if re.match(r"^[a-z]+$", t):
-                stemmed = simple_stem(t)
-                unigrams.append(stemmed)
-                if stemmed != t:
-                    unigrams.append(t)  # Keep original too
-            else:
-                unigrams.append(t)
+        # Split on non-word chars (keeping Korean); stemmed English keeps the original too
+        tokens: List[str] = []
+        for word in _WORD_RE.findall(text_lower):
+            tokens += _word_units(word)
 
         # Bigrams
-        bigrams = [f"{unigrams[i]}_{unigrams[i + 1]}" for i in range(len(unigrams) - 1)]
+        n = len(tokens)
+        tokens += [f"{tokens[i]}_{tokens[i + 1]}" for i in range(n - 1)]
 
-        # Character 3-grams (especially useful for Korean)
-        char_trigrams = []
-        clean = re.sub(r"\s+", "", text_lower)
-        for i in range(len(clean) - 2):
-            tri = clean[i : i + 3]
-            if re.match(r"^[\w가-힣]{3}$", tri):
-                char_trigrams.append(f"c3:{tri}")
+        # Character 3-grams (especially useful for Korean): every window
+        # lies inside one run of word chars once whitespace is removed
+        for run in _WORD_RE.findall(_SPACE_RE.sub("", text_lower)):
+            if len(run) >= 3:
+                tokens += ["c3:" + run[i : i + 3] for i in range(len(run) - 2)]
 
         # Jamo decomposition for Korean text
-        korean_chars = re.findall(r"[가-힣]+", text_lower)
-        jamo_tokens = []
-        for kw in korean_chars:
+        for kw in _HANGUL_RE.findall(text_lower):
             if len(kw) >= 2:
-                jamo = decompose_jamo(kw)
-                jamo_tokens.append(f"j:{jamo}")
+                tokens.append(_jamo_token(kw))
 
-        return unigrams + bigrams + char_trigrams + jamo_tokens
+        return tokens
 
     def index_file(self, label: str, fpath: Path) -> None:
         """Index a single file."""
         self._ensure_db()
         try:
             mtime = fpath.stat().st_mtime
-            self._mtimes[label] = mtime
             text = fpath.read_text(encoding="utf-8", errors="replace")
             self._index_text(label, text, mtime)
+            with self._db_lock:
+                self._mtimes[label] = mtime
             self._last_check = time.time()
         except Exception as e:
             log.warning(f"RAG index_file error ({label}): {e}")
 
-    def _chunk_and_index(self, label, text, mtime, chunk_size, chunk_overlap, new_docs, vectors, doc_freq):
-        """Chunk text and add to index arrays."""
+    @classmethod
+    def _chunk_and_index(cls, label, text, mtime, chunk_size, chunk_overlap, new_docs, vectors, doc_freq):
+        """Chunk text and add to index arrays (a classmethod so ingest workers can call it)."""
         lines = text.splitlines()
         step = max(1, chunk_size - chunk_overlap)
         for i in range(0, len(lines), step):
@@ -307,146 +408,138 @@ class RAGEngine(RAGIndexerMixin):
                 continue
             if len(chunk_text) > MAX_CHUNK_CHARS:
                 chunk_text = chunk_text[:MAX_CHUNK_CHARS]
-            tokens = self._tokenize(chunk_text)
+            tokens = cls._tokenize(chunk_text)
             if not tokens:
                 continue
             h = hashlib.md5(chunk_text.encode(), usedforsecurity=False).hexdigest()[:12]
-            new_docs.append((label, i + 1, i + len(chunk_lines), chunk_text, json.dumps(tokens), len(tokens), mtime, h))
+            new_docs.append((label, i + 1, i + len(chunk_lines), chunk_text, tokens, len(tokens), mtime, h))
             vectors.append(compute_tf(tokens))
             for t in set(tokens):
                 doc_freq[t] = doc_freq.get(t, 0) + 1
 
     def reindex(self, force: bool = False) -> None:
-        """Rebuild the index from source files."""
+        """Bring the index up to date with source files.
+
+        Without *force* only changed or vanished sources are touched (delta
+        statistics); ``force=True`` rebuilds the whole index through the
+        parallel, resumable :class:`IngestPipeline`, as does a plain call
+        on an empty index or after an interrupted rebuild. Only one reindex
+        runs at a time; callers arriving meanwhile return immediately.
+        """
         self._ensure_db()
         if not force and not self._needs_reindex():
             return
-
-        files = self._get_indexable_files()
-        session_files = self._get_session_files()
-
-        cfg = self.config
-        chunk_size = cfg.get("chunkSize", CHUNK_SIZE)
-        chunk_overlap = cfg.get("chunkOverlap", CHUNK_OVERLAP)
-
-        new_docs = []
-        vectors = []
-        doc_freq: Dict[str, int] = {}
-
-        def process_text(label: str, text: str, mtime: float) -> None:
-            """Process text."""
-            self._chunk_and_index(label, text, mtime, chunk_size, chunk_overlap, new_docs, vectors, doc_freq)
-
-        for label, fpath in files:
-            try:
-                mtime = fpath.stat().st_mtime
-                self._mtimes[label] = mtime
-                text = fpath.read_text(encoding="utf-8", errors="replace")
-                process_text(label, text, mtime)
-            except Exception as e:
-                log.warning(f"RAG index error ({label}): {e}")
-                continue
-
-        # Session files
-        for label, fpath in session_files:
-            try:
-                mtime = fpath.stat().st_mtime
-                self._mtimes[label] = mtime
-                with open(fpath, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                parts = []
-                messages = data if isinstance(data, list) else data.get("messages", [])
-                for msg in messages:
-                    if isinstance(msg, dict):
-                        content = msg.get("content", "")
-                        if isinstance(content, str) and content.strip():
-                            parts.append(content)
-                if parts:
-                    process_text(label, "\n".join(parts), mtime)
-            except Exception as e:
-                log.warning(f"RAG session index error ({label}): {e}")
-                continue
-
-        if not new_docs:
+        if not self._ingest_lock.acquire(blocking=False):
             return
-
-        self._conn.execute("BEGIN IMMEDIATE")
         try:
-            self._conn.execute("DELETE FROM tfidf_vectors")
-            self._conn.execute("DELETE FROM chunks")
-            self._conn.execute("DELETE FROM doc_freq")
-            self._conn.executemany(
-                "INSERT INTO chunks (source, line_start, line_end, text, tokens, token_count, mtime, hash) VALUES (?,?,?,?,?,?,?,?)",
-                new_docs,
-            )
-            # Insert TF-IDF vectors
-            # Get the inserted chunk IDs
-            rows = self._conn.execute("SELECT id FROM chunks ORDER BY id").fetchall()
-            for (chunk_id,), vec in zip(rows, vectors):
-                self._conn.execute(
-                    "INSERT INTO tfidf_vectors (chunk_id, vector) VALUES (?,?)", (chunk_id, json.dumps(vec))
-                )
+            files = self._get_indexable_files()
+            session_files = self._get_session_files()
+            if not force and not self._needs_rebuild():
+                self._reindex_changed(files, session_files)
+                return
+            self._rebuild(files, session_files)
+        finally:
+            self._ingest_lock.release()
+
+    def _rebuild(self, files: List, session_files: List) -> None:
+        """Full rebuild via the bulk ingestion pipeline."""
+        sources = [(label, fpath, False) for label, fpath in files]
+        sources += [(label, fpath, True) for label, fpath in session_files]
+        if not sources:
+            return
 
-            self._conn.executemany("INSERT OR REPLACE INTO doc_freq (term, df) VALUES (?,?)", list(doc_freq.items()))
-            self._conn.execute("COMMIT")
-        except Exception as e:  # noqa: broad-except
-            self._conn.execute("ROLLBACK")
-            raise
-        self._load_stats()
-        log.info(
-            f"[AI] RAG index rebuilt: {len(new_docs)} chunks from {len(files) + len(session_files)} files, "
-            f"{len(doc_freq)} unique terms"
+        cfg = self.config
+        written = IngestPipeline(self, cfg.get("ingest")).run(
+            sources, cfg.get("chunkSize", CHUNK_SIZE), cfg.get("chunkOverlap", CHUNK_OVERLAP)
         )
+        with self._db_lock:
+            self._discovered = {label for label, _, _ in sources}
+            log.info(
+                f"[AI] RAG index rebuilt: {written} chunks written, {self._doc_count} total from "
+                f"{len(sources)} files, {len(self._df)} unique terms"
+            )
+            chunk_texts = [row[0] for row in self._conn.execute("SELECT text FROM chunks")]
 
         # Generate embeddings for all chunks if API available
         try:
-            from salmalm.features.rag_embeddings import get_available_provider, batch_embed
-            if get_available_provider():
-                chunk_texts = [doc[3] for doc in new_docs]  # text field
-                batch_embed(chunk_texts, conn=self._conn)
+            self._embed_chunks(chunk_texts)
         except Exception as e:
             log.debug(f"[RAG] Embedding during reindex skipped: {e}")
+        with self._db_lock:
+            self._emb_matrix = None  # embeddings may have arrived for any chunk
 
     def _bm25_search(self, query_tokens: List[str], max_results: int, min_score: float) -> List[Dict]:
-        """Pure BM25 search, returns scored results with bm25 rank."""
-        term_set = set(query_tokens)
-        scored = []
-
-        for row in self._conn.execute("SELECT id, source, line_start, text, tokens, token_count FROM chunks"):
-            chunk_id, source, line_start, text, tokens_json, token_count = row
-            chunk_tokens = json.loads(tokens_json)
-            chunk_token_set = set(chunk_tokens)
-            if not term_set & chunk_token_set:
-                continue
-
-            score = 0.0
-            tf_map: Dict[str, int] = {}
-            for t in chunk_tokens:
-                tf_map[t] = tf_map.get(t, 0) + 1
-
-            dl = token_count
+        """BM25 over the postings index, returns scored results with bm25 rank.
+
+        Only chunks containing at least one query term are touched. Terms are
+        processed in descending upper-bound order; once the current k-th best
+        score exceeds what the remaining terms could add (MaxScore), no new
+        candidates are admitted and only existing accumulators are updated.
+        """
+        with self._db_lock:
+            query_tf: Dict[str, int] = {}
             for qt in query_tokens:
-                if qt not in tf_map:
+                query_tf[qt] = query_tf.get(qt, 0) + 1
+
+            # Upper bound per term: BM25 saturates at idf * (k1 + 1) as tf grows.
+            bounds = {t: qtf * self._idf(t) * (BM25_K1 + 1) for t, qtf in query_tf.items()}
+            terms = sorted(query_tf, key=lambda t: -bounds[t])
+            remaining = sum(bounds.values())
+            use_max_score = self.config.get("bm25", {}).get("maxScore", True)
+
+            term_ids = self._terms.lookup(self._conn, terms)
+            acc: Dict[int, float] = {}
+            norm = BM25_K1 / self._avg_dl
+            for term in terms:
+                admit_new = True
+                if use_max_score and len(acc) >= max_results:
+                    threshold = heapq.nlargest(max_results, acc.values())[-1]
+                    admit_new = threshold < remaining
+                remaining -= bounds[term]
+                if term not in term_ids:
                     continue
-                tf = tf_map[qt]
-                idf = self._idf_cache.get(qt, 0)
-                numerator = tf * (BM25_K1 + 1)
-                denominator = tf + BM25_K1 * (1 - BM25_B + BM25_B * dl / self._avg_dl)
-                score += idf * (numerator / denominator)
-
-            if score >= min_score:
-                scored.append(
-                    {
-                        "score": score,
-                        "source": source,
-                        "line": line_start,
-                        "text": text,
-                        "chunk_id": chunk_id,
-                    }
-                )
-
-        scored.sort(key=lambda x: -x["score"])
-        return scored[:max_results]
+                idf = self._idf(term)
+                qtf = query_tf[term]
+                for chunk_id, tf, dl in self._conn.execute(
+                    "SELECT p.chunk_id, p.tf, c.token_count FROM postings p JOIN chunks c ON c.id = p.chunk_id "
+                    "WHERE p.term_id=?",
+                    (term_ids[term],),
+                ):
+                    if not admit_new and chunk_id not in acc:
+                        continue
+                    denominator = tf + BM25_K1 * (1 - BM25_B) + norm * BM25_B * dl
+                    acc[chunk_id] = acc.get(chunk_id, 0.0) + qtf * idf * (tf * (BM25_K1 + 1) / denominator)
+
+            top = heapq.nlargest(max_results, ((s, cid) for cid, s in acc.items() if s >= min_score))
+            return self._fetch_results(top)
+
+    def _fetch_results(self, top: List[tuple]) -> List[Dict]:
+        """Materialize ranked ``(score, chunk_id)`` pairs into result dicts."""
+        if not top:
+            return []
+        placeholders = ",".join("?" * len(top))
+        rows = {
+            r[0]: r
+            for r in self._conn.execute(
+                f"SELECT id, source, line_start, text FROM chunks WHERE id IN ({placeholders})",
+                [cid for _, cid in top],
+            )
+        }
+        scored = []
+        for score, chunk_id in top:
+            row = rows.get(chunk_id)
+            if row is None:
+                continue
+            scored.append(
+                {
+                    "score": score,
+                    "source": row[1],
+                    "line": row[2],
+                    "text": row[3],
+                    "chunk_id": chunk_id,
+                }
+            )
+        return scored
 
     @staticmethod
     def _has_embedding_api() -> bool:
@@ -458,101 +551,123 @@ class RAGEngine(RAGIndexerMixin):
             return False
 
     def _embedding_search(self, query: str, max_results: int) -> List[Dict]:
-        """Semantic search using embedding vectors."""
+        """Semantic search: one matrix-vector product over normalized chunk embeddings."""
         try:
-            from salmalm.features.rag_embeddings import get_embedding, cosine_similarity_vec
+            from salmalm.features.rag_embeddings import get_embedding
         except Exception:
             return []
 
-        result = get_embedding(query, conn=self._conn)
+        # The provider call may hit the network, so it runs on its own connection outside _db_lock.
+        conn = get_connection(self._db_path)
+        try:
+            result = get_embedding(query, conn=conn, config=self.config.get("embeddings"))
+        finally:
+            conn.close()
         if result is None:
             return []
         query_emb, _ = result
 
-        # Get all chunks that have embeddings
-        scored = []
-        for row in self._conn.execute(
-            "SELECT c.id, c.source, c.line_start, c.text, c.hash "
-            "FROM chunks c"
-        ):
-            chunk_id, source, line_start, text, chunk_hash = row
-            # Look up embedding by chunk hash
-            emb_row = self._conn.execute(
-                "SELECT embedding FROM rag_embeddings WHERE chunk_hash=?",
-                (hashlib.sha256(text.encode()).hexdigest()[:32],),
-            ).fetchone()
-            if not emb_row:
-                continue
-            chunk_emb = json.loads(emb_row[0])
-            if len(chunk_emb) != len(query_emb):
-                continue
-            sim = cosine_similarity_vec(query_emb, chunk_emb)
-            if sim > 0:
-                scored.append({
-                    "score": sim,
-                    "source": source,
-                    "line": line_start,
-                    "text": text,
-                    "chunk_id": chunk_id,
-                })
-
-        scored.sort(key=lambda x: -x["score"])
-        return scored[:max_results]
+        with self._db_lock:
+            if self._emb_matrix is None or self._emb_matrix_gen != self._index_gen:
+                self._refresh_embedding_index()
+            if self._ann is not None and self._ann.dims == len(query_emb):
+                return self._fetch_results(self._ann.search(query_emb, max_results))
+            return self._fetch_results(self._emb_matrix.search(query_emb, max_results))
+
+    def _refresh_embedding_index(self) -> None:
+        """Bring the embedding matrix and ANN index up to the current generation.
+
+        The first search loads the whole matrix; later generations apply only
+        the chunks that per-source writes added or dropped since (see
+        ``_replace_source``), and the ANN rebuild reuses every inverted list
+        they did not touch. Callers hold ``_db_lock``.
+        """
+        if self._emb_matrix is None:
+            matrix, pending = EmbeddingMatrix.load(self._conn), set()
+        else:
+            matrix, pending = self._emb_matrix.updated(self._conn, self._emb_added, self._emb_dropped)
+        self._emb_added, self._emb_dropped = pending, set()
+        self._emb_matrix_gen = self._index_gen
+        if matrix is self._emb_matrix:
+            return
+        self._emb_matrix = matrix
+        rows = matrix.largest_block()
+        self._ann = IVFIndex.build(self._conn, rows, self.config.get("ann"), prev=self._ann) if rows else None
 
     def _vector_search(self, query_tokens: List[str], max_results: int) -> List[Dict]:
         """TF-IDF vector cosine similarity search."""
-        if self._doc_count == 0:
-            return []
-
-        # Build query TF-IDF vector
-        query_tf = compute_tf(query_tokens)
-        # Weight by IDF
-        query_vec: Dict[str, float] = {}
-        for term, tf_val in query_tf.items():
-            idf = self._idf_cache.get(term, 0)
-            if idf > 0:
-                query_vec[term] = tf_val * idf
-
-        if not query_vec:
-            return []
-
-        scored = []
-        for row in self._conn.execute(
-            "SELECT c.id, c.source, c.line_start, c.text, v.vector "
-            "FROM chunks c JOIN tfidf_vectors v ON c.id = v.chunk_id"
-        ):
-            chunk_id, source, line_start, text, vec_json = row
-            chunk_tf = json.loads(vec_json)
-            # Apply IDF weighting to chunk vector
-            chunk_vec: Dict[str, float] = {}
-            for term, tf_val in chunk_tf.items():
-                idf = self._idf_cache.get(term, 0)
-                if idf > 0:
-                    chunk_vec[term] = tf_val * idf
-
-            sim = cosine_similarity(query_vec, chunk_vec)
-            if sim > 0:
-                scored.append(
-                    {
-                        "score": sim,
-                        "source": source,
-                        "line": line_start,
-                        "text": text,
-                        "chunk_id": chunk_id,
-                    }
-                )
-
-        scored.sort(key=lambda x: -x["score"])
-        return scored[:max_results]
+        with self._db_lock:
+            if self._doc_count == 0:
+                return []
+
+            # Build query TF-IDF vector (keyed by term id, like the stored vectors)
+            query_tf = compute_tf(query_tokens)
+            term_ids = self._terms.lookup(self._conn, query_tf)
+            # Weight by IDF
+            query_vec: Dict[int, float] = {}
+            for term, tf_val in query_tf.items():
+                idf = self._idf(term)
+                if idf > 0 and term in term_ids:
+                    query_vec[term_ids[term]] = tf_val * idf
+
+            if not query_vec:
+                return []
+
+            # Only chunks that share a query term can score above zero, so the
+            # postings lists bound the candidates; text is read for the top-k only.
+            qids = list(query_vec)
+            placeholders = ",".join("?" * len(qids))
+            idf_by_id: Dict[int, float] = {}
+            scored = []
+            for chunk_id, vec_blob in self._conn.execute(
+                "SELECT chunk_id, vector FROM tfidf_vectors WHERE chunk_id IN "
+                f"(SELECT DISTINCT chunk_id FROM postings WHERE term_id IN ({placeholders}))",
+                qids,
+            ):
+                # Apply IDF weighting to chunk vector
+                chunk_vec: Dict[int, float] = {}
+                for tid, tf_val in zip(*unpack_tf(vec_blob)):
+                    idf = idf_by_id.get(tid)
+                    if idf is None:
+                        idf = idf_by_id[tid] = self._idf(self._terms.term(self._conn, tid) or "")
+                    if idf > 0:
+                        chunk_vec[tid] = tf_val * idf
+
+                sim = cosine_similarity(query_vec, chunk_vec)
+                if sim > 0:
+                    scored.append((sim, chunk_id))
+
+            return self._fetch_results(heapq.nlargest(max_results, scored))
 
     def search(self, query: str, max_results: int = 8, min_score: float = 0.1) -> List[Dict]:
-        """Hybrid search (BM25 + Vector). Returns list of {score, source, line, text}."""
+        """Hybrid search (BM25 + Vector). Returns list of {score, source, line, text}.
+
+        Ranked results are shared through the retrieval cache until the next
+        index write or a change to the ranking settings (see
+        :meth:`_retrieval_key`), so repeated queries in one turn search once.
+        """
         self._ensure_db()
         self.reindex()
 
         if self._doc_count == 0:
             return []
 
+        gen = self._retrieval_key()
+        cached = retrieval_cache.get("rag", query, gen)
+        if cached is None or cached[0] < max_results:
+            pool = max(max_results, RETRIEVAL_POOL)
+            cached = (pool, self._search(query, pool))
+            retrieval_cache.put("rag", query, gen, cached)
+        return [dict(r) for r in cached[1] if r["score"] >= min_score][:max_results]
+
+    def _retrieval_key(self) -> tuple:
+        """Retrieval-cache generation: the index generation plus the settings that shape ranking."""
+        cfg = self.config
+        settings = json.dumps({k: cfg.get(k) for k in ("hybrid", "bm25", "embeddings", "ann")}, sort_keys=True)
+        return self._index_gen, settings, self._has_embedding_api()
+
+    def _search(self, query: str, max_results: int) -> List[Dict]:
+        """Uncached hybrid search, best first, without a min_score cut."""
         query_tokens = self._tokenize(query)
         if not query_tokens:
             return []
@@ -566,7 +681,7 @@ class RAGEngine(RAGIndexerMixin):
 
         if not hybrid_enabled:
             # BM25 only (legacy mode)
-            results = self._bm25_search(expanded_tokens, max_results, min_score)
+            results = self._bm25_search(expanded_tokens, max_results, 0.0)
             for r in results:
                 r["score"] = round(r["score"], 4)
                 r.pop("chunk_id", None)
@@ -633,14 +748,20 @@ class RAGEngine(RAGIndexerMixin):
                 )
 
         final.sort(key=lambda x: -x["score"])
-
-        # Filter by min_score
-        final = [r for r in final if r["score"] >= min_score]
         return final[:max_results]
 
-    def build_context(self, query: str, max_chars: int = 4000, max_results: int = 6) -> str:
-        """Build a context string for RAG injection into LLM prompts."""
-        results = self.search(query, max_results=max_results)
+    def build_context(
+        self, query: str, max_chars: int = 4000, max_results: int = 6, results: Optional[List[Dict]] = None
+    ) -> str:
+        """Build a context string for RAG injection into LLM prompts.
+
+        *results* are hits already retrieved for *query* (best first); the
+        search is skipped when they are given.
+        """
+        if results is None:
+            results = self.search(query, max_results=max_results)
+        else:
+            results = results[:max_results]
         if not results:
             return ""
 
@@ -666,10 +787,11 @@ class RAGEngine(RAGIndexerMixin):
         self._ensure_db()
         return {
             "total_chunks": self._doc_count,
-            "unique_terms": len(self._idf_cache),
+            "unique_terms": len(self._df),
             "avg_chunk_length": round(self._avg_dl, 1),
             "db_size_kb": round(self._db_path.stat().st_size / 1024, 1) if self._db_path.exists() else 0,
             "indexed_files": len(self._mtimes),
+            "ingest": dict(self._ingest_progress),
         }
 
     def close(self) -> None:
@@ -682,14 +804,24 @@ class RAGEngine(RAGIndexerMixin):
 # ── RAG-augmented prompt injection ─────────────────────────────
 
 
-def inject_rag_context(messages: list, system_prompt: str, max_chars: int = 3000) -> str:
-    """Analyze recent messages and inject relevant RAG context into system prompt."""
+def rag_query_for(messages: list) -> str:
+    """Retrieval query for a turn: the last few user messages joined."""
     user_msgs = [m["content"] for m in messages[-6:] if m.get("role") == "user" and isinstance(m.get("content"), str)]
-    if not user_msgs:
+    return " ".join(user_msgs[-3:])
+
+
+def inject_rag_context(
+    messages: list, system_prompt: str, max_chars: int = 3000, results: Optional[List[Dict]] = None
+) -> str:
+    """Analyze recent messages and inject relevant RAG context into system prompt.
+
+    *results*: hits for :func:`rag_query_for` already retrieved this turn.
+    """
+    query = rag_query_for(messages)
+    if not query:
         return system_prompt
 
-    query = " ".join(user_msgs[-3:])
-    context = rag_engine.build_context(query, max_chars=max_chars)
+    context = rag_engine.build_context(query, max_chars=max_chars, results=results)
     if not context:
         return system_prompt
 
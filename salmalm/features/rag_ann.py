@@ -0,0 +1,202 @@
+"""Approximate nearest-neighbour (IVF-flat) index for semantic RAG search.
+
+Chunk embeddings are partitioned into ``nlist`` inverted lists around
+spherical k-means centroids. A query scores the centroids, probes the
+``nprobe`` closest lists and runs an exact scan only inside them.
+
+Persistence lives in ``rag.db`` next to the chunks it describes:
+  - ``ann_centroids`` — list_id → packed float32 centroid
+  - ``ann_assign``    — chunk_id → list_id
+  - ``meta``          — ``ann_dims`` / ``ann_trained_size``
+
+Chunks removed by the indexer drop their assignment rows in the same
+transaction; new chunks are assigned to their nearest centroid on the next
+load, so updates cost O(changed chunks × nlist). Rebuilding from the
+previous index keeps every inverted list whose members did not change and
+copies vectors only into the lists that did. Centroids are retrained only
+when the corpus has grown by ``retrainGrowth`` since the last training.
+
+rag.json knobs (``"ann": {...}``):
+  enabled, minVectors (exact search below this), nlist (0 = √N),
+  nprobe, trainIterations, retrainGrowth.
+"""
+
+from __future__ import annotations
+
+import heapq
+import logging
+import math
+import operator
+import random
+import sqlite3
+import time
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from salmalm.features.rag_embeddings import unpack_embedding
+from salmalm.features.rag_vectors import VectorBlock, normalize
+
+log = logging.getLogger(__name__)
+
+ANN_DEFAULTS = {
+    "enabled": True,
+    "minVectors": 5000,
+    "nlist": 0,
+    "nprobe": 8,
+    "trainIterations": 8,
+    "retrainGrowth": 4.0,
+}
+
+# Cap on k-means training sample, in vectors per list (FAISS uses ~39-256).
+_TRAIN_PER_LIST = 64
+
+
+def _argmax(values) -> int:
+    """Index of the largest value (works for lists and ndarrays)."""
+    if hasattr(values, "argmax"):
+        return int(values.argmax())
+    return max(range(len(values)), key=values.__getitem__)
+
+
+def _make_block(vectors: Sequence[Sequence[float]], dims: int) -> VectorBlock:
+    block = VectorBlock(dims)
+    for i, v in enumerate(vectors):
+        block.add(i, v)
+    block.freeze()
+    return block
+
+
+def train_centroids(vectors: List[array], nlist: int, iterations: int, seed: int = 0) -> List[array]:
+    """Spherical k-means over unit vectors; returns *nlist* unit centroids."""
+    dims = len(vectors[0])
+    rng = random.Random(seed)
+    centroids = [array("f", vectors[i]) for i in rng.sample(range(len(vectors)), nlist)]
+    for _ in range(iterations):
+        block = _make_block(centroids, dims)
+        sums: List[Optional[List[float]]] = [None] * nlist
+        for v in vectors:
+            c = _argmax(block.dots(v))
+            sums[c] = list(v) if sums[c] is None else list(map(operator.add, sums[c], v))
+        for c, total in enumerate(sums):
+            unit = normalize(total) if total is not None else None
+            # Empty cluster: reseed from a random vector rather than leaving it dead.
+            centroids[c] = array("f", unit if unit is not None else vectors[rng.randrange(len(vectors))])
+    return centroids
+
+
+class IVFIndex:
+    """IVF-flat index over one embedding dimensionality."""
+
+    def __init__(self, dims: int, centroids: VectorBlock, lists: Dict[int, VectorBlock], nprobe: int) -> None:
+        self.dims = dims
+        self.nprobe = nprobe
+        self._centroids = centroids
+        self._lists = lists
+
+    def __len__(self) -> int:
+        return sum(len(b.ids) for b in self._lists.values())
+
+    @property
+    def nlist(self) -> int:
+        return len(self._centroids.ids)
+
+    def search(self, query: Sequence[float], k: int, nprobe: Optional[int] = None) -> List[Tuple[float, int]]:
+        """Approximate cosine top-k: exact scan of the *nprobe* nearest lists."""
+        q = normalize(query)
+        if q is None or len(q) != self.dims:
+            return []
+        dots = self._centroids.dots(q)
+        probes = heapq.nlargest(nprobe or self.nprobe, range(len(self._centroids.ids)), key=dots.__getitem__)
+        candidates: List[Tuple[float, int]] = []
+        for list_id in probes:
+            block = self._lists.get(list_id)
+            if block is not None:
+                candidates.extend(block.top_k(q, k))
+        return heapq.nlargest(k, candidates)
+
+    @classmethod
+    def build(
+        cls,
+        conn: sqlite3.Connection,
+        rows: VectorBlock,
+        cfg: Optional[dict] = None,
+        prev: Optional["IVFIndex"] = None,
+    ) -> Optional["IVFIndex"]:
+        """Load (training or extending as needed) the index for *rows*.
+
+        With *prev* (the index of an earlier generation) and unchanged
+        centroids, lists whose members are the same are reused as they are;
+        only the lists that gained or lost chunks are rebuilt.
+
+        Returns ``None`` when disabled or when the corpus is small enough that
+        exact search is both faster and lossless.
+        """
+        opts = dict(ANN_DEFAULTS)
+        opts.update(cfg or {})
+        n = len(rows.ids)
+        if not opts["enabled"] or n < max(1, opts["minVectors"]):
+            return None
+        dims = d = rows.dims
+
+        def vec(i: int) -> array:
+            return rows.data[i * d : (i + 1) * d]
+
+        meta = dict(conn.execute("SELECT key, value FROM meta WHERE key IN ('ann_dims', 'ann_trained_size')"))
+        centroids = [
+            unpack_embedding(blob) for (blob,) in conn.execute("SELECT centroid FROM ann_centroids ORDER BY list_id")
+        ]
+        trained_size = int(meta.get("ann_trained_size", 0))
+        if not centroids or int(meta.get("ann_dims", 0)) != dims or n >= trained_size * float(opts["retrainGrowth"]):
+            nlist = int(opts["nlist"]) or int(math.sqrt(n))
+            nlist = max(1, min(nlist, n))
+            t0 = time.time()
+            sample_size = min(n, nlist * _TRAIN_PER_LIST)
+            sample = [vec(i) for i in random.Random(1).sample(range(n), sample_size)]
+            centroids = train_centroids(sample, nlist, int(opts["trainIterations"]))
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("DELETE FROM ann_centroids")
+                conn.execute("DELETE FROM ann_assign")
+                conn.executemany(
+                    "INSERT INTO ann_centroids (list_id, centroid) VALUES (?,?)",
+                    [(i, c.tobytes()) for i, c in enumerate(centroids)],
+                )
+                conn.executemany(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES (?,?)",
+                    [("ann_dims", str(dims)), ("ann_trained_size", str(n))],
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            log.info(f"[RAG] ANN trained: {nlist} lists over {n} vectors in {time.time() - t0:.1f}s")
+
+        centroid_block = _make_block(centroids, dims)
+        assigned: Dict[int, int] = dict(conn.execute("SELECT chunk_id, list_id FROM ann_assign"))
+        new_rows = []
+        members: Dict[int, List[int]] = {}
+        for i, chunk_id in enumerate(rows.ids):
+            list_id = assigned.get(chunk_id)
+            if list_id is None:
+                list_id = _argmax(centroid_block.dots(vec(i)))
+                new_rows.append((chunk_id, list_id))
+            members.setdefault(list_id, []).append(i)
+        if new_rows:
+            conn.executemany("INSERT OR REPLACE INTO ann_assign (chunk_id, list_id) VALUES (?,?)", new_rows)
+            conn.commit()
+
+        reusable: Dict[int, VectorBlock] = {}
+        if prev is not None and prev.dims == dims and prev._centroids.data == centroid_block.data:
+            reusable = prev._lists
+        lists: Dict[int, VectorBlock] = {}
+        for list_id, idxs in members.items():
+            old = reusable.get(list_id)
+            if old is not None and len(old.ids) == len(idxs) and old.ids == [rows.ids[i] for i in idxs]:
+                lists[list_id] = old
+                continue
+            block = VectorBlock(dims)
+            for i in idxs:
+                block.add(rows.ids[i], vec(i))
+            block.freeze()
+            lists[list_id] = block
+        return cls(dims, centroid_block, lists, int(opts["nprobe"]))
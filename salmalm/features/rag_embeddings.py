@@ -1,18 +1,36 @@
 """Embedding-based vector search using AI provider APIs.
 
-Pure stdlib — uses urllib.request for HTTP calls.
-Supports OpenAI, Google, and Anthropic embedding APIs with automatic fallback.
+Pure stdlib — uses http.client over pooled keep-alive connections.
+Supports OpenAI and Google embedding APIs with automatic fallback.
+Bulk requests go through :class:`EmbeddingScheduler`, which packs texts
+into provider-max batches and runs several of them concurrently. It also
+honours 429 Retry-After. Endpoints can be overridden via rag.json
+``"embeddings": {"endpoints": {...}}``.
+
+Embeddings are cached as packed, L2-normalized float32 blobs (``array('f')``),
+so cosine similarity reduces to a dot product and no JSON parsing is needed
+on the search path. Legacy JSON-text rows are still readable and are
+converted in place by :func:`migrate_embeddings`.
 """
 
 from __future__ import annotations
 
 import hashlib
+import http.client
 import json
 import logging
+import math
 import sqlite3
-import urllib.request
+import threading
+import time
 import urllib.error
-from typing import Dict, List, Optional, Tuple
+from array import array
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from salmalm.core.cost import estimate_tokens
+from salmalm.utils.http_pool import HTTPSPool
 
 log = logging.getLogger(__name__)
 
@@ -25,6 +43,48 @@ _DIMENSIONS = {
 }
 
 
+def pack_embedding(vec) -> bytes:
+    """L2-normalize *vec* and pack it as a native float32 blob."""
+    norm = math.sqrt(sum(x * x for x in vec)) or 1.0
+    return array("f", [x / norm for x in vec]).tobytes()
+
+
+def unpack_embedding(value) -> array:
+    """Decode a cached embedding (float32 blob or legacy JSON text) to ``array('f')``."""
+    if isinstance(value, str):
+        return array("f", pack_embedding(json.loads(value)))
+    vec = array("f")
+    vec.frombytes(value)
+    return vec
+
+
+def migrate_embeddings(conn: sqlite3.Connection) -> int:
+    """Convert legacy JSON-text embedding rows to float32 blobs. Returns rows converted."""
+    rows = conn.execute("SELECT chunk_hash, embedding FROM rag_embeddings WHERE typeof(embedding)='text'").fetchall()
+    if not rows:
+        return 0
+    conn.executemany(
+        "UPDATE rag_embeddings SET embedding=? WHERE chunk_hash=?",
+        [(pack_embedding(json.loads(emb)), h) for h, emb in rows],
+    )
+    conn.commit()
+    log.info(f"[RAG] Converted {len(rows)} cached embeddings to float32 blobs")
+    return len(rows)
+
+
+def text_hash(text: str) -> str:
+    """Cache key for a chunk or query text."""
+    return hashlib.sha256(text.encode()).hexdigest()[:32]
+
+
+def _cache_put(conn: sqlite3.Connection, key: str, emb: List[float], provider: str) -> None:
+    """Store a normalized float32 embedding in the cache (caller commits)."""
+    conn.execute(
+        "INSERT OR REPLACE INTO rag_embeddings (chunk_hash, embedding, provider, dimensions) VALUES (?,?,?,?)",
+        (key, pack_embedding(emb), provider, len(emb)),
+    )
+
+
 def _get_api_key(provider: str) -> Optional[str]:
     """Resolve API key for a provider."""
     try:
@@ -34,44 +94,106 @@ def _get_api_key(provider: str) -> Optional[str]:
         return None
 
 
-def _embed_openai(texts: List[str], api_key: str) -> List[List[float]]:
+# ── HTTP: keep-alive connections shared by all embedding calls ──
+
+
+class EmbeddingHTTPError(Exception):
+    """Non-2xx response from an embedding endpoint."""
+
+    def __init__(self, status: int, body: str = "", retry_after: Optional[float] = None) -> None:
+        """Init  ."""
+        super().__init__(f"HTTP {status}: {body[:200]}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After header (delta-seconds or HTTP date) → seconds to wait."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class KeepAlivePool(HTTPSPool):
+    """Keep-alive pool for embedding requests (see :mod:`salmalm.utils.http_pool`).
+
+    Separate from the chat pool so that bulk embedding bursts do not take
+    over the connections kept for LLM calls.
+    """
+
+    def __init__(self, max_idle_per_host: int = 8, timeout: float = 30.0) -> None:
+        """Init  ."""
+        super().__init__("embeddings", max_per_host=max_idle_per_host)
+        self._timeout = timeout
+
+    def post_json(self, url: str, payload: dict, headers: Dict[str, str]) -> dict:
+        """POST *payload* as JSON and decode the JSON response; raises EmbeddingHTTPError."""
+        hdrs = {"Content-Type": "application/json", **headers}
+        try:
+            with self.request("POST", url, json.dumps(payload).encode(), hdrs, timeout=self._timeout) as resp:
+                data = resp.read()
+        except urllib.error.HTTPError as e:
+            raise EmbeddingHTTPError(
+                e.code, e.read().decode("utf-8", "replace"), _parse_retry_after(e.headers.get("Retry-After"))
+            ) from e
+        if resp.status >= 300:
+            raise EmbeddingHTTPError(resp.status, data.decode("utf-8", "replace"))
+        return json.loads(data)
+
+
+_http = KeepAlivePool()
+
+
+# ── Providers ──
+
+_ENDPOINTS = {
+    "openai": "https://api.openai.com/v1/embeddings",
+    "google": "https://generativelanguage.googleapis.com/v1/models/text-embedding-004:batchEmbedContents",
+}
+
+# Largest batch each API accepts per request.
+_MAX_BATCH = {
+    "openai": 2048,
+    "google": 100,
+}
+# Estimated-token budget per request. OpenAI rejects requests over 300k
+# tokens in total; the estimate is rough, so stay well below that.
+_MAX_BATCH_TOKENS = {
+    "openai": 250_000,
+}
+
+
+def _embed_openai(texts: List[str], api_key: str, endpoint: Optional[str] = None) -> List[List[float]]:
     """Call OpenAI embeddings API."""
-    body = json.dumps({
-        "model": "text-embedding-3-small",
-        "input": texts,
-    }).encode()
-    req = urllib.request.Request(
-        "https://api.openai.com/v1/embeddings",
-        data=body,
-        headers={
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json",
-        },
+    data = _http.post_json(
+        endpoint or _ENDPOINTS["openai"],
+        {"model": "text-embedding-3-small", "input": texts},
+        {"Authorization": f"Bearer {api_key}"},
     )
-    with urllib.request.urlopen(req, timeout=30) as resp:
-        data = json.loads(resp.read())
     # Sort by index to ensure correct order
     items = sorted(data["data"], key=lambda x: x["index"])
     return [item["embedding"] for item in items]
 
 
-def _embed_google(texts: List[str], api_key: str) -> List[List[float]]:
-    """Call Google embeddings API (one at a time — batch not supported in simple endpoint)."""
-    results = []
-    for text in texts:
-        body = json.dumps({
-            "content": {"parts": [{"text": text}]},
-        }).encode()
-        url = "https://generativelanguage.googleapis.com/v1/models/text-embedding-004:embedContent"
-        req = urllib.request.Request(
-            url,
-            data=body,
-            headers={"Content-Type": "application/json", "x-goog-api-key": api_key},
-        )
-        with urllib.request.urlopen(req, timeout=30) as resp:
-            data = json.loads(resp.read())
-        results.append(data["embedding"]["values"])
-    return results
+def _embed_google(texts: List[str], api_key: str, endpoint: Optional[str] = None) -> List[List[float]]:
+    """Call Google batchEmbedContents (up to 100 texts per request)."""
+    data = _http.post_json(
+        endpoint or _ENDPOINTS["google"],
+        {
+            "requests": [
+                {"model": "models/text-embedding-004", "content": {"parts": [{"text": text}]}} for text in texts
+            ]
+        },
+        {"x-goog-api-key": api_key},
+    )
+    return [item["values"] for item in data["embeddings"]]
 
 
 _EMBED_FNS = {
@@ -89,22 +211,148 @@ def get_available_provider() -> Optional[str]:
     return None
 
 
-def get_embedding(text: str, provider: Optional[str] = None, conn: Optional[sqlite3.Connection] = None) -> Optional[Tuple[List[float], str]]:
+# ── Scheduler ──
+
+EMBED_DEFAULTS = {
+    "concurrency": 4,  # batches in flight at once
+    "batchSize": 0,  # texts per request; 0 = provider maximum
+    "maxRetries": 5,
+    "endpoints": {},  # provider → URL override (e.g. a local stub or proxy)
+}
+
+
+class EmbeddingScheduler:
+    """Coalesce texts into provider-max batches and embed them concurrently.
+
+    A batch closes at ``batchSize`` texts or at the provider's per-request
+    token budget (estimated), whichever comes first.
+
+    Up to ``concurrency`` batches are in flight over pooled keep-alive
+    connections. A 429 pauses every worker until its ``Retry-After`` has
+    elapsed (exponential backoff when the header is missing); 5xx and
+    connection errors are retried with backoff, up to ``maxRetries``.
+    """
+
+    def __init__(self, provider: str, api_key: str, cfg: Optional[dict] = None) -> None:
+        """Init  ."""
+        c = {**EMBED_DEFAULTS, **(cfg or {})}
+        self.provider = provider
+        self.api_key = api_key
+        self.concurrency = max(1, int(c["concurrency"]))
+        max_batch = _MAX_BATCH.get(provider, 100)
+        self.batch_size = min(int(c["batchSize"]) or max_batch, max_batch)
+        self.max_tokens = _MAX_BATCH_TOKENS.get(provider)
+        self.max_retries = int(c["maxRetries"])
+        self.endpoint = {**_ENDPOINTS, **(c.get("endpoints") or {})}.get(provider)
+        self._pause_until = 0.0
+        self._lock = threading.Lock()
+
+    def _pause(self, seconds: float) -> None:
+        with self._lock:
+            self._pause_until = max(self._pause_until, time.monotonic() + seconds)
+
+    def _wait(self) -> None:
+        while True:
+            with self._lock:
+                delay = self._pause_until - time.monotonic()
+            if delay <= 0:
+                return
+            time.sleep(delay)
+
+    def _run_batch(self, texts: List[str]) -> List[List[float]]:
+        fn = _EMBED_FNS[self.provider]
+        for attempt in range(self.max_retries + 1):
+            self._wait()
+            backoff = min(30.0, 0.5 * 2**attempt)
+            try:
+                return fn(texts, self.api_key, endpoint=self.endpoint)
+            except EmbeddingHTTPError as e:
+                if attempt == self.max_retries or not (e.status == 429 or e.status >= 500):
+                    raise
+                if e.status == 429:
+                    # Rate limited: hold back every worker, not just this one.
+                    self._pause(e.retry_after if e.retry_after is not None else backoff)
+                else:
+                    time.sleep(backoff)
+            except (OSError, http.client.HTTPException):
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(backoff)
+        return []
+
+    def _spans(self, texts: List[str]) -> List[Tuple[int, int]]:
+        """``(start, end)`` slices of *texts*, bounded by batch size and token budget."""
+        spans = []
+        start, tokens = 0, 0
+        for i, text in enumerate(texts):
+            n = estimate_tokens(text)
+            full = i - start >= self.batch_size or (self.max_tokens and tokens + n > self.max_tokens)
+            if i > start and full:
+                spans.append((start, i))
+                start, tokens = i, 0
+            tokens += n
+        if start < len(texts):
+            spans.append((start, len(texts)))
+        return spans
+
+    def embed(self, texts: List[str], on_batch: Optional[Callable[[int, List[List[float]]], None]] = None):
+        """Embed *texts*; returns a list aligned with it (None where a batch failed).
+
+        *on_batch(start, embeddings)* is called in the calling thread as each
+        batch completes, so results can be persisted incrementally.
+        """
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        spans = self._spans(texts)
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, len(spans) or 1)) as pool:
+            futures = {pool.submit(self._run_batch, texts[s:e]): s for s, e in spans}
+            for fut in as_completed(futures):
+                start = futures[fut]
+                try:
+                    embeddings = fut.result()
+                except Exception as e:
+                    log.warning(f"[RAG] Embedding batch at {start} failed via {self.provider}: {e}")
+                    continue
+                results[start : start + len(embeddings)] = embeddings
+                if on_batch:
+                    on_batch(start, embeddings)
+        return results
+
+
+def _cached_embeddings(conn: sqlite3.Connection, keys: List[str]) -> Dict[str, Tuple[List[float], str]]:
+    """Look up many cache keys at once."""
+    found: Dict[str, Tuple[List[float], str]] = {}
+    for i in range(0, len(keys), 500):
+        part = keys[i : i + 500]
+        rows = conn.execute(
+            f"SELECT chunk_hash, embedding, provider FROM rag_embeddings WHERE chunk_hash IN ({','.join('?' * len(part))})",
+            part,
+        ).fetchall()
+        for key, emb, provider in rows:
+            found[key] = (unpack_embedding(emb).tolist(), provider)
+    return found
+
+
+def get_embedding(
+    text: str,
+    provider: Optional[str] = None,
+    conn: Optional[sqlite3.Connection] = None,
+    config: Optional[dict] = None,
+) -> Optional[Tuple[List[float], str]]:
     """Get embedding for text, using cache if available.
-    
+
     Returns (embedding, provider) or None on failure.
     """
-    text_hash = hashlib.sha256(text.encode()).hexdigest()[:32]
-    
+    key = text_hash(text)
+
     # Check cache
     if conn:
         try:
             row = conn.execute(
                 "SELECT embedding, provider FROM rag_embeddings WHERE chunk_hash=?",
-                (text_hash,),
+                (key,),
             ).fetchone()
             if row:
-                return json.loads(row[0]), row[1]
+                return unpack_embedding(row[0]).tolist(), row[1]
         except Exception as _e:
             log.debug("[RAG-EMBED] suppressed: %s", _e)
 
@@ -113,63 +361,42 @@ def get_embedding(text: str, provider: Optional[str] = None, conn: Optional[sqli
         provider = get_available_provider()
     if provider is None:
         return None
-    
-    api_key = _get_api_key(provider)
-    if not api_key:
-        return None
 
-    try:
-        fn = _EMBED_FNS.get(provider)
-        if not fn:
-            return None
-        embeddings = fn([text], api_key)
-        if not embeddings:
-            return None
+    # Requested provider first, then the others as fallback
+    for candidate in [provider] + [p for p in _PROVIDERS if p != provider]:
+        api_key = _get_api_key(candidate)
+        if not api_key or candidate not in _EMBED_FNS:
+            continue
+        try:
+            embeddings = EmbeddingScheduler(candidate, api_key, config).embed([text])
+        except Exception as e:
+            log.debug(f"[RAG] Embedding failed via {candidate}: {e}")
+            continue
+        if not embeddings or embeddings[0] is None:
+            continue
         emb = embeddings[0]
-        
-        # Cache
         if conn:
             try:
-                conn.execute(
-                    "INSERT OR REPLACE INTO rag_embeddings (chunk_hash, embedding, provider, dimensions) VALUES (?,?,?,?)",
-                    (text_hash, json.dumps(emb), provider, len(emb)),
-                )
+                _cache_put(conn, key, emb, candidate)
                 conn.commit()
             except Exception as _e:
                 log.debug("[RAG-EMBED] suppressed: %s", _e)
-        
-        return emb, provider
-    except Exception as e:
-        log.debug(f"[RAG] Embedding failed via {provider}: {e}")
-        # Try fallback
-        for fallback in _PROVIDERS:
-            if fallback == provider:
-                continue
-            fb_key = _get_api_key(fallback)
-            if not fb_key:
-                continue
-            try:
-                fn = _EMBED_FNS[fallback]
-                embeddings = fn([text], fb_key)
-                if embeddings:
-                    emb = embeddings[0]
-                    if conn:
-                        try:
-                            conn.execute(
-                                "INSERT OR REPLACE INTO rag_embeddings (chunk_hash, embedding, provider, dimensions) VALUES (?,?,?,?)",
-                                (text_hash, json.dumps(emb), fallback, len(emb)),
-                            )
-                            conn.commit()
-                        except Exception as _e:
-                            log.debug("[RAG-EMBED] suppressed: %s", _e)
-                    return emb, fallback
-            except Exception:
-                continue
-        return None
+        return emb, candidate
+    return None
+
 
+def batch_embed(
+    texts: List[str],
+    provider: Optional[str] = None,
+    conn: Optional[sqlite3.Connection] = None,
+    config: Optional[dict] = None,
+) -> List[Optional[Tuple[List[float], str]]]:
+    """Batch embed texts. Returns list of (embedding, provider) or None for failures.
 
-def batch_embed(texts: List[str], provider: Optional[str] = None, conn: Optional[sqlite3.Connection] = None) -> List[Optional[Tuple[List[float], str]]]:
-    """Batch embed texts. Returns list of (embedding, provider) or None for failures."""
+    Cached texts are looked up in bulk; the rest go through an
+    :class:`EmbeddingScheduler` (rag.json ``"embeddings"`` as *config*) and
+    each finished batch is written back with one ``executemany``.
+    """
     if not texts:
         return []
 
@@ -179,73 +406,53 @@ def batch_embed(texts: List[str], provider: Optional[str] = None, conn: Optional
         return [None] * len(texts)
 
     api_key = _get_api_key(provider)
-    if not api_key:
+    if not api_key or provider not in _EMBED_FNS:
         return [None] * len(texts)
 
     # Check cache first
+    keys = [text_hash(t) for t in texts]
     results: List[Optional[Tuple[List[float], str]]] = [None] * len(texts)
-    uncached_indices = []
-    uncached_texts = []
-
-    for i, text in enumerate(texts):
-        text_hash = hashlib.sha256(text.encode()).hexdigest()[:32]
-        if conn:
-            try:
-                row = conn.execute(
-                    "SELECT embedding, provider FROM rag_embeddings WHERE chunk_hash=?",
-                    (text_hash,),
-                ).fetchone()
-                if row:
-                    results[i] = (json.loads(row[0]), row[1])
-                    continue
-            except Exception as _e:
-                log.debug("[RAG-EMBED] suppressed: %s", _e)
-        uncached_indices.append(i)
-        uncached_texts.append(text)
+    cached: Dict[str, Tuple[List[float], str]] = {}
+    if conn:
+        try:
+            cached = _cached_embeddings(conn, list(set(keys)))
+        except Exception as _e:
+            log.debug("[RAG-EMBED] suppressed: %s", _e)
 
-    if not uncached_texts:
+    # Unique uncached texts (duplicate chunks are embedded once)
+    pending: Dict[str, str] = {}
+    for i, key in enumerate(keys):
+        if key in cached:
+            results[i] = cached[key]
+        else:
+            pending.setdefault(key, texts[i])
+    if not pending:
         return results
 
-    try:
-        fn = _EMBED_FNS.get(provider)
-        if not fn:
-            return results
-        
-        # Batch in groups of 100 (OpenAI limit is 2048, but keep reasonable)
-        batch_size = 100
-        for batch_start in range(0, len(uncached_texts), batch_size):
-            batch = uncached_texts[batch_start:batch_start + batch_size]
-            batch_idx = uncached_indices[batch_start:batch_start + batch_size]
-            
-            embeddings = fn(batch, api_key)
-            
-            for j, (idx, text) in enumerate(zip(batch_idx, batch)):
-                if j < len(embeddings):
-                    emb = embeddings[j]
-                    results[idx] = (emb, provider)
-                    # Cache
-                    if conn:
-                        try:
-                            text_hash = hashlib.sha256(text.encode()).hexdigest()[:32]
-                            conn.execute(
-                                "INSERT OR REPLACE INTO rag_embeddings (chunk_hash, embedding, provider, dimensions) VALUES (?,?,?,?)",
-                                (text_hash, json.dumps(emb), provider, len(emb)),
-                            )
-                        except Exception as _e:
-                            log.debug("[RAG-EMBED] suppressed: %s", _e)
-            
-        if conn:
-            try:
-                conn.commit()
-            except Exception as _e:
-                log.debug("[RAG-EMBED] suppressed: %s", _e)
-        
-        embedded_count = sum(1 for r in results if r is not None)
-        log.info(f"[RAG] Embedded {embedded_count} chunks via {provider}")
-        
-    except Exception as e:
-        log.warning(f"[RAG] Batch embedding failed via {provider}: {e}")
+    pending_keys = list(pending)
+
+    def _store(start: int, embeddings: List[List[float]]) -> None:
+        if not conn:
+            return
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO rag_embeddings (chunk_hash, embedding, provider, dimensions) VALUES (?,?,?,?)",
+                [
+                    (key, pack_embedding(emb), provider, len(emb))
+                    for key, emb in zip(pending_keys[start : start + len(embeddings)], embeddings)
+                ],
+            )
+            conn.commit()
+        except Exception as _e:
+            log.debug("[RAG-EMBED] suppressed: %s", _e)
 
+    t0 = time.monotonic()
+    embedded = EmbeddingScheduler(provider, api_key, config).embed([pending[k] for k in pending_keys], _store)
+    by_key = {k: (emb, provider) for k, emb in zip(pending_keys, embedded) if emb is not None}
+    for i, key in enumerate(keys):
+        if results[i] is None and key in by_key:
+            results[i] = by_key[key]
+    log.info(f"[RAG] Embedded {len(by_key)}/{len(pending_keys)} chunks via {provider} in {time.monotonic() - t0:.1f}s")
     return results
 
 
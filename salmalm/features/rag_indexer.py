@@ -1,7 +1,5 @@
 """RAG indexing methods mixin."""
 
-import hashlib
-import json
 import logging
 import time
 from pathlib import Path
@@ -12,86 +10,143 @@ log = logging.getLogger(__name__)
 from salmalm.constants import DATA_DIR, BASE_DIR, MEMORY_DIR, MEMORY_FILE, WORKSPACE_DIR  # noqa: E402
 
 REINDEX_INTERVAL = 120
-from salmalm.features.rag_utils import CHUNK_SIZE, CHUNK_OVERLAP, MAX_CHUNK_CHARS, compute_tf  # noqa: E402  # default seconds
+from salmalm.features.rag_utils import CHUNK_SIZE, CHUNK_OVERLAP  # noqa: E402
+from salmalm.core.retrieval_cache import next_generation  # noqa: E402
+from salmalm.db import get_connection  # noqa: E402
+from salmalm.features.rag_ingest import insert_chunks, read_source_text  # noqa: E402
+from salmalm.features.rag_terms import unpack_ids  # noqa: E402
 
 
 class RAGIndexerMixin:
     """Mixin for RAG indexing operations."""
 
     def _index_text(self, label: str, text: str, mtime: float):
-        """Index text content as chunks."""
+        """Index text content as chunks, replacing any previous chunks for *label*."""
         cfg = self.config
         chunk_size = cfg.get("chunkSize", CHUNK_SIZE)
         chunk_overlap = cfg.get("chunkOverlap", CHUNK_OVERLAP)
 
-        lines = text.splitlines()
-        new_docs = []
-        vectors = []
+        new_docs: List[tuple] = []
+        vectors: List[Dict[str, float]] = []
         doc_freq: Dict[str, int] = {}
+        self._chunk_and_index(label, text, mtime, chunk_size, chunk_overlap, new_docs, vectors, doc_freq)
 
-        step = max(1, chunk_size - chunk_overlap)
-        for i in range(0, len(lines), step):
-            chunk_lines = lines[i : i + chunk_size]
-            chunk_text = "\n".join(chunk_lines).strip()
-            if not chunk_text or len(chunk_text) < 10:
-                continue
-            if len(chunk_text) > MAX_CHUNK_CHARS:
-                chunk_text = chunk_text[:MAX_CHUNK_CHARS]
-
-            tokens = self._tokenize(chunk_text)
-            if not tokens:
-                continue
+        with self._db_lock:
+            if not new_docs and not self._conn.execute(
+                "SELECT 1 FROM chunks WHERE source=? LIMIT 1", (label,)
+            ).fetchone():
+                return
+            self._replace_source(label, new_docs, vectors, doc_freq)
 
-            h = hashlib.md5(chunk_text.encode(), usedforsecurity=False).hexdigest()[:12]
-            new_docs.append((label, i + 1, i + len(chunk_lines), chunk_text, json.dumps(tokens), len(tokens), mtime, h))
+        # Generate embeddings for new chunks (async-friendly, non-blocking on failure)
+        try:
+            self._embed_chunks([doc[3] for doc in new_docs])  # text field
+        except Exception as e:
+            log.debug(f"[RAG] Embedding during index_text skipped: {e}")
 
-            # TF vector for this chunk
-            tf_vec = compute_tf(tokens)
-            vectors.append(tf_vec)
+    def _embed_chunks(self, chunk_texts: List[str]) -> None:
+        """Embed chunk texts if a provider is configured.
 
-            for t in set(tokens):
-                doc_freq[t] = doc_freq.get(t, 0) + 1
+        Provider calls go over the network, so they use a pooled connection
+        of their own instead of holding ``_db_lock`` on the shared one.
+        """
+        from salmalm.features.rag_embeddings import get_available_provider, batch_embed
 
-        if not new_docs:
+        if not chunk_texts or not get_available_provider():
             return
+        conn = get_connection(self._db_path)
+        try:
+            batch_embed(chunk_texts, conn=conn, config=self.config.get("embeddings"))
+        finally:
+            conn.close()
+        with self._db_lock:
+            self._index_gen = next_generation()
 
-        # Remove old chunks for this label
-        self._conn.execute(
-            "DELETE FROM tfidf_vectors WHERE chunk_id IN (SELECT id FROM chunks WHERE source=?)", (label,)
-        )
-        self._conn.execute("DELETE FROM chunks WHERE source=?", (label,))
+    def _replace_source(
+        self, label: str, new_docs: List[tuple], vectors: List[Dict[str, float]], doc_freq: Dict[str, int]
+    ) -> None:
+        """Swap *label*'s chunks and apply doc_freq / length deltas in one transaction.
+
+        The df of the old chunks' terms (read from postings) is decremented and
+        the new chunks' df incremented, so no corpus-wide pass is needed. The
+        dropped and added chunk ids are queued for the embedding matrix.
+        Callers hold ``_db_lock``.
+        """
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            old_n, old_len = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(token_count), 0) FROM chunks WHERE source=?", (label,)
+            ).fetchone()
+            delta = dict(doc_freq)
+            for term, df in self._conn.execute(
+                "SELECT t.term, COUNT(*) FROM postings p JOIN terms t ON t.id = p.term_id "
+                "WHERE p.chunk_id IN (SELECT id FROM chunks WHERE source=?) GROUP BY p.term_id",
+                (label,),
+            ):
+                delta[term] = delta.get(term, 0) - df
+            delta = {t: d for t, d in delta.items() if d}
 
-        # Insert new chunks
-        for doc in new_docs:
-            cur = self._conn.execute(
-                "INSERT INTO chunks (source, line_start, line_end, text, tokens, token_count, mtime, hash) VALUES (?,?,?,?,?,?,?,?)",
-                doc,
+            dropped = [cid for (cid,) in self._conn.execute("SELECT id FROM chunks WHERE source=?", (label,))]
+            self._delete_source(label)
+            self._insert_chunks(new_docs, vectors)
+            added = [cid for (cid,) in self._conn.execute("SELECT id FROM chunks WHERE source=?", (label,))]
+            self._conn.executemany(
+                "INSERT INTO doc_freq (term, df) VALUES (?,?) ON CONFLICT(term) DO UPDATE SET df = df + excluded.df",
+                list(delta.items()),
             )
-            chunk_id = cur.lastrowid
-            idx = len(vectors) - len(new_docs) + new_docs.index(doc)
-            self._conn.execute(
-                "INSERT INTO tfidf_vectors (chunk_id, vector) VALUES (?,?)", (chunk_id, json.dumps(vectors[idx]))
+            self._conn.executemany(
+                "DELETE FROM doc_freq WHERE term=? AND df<=0", [(t,) for t, d in delta.items() if d < 0]
             )
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            self._terms.reset()
+            raise
+        self._emb_added.difference_update(dropped)
+        self._emb_dropped.update(dropped)
+        self._emb_added.update(added)
+        self._apply_stats_delta(len(new_docs) - old_n, sum(doc[5] for doc in new_docs) - old_len, delta)
 
-        # Update doc_freq (rebuild entirely for simplicity during reindex)
-        # This is handled in reindex(); for single file we just update
-        for term, df_val in doc_freq.items():
-            self._conn.execute(
-                "INSERT OR REPLACE INTO doc_freq (term, df) VALUES (?, COALESCE((SELECT df FROM doc_freq WHERE term=?), 0) + ?)",
-                (term, term, df_val),
-            )
+    def _remove_source(self, label: str) -> None:
+        """Drop *label* from the index (file deleted or no longer indexable)."""
+        with self._db_lock:
+            self._replace_source(label, [], [], {})
+            self._mtimes.pop(label, None)
 
-        self._conn.commit()
-        self._load_stats()
+    def _delete_source(self, label: str) -> None:
+        """Remove every chunk (and its vectors/postings) indexed under *label*."""
+        self._conn.execute("DELETE FROM postings WHERE chunk_id IN (SELECT id FROM chunks WHERE source=?)", (label,))
+        self._conn.execute("DELETE FROM ann_assign WHERE chunk_id IN (SELECT id FROM chunks WHERE source=?)", (label,))
+        self._conn.execute(
+            "DELETE FROM tfidf_vectors WHERE chunk_id IN (SELECT id FROM chunks WHERE source=?)", (label,)
+        )
+        self._conn.execute("DELETE FROM chunks WHERE source=?", (label,))
 
-        # Generate embeddings for new chunks (async-friendly, non-blocking on failure)
+    def _insert_chunks(self, new_docs: List[tuple], vectors: List[Dict[str, float]]) -> None:
+        """Insert chunk rows with their TF vectors and postings (caller owns the transaction)."""
+        insert_chunks(self._conn, self._terms, new_docs, vectors)
+
+    def _backfill_postings(self) -> None:
+        """Build the postings table for databases created before it existed."""
+        if self._conn.execute("SELECT 1 FROM postings LIMIT 1").fetchone():
+            return
+        if not self._conn.execute("SELECT 1 FROM chunks LIMIT 1").fetchone():
+            return
+        self._conn.execute("BEGIN IMMEDIATE")
         try:
-            from salmalm.features.rag_embeddings import get_available_provider, batch_embed
-            if get_available_provider():
-                chunk_texts = [doc[3] for doc in new_docs]  # text field
-                batch_embed(chunk_texts, conn=self._conn)
-        except Exception as e:
-            log.debug(f"[RAG] Embedding during index_text skipped: {e}")
+            for chunk_id, tokens in self._conn.execute("SELECT id, tokens FROM chunks").fetchall():
+                counts: Dict[int, int] = {}
+                for tid in unpack_ids(tokens):
+                    counts[tid] = counts.get(tid, 0) + 1
+                self._conn.executemany(
+                    "INSERT INTO postings (term_id, chunk_id, tf) VALUES (?,?,?)",
+                    [(tid, chunk_id, tf) for tid, tf in counts.items()],
+                )
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+        log.info("[RAG] Built postings index for existing chunks")
 
     def _get_indexable_files(self) -> List[Tuple[str, Path]]:
         """Enumerate files to index."""
@@ -172,24 +227,43 @@ class RAGIndexerMixin:
     def _index_session_file(self, label: str, fpath: Path, mtime: float):
         """Index a session JSON file, extracting conversation text."""
         try:
-            with open(fpath, "r", encoding="utf-8") as f:
-                data = json.load(f)
+            text = read_source_text(fpath, is_session=True)
         except Exception as e:  # noqa: broad-except
             return
-
-        # Extract messages text
-        parts = []
-        messages = data if isinstance(data, list) else data.get("messages", [])
-        for msg in messages:
-            if isinstance(msg, dict):
-                content = msg.get("content", "")
-                if isinstance(content, str) and content.strip():
-                    parts.append(content)
-
-        if parts:
-            text = "\n".join(parts)
+        if text:
             self._index_text(label, text, mtime)
 
+    def _reindex_changed(self, files: List[Tuple[str, Path]], session_files: List[Tuple[str, Path]]) -> None:
+        """Re-index only sources whose mtime changed and drop ones that vanished."""
+        current = {label for label, _ in files + session_files}
+        for is_session, items in ((False, files), (True, session_files)):
+            for label, fpath in items:
+                try:
+                    mtime = fpath.stat().st_mtime
+                    if self._mtimes.get(label) == mtime:
+                        continue
+                    if is_session:
+                        self._index_session_file(label, fpath, mtime)
+                    else:
+                        self._index_text(label, fpath.read_text(encoding="utf-8", errors="replace"), mtime)
+                    # Only after success: a failed source is retried on the next pass
+                    with self._db_lock:
+                        self._mtimes[label] = mtime
+                except Exception as e:
+                    log.warning(f"RAG index error ({label}): {e}")
+        for label in self._discovered - current:
+            self._remove_source(label)
+        with self._db_lock:
+            self._discovered = current
+
+    def _needs_rebuild(self) -> bool:
+        """True if the index is empty or a bulk rebuild was interrupted (see rag_ingest)."""
+        with self._db_lock:
+            if self._doc_count == 0:
+                return True
+            row = self._conn.execute("SELECT value FROM meta WHERE key='ingest_state'").fetchone()
+            return bool(row) and row[0] == "running"
+
     def _needs_reindex(self) -> bool:
         """Check if any source files changed since last index."""
         now = time.time()
@@ -199,6 +273,8 @@ class RAGIndexerMixin:
         self._last_check = now
 
         all_files = self._get_indexable_files() + self._get_session_files()
+        if self._discovered - {label for label, _ in all_files}:
+            return True
         for label, fpath in all_files:
             try:
                 mtime = fpath.stat().st_mtime
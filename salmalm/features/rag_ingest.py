@@ -0,0 +1,343 @@
+"""Parallel, resumable bulk ingestion for the RAG index.
+
+Used by ``RAGEngine.reindex(force=True)`` (manual rebuild), and by a plain
+``reindex()`` when the index is empty or an earlier rebuild was interrupted.
+Stages:
+
+  discovery → read + chunk/tokenize → batched ``executemany`` writes → swap
+
+Tokenization (character 3-grams, jamo decomposition) is CPU-bound, so the
+read/chunk stage runs in a process pool once a corpus has at least
+``parallelMinFiles`` sources. Small corpora stay in-process because pool
+start-up would dominate.
+
+  - Staging: chunks, vectors, postings and doc_freq are written to
+    ``ingest_*`` tables on the pipeline's own connection. The live tables
+    and the engine's in-memory statistics are untouched until the last
+    batch; one transaction then replaces the live index, so searches see
+    the old index or the new one, never a partial one.
+  - Backpressure: at most ``workers * 4`` sources are in flight; the pool
+    is fed only as the writer drains finished results.
+  - Batching: results are written in transactions of about
+    ``batchChunks`` chunks. Whole sources go into one batch, so a committed
+    source is always complete.
+  - Resumability: ``meta.ingest_state`` stays ``running`` until the swap
+    commits. An interrupted run is resumed from the staging tables by the
+    next rebuild, which skips sources whose staged chunks carry the file's
+    current mtime.
+  - Progress: ``RAGEngine.get_stats()["ingest"]``, served by ``/api/rag``.
+
+rag.json knobs (``"ingest": {...}``):
+  workers (0 = CPU count), batchChunks, parallelMinFiles.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from salmalm.db import get_connection
+from salmalm.features.rag_terms import TermDictionary, pack_ids, pack_tf
+
+log = logging.getLogger(__name__)
+
+INGEST_DEFAULTS = {"workers": 0, "batchChunks": 2000, "parallelMinFiles": 32}
+_INFLIGHT_PER_WORKER = 4
+_STAGING = "ingest_"  # prefix of the staging copies of the index tables
+
+
+def read_source_text(fpath: Path, is_session: bool) -> str:
+    """Text of a source file; session JSON is reduced to its message contents."""
+    if not is_session:
+        return fpath.read_text(encoding="utf-8", errors="replace")
+    with open(fpath, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    parts = []
+    messages = data if isinstance(data, list) else data.get("messages", [])
+    for msg in messages:
+        if isinstance(msg, dict):
+            content = msg.get("content", "")
+            if isinstance(content, str) and content.strip():
+                parts.append(content)
+    return "\n".join(parts)
+
+
+def prepare_source(job: tuple) -> tuple:
+    """Read and chunk one source (runs in a worker process).
+
+    Returns ``(label, mtime, new_docs, vectors, doc_freq, error)``.
+    """
+    from salmalm.features.rag import RAGEngine
+
+    label, path, is_session, chunk_size, chunk_overlap = job
+    try:
+        fpath = Path(path)
+        mtime = fpath.stat().st_mtime
+        text = read_source_text(fpath, is_session)
+        new_docs: List[tuple] = []
+        vectors: List[Dict[str, float]] = []
+        doc_freq: Dict[str, int] = {}
+        RAGEngine._chunk_and_index(label, text, mtime, chunk_size, chunk_overlap, new_docs, vectors, doc_freq)
+        return label, mtime, new_docs, vectors, doc_freq, None
+    except Exception as e:  # noqa: broad-except
+        return label, None, [], [], {}, str(e)
+
+
+def insert_chunks(
+    conn, terms: TermDictionary, new_docs: List[tuple], vectors: List[Dict[str, float]], prefix: str = ""
+) -> None:
+    """Insert chunk rows, packed TF vectors and postings with ``executemany``.
+
+    ``new_docs`` rows carry the token list at index 4; it is stored as packed
+    term ids (see :mod:`rag_terms`). The caller owns the transaction and
+    must :meth:`TermDictionary.reset` on rollback. *prefix* selects the
+    staging tables. Chunk ids are allocated past the live AUTOINCREMENT
+    sequence and ``MAX(id)`` of both the live and the target table, so ids
+    are never reused. Raw term counts are recovered from the normalized TF
+    vector (``tf * token_count``) so postings stay integral.
+    """
+    if not new_docs:
+        return
+    term_ids = terms.ids_for(conn, {t for vec in vectors for t in vec})
+    last = conn.execute(
+        "SELECT MAX(COALESCE((SELECT seq FROM sqlite_sequence WHERE name='chunks'), 0), "
+        f"COALESCE((SELECT MAX(id) FROM chunks), 0), COALESCE((SELECT MAX(id) FROM {prefix}chunks), 0))"
+    ).fetchone()[0]
+    ids = range(last + 1, last + 1 + len(new_docs))
+    conn.executemany(
+        f"INSERT INTO {prefix}chunks (id, source, line_start, line_end, text, tokens, token_count, mtime, hash) "
+        "VALUES (?,?,?,?,?,?,?,?,?)",
+        [(chunk_id, *doc[:4], pack_ids(term_ids[t] for t in doc[4]), *doc[5:]) for chunk_id, doc in zip(ids, new_docs)],
+    )
+    conn.executemany(
+        f"INSERT INTO {prefix}tfidf_vectors (chunk_id, vector) VALUES (?,?)",
+        [(chunk_id, pack_tf({term_ids[t]: tf for t, tf in vec.items()})) for chunk_id, vec in zip(ids, vectors)],
+    )
+    conn.executemany(
+        f"INSERT INTO {prefix}postings (term_id, chunk_id, tf) VALUES (?,?,?)",
+        [
+            (term_ids[term], chunk_id, round(tf * doc[5]))
+            for chunk_id, doc, vec in zip(ids, new_docs, vectors)
+            for term, tf in vec.items()
+        ],
+    )
+
+
+class IngestPipeline:
+    """One bulk (re)build of a RAGEngine index. See the module docstring."""
+
+    def __init__(self, engine, cfg: Optional[dict] = None) -> None:
+        """Init  ."""
+        c = {**INGEST_DEFAULTS, **(cfg or {})}
+        self.engine = engine
+        self.workers = int(c["workers"]) or os.cpu_count() or 1
+        self.batch_chunks = max(1, int(c["batchChunks"]))
+        self.parallel_min = int(c["parallelMinFiles"])
+        self.progress = engine._ingest_progress
+
+    def run(self, sources: List[Tuple[str, Path, bool]], chunk_size: int, chunk_overlap: int) -> int:
+        """Ingest *sources* ``(label, path, is_session)``; returns the number of chunks written."""
+        conn = get_connection(self.engine._db_path)
+        try:
+            row = conn.execute("SELECT value FROM meta WHERE key='ingest_state'").fetchone()
+            resumed = bool(row) and row[0] == "running" and self._has_staging(conn)
+            done = self._resume_state(conn, sources) if resumed else self._start(conn)
+
+            mtimes = dict(done)
+            jobs = []
+            for label, fpath, is_session in sources:
+                try:
+                    if done.get(label) == fpath.stat().st_mtime:
+                        continue
+                except OSError:
+                    pass
+                jobs.append((label, str(fpath), is_session, chunk_size, chunk_overlap))
+
+            parallel = self.workers > 1 and len(jobs) >= self.parallel_min
+            self.progress.clear()
+            self.progress.update(
+                state="running",
+                resumed=resumed,
+                workers=self.workers if parallel else 1,
+                files_total=len(sources),
+                files_skipped=len(sources) - len(jobs),
+                files_done=0,
+                files_failed=0,
+                chunks=0,
+                started_at=time.time(),
+            )
+
+            written = 0
+            batch: List[tuple] = []
+            batch_size = 0
+            for label, mtime, new_docs, vectors, doc_freq, error in self._results(jobs, parallel):
+                if error is not None:
+                    self.progress["files_failed"] += 1
+                    log.warning(f"RAG index error ({label}): {error}")
+                    continue
+                mtimes[label] = mtime
+                self.progress["files_done"] += 1
+                if new_docs:
+                    batch.append((new_docs, vectors, doc_freq))
+                    batch_size += len(new_docs)
+                if batch_size >= self.batch_chunks:
+                    written += self._write_batch(conn, batch)
+                    batch, batch_size = [], 0
+            written += self._write_batch(conn, batch)
+
+            self._swap(conn, resumed, mtimes)
+            self.progress.update(state="done", elapsed_s=round(time.time() - self.progress["started_at"], 2))
+            return written
+        except BaseException:
+            self.progress["state"] = "interrupted"
+            raise
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _has_staging(conn) -> bool:
+        return (
+            conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (f"{_STAGING}chunks",)).fetchone()
+            is not None
+        )
+
+    def _start(self, conn) -> Dict[str, float]:
+        """Create empty staging tables and mark a run in progress (one transaction)."""
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for table in ("chunks", "tfidf_vectors", "postings"):
+                conn.execute(f"DROP TABLE IF EXISTS {_STAGING}{table}")
+                conn.execute(f"CREATE TABLE {_STAGING}{table} AS SELECT * FROM {table} WHERE 0")
+            conn.execute(f"CREATE INDEX {_STAGING}chunks_source ON {_STAGING}chunks(source)")
+            conn.execute(f"DROP TABLE IF EXISTS {_STAGING}doc_freq")
+            conn.execute(f"CREATE TABLE {_STAGING}doc_freq (term TEXT PRIMARY KEY, df INTEGER NOT NULL)")
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('ingest_state', 'running')")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return {}
+
+    def _resume_state(self, conn, sources: List[Tuple[str, Path, bool]]) -> Dict[str, float]:
+        """Staged sources still current; drops the ones that vanished or changed."""
+        committed = {
+            src: mtime
+            for src, mtime in conn.execute(f"SELECT source, MAX(mtime) FROM {_STAGING}chunks GROUP BY source")
+        }
+        current = {}
+        for label, fpath, _ in sources:
+            try:
+                current[label] = fpath.stat().st_mtime
+            except OSError:
+                continue
+        stale = [src for src, mtime in committed.items() if current.get(src) != mtime]
+        if stale:
+            sub = f"(SELECT id FROM {_STAGING}chunks WHERE source=?)"
+            conn.execute("BEGIN IMMEDIATE")
+            for src in stale:
+                conn.execute(f"DELETE FROM {_STAGING}postings WHERE chunk_id IN {sub}", (src,))
+                conn.execute(f"DELETE FROM {_STAGING}tfidf_vectors WHERE chunk_id IN {sub}", (src,))
+                conn.execute(f"DELETE FROM {_STAGING}chunks WHERE source=?", (src,))
+            conn.execute("COMMIT")
+        log.info(f"[RAG] Resuming interrupted ingestion: {len(committed) - len(stale)} sources already indexed")
+        return {src: mtime for src, mtime in committed.items() if src not in stale}
+
+    def _results(self, jobs: List[tuple], parallel: bool) -> Iterator[tuple]:
+        """Prepared sources in completion order, with bounded in-flight work."""
+        if not parallel:
+            for job in jobs:
+                yield prepare_source(job)
+            return
+        try:
+            pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        except (OSError, NotImplementedError) as e:
+            log.warning(f"[RAG] Process pool unavailable, ingesting in-process: {e}")
+            for job in jobs:
+                yield prepare_source(job)
+            return
+        with pool:
+            pending = iter(jobs)
+            inflight: set = set()
+            limit = self.workers * _INFLIGHT_PER_WORKER
+            while True:
+                while len(inflight) < limit:
+                    job = next(pending, None)
+                    if job is None:
+                        break
+                    inflight.add(pool.submit(prepare_source, job))
+                if not inflight:
+                    return
+                finished, inflight = wait(inflight, return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    yield fut.result()
+
+    def _write_batch(self, conn, batch: List[tuple]) -> int:
+        """Write prepared sources to the staging tables in one transaction."""
+        if not batch:
+            return 0
+        new_docs = [doc for docs, _, _ in batch for doc in docs]
+        vectors = [vec for _, vecs, _ in batch for vec in vecs]
+        df_delta: Dict[str, int] = {}
+        for _, _, doc_freq in batch:
+            for term, df in doc_freq.items():
+                df_delta[term] = df_delta.get(term, 0) + df
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            insert_chunks(conn, self.engine._terms, new_docs, vectors, prefix=_STAGING)
+            conn.executemany(
+                f"INSERT INTO {_STAGING}doc_freq (term, df) VALUES (?,?) "
+                "ON CONFLICT(term) DO UPDATE SET df = df + excluded.df",
+                list(df_delta.items()),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            self.engine._terms.reset()
+            raise
+        self.progress["chunks"] += len(new_docs)
+        return len(new_docs)
+
+    def _swap(self, conn, resumed: bool, mtimes: Dict[str, float]) -> None:
+        """Replace the live index with the staging tables and reload the engine's statistics.
+
+        Runs under the engine's ``_db_lock`` so no search mixes the old
+        statistics with the new rows. A run that staged no chunks keeps the
+        live index, as the single-transaction rebuild did.
+        """
+        engine = self.engine
+        with engine._db_lock:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                swap = conn.execute(f"SELECT 1 FROM {_STAGING}chunks LIMIT 1").fetchone() is not None
+                if swap:
+                    conn.execute("DELETE FROM postings")
+                    conn.execute("DELETE FROM ann_assign")
+                    conn.execute("DELETE FROM tfidf_vectors")
+                    conn.execute("DELETE FROM chunks")
+                    conn.execute("DELETE FROM doc_freq")
+                    conn.execute(f"INSERT INTO chunks SELECT * FROM {_STAGING}chunks")
+                    conn.execute(f"INSERT INTO tfidf_vectors SELECT * FROM {_STAGING}tfidf_vectors")
+                    conn.execute(f"INSERT INTO postings SELECT * FROM {_STAGING}postings ORDER BY term_id, chunk_id")
+                    if resumed:
+                        # Stale staged sources were dropped without df bookkeeping; rebuild df once.
+                        conn.execute(
+                            "INSERT INTO doc_freq (term, df) SELECT t.term, COUNT(*) FROM postings p "
+                            "JOIN terms t ON t.id = p.term_id GROUP BY p.term_id"
+                        )
+                    else:
+                        conn.execute(f"INSERT INTO doc_freq (term, df) SELECT term, df FROM {_STAGING}doc_freq")
+                for table in ("chunks", "tfidf_vectors", "postings", "doc_freq"):
+                    conn.execute(f"DROP TABLE {_STAGING}{table}")
+                conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('ingest_state', 'done')")
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            engine._mtimes = mtimes if swap else {**engine._mtimes, **mtimes}
+            engine._load_stats()
@@ -0,0 +1,188 @@
+"""Term dictionary and packed encodings for the RAG index.
+
+Term strings are stored once in ``terms(id, term)``; everything else
+refers to them by integer id:
+
+  - ``chunks.tokens``        — ``array('I')`` of token ids (chunk order)
+  - ``tfidf_vectors.vector`` — ``array('I')`` term ids followed by
+    ``array('f')`` normalized TF values (same length)
+  - ``postings.term_id``     — inverted index key
+
+Decoding is a single ``array.frombytes`` call instead of ``json.loads``.
+:func:`migrate_compact` converts databases written with JSON tokens,
+JSON vectors and string-keyed postings.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+import threading
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+log = logging.getLogger(__name__)
+
+_SELECT_BATCH = 500
+
+
+def pack_ids(ids: Iterable[int]) -> bytes:
+    """Pack term ids as native uint32."""
+    return array("I", ids).tobytes()
+
+
+def unpack_ids(blob: bytes) -> array:
+    """Decode :func:`pack_ids` output."""
+    ids = array("I")
+    ids.frombytes(blob)
+    return ids
+
+
+def pack_tf(vec: Dict[int, float]) -> bytes:
+    """Pack a ``{term_id: tf}`` vector as ids followed by float32 values."""
+    return array("I", vec.keys()).tobytes() + array("f", vec.values()).tobytes()
+
+
+def unpack_tf(blob: bytes) -> Tuple[array, array]:
+    """Decode :func:`pack_tf` output into parallel ``(ids, tfs)`` arrays."""
+    half = len(blob) // 2
+    ids, tfs = array("I"), array("f")
+    ids.frombytes(blob[:half])
+    tfs.frombytes(blob[half:])
+    return ids, tfs
+
+
+class TermDictionary:
+    """Cached term ↔ id mapping over the ``terms`` table.
+
+    The cache only ever holds committed ids; writers call :meth:`reset`
+    after a rollback, and lookups of unknown terms fall back to SQL.
+    """
+
+    def __init__(self) -> None:
+        """Init  ."""
+        self._ids: Dict[str, int] = {}
+        self._terms: Dict[int, str] = {}
+        self._complete = False  # _terms holds every row of the table
+        self._lock = threading.Lock()
+
+    def reset(self) -> None:
+        """Drop the cache (after a rollback or an external rebuild)."""
+        with self._lock:
+            self._ids.clear()
+            self._terms.clear()
+            self._complete = False
+
+    def _remember(self, pairs) -> None:
+        with self._lock:
+            for term, tid in pairs:
+                self._ids[term] = tid
+                self._terms[tid] = term
+
+    def lookup(self, conn: sqlite3.Connection, terms: Iterable[str]) -> Dict[str, int]:
+        """Ids of the *terms* that exist; unknown terms are omitted."""
+        found: Dict[str, int] = {}
+        missing: List[str] = []
+        for term in set(terms):
+            tid = self._ids.get(term)
+            if tid is None:
+                missing.append(term)
+            else:
+                found[term] = tid
+        for i in range(0, len(missing), _SELECT_BATCH):
+            part = missing[i : i + _SELECT_BATCH]
+            rows = conn.execute(
+                f"SELECT term, id FROM terms WHERE term IN ({','.join('?' * len(part))})", part
+            ).fetchall()
+            self._remember(rows)
+            found.update(rows)
+        return found
+
+    def ids_for(self, conn: sqlite3.Connection, terms: Iterable[str]) -> Dict[str, int]:
+        """Ids for *terms*, inserting new ones (caller owns the transaction)."""
+        terms = set(terms)
+        found = self.lookup(conn, terms)
+        new = [t for t in terms if t not in found]
+        if new:
+            conn.executemany("INSERT OR IGNORE INTO terms (term) VALUES (?)", [(t,) for t in new])
+            for i in range(0, len(new), _SELECT_BATCH):
+                part = new[i : i + _SELECT_BATCH]
+                found.update(
+                    conn.execute(f"SELECT term, id FROM terms WHERE term IN ({','.join('?' * len(part))})", part)
+                )
+        return found
+
+    def term(self, conn: sqlite3.Connection, tid: int) -> Optional[str]:
+        """Term string for *tid* (loads the full table once on a miss)."""
+        term = self._terms.get(tid)
+        if term is None and not self._complete:
+            self._remember(conn.execute("SELECT term, id FROM terms").fetchall())
+            self._complete = True
+            term = self._terms.get(tid)
+        return term
+
+
+def _columns(conn: sqlite3.Connection, table: str) -> List[str]:
+    return [r[1] for r in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def migrate_compact(conn: sqlite3.Connection, terms: TermDictionary) -> bool:
+    """Convert JSON tokens/vectors and string-keyed postings to the packed format.
+
+    Runs in one transaction and VACUUMs afterwards to return the freed
+    pages. Returns True if anything was converted.
+    """
+    old_postings = "term" in _columns(conn, "postings")
+    json_chunks = conn.execute("SELECT 1 FROM chunks WHERE typeof(tokens)='text' LIMIT 1").fetchone()
+    json_vectors = conn.execute("SELECT 1 FROM tfidf_vectors WHERE typeof(vector)='text' LIMIT 1").fetchone()
+    if not (old_postings or json_chunks or json_vectors):
+        return False
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for chunk_id, tokens_json in conn.execute(
+            "SELECT id, tokens FROM chunks WHERE typeof(tokens)='text'"
+        ).fetchall():
+            tokens = json.loads(tokens_json)
+            ids = terms.ids_for(conn, tokens)
+            conn.execute("UPDATE chunks SET tokens=? WHERE id=?", (pack_ids(ids[t] for t in tokens), chunk_id))
+        for chunk_id, vec_json in conn.execute(
+            "SELECT chunk_id, vector FROM tfidf_vectors WHERE typeof(vector)='text'"
+        ).fetchall():
+            vec = json.loads(vec_json)
+            ids = terms.ids_for(conn, vec)
+            conn.execute(
+                "UPDATE tfidf_vectors SET vector=? WHERE chunk_id=?",
+                (pack_tf({ids[t]: tf for t, tf in vec.items()}), chunk_id),
+            )
+        if old_postings:
+            conn.execute("INSERT OR IGNORE INTO terms (term) SELECT DISTINCT term FROM postings")
+            conn.execute("DROP INDEX IF EXISTS idx_postings_chunk")
+            conn.execute("ALTER TABLE postings RENAME TO postings_old")
+            conn.execute(_POSTINGS_DDL)
+            conn.execute(
+                "INSERT INTO postings (term_id, chunk_id, tf) "
+                "SELECT t.id, p.chunk_id, p.tf FROM postings_old p JOIN terms t ON t.term = p.term"
+            )
+            conn.execute("DROP TABLE postings_old")
+            conn.execute(_POSTINGS_INDEX_DDL)
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        terms.reset()
+        raise
+    conn.execute("VACUUM")
+    log.info("[RAG] Converted index to packed term-id storage")
+    return True
+
+
+_POSTINGS_DDL = """CREATE TABLE IF NOT EXISTS postings (
+            term_id INTEGER NOT NULL,
+            chunk_id INTEGER NOT NULL,
+            tf INTEGER NOT NULL,
+            PRIMARY KEY (term_id, chunk_id)
+        ) WITHOUT ROWID"""
+
+_POSTINGS_INDEX_DDL = """CREATE INDEX IF NOT EXISTS idx_postings_chunk
+            ON postings(chunk_id)"""
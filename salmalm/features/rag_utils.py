@@ -17,6 +17,10 @@ from salmalm.constants import DATA_DIR  # noqa: E402
 
 _DEFAULT_CONFIG = {
     "hybrid": {"enabled": True, "vectorWeight": 0.7, "textWeight": 0.3},
+    "bm25": {"maxScore": True},
+    "ann": {"enabled": True, "minVectors": 5000, "nlist": 0, "nprobe": 8, "trainIterations": 8, "retrainGrowth": 4.0},
+    "ingest": {"workers": 0, "batchChunks": 2000, "parallelMinFiles": 32},
+    "embeddings": {"concurrency": 4, "batchSize": 0, "maxRetries": 5, "endpoints": {}},
     "sessionIndexing": {"enabled": False, "retentionDays": 30},
     "extraPaths": [],
     "chunkSize": 5,
@@ -77,8 +81,30 @@ for _key, _vals in _SYNONYMS.items():
     _SYNONYM_REVERSE[_kl].extend(v.lower() for v in _vals)
 
 
+# Lookup table for ``str.translate``: index = code point, Hangul syllables map
+# to their jamo string and everything below 0xAC00 to itself. Built on first
+# use (~11k syllables); set _USE_JAMO_TABLE = False for the arithmetic path.
+_USE_JAMO_TABLE = True
+_JAMO_TABLE: Optional[list] = None
+
+
+def _jamo_table() -> list:
+    global _JAMO_TABLE
+    if _JAMO_TABLE is None:
+        table: list = list(range(0xAC00))
+        for cho in _CHO:
+            for jung in _JUNG:
+                for jong in _JONG:
+                    table.append(cho + jung + jong)
+        _JAMO_TABLE = table
+    return _JAMO_TABLE
+
+
 def decompose_jamo(text: str) -> str:
     """Decompose Korean syllables into jamo (초성/중성/종성)."""
+    if _USE_JAMO_TABLE:
+        # Code points past the table raise IndexError → left unchanged.
+        return text.translate(_jamo_table())
     result = []
     for ch in text:
         code = ord(ch)
@@ -0,0 +1,205 @@
+"""In-memory embedding matrix for exact semantic RAG search.
+
+Chunk embeddings are loaded once into one contiguous float32 matrix per
+dimensionality; later index generations copy it with only the chunks that
+were added or dropped since (:meth:`EmbeddingMatrix.updated`). Vectors are L2-normalized at write time
+(see ``rag_embeddings.pack_embedding``), so a query is a single
+matrix-vector product followed by a top-k partial sort.
+
+Uses NumPy when installed; otherwise falls back to a stdlib ``array('f')``
+scan with ``math.sumprod`` (3.12+) or ``map(operator.mul)``.
+"""
+
+from __future__ import annotations
+
+import heapq
+import math
+import operator
+import sqlite3
+from array import array
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from salmalm.features.rag_embeddings import text_hash, unpack_embedding
+
+try:
+    import numpy as _np
+
+    _HAS_NUMPY = True
+except ImportError:
+    _np = None
+    _HAS_NUMPY = False
+
+# Bound on SQL parameters per ``IN (...)`` lookup.
+_SQL_BATCH = 500
+
+_sumprod = getattr(math, "sumprod", None) or (lambda a, b: sum(map(operator.mul, a, b)))
+
+
+def normalize(vec: Sequence[float]) -> Optional[List[float]]:
+    """L2-normalize *vec*; ``None`` for the zero vector."""
+    norm = math.sqrt(sum(x * x for x in vec))
+    if norm == 0.0:
+        return None
+    return [x / norm for x in vec]
+
+
+class VectorBlock:
+    """Rows of one dimensionality: chunk ids + row-major float32 matrix.
+
+    Call :meth:`freeze` once all rows are added; the NumPy view pins the buffer.
+    """
+
+    __slots__ = ("dims", "ids", "data", "matrix")
+
+    def __init__(self, dims: int) -> None:
+        self.dims = dims
+        self.ids: List[int] = []
+        self.data = array("f")
+        self.matrix = None  # numpy view of ``data`` when available
+
+    def add(self, chunk_id: int, vec: array) -> None:
+        self.ids.append(chunk_id)
+        self.data.extend(vec)
+
+    def freeze(self) -> None:
+        if _HAS_NUMPY:
+            self.matrix = _np.frombuffer(self.data, dtype=_np.float32).reshape(len(self.ids), self.dims)
+
+    def updated(self, drop: Set[int], rows: Sequence[Tuple[int, array]]) -> "VectorBlock":
+        """Frozen copy without the *drop* ids and with *rows* appended (``self`` if unchanged).
+
+        Kept rows are copied in contiguous runs, so the cost is a memcpy plus
+        one step per dropped row.
+        """
+        if not rows and drop.isdisjoint(self.ids):
+            return self
+        block = VectorBlock(self.dims)
+        d = self.dims
+        start = 0
+        for i, chunk_id in enumerate(self.ids):
+            if chunk_id in drop:
+                block.ids.extend(self.ids[start:i])
+                block.data.extend(self.data[start * d : i * d])
+                start = i + 1
+        block.ids.extend(self.ids[start:])
+        block.data.extend(self.data[start * d :])
+        for chunk_id, vec in rows:
+            block.add(chunk_id, vec)
+        block.freeze()
+        return block
+
+    def dots(self, query: Sequence[float]):
+        """Dot product of every row with *query* (ndarray with NumPy, list otherwise)."""
+        if self.matrix is not None:
+            return self.matrix @ _np.asarray(query, dtype=_np.float32)
+        d = self.dims
+        mv = memoryview(self.data)
+        q = list(query)
+        return [_sumprod(mv[i * d : (i + 1) * d], q) for i in range(len(self.ids))]
+
+    def top_k(self, query: Sequence[float], k: int) -> List[Tuple[float, int]]:
+        """Return up to *k* ``(similarity, chunk_id)`` pairs with similarity > 0, best first."""
+        n = len(self.ids)
+        if n == 0 or k <= 0:
+            return []
+        k = min(k, n)
+        sims = self.dots(query)
+        if self.matrix is not None:
+            idx = _np.argpartition(-sims, k - 1)[:k] if k < n else _np.arange(n)
+            pairs = [(float(sims[i]), self.ids[i]) for i in idx]
+            pairs.sort(reverse=True)
+        else:
+            pairs = heapq.nlargest(k, zip(sims, self.ids))
+        return [p for p in pairs if p[0] > 0]
+
+
+class EmbeddingMatrix:
+    """Contiguous, per-dimension matrices of chunk embeddings keyed by chunk id."""
+
+    def __init__(self) -> None:
+        self._blocks: Dict[int, VectorBlock] = {}
+
+    def __len__(self) -> int:
+        return sum(len(b.ids) for b in self._blocks.values())
+
+    @classmethod
+    def load(cls, conn: sqlite3.Connection) -> "EmbeddingMatrix":
+        """Build the matrix from ``chunks`` joined to cached ``rag_embeddings``."""
+        self = cls()
+        cached = dict(conn.execute("SELECT chunk_hash, embedding FROM rag_embeddings").fetchall())
+        if not cached:
+            return self
+        for chunk_id, text in conn.execute("SELECT id, text FROM chunks"):
+            blob = cached.get(text_hash(text))
+            if blob is None:
+                continue
+            vec = unpack_embedding(blob)
+            block = self._blocks.get(len(vec))
+            if block is None:
+                block = self._blocks[len(vec)] = VectorBlock(len(vec))
+            block.add(chunk_id, vec)
+        for block in self._blocks.values():
+            block.freeze()
+        return self
+
+    def updated(
+        self, conn: sqlite3.Connection, added: Iterable[int], dropped: Set[int]
+    ) -> Tuple["EmbeddingMatrix", Set[int]]:
+        """Copy with *dropped* chunk ids removed and *added* chunks appended.
+
+        Only the added chunks and their embeddings are read. Returns the new
+        matrix (``self`` when nothing changed) and the added ids that have no
+        cached embedding yet, for the caller to retry on a later update.
+        """
+        texts: Dict[int, str] = {}
+        pending = [cid for cid in added if cid not in dropped]
+        for i in range(0, len(pending), _SQL_BATCH):
+            batch = pending[i : i + _SQL_BATCH]
+            placeholders = ",".join("?" * len(batch))
+            texts.update(conn.execute(f"SELECT id, text FROM chunks WHERE id IN ({placeholders})", batch))
+        hashes = {cid: text_hash(text) for cid, text in texts.items()}
+        cached: Dict[str, bytes] = {}
+        wanted = list(set(hashes.values()))
+        for i in range(0, len(wanted), _SQL_BATCH):
+            batch = wanted[i : i + _SQL_BATCH]
+            placeholders = ",".join("?" * len(batch))
+            cached.update(
+                conn.execute(
+                    f"SELECT chunk_hash, embedding FROM rag_embeddings WHERE chunk_hash IN ({placeholders})", batch
+                )
+            )
+
+        rows: Dict[int, List[Tuple[int, array]]] = {}
+        missing: Set[int] = set()
+        for chunk_id in pending:
+            blob = cached.get(hashes.get(chunk_id, ""))
+            if blob is None:
+                if chunk_id in texts:
+                    missing.add(chunk_id)
+                continue
+            vec = unpack_embedding(blob)
+            rows.setdefault(len(vec), []).append((chunk_id, vec))
+
+        new = EmbeddingMatrix()
+        for dims in set(self._blocks) | set(rows):
+            block = self._blocks.get(dims) or VectorBlock(dims)
+            new._blocks[dims] = block.updated(dropped, rows.get(dims, ()))
+        if all(new._blocks[dims] is self._blocks.get(dims) for dims in new._blocks):
+            return self, missing
+        return new, missing
+
+    def block(self, dims: int) -> Optional[VectorBlock]:
+        """Rows of the given dimensionality, if any."""
+        return self._blocks.get(dims)
+
+    def largest_block(self) -> Optional[VectorBlock]:
+        """The dimensionality holding the most rows (the active provider)."""
+        return max(self._blocks.values(), key=lambda b: len(b.ids), default=None)
+
+    def search(self, query: Sequence[float], k: int) -> List[Tuple[float, int]]:
+        """Exact cosine top-k against rows of the query's dimensionality."""
+        block = self._blocks.get(len(query))
+        q = normalize(query)
+        if block is None or q is None:
+            return []
+        return block.top_k(q, k)
@@ -50,10 +50,10 @@ class UsageTracker:
         except Exception as e:
             log.warning(f"Usage tracking error: {e}")
 
-    def daily_report(self, days: int = 7) -> List[Dict]:
-        """Daily report."""
+    def daily_report(self, days: int = 7, conn=None) -> List[Dict]:
+        """Daily report (*conn*: read connection to use, e.g. from ``audit_db.read``)."""
         try:
-            conn = self._get_db()
+            conn = conn or self._get_db()
             cutoff = (datetime.now(KST) - timedelta(days=days)).isoformat()
             rows = conn.execute(
                 "SELECT substr(ts,1,10) as day, model, "
@@ -77,10 +77,10 @@ class UsageTracker:
         except Exception as e:  # noqa: broad-except
             return []
 
-    def monthly_report(self, months: int = 3) -> List[Dict]:
-        """Monthly report."""
+    def monthly_report(self, months: int = 3, conn=None) -> List[Dict]:
+        """Monthly report (*conn* as in :meth:`daily_report`)."""
         try:
-            conn = self._get_db()
+            conn = conn or self._get_db()
             cutoff = (datetime.now(KST) - timedelta(days=months * 30)).isoformat()
             rows = conn.execute(
                 "SELECT substr(ts,1,7) as month, model, "
@@ -104,10 +104,10 @@ class UsageTracker:
         except Exception as e:  # noqa: broad-except
             return []
 
-    def model_breakdown(self) -> Dict[str, float]:
-        """Model breakdown."""
+    def model_breakdown(self, conn=None) -> Dict[str, float]:
+        """Model breakdown (*conn* as in :meth:`daily_report`)."""
         try:
-            conn = self._get_db()
+            conn = conn or self._get_db()
             rows = conn.execute("SELECT model, SUM(cost) FROM usage_detail GROUP BY model").fetchall()
             return {r[0]: round(r[1], 6) for r in rows}
         except Exception as e:  # noqa: broad-except
@@ -187,12 +187,7 @@ class UserManager:
 
         self._ensure_db()
         self._maybe_reset_quotas(user_id)
-        conn = get_connection(USERS_DB)
-        row = conn.execute(
-            "SELECT daily_limit, monthly_limit, current_daily, current_monthly FROM user_quotas WHERE user_id=?",
-            (user_id,),
-        ).fetchone()
-        conn.close()
+        row = self._quota_row(user_id)
 
         if not row:
             self.ensure_quota(user_id)
@@ -232,14 +227,27 @@ class UserManager:
         if not self.multi_tenant_enabled or cost <= 0:
             return
         self._ensure_db()
-        self.ensure_quota(user_id)
-        conn = get_connection(USERS_DB)
-        conn.execute(
-            "UPDATE user_quotas SET current_daily = current_daily + ?, current_monthly = current_monthly + ? WHERE user_id=?",
-            (cost, cost, user_id),
-        )
-        conn.commit()
-        conn.close()
+        from salmalm.core.usage_ledger import usage_ledger
+
+        usage_ledger.record_cost(USERS_DB, user_id, cost)
+
+    def _quota_row(self, user_id: int) -> Optional[tuple]:
+        """(daily_limit, monthly_limit, current_daily, current_monthly) including unflushed cost."""
+        from salmalm.core.usage_ledger import usage_ledger
+
+        with usage_ledger.flush_lock:
+            conn = get_connection(USERS_DB)
+            row = conn.execute(
+                "SELECT daily_limit, monthly_limit, current_daily, current_monthly FROM user_quotas WHERE user_id=?",
+                (user_id,),
+            ).fetchone()
+            conn.close()
+            pending = usage_ledger.pending_cost(USERS_DB, user_id)
+        if not row:
+            if not pending:
+                return None
+            row = (self.DEFAULT_DAILY_LIMIT, self.DEFAULT_MONTHLY_LIMIT, 0.0, 0.0)
+        return (row[0], row[1], row[2] + pending, row[3] + pending)
 
     def set_quota(
         self, user_id: int, daily_limit: Optional[float] = None, monthly_limit: Optional[float] = None
@@ -259,12 +267,7 @@ class UserManager:
         """Get quota info for a user."""
         self._ensure_db()
         self._maybe_reset_quotas(user_id)
-        conn = get_connection(USERS_DB)
-        row = conn.execute(
-            "SELECT daily_limit, monthly_limit, current_daily, current_monthly FROM user_quotas WHERE user_id=?",
-            (user_id,),
-        ).fetchone()
-        conn.close()
+        row = self._quota_row(user_id)
         if not row:
             return {
                 "daily_limit": self.DEFAULT_DAILY_LIMIT,
@@ -488,7 +491,10 @@ class UserManager:
 
     def get_all_users_with_stats(self) -> List[dict]:
         """Get all users with usage stats for admin dashboard."""
+        from salmalm.core.usage_ledger import usage_ledger
+
         self._ensure_db()
+        usage_ledger.flush()
         conn = get_connection(USERS_DB)
 
         users = []
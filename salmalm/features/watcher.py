@@ -143,6 +143,10 @@ class FileWatcher:
 
     def _walk(self, root: Path):
         """Walk directory tree, yielding files matching extensions and not excluded."""
+        if root.is_file():  # a single watched file
+            if root.suffix.lower() in self._extensions:
+                yield root
+            return
         try:
             for entry in os.scandir(str(root)):
                 if entry.name in self._exclude:
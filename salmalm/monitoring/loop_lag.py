@@ -0,0 +1,70 @@
+"""Event-loop stall monitor.
+
+A background task sleeps for a fixed interval and measures how late it
+wakes up. The overshoot is the time the loop spent running something
+else without yielding — a blocking call in an ``async def`` handler shows
+up here directly. Exported as ``salmalm_event_loop_lag_seconds``
+(histogram) and ``salmalm_event_loop_lag_max_seconds`` (worst since start).
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Optional
+
+_INTERVAL = 0.05
+
+
+class LoopLagMonitor:
+    """Sample event-loop lag every *interval* seconds."""
+
+    def __init__(self, interval: float = _INTERVAL) -> None:
+        """Init  ."""
+        self.interval = interval
+        self.samples = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def record(self, lag: float) -> None:
+        """Account one lag sample (seconds)."""
+        self.samples += 1
+        self.total += lag
+        if lag > self.max:
+            self.max = lag
+        try:
+            from salmalm.monitoring.metrics import event_loop_lag, event_loop_lag_max
+
+            event_loop_lag.observe(lag)
+            event_loop_lag_max.set(self.max)
+        except Exception:
+            pass
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            t0 = loop.time()
+            await asyncio.sleep(self.interval)
+            self.record(max(0.0, loop.time() - t0 - self.interval))
+
+    def start(self) -> None:
+        """Start sampling on the running loop (idempotent)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self) -> None:
+        """Stop sampling."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def stats(self) -> dict:
+        """Samples, mean and max lag in seconds."""
+        return {
+            "samples": self.samples,
+            "mean": self.total / self.samples if self.samples else 0.0,
+            "max": self.max,
+        }
+
+
+loop_lag = LoopLagMonitor()
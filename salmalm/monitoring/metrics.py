@@ -189,6 +189,96 @@ llm_call_duration = metrics.register(
 active_sessions = metrics.register(
     Gauge("salmalm_active_sessions", "Active in-memory session count")
 )
+session_cache_lookups = metrics.register(
+    Counter("salmalm_session_cache_lookups_total", "Session cache lookups", ("result",))
+)
+session_cache_evictions = metrics.register(
+    Counter("salmalm_session_cache_evictions_total", "Sessions evicted from the in-memory cache")
+)
+session_cache_bytes = metrics.register(
+    Gauge("salmalm_session_cache_bytes", "Estimated bytes held by in-memory sessions")
+)
+event_loop_lag = metrics.register(
+    Histogram(
+        "salmalm_event_loop_lag_seconds",
+        "Event-loop wake-up delay (time the loop was blocked)",
+        buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+    )
+)
+event_loop_lag_max = metrics.register(
+    Gauge("salmalm_event_loop_lag_max_seconds", "Worst event-loop stall since start")
+)
+db_op_duration = metrics.register(
+    Histogram(
+        "salmalm_db_op_duration_seconds",
+        "Async DB facade operation time (off the event loop)",
+        ("kind",),
+        buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0),
+    )
+)
+db_write_latency = metrics.register(
+    Histogram(
+        "salmalm_db_write_latency_seconds",
+        "Queued write to durable group commit",
+        ("db",),
+        buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+    )
+)
+db_write_latency_p99 = metrics.register(
+    Gauge("salmalm_db_write_latency_p99_seconds", "p99 queue-to-commit latency over the last 1000 writes", ("db",))
+)
+db_lock_wait = metrics.register(
+    Histogram(
+        "salmalm_db_lock_wait_seconds",
+        "Writer thread wait for the SQLite write lock (BEGIN IMMEDIATE)",
+        ("db",),
+        buckets=(0.0001, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0),
+    )
+)
+db_commit_batch = metrics.register(
+    Histogram(
+        "salmalm_db_commit_batch_size",
+        "Write jobs per group commit",
+        ("db",),
+        buckets=(1, 2, 4, 8, 16, 32, 64),
+    )
+)
+http_pool_requests = metrics.register(
+    Counter(
+        "salmalm_http_pool_requests_total",
+        "Outbound provider requests by connection origin (reused keep-alive or new)",
+        ("pool", "host", "connection"),
+    )
+)
+http_pool_reuse_ratio = metrics.register(
+    Gauge("salmalm_http_pool_reuse_ratio", "Share of outbound requests served on a reused connection", ("pool",))
+)
+http_connect_time = metrics.register(
+    Histogram(
+        "salmalm_http_connect_seconds",
+        "New outbound connection setup (DNS + TCP + TLS handshake)",
+        ("pool", "host"),
+        buckets=(0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 1.0, 2.5),
+    )
+)
+sse_active_streams = metrics.register(
+    Gauge("salmalm_sse_active_streams", "Chat SSE streams currently being sent")
+)
+sse_client_disconnects = metrics.register(
+    Counter("salmalm_sse_client_disconnects_total", "Chat SSE streams ended by the client before completion")
+)
+response_cache_lookups = metrics.register(
+    Counter("salmalm_response_cache_lookups_total", "LLM response cache lookups by serving tier", ("result",))
+)
+response_cache_bytes_saved = metrics.register(
+    Counter("salmalm_response_cache_bytes_saved_total", "Response bytes served from the LLM response cache")
+)
+response_cache_bytes = metrics.register(
+    Gauge("salmalm_response_cache_bytes", "Bytes held by the LLM response cache", ("tier",))
+)
+response_cache_evictions = metrics.register(
+    Counter("salmalm_response_cache_evictions_total", "LLM response cache entries evicted for size", ("tier",))
+)
 token_usage_total = metrics.register(
     Counter("salmalm_token_usage_total", "Token usage total", ("provider", "type"))
 )
@@ -28,6 +28,7 @@ def handle_memory_write(args: dict) -> str:
         p = MEMORY_DIR / fname
     p.parent.mkdir(parents=True, exist_ok=True)
     p.write_text(args["content"], encoding="utf-8")
+    _tfidf.refresh_path(p)
     return f"{fname} saved"
 
 
@@ -3,14 +3,36 @@
 Provides ``AsyncHTTPClient`` for non-blocking HTTP/1.1 requests with
 optional SSE streaming support, suitable for replacing synchronous
 ``urllib.request`` calls inside async code paths.
+
+Bodies are decoded incrementally (``Content-Length``, chunked or
+read-to-close), so streams can be consumed with :meth:`AsyncHTTPResponse.iter_chunks`
+or :meth:`AsyncHTTPResponse.iter_lines` as bytes arrive. Connections are
+kept alive per event loop and host (same limits as
+:mod:`salmalm.utils.http_pool`) and reused once a body has been read to the
+end. Cancelling the task that is reading a body aborts its socket at once;
+a half-read connection is never reused.
+
+Connections are always direct: proxy settings are not applied. Callers that
+must honor ``HTTPS_PROXY`` check ``http_pool._via_proxy`` and use the sync
+pool instead (see :mod:`salmalm.core.llm_stream`).
 """
 
 from salmalm.security.crypto import log
 import asyncio
 import json
-import ssl
+import time
 import urllib.parse
-from typing import AsyncIterator, Dict, Optional
+import weakref
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from salmalm.utils.http_pool import (
+    _DRAIN_LIMIT,
+    _DRAIN_TIMEOUT,
+    _IDLE_TIMEOUT,
+    _MAX_PER_HOST,
+    record_connection,
+    ssl_context,
+)
 
 __all__ = ["AsyncHTTPClient", "AsyncHTTPResponse"]
 
@@ -18,10 +40,31 @@ __all__ = ["AsyncHTTPClient", "AsyncHTTPResponse"]
 class AsyncHTTPResponse:
     """Lightweight async HTTP response wrapper."""
 
-    __slots__ = ("status", "headers", "_reader", "_writer", "_body")
+    __slots__ = (
+        "status",
+        "headers",
+        "_reader",
+        "_writer",
+        "_body",
+        "_client",
+        "_key",
+        "_chunked",
+        "_chunk_left",
+        "_remaining",
+        "_done",
+        "read_timeout",
+    )
 
     def __init__(
-        self, status: int, headers: Dict[str, str], reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+        self,
+        status: int,
+        headers: Dict[str, str],
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        *,
+        client: Optional["AsyncHTTPClient"] = None,
+        key: Optional[tuple] = None,
+        read_timeout: Optional[float] = None,
     ):
         """Init  ."""
         self.status = status
@@ -29,6 +72,14 @@ class AsyncHTTPResponse:
         self._reader = reader
         self._writer = writer
         self._body: Optional[bytes] = None
+        self._client = client  # set when the connection may be reused
+        self._key = key
+        self._chunked = headers.get("transfer-encoding", "").lower() == "chunked"
+        self._chunk_left = 0
+        length = headers.get("content-length")
+        self._remaining: Optional[int] = int(length) if length is not None and not self._chunked else None
+        self._done = False
+        self.read_timeout = read_timeout  # per-read limit while streaming
 
     # -- body helpers -------------------------------------------------------
 
@@ -36,15 +87,19 @@ class AsyncHTTPResponse:
         """Read entire response body (handles chunked transfer-encoding)."""
         if self._body is not None:
             return self._body
-        if self.headers.get("transfer-encoding", "").lower() == "chunked":
-            self._body = await self._read_chunked()
-        else:
-            length = self.headers.get("content-length")
-            if length is not None:
-                self._body = await self._reader.readexactly(int(length))
-            else:
-                self._body = await self._reader.read(-1)
-        self._close()
+        if self._remaining is not None and not self._done:
+            try:
+                self._body = await self._reader.readexactly(self._remaining)
+            except BaseException:
+                self._close()
+                raise
+            self._remaining = 0
+            self._finish()
+            return self._body
+        parts = []
+        async for chunk in self.iter_chunks(65536):
+            parts.append(chunk)
+        self._body = b"".join(parts)
         return self._body
 
     async def json(self) -> dict:
@@ -60,62 +115,138 @@ class AsyncHTTPResponse:
     async def iter_lines(self) -> AsyncIterator[str]:
         """Yield lines as they arrive (for SSE / streaming)."""
         buf = b""
-        try:
-            while True:
-                # Handle chunked TE transparently
-                chunk = await self._reader.read(4096)
-                if not chunk:
-                    if buf:
-                        yield buf.decode("utf-8", errors="replace")
-                    break
-                buf += chunk
-                while b"\n" in buf:
-                    line, buf = buf.split(b"\n", 1)
-                    yield line.decode("utf-8", errors="replace")
-        finally:
-            self._close()
+        async for chunk in self.iter_chunks():
+            buf += chunk
+            while b"\n" in buf:
+                line, buf = buf.split(b"\n", 1)
+                yield line.decode("utf-8", errors="replace")
+        if buf:
+            yield buf.decode("utf-8", errors="replace")
 
     async def iter_chunks(self, size: int = 4096) -> AsyncIterator[bytes]:
-        """Yield raw byte chunks."""
+        """Yield decoded body bytes as they arrive.
+
+        Leaving the loop early (``break``) keeps the connection: the
+        response's ``aclose()`` decides whether to drain or drop it.
+        """
         try:
             while True:
-                chunk = await self._reader.read(size)
+                chunk = await self._read_some(size)
                 if not chunk:
                     break
                 yield chunk
-        finally:
+        except GeneratorExit:
+            raise
+        except BaseException:
+            if not self._done:
+                self._close()  # failed or cancelled mid-read
+            raise
+
+    async def aclose(self) -> None:
+        """Finish with the response, keeping the connection if it is reusable.
+
+        A short unread tail (e.g. the terminating chunk after ``[DONE]``) is
+        drained so the connection can go back to the pool; otherwise it is closed.
+        """
+        if self._done:
+            return
+        if self._client is not None:
+            try:
+                left = _DRAIN_LIMIT
+                while left > 0 and not self._done:
+                    left -= len(await asyncio.wait_for(self._read_some(8192), _DRAIN_TIMEOUT))
+            except (OSError, ValueError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+                pass
+        if not self._done:
+            self._close()
+
+    async def __aenter__(self) -> "AsyncHTTPResponse":
+        """Enter."""
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        """Exit; a body abandoned by an exception or cancellation is not drained."""
+        if exc_type is None:
+            await self.aclose()
+        elif not self._done:
             self._close()
 
     # -- internals ----------------------------------------------------------
 
-    async def _read_chunked(self) -> bytes:
-        """Decode HTTP chunked transfer-encoding."""
-        body = bytearray()
+    async def _recv(self, coro):
+        if self.read_timeout:
+            return await asyncio.wait_for(coro, self.read_timeout)
+        return await coro
+
+    async def _read_some(self, size: int) -> bytes:
+        """Next piece of the decoded body; ``b""`` once it is complete."""
+        if self._done:
+            return b""
+        if self._chunked:
+            if self._chunk_left == 0:
+                self._chunk_left = await self._read_chunk_size()
+                if self._chunk_left == 0:
+                    # Last chunk: skip trailers up to the blank line
+                    while (await self._reader.readline()) not in (b"\r\n", b"\n", b""):
+                        pass
+                    self._finish()
+                    return b""
+            data = await self._recv(self._reader.read(min(size, self._chunk_left)))
+            if not data:
+                raise asyncio.IncompleteReadError(b"", self._chunk_left)
+            self._chunk_left -= len(data)
+            if self._chunk_left == 0:
+                await self._reader.readline()  # CRLF after the chunk
+            return data
+        if self._remaining is not None:
+            if self._remaining == 0:
+                self._finish()
+                return b""
+            data = await self._recv(self._reader.read(min(size, self._remaining)))
+            if not data:
+                raise asyncio.IncompleteReadError(b"", self._remaining)
+            self._remaining -= len(data)
+            return data
+        data = await self._recv(self._reader.read(size))
+        if not data:
+            self._client = None  # delimited by close: not reusable
+            self._finish()
+        return data
+
+    async def _read_chunk_size(self) -> int:
         while True:
-            size_line = await self._reader.readline()
-            size_str = size_line.strip()
-            if not size_str:
-                continue
-            chunk_len = int(size_str, 16)
-            if chunk_len == 0:
-                await self._reader.readline()  # trailing CRLF
-                break
-            data = await self._reader.readexactly(chunk_len)
-            body.extend(data)
-            await self._reader.readline()  # trailing CRLF after chunk
-        return bytes(body)
+            size_line = await self._recv(self._reader.readline())
+            if not size_line:
+                raise asyncio.IncompleteReadError(b"", None)
+            size_str = size_line.split(b";", 1)[0].strip()
+            if size_str:
+                return int(size_str, 16)
+
+    def _finish(self) -> None:
+        """Body fully read: hand the connection back or close it."""
+        self._done = True
+        client, self._client = self._client, None
+        if client is not None and self.headers.get("connection", "").lower() != "close":
+            client._release(self._key, self._reader, self._writer)
+        else:
+            self._close()
 
     def _close(self):
         """Close."""
+        self._done = True
+        self._client = None
         try:
-            if not self._writer.is_closing():
+            transport = getattr(self._writer, "transport", None)
+            if transport is not None:
+                transport.abort()  # drop the socket now; no TLS close_notify round trip
+            elif not self._writer.is_closing():
                 self._writer.close()
         except Exception as e:  # noqa: broad-except
             log.debug(f"Suppressed: {e}")
 
 
 class AsyncHTTPClient:
-    """Pure-stdlib asyncio HTTP/1.1 client.
+    """Pure-stdlib asyncio HTTP/1.1 client with keep-alive connections.
 
     Usage::
 
@@ -124,9 +255,70 @@ class AsyncHTTPClient:
         print(await resp.text())
     """
 
-    def __init__(self, default_timeout: float = 30) -> None:
+    def __init__(
+        self,
+        default_timeout: float = 30,
+        *,
+        keep_alive: bool = True,
+        max_per_host: int = _MAX_PER_HOST,
+        idle_timeout: float = _IDLE_TIMEOUT,
+        name: str = "llm-async",
+    ) -> None:
         """Init  ."""
         self._default_timeout = default_timeout
+        self._keep_alive = keep_alive
+        self.max_per_host = max_per_host
+        self.idle_timeout = idle_timeout
+        self.name = name
+        # Streams belong to one event loop: idle connections are kept per loop
+        self._idle: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[tuple, List[tuple]]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self.opened = 0
+        self.reused = 0
+
+    # -- connections ---------------------------------------------------------
+
+    def _idle_for(self, key: tuple) -> List[tuple]:
+        per_loop = self._idle.get(asyncio.get_running_loop())
+        if per_loop is None:
+            per_loop = self._idle[asyncio.get_running_loop()] = {}
+        return per_loop.setdefault(key, [])
+
+    def _checkout(self, key: tuple) -> Optional[Tuple[asyncio.StreamReader, asyncio.StreamWriter]]:
+        idle = self._idle_for(key)
+        now = time.monotonic()
+        while idle:
+            reader, writer, since = idle.pop()
+            if now - since > self.idle_timeout or writer.is_closing() or reader.at_eof():
+                writer.close()
+                continue
+            return reader, writer
+        return None
+
+    def _release(self, key: tuple, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            idle = self._idle_for(key)
+        except RuntimeError:  # no running loop (finalizer)
+            writer.close()
+            return
+        if len(idle) >= self.max_per_host or writer.is_closing():
+            writer.close()
+            return
+        idle.append((reader, writer, time.monotonic()))
+
+    async def _open(self, key: tuple, timeout: float) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        scheme, host, port = key
+        kw = {}
+        if scheme == "https":
+            kw["ssl"] = ssl_context()
+        t0 = time.perf_counter()
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port, **kw), timeout=timeout)
+        self.opened += 1
+        record_connection(self.name, host, False, time.perf_counter() - t0, self.reused, self.opened + self.reused)
+        return reader, writer
+
+    # -- requests ------------------------------------------------------------
 
     async def request(
         self,
@@ -142,23 +334,19 @@ class AsyncHTTPClient:
         parsed = urllib.parse.urlparse(url)
         host = parsed.hostname
         port = parsed.port or (443 if parsed.scheme == "https" else 80)
-
-        # Open connection
-        kw = {}
-        if parsed.scheme == "https":
-            kw["ssl"] = ssl.create_default_context()
-        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port, **kw), timeout=timeout)
+        key = (parsed.scheme, host, port)
 
         # Build request
         path = parsed.path or "/"
         if parsed.query:
             path = f"{path}?{parsed.query}"
 
-        lines = [f"{method} {path} HTTP/1.1", f"Host: {host}"]
+        # netloc keeps a non-default port and IPv6 brackets; drop any userinfo
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {parsed.netloc.rpartition('@')[2]}"]
         hdrs = dict(headers) if headers else {}
         if body and "Content-Length" not in hdrs and "content-length" not in hdrs:
             hdrs["Content-Length"] = str(len(body))
-        if "Connection" not in hdrs and "connection" not in hdrs:
+        if "Connection" not in hdrs and "connection" not in hdrs and not self._keep_alive:
             hdrs["Connection"] = "close"
         for k, v in hdrs.items():
             lines.append(f"{k}: {v}")
@@ -169,11 +357,33 @@ class AsyncHTTPClient:
         if body:
             raw += body
 
-        writer.write(raw)
-        await writer.drain()
-
-        # Parse status line
-        status_line = await asyncio.wait_for(reader.readline(), timeout=timeout)
+        for attempt in (0, 1):
+            conn = self._checkout(key) if self._keep_alive else None
+            reused = conn is not None
+            if reused:
+                self.reused += 1
+                record_connection(self.name, host, True, 0.0, self.reused, self.opened + self.reused)
+                reader, writer = conn
+            else:
+                reader, writer = await self._open(key, timeout)
+            try:
+                writer.write(raw)
+                await writer.drain()
+                # Parse status line
+                status_line = await asyncio.wait_for(reader.readline(), timeout=timeout)
+                if not status_line:
+                    raise ConnectionResetError("connection closed before response")
+            except (ConnectionError, asyncio.IncompleteReadError) as e:
+                writer.close()
+                if not reused or attempt:
+                    raise
+                # The server closed the idle connection first: retry once on a fresh one.
+                log.debug(f"[ASYNC-HTTP] stale connection to {host}: {e}")
+                continue
+            except BaseException:
+                writer.close()
+                raise
+            break
         parts = status_line.split(None, 2)
         status_code = int(parts[1])
 
@@ -184,10 +394,31 @@ class AsyncHTTPClient:
             if hline in (b"\r\n", b"\n", b""):
                 break
             decoded = hline.decode("utf-8", errors="replace")
-            key, _, value = decoded.partition(":")
-            resp_headers[key.strip().lower()] = value.strip()
-
-        return AsyncHTTPResponse(status_code, resp_headers, reader, writer)
+            k, _, value = decoded.partition(":")
+            resp_headers[k.strip().lower()] = value.strip()
+
+        resp = AsyncHTTPResponse(
+            status_code,
+            resp_headers,
+            reader,
+            writer,
+            client=self if self._keep_alive else None,
+            key=key,
+            read_timeout=timeout,
+        )
+        if method == "HEAD" or status_code in (204, 304):
+            resp._chunked, resp._remaining = False, 0  # no body follows
+        return resp
+
+    def close(self) -> None:
+        """Close idle connections of the running loop."""
+        try:
+            per_loop = self._idle.pop(asyncio.get_running_loop(), {})
+        except RuntimeError:
+            return
+        for conns in per_loop.values():
+            for _, writer, _ in conns:
+                writer.close()
 
     # -- convenience wrappers -----------------------------------------------
 
@@ -0,0 +1,368 @@
+"""Keep-alive HTTP(S) connection pool for LLM provider calls.
+
+``urllib.request.urlopen`` opens a new TCP + TLS connection per request and
+sends ``Connection: close``, so every iteration of a tool loop paid a full
+handshake (100–300 ms of time-to-first-token). :func:`urlopen` is a drop-in
+replacement that keeps persistent ``http.client`` connections per host:
+
+- connections idle for longer than ``SALMALM_HTTP_POOL_IDLE`` seconds
+  (default 50, below the usual 60 s load-balancer cut-off) are evicted;
+- at most ``SALMALM_HTTP_POOL_MAX_PER_HOST`` connections (default 8) are
+  kept open per host — extra concurrent requests get a one-off connection
+  that is closed afterwards, so callers never block on the pool;
+- a connection goes back to the pool only once its response body has been
+  read to the end. A streamed response that is closed early is drained
+  (up to ``_DRAIN_LIMIT`` bytes) or, failing that, its connection closed;
+- all connections share one ``ssl.SSLContext`` (CA bundle loaded once).
+
+A request on a reused connection that the server has meanwhile closed is
+retried once on a fresh connection. HTTP errors raise
+``urllib.error.HTTPError`` exactly like ``urlopen``, and requests that must
+go through a configured proxy fall back to ``urllib.request.urlopen``.
+``SALMALM_HTTP_POOL=0`` disables pooling.
+
+Reuse counts and connect (DNS + TCP + TLS) times are exported on
+``/metrics`` as ``salmalm_http_pool_*`` and ``salmalm_http_connect_seconds``.
+"""
+
+from __future__ import annotations
+
+import http.client
+import io
+import logging
+import os
+import ssl
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from typing import Dict, List, Optional, Tuple
+
+log = logging.getLogger(__name__)
+
+_POOL_ENABLED = os.environ.get("SALMALM_HTTP_POOL", "1") != "0"
+_MAX_PER_HOST = int(os.environ.get("SALMALM_HTTP_POOL_MAX_PER_HOST", "8"))
+_IDLE_TIMEOUT = float(os.environ.get("SALMALM_HTTP_POOL_IDLE", "50"))
+_DRAIN_LIMIT = 64 * 1024  # bytes read from an unfinished body to make its connection reusable
+_DRAIN_TIMEOUT = 1.0  # seconds allowed for that drain
+
+_ssl_lock = threading.Lock()
+_ssl_context: Optional[ssl.SSLContext] = None
+
+
+def ssl_context() -> ssl.SSLContext:
+    """The shared client ``SSLContext`` (created on first use)."""
+    global _ssl_context
+    if _ssl_context is None:
+        with _ssl_lock:
+            if _ssl_context is None:
+                _ssl_context = ssl.create_default_context()
+    return _ssl_context
+
+
+def _via_proxy(scheme: str, host: str) -> bool:
+    proxies = urllib.request.getproxies()
+    return scheme in proxies and not urllib.request.proxy_bypass(host)
+
+
+def record_connection(pool: str, host: str, reused: bool, connect_time: float, reused_total: int, total: int) -> None:
+    """Export one connection checkout (new or reused) to ``/metrics``."""
+    try:
+        from salmalm.monitoring.metrics import http_connect_time, http_pool_requests, http_pool_reuse_ratio
+    except Exception:  # noqa: broad-except — metrics are optional
+        return
+    http_pool_requests.inc(pool=pool, host=host, connection="reused" if reused else "new")
+    if not reused:
+        http_connect_time.observe(connect_time, pool=pool, host=host)
+    if total:
+        http_pool_reuse_ratio.set(reused_total / total, pool=pool)
+
+
+class PooledResponse:
+    """``http.client.HTTPResponse`` wrapper that returns its connection on close.
+
+    Supports what callers of ``urlopen`` use: ``read``, ``readline``, line
+    iteration, ``status``/``code``, ``headers``/``getheader`` and the context
+    manager protocol.
+    """
+
+    def __init__(
+        self,
+        pool: "HTTPSPool",
+        key: Tuple[str, str],
+        conn: http.client.HTTPConnection,
+        resp: http.client.HTTPResponse,
+        url: str,
+    ) -> None:
+        """Init  ."""
+        self._pool = pool
+        self._key = key
+        self._conn: Optional[http.client.HTTPConnection] = conn
+        self._resp = resp
+        self.url = url
+
+    @property
+    def status(self) -> int:
+        """HTTP status code."""
+        return self._resp.status
+
+    code = status
+
+    @property
+    def headers(self):
+        """Response headers (``http.client.HTTPMessage``)."""
+        return self._resp.headers
+
+    def getheader(self, name: str, default=None):
+        """Single response header."""
+        return self._resp.getheader(name, default)
+
+    def getcode(self) -> int:
+        """HTTP status code (``urlopen`` compatibility)."""
+        return self._resp.status
+
+    def read(self, amt: Optional[int] = None) -> bytes:
+        """Read the body; the connection is released once it is exhausted."""
+        data = self._resp.read(amt)
+        if self._resp.isclosed():
+            self._release()
+        return data
+
+    def readline(self, limit: int = -1) -> bytes:
+        """Read one line of the body."""
+        line = self._resp.readline(limit)
+        if self._resp.isclosed():
+            self._release()
+        return line
+
+    def __iter__(self):
+        """Iterate over body lines."""
+        while True:
+            line = self.readline()
+            if not line:
+                return
+            yield line
+
+    def close(self) -> None:
+        """Finish with the response, keeping the connection if it is reusable."""
+        if self._conn is None:
+            return
+        if not self._resp.isclosed() and not self._drain():
+            self._discard()
+            return
+        self._release()
+
+    def _drain(self) -> bool:
+        """Read the rest of a short, already-finishing body (e.g. after ``[DONE]``)."""
+        conn = self._conn
+        try:
+            if conn.sock is not None:
+                conn.sock.settimeout(_DRAIN_TIMEOUT)
+            left = _DRAIN_LIMIT
+            while left > 0 and not self._resp.isclosed():
+                chunk = self._resp.read(min(left, 8192))
+                if not chunk:
+                    break
+                left -= len(chunk)
+        except (OSError, http.client.HTTPException):
+            return False
+        return self._resp.isclosed()
+
+    def _release(self) -> None:
+        conn, self._conn = self._conn, None
+        if conn is None:
+            return
+        self._pool._done(self._key, conn, keep=not self._resp.will_close)
+
+    def _discard(self) -> None:
+        conn, self._conn = self._conn, None
+        self._resp.close()
+        self._pool._done(self._key, conn, keep=False)
+
+    def __enter__(self) -> "PooledResponse":
+        """Enter."""
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        """Close; a body abandoned by an exception is not drained."""
+        if exc_type is None:
+            self.close()
+        elif self._conn is not None:
+            self._discard()
+
+    def __del__(self) -> None:
+        """Never leak a half-read connection back into the pool."""
+        if self._conn is not None:
+            try:
+                self._discard()
+            except Exception:  # noqa: broad-except — interpreter shutdown
+                pass
+
+
+class HTTPSPool:
+    """Persistent HTTP(S) connections per host, shared across threads."""
+
+    def __init__(
+        self, name: str = "llm", max_per_host: int = _MAX_PER_HOST, idle_timeout: float = _IDLE_TIMEOUT
+    ) -> None:
+        """Init  ."""
+        self.name = name
+        self.max_per_host = max_per_host
+        self.idle_timeout = idle_timeout
+        self._lock = threading.RLock()  # re-entrant: PooledResponse.__del__ may run under it
+        self._idle: Dict[Tuple[str, str], List[Tuple[http.client.HTTPConnection, float]]] = {}
+        self._open: Dict[Tuple[str, str], int] = {}  # pooled connections per host (idle + in use)
+        self.opened = 0
+        self.reused = 0
+        self.evicted = 0
+        self.connect_time = 0.0
+
+    # ── checkout / return ──
+
+    def _evict_expired(self, now: float) -> List[http.client.HTTPConnection]:
+        # Called with self._lock held
+        expired = []
+        for key, idle in self._idle.items():
+            while idle and now - idle[0][1] > self.idle_timeout:
+                expired.append(idle.pop(0)[0])
+                self._open[key] -= 1
+        self.evicted += len(expired)
+        return expired
+
+    def _acquire(self, key: Tuple[str, str], timeout: float) -> Tuple[http.client.HTTPConnection, bool]:
+        now = time.monotonic()
+        conn = None
+        with self._lock:
+            expired = self._evict_expired(now)
+            idle = self._idle.get(key)
+            if idle:
+                conn = idle.pop()[0]
+                self.reused += 1
+            else:
+                pooled = self._open.get(key, 0) < self.max_per_host
+                if pooled:
+                    self._open[key] = self._open.get(key, 0) + 1
+        for c in expired:
+            c.close()
+        if conn is not None:
+            conn.timeout = timeout
+            if conn.sock is not None:
+                conn.sock.settimeout(timeout)
+            self._record(key, reused=True)
+            return conn, True
+        return self._connect(key, timeout, pooled), False
+
+    def _connect(self, key: Tuple[str, str], timeout: float, pooled: bool) -> http.client.HTTPConnection:
+        scheme, netloc = key
+        if scheme == "https":
+            conn: http.client.HTTPConnection = http.client.HTTPSConnection(
+                netloc, timeout=timeout, context=ssl_context()
+            )
+        else:
+            conn = http.client.HTTPConnection(netloc, timeout=timeout)
+        conn._salmalm_pooled = pooled  # False: a one-off connection above max_per_host
+        t0 = time.perf_counter()
+        try:
+            conn.connect()
+        except BaseException:
+            self._done(key, conn, keep=False)
+            raise
+        elapsed = time.perf_counter() - t0
+        with self._lock:
+            self.opened += 1
+            self.connect_time += elapsed
+        self._record(key, reused=False, connect_time=elapsed)
+        return conn
+
+    def _done(self, key: Tuple[str, str], conn: http.client.HTTPConnection, keep: bool) -> None:
+        """Put *conn* back on the idle list (``keep``) or close it and free its slot."""
+        pooled = getattr(conn, "_salmalm_pooled", False)
+        with self._lock:
+            if keep and pooled:
+                self._idle.setdefault(key, []).append((conn, time.monotonic()))
+                return
+            if pooled:
+                self._open[key] = max(0, self._open.get(key, 0) - 1)
+        conn.close()
+
+    def _record(self, key: Tuple[str, str], reused: bool, connect_time: float = 0.0) -> None:
+        record_connection(self.name, key[1], reused, connect_time, self.reused, self.opened + self.reused)
+
+    # ── requests ──
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        body: Optional[bytes] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: float = 120,
+    ) -> PooledResponse:
+        """Send one request; raises ``urllib.error.HTTPError`` for status >= 400."""
+        parts = urllib.parse.urlsplit(url)
+        key = (parts.scheme, parts.netloc)
+        path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        hdrs = dict(headers or {})
+        for attempt in (0, 1):
+            conn, reused = self._acquire(key, timeout)
+            try:
+                conn.request(method, path, body=body, headers=hdrs)
+                resp = conn.getresponse()
+            except (http.client.HTTPException, ConnectionError) as e:
+                self._done(key, conn, keep=False)
+                if not reused or attempt:
+                    raise
+                # The server closed the idle connection first: retry once on a fresh one.
+                log.debug("[HTTP-POOL] stale connection to %s: %s", parts.netloc, e)
+                continue
+            except BaseException:
+                self._done(key, conn, keep=False)
+                raise
+            out = PooledResponse(self, key, conn, resp, url)
+            if resp.status >= 400:
+                data = out.read()
+                out.close()
+                raise urllib.error.HTTPError(url, resp.status, resp.reason, resp.headers, io.BytesIO(data))
+            return out
+        raise http.client.HTTPException("unreachable")
+
+    def urlopen(self, req: urllib.request.Request, timeout: float = 120):
+        """``urllib.request.urlopen`` for a ``Request``, over a pooled connection."""
+        parts = urllib.parse.urlsplit(req.full_url)
+        if not _POOL_ENABLED or parts.scheme not in ("http", "https") or _via_proxy(parts.scheme, parts.hostname or ""):
+            return urllib.request.urlopen(req, timeout=timeout)
+        headers = dict(req.header_items())
+        return self.request(req.get_method(), req.full_url, req.data, headers, timeout)
+
+    def close(self) -> None:
+        """Close all idle connections."""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+            for key, conns in idle.items():
+                self._open[key] = max(0, self._open.get(key, 0) - len(conns))
+        for conns in idle.values():
+            for conn, _ in conns:
+                conn.close()
+
+    def stats(self) -> dict:
+        """Connections opened and reused, idle evictions and mean connect time."""
+        with self._lock:
+            idle = sum(len(v) for v in self._idle.values())
+        total = self.opened + self.reused
+        return {
+            "opened": self.opened,
+            "reused": self.reused,
+            "reuse_ratio": round(self.reused / total, 3) if total else 0.0,
+            "evicted": self.evicted,
+            "idle": idle,
+            "avg_connect_ms": round(self.connect_time / self.opened * 1000, 1) if self.opened else 0.0,
+        }
+
+
+llm_pool = HTTPSPool("llm")
+
+
+def urlopen(req: urllib.request.Request, timeout: float = 120):
+    """Drop-in ``urllib.request.urlopen`` using the shared LLM provider pool."""
+    return llm_pool.urlopen(req, timeout=timeout)
@@ -213,12 +213,14 @@ class AgentExporter:
             from salmalm.core import _get_db
 
             conn = _get_db()
-            rows = conn.execute("SELECT session_id, messages, updated_at FROM session_store").fetchall()
+            from salmalm.core.session_store import load_session_messages
+
+            rows = conn.execute("SELECT session_id, updated_at FROM session_store").fetchall()
             for r in rows:
-                sid, msgs_json, updated = r[0], r[1], r[2]
+                sid, updated = r[0], r[1]
                 session_data = {
                     "session_id": sid,
-                    "messages": json.loads(msgs_json) if msgs_json else [],
+                    "messages": load_session_messages(conn, sid),
                     "updated_at": updated,
                 }
                 zf.writestr(f"sessions/{sid}.json", json.dumps(session_data, ensure_ascii=False, indent=1))
@@ -509,6 +511,7 @@ class AgentImporter:
         """Import sessions."""
         try:
             from salmalm.core import _get_db
+            from salmalm.core.session_store import _index_values, _is_hidden, detach_forks
 
             conn = _get_db()
             count = 0
@@ -518,19 +521,27 @@ class AgentImporter:
                 data = json.loads(zf.read(name))
                 sid = data.get("session_id", "")
                 msgs = json.dumps(data.get("messages", []), ensure_ascii=False)
+                first, n_msgs = _index_values(data.get("messages", []))
                 updated = data.get("updated_at", _now_kst())
                 # Check existing
                 existing = conn.execute("SELECT session_id FROM session_store WHERE session_id=?", (sid,)).fetchone()
                 if existing and self.conflict_mode == "skip":
                     continue
                 if existing:
+                    # The imported blob replaces the session's message log;
+                    # branches of it keep their own copy of what they inherit
+                    detach_forks(conn, sid)
                     conn.execute(
-                        "UPDATE session_store SET messages=?, updated_at=? WHERE session_id=?", (msgs, updated, sid)
+                        "UPDATE session_store SET messages=?, updated_at=?, first_user_text=?, message_count=?, "
+                        "fork_seq=NULL WHERE session_id=?",
+                        (msgs, updated, first, n_msgs, sid),
                     )
+                    conn.execute("DELETE FROM session_messages WHERE session_id=?", (sid,))
                 else:
                     conn.execute(
-                        "INSERT INTO session_store (session_id, messages, updated_at) VALUES (?,?,?)",
-                        (sid, msgs, updated),
+                        "INSERT INTO session_store (session_id, messages, updated_at, first_user_text, message_count, hidden) "
+                        "VALUES (?,?,?,?,?,?)",
+                        (sid, msgs, updated, first, n_msgs, _is_hidden(sid)),
                     )
                 count += 1
             conn.commit()
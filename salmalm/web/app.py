@@ -42,7 +42,6 @@ from salmalm.web.asgi import (
     _HTMLResp,
     _JSONResp,
     _RawResp,
-    _SSEQueue,
     _cors_headers,
     _handle_sse_stream,
     _inject_mixin_methods,
@@ -212,16 +211,11 @@ async def _dispatch(
             return RedirectResponse(url=location, status_code=handler._resp_status)
 
         # Raw streaming (non-SSE — e.g. SW.js)
-        if handler._streaming and not handler._sse_queue._q.empty():
-            chunks = []
-            q = handler._sse_queue._q
-            while not q.empty():
-                chunk = q.get_nowait()
-                if chunk is not None:
-                    chunks.append(chunk)
+        raw = handler._sse_queue.getvalue() if handler._streaming else b""
+        if raw:
             ct = handler._resp_headers.get("content-type", "application/octet-stream")
             return Response(
-                b"".join(chunks),
+                raw,
                 media_type=ct,
                 status_code=handler._resp_status,
                 headers=_cors_headers(request),
@@ -432,6 +426,20 @@ async def _on_startup() -> None:  # noqa: D401
         LLMCronManager._main_loop = _aio_startup.get_running_loop()
     except Exception:
         pass
+    # Event-loop stall sampling (salmalm_event_loop_lag_seconds)
+    from salmalm.monitoring.loop_lag import loop_lag
+    loop_lag.start()
+
+
+@app.on_event("shutdown")
+async def _on_shutdown() -> None:  # noqa: D401
+    from salmalm.core.usage_ledger import usage_ledger
+    from salmalm.db.aio import audit_db, auth_db
+    from salmalm.monitoring.loop_lag import loop_lag
+    loop_lag.stop()
+    usage_ledger.close()
+    audit_db.close()
+    auth_db.close()
 
 
 # ── WebSocket endpoint (single-port, same as HTTP) ────────────────────────
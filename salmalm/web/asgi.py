@@ -4,8 +4,10 @@ Adapter pattern: FastHandler subclasses WebHandler but skips
 BaseHTTPRequestHandler.__init__, overriding _json/_html/wfile so all
 existing mixin route handlers work without modification.
 
-SSE streaming: sync wfile.write() calls are bridged to an async
-generator via a thread-safe queue, so uvicorn's event loop never blocks.
+SSE streaming: the chat handler runs on a dedicated producer thread and its
+sync wfile.write() calls feed an _SSEChannel that wakes the event loop with
+call_soon_threadsafe, so uvicorn's event loop never blocks and no executor
+thread is spent per chunk.
 """
 
 from __future__ import annotations
@@ -14,9 +16,10 @@ import asyncio
 import io
 import json
 import os
-import queue
+import threading
 import time
-from typing import AsyncIterator
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Optional
 
 from pathlib import Path
 from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
@@ -69,30 +72,124 @@ class _RawResp(BaseException):
         self.status = status
 
 
-# ── SSE queue bridge ────────────────────────────────────────────────────────
+# ── SSE channel bridge ──────────────────────────────────────────────────────
 
-class _SSEQueue:
+_SSE_COALESCE = float(os.environ.get("SALMALM_SSE_COALESCE_MS", "10")) / 1000
+_SSE_FLUSH_BYTES = 16 * 1024  # send at once, without waiting out the coalesce window
+_SSE_MAX_BUFFER = int(os.environ.get("SALMALM_SSE_MAX_BUFFER", str(1024 * 1024)))
+_SSE_WRITE_TIMEOUT = 30.0  # producer gives up on a client that stopped reading
+_SSE_MAX_STREAMS = int(os.environ.get("SALMALM_SSE_MAX_STREAMS", "64"))
+
+# Chat handlers block for the whole generation; keep them off the default
+# executor that asyncio.to_thread / run_in_executor(None, ...) share.
+_sse_executor = ThreadPoolExecutor(max_workers=_SSE_MAX_STREAMS, thread_name_prefix="salmalm-sse")
+
+
+class _SSEChannel:
     """Bridges sync wfile.write() calls into an async StreamingResponse.
 
-    The SSE handler thread calls write() synchronously.
-    The async generate() coroutine polls the queue without blocking the event loop.
-    """
+    The SSE handler thread calls write(); the first write after each
+    hand-off wakes the consumer with ``loop.call_soon_threadsafe``, and
+    get() returns everything written since as one batch (waiting up to
+    ``SALMALM_SSE_COALESCE_MS`` for more unless 16 KiB are buffered).
+    Past ``SALMALM_SSE_MAX_BUFFER`` unsent bytes the producer blocks.
+    After disconnect() every write raises BrokenPipeError, which the chat
+    handler already treats as a client disconnect.
 
-    _SENTINEL = None
+    Before bind() (non-SSE handlers running on the loop thread) writes are
+    only buffered and read back with getvalue().
+    """
 
-    def __init__(self) -> None:
-        self._q: queue.SimpleQueue = queue.SimpleQueue()
+    def __init__(self, max_buffer: int = _SSE_MAX_BUFFER) -> None:
+        self._lock = threading.Lock()
+        self._space = threading.Condition(self._lock)
+        self._chunks: list = []
+        self._size = 0
+        self._max_buffer = max_buffer
+        self._closed = False
+        self._disconnected = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread = 0
+        self._ready: Optional[asyncio.Event] = None
+        self._wake_pending = False
+
+    def bind(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Attach the consuming event loop (call from that loop)."""
+        self._loop = loop
+        self._loop_thread = threading.get_ident()
+        self._ready = asyncio.Event()
 
     def write(self, data: bytes) -> int:
-        self._q.put(data)
+        with self._lock:
+            if self._disconnected:
+                raise BrokenPipeError("SSE client disconnected")
+            if self._loop is not None and threading.get_ident() != self._loop_thread:
+                deadline = time.monotonic() + _SSE_WRITE_TIMEOUT
+                while self._size >= self._max_buffer and not self._disconnected:
+                    left = deadline - time.monotonic()
+                    if left <= 0:
+                        raise BrokenPipeError("SSE client stopped reading")
+                    self._space.wait(left)
+                if self._disconnected:
+                    raise BrokenPipeError("SSE client disconnected")
+            self._chunks.append(bytes(data))
+            self._size += len(data)
+            self._wake()
         return len(data)
 
     def flush(self) -> None:
-        pass  # each write is immediately available
+        pass  # the consumer is woken by write()
 
     def close(self) -> None:
-        """Signal generator to stop."""
-        self._q.put(self._SENTINEL)
+        """Signal end of stream (producer side)."""
+        with self._lock:
+            self._closed = True
+            self._wake()
+
+    def disconnect(self) -> None:
+        """Client went away: drop buffered data and fail further writes."""
+        with self._lock:
+            self._disconnected = True
+            self._chunks.clear()
+            self._size = 0
+            self._space.notify_all()
+
+    def getvalue(self) -> bytes:
+        """Everything buffered so far (non-streaming responses)."""
+        with self._lock:
+            data = b"".join(self._chunks)
+            self._chunks.clear()
+            self._size = 0
+            return data
+
+    async def get(self) -> Optional[bytes]:
+        """Next coalesced batch of writes; ``None`` once the producer closed."""
+        while True:
+            await self._ready.wait()
+            if _SSE_COALESCE and not self._closed and self._size < _SSE_FLUSH_BYTES:
+                await asyncio.sleep(_SSE_COALESCE)  # let a few more tokens arrive
+            with self._lock:
+                data = b"".join(self._chunks)
+                self._chunks.clear()
+                self._size = 0
+                self._space.notify_all()
+                if not self._closed:
+                    self._ready.clear()
+                    self._wake_pending = False
+                elif not data:
+                    return None
+            if data:
+                return data
+
+    def _wake(self) -> None:
+        """Wake get() once per batch (lock held)."""
+        if self._loop is None or self._wake_pending:
+            return
+        self._wake_pending = True
+        try:
+            self._loop.call_soon_threadsafe(self._ready.set)
+        except RuntimeError:  # loop closed: nobody is reading any more
+            self._disconnected = True
 
 
 # ── Case-insensitive header dict ────────────────────────────────────────────
@@ -124,7 +221,7 @@ class FastHandler:
     Key differences from WebHandler:
     - _json() raises _JSONResp instead of writing to wfile directly
     - _html() raises _HTMLResp
-    - wfile delegates to _SSEQueue for SSE streaming
+    - wfile delegates to _SSEChannel for SSE streaming
     - BaseHTTPRequestHandler.__init__ is never called
     """
 
@@ -159,7 +256,7 @@ class FastHandler:
         self._content_length = len(body_bytes)
 
         # SSE streaming state
-        self._sse_queue = _SSEQueue()
+        self._sse_queue = _SSEChannel()
         self._streaming = False
         self._resp_status = 200
         self._resp_headers: dict = {}
@@ -229,7 +326,7 @@ class FastHandler:
         pass  # headers finalised when StreamingResponse is built
 
     @property
-    def wfile(self) -> _SSEQueue:
+    def wfile(self) -> _SSEChannel:
         return self._sse_queue
 
     # ── IP / auth helpers ────────────────────────────────────────────────────
@@ -470,15 +567,10 @@ def create_asgi_app() -> FastAPI:
                 return RedirectResponse(url=location, status_code=handler._resp_status)
 
             # If handler returned normally (raw wfile writes for non-SSE streams like SW.js)
-            if handler._streaming and not handler._sse_queue._q.empty():
-                chunks = []
-                q = handler._sse_queue._q
-                while not q.empty():
-                    chunk = q.get_nowait()
-                    if chunk is not None:
-                        chunks.append(chunk)
+            raw = handler._sse_queue.getvalue() if handler._streaming else b""
+            if raw:
                 ct = handler._resp_headers.get("content-type", "application/octet-stream")
-                return Response(b"".join(chunks), media_type=ct,
+                return Response(raw, media_type=ct,
                                 status_code=handler._resp_status,
                                 headers=_cors_headers(request))
 
@@ -511,12 +603,15 @@ def create_asgi_app() -> FastAPI:
 # ── SSE async bridge ─────────────────────────────────────────────────────────
 
 async def _handle_sse_stream(handler: FastHandler) -> StreamingResponse:
-    """Run SSE handler in thread-pool, yield chunks via async generator.
+    """Run the SSE handler on a producer thread, yield its writes from the loop.
 
-    The handler writes to handler.wfile (an _SSEQueue). The async generator
-    reads from that queue without blocking uvicorn's event loop.
+    The handler writes to handler.wfile (an _SSEChannel bound to this loop).
+    If the client disconnects, the channel rejects further writes and the
+    session's generation is aborted, which cancels the in-flight LLM call.
     """
-    sse_q = handler.wfile  # ensure queue exists
+    sse_q = handler.wfile
+    loop = asyncio.get_running_loop()
+    sse_q.bind(loop)
 
     def _run_handler() -> None:
         try:
@@ -541,19 +636,27 @@ async def _handle_sse_stream(handler: FastHandler) -> StreamingResponse:
         finally:
             sse_q.close()  # always signal end
 
-    loop = asyncio.get_running_loop()
-    thread_future = loop.run_in_executor(None, _run_handler)
+    thread_future = loop.run_in_executor(_sse_executor, _run_handler)
 
     async def generate() -> AsyncIterator[bytes]:
-        while True:
-            try:
-                # Poll queue in executor (non-blocking for event loop)
-                chunk = await loop.run_in_executor(None, sse_q._q.get)
-                if chunk is _SSEQueue._SENTINEL:
+        from salmalm.monitoring.metrics import sse_active_streams, sse_client_disconnects
+
+        sse_active_streams.inc()
+        finished = False
+        try:
+            while True:
+                chunk = await sse_q.get()
+                if chunk is None:
+                    finished = True
                     break
                 yield chunk
-            except Exception:
-                break
+        finally:
+            sse_active_streams.dec()
+            if not finished:
+                # Cancelled by the server on client disconnect (or send failed)
+                sse_client_disconnects.inc()
+                sse_q.disconnect()
+                _abort_generation(handler)
         # Ensure thread finishes cleanly
         try:
             await asyncio.wait_for(thread_future, timeout=5.0)
@@ -572,6 +675,18 @@ async def _handle_sse_stream(handler: FastHandler) -> StreamingResponse:
     )
 
 
+def _abort_generation(handler: FastHandler) -> None:
+    """Stop the chat generation behind an SSE stream whose client went away."""
+    try:
+        from salmalm.features.abort import abort_controller
+
+        session_id = handler._body.get("session", "web")
+        log.info(f"[SSE] Client disconnected — aborting session={session_id}")
+        abort_controller.set_abort(session_id)
+    except Exception as e:
+        log.debug(f"[SSE] abort on disconnect failed: {e}")
+
+
 # ── Helper: inject mixin methods from WebHandler ─────────────────────────────
 
 def _inject_mixin_methods(target_cls, source_cls) -> None:
@@ -436,16 +436,20 @@ class DailyQuotaManager:
         with self._lock:
             if key in self._cache:
                 return self._cache[key]
+        from salmalm.core.usage_ledger import usage_ledger
+
         try:
-            conn = self._get_conn()
-            row = conn.execute(
-                "SELECT tokens FROM daily_quota WHERE user_id=? AND date=?",
-                (user_id, today),
-            ).fetchone()
-            conn.close()
-            val = row[0] if row else 0
+            with usage_ledger.flush_lock:  # DB value + unflushed tokens, without a flush in between
+                conn = self._get_conn()
+                row = conn.execute(
+                    "SELECT tokens FROM daily_quota WHERE user_id=? AND date=?",
+                    (user_id, today),
+                ).fetchone()
+                conn.close()
+                val = (row[0] if row else 0) + usage_ledger.pending_tokens(AUTH_DB, user_id, today)
             with self._lock:
-                self._cache[key] = val  # Only cache on successful DB read
+                # Only cache on successful DB read; a concurrent add_usage may have cached first
+                val = self._cache.setdefault(key, val)
         except Exception as _qe:
             log.warning("[QUOTA] DB read failed for %s — returning conservative 0: %s", user_id, _qe)
             val = 0  # Do NOT cache: next call will re-read DB
@@ -468,30 +472,27 @@ class DailyQuotaManager:
         """Increment today's token counter for *user_id*."""
         if tokens <= 0:
             return
+        from salmalm.core.usage_ledger import usage_ledger
+
         today = self._today()
         key = f"{user_id}:{today}"
+        self.get_usage(user_id)  # load today's persisted count so the cached total stays exact
         with self._lock:
             self._cache[key] = self._cache.get(key, 0) + tokens
+            # Written behind by the usage ledger; get_usage adds its pending tokens until then
+            usage_ledger.record_tokens(AUTH_DB, user_id, today, tokens)
             # Prune stale date keys to prevent unbounded cache growth.
             # Keys with a different date suffix are yesterday (or older) — evict them.
             if len(self._cache) > 200:
                 stale = [k for k in self._cache if not k.endswith(f":{today}")]
                 for k in stale:
                     del self._cache[k]
-        try:
-            conn = self._get_conn()
-            conn.execute(
-                """INSERT INTO daily_quota (user_id, date, tokens) VALUES (?,?,?)
-                   ON CONFLICT(user_id, date) DO UPDATE SET tokens = tokens + excluded.tokens""",
-                (user_id, today, tokens),
-            )
-            conn.commit()
-            conn.close()
-        except Exception as _e:
-            log.debug("[QUOTA] DB add_usage failed: %s", _e)
 
     def get_all_today(self) -> List[dict]:
         """Admin view — all users' today usage."""
+        from salmalm.core.usage_ledger import usage_ledger
+
+        usage_ledger.flush()
         today = self._today()
         try:
             conn = self._get_conn()
@@ -830,7 +831,7 @@ class AuthManager:
             if deleted and row:
                 uid = row[0]
                 # Revoke all tokens immediately
-                self.revoke_all_for_user(uid)
+                self._token_mgr.revoke_all_for_user(uid)
                 # Clean up daily quota records
                 try:
                     qconn = get_connection(AUTH_DB)
@@ -873,7 +874,7 @@ class AuthManager:
                 ).fetchone()
                 _conn_rev.close()
                 if _row_rev:
-                    self.revoke_all_for_user(_row_rev[0])
+                    self._token_mgr.revoke_all_for_user(_row_rev[0])
                     log.warning("[AUTH] All tokens revoked for user %s after password change", username)
             except Exception as _rev_e:
                 log.warning("[AUTH] Failed to revoke tokens after password change: %s", _rev_e)
@@ -339,6 +339,7 @@ from fastapi.responses import JSONResponse as _JSON, Response as _Response, HTML
 from salmalm.web.fastapi_deps import require_auth as _auth, optional_auth as _optauth
 
 from salmalm.web.schemas import LoginRequest, UnlockRequest, UserCreate
+from salmalm.db.aio import auth_db as _adb
 
 router = _APIRouter()
 
@@ -348,7 +349,7 @@ async def get_auth_users(request: _Request):
     user = extract_auth(dict(request.headers))
     if not user or user.get("role") != "admin":
         return _JSON(content={"error": "Admin access required"}, status_code=403)
-    return _JSON(content={"users": auth_manager.list_users()})
+    return _JSON(content={"users": await _adb.call(auth_manager.list_users)})
 
 @router.get("/api/google/auth")
 async def get_google_auth(request: _Request, _u=_Depends(_auth)):
@@ -382,8 +383,8 @@ async def post_users_register(req: UserCreate, request: _Request):
         if not requester or requester.get("role") != "admin":
             return _JSON(content={"error": "Admin access required for registration / 관리자만 등록 가능"}, status_code=403)
     try:
-        user = auth_manager.create_user(req.username, req.password, req.role)
-        user_manager.ensure_quota(user["id"])
+        user = await _adb.call(auth_manager.create_user, req.username, req.password, req.role)
+        await _adb.call(user_manager.ensure_quota, user["id"])
         return _JSON(content={"ok": True, "user": user})
     except ValueError as e:
         return _JSON(content={"error": str(e)}, status_code=400)
@@ -395,7 +396,8 @@ async def post_auth_login(req: LoginRequest, request: _Request):
     import os as _os_login
     username = req.username
     password = req.password
-    user = auth_manager.authenticate(username, password)
+    # Password hashing and the lockout bookkeeping run off the event loop
+    user = await _adb.call(auth_manager.authenticate, username, password)
     ip = request.client.host if request.client else "unknown"
     if user:
         token = auth_manager.create_token(user)
@@ -432,7 +434,7 @@ async def post_auth_register(req: UserCreate, request: _Request):
     if not requester or requester.get("role") != "admin":
         return _JSON(content={"error": "Admin access required"}, status_code=403)
     try:
-        user = auth_manager.create_user(req.username, req.password, req.role)
+        user = await _adb.call(auth_manager.create_user, req.username, req.password, req.role)
         return _JSON(content={"ok": True, "user": user})
     except ValueError as e:
         return _JSON(content={"error": str(e)}, status_code=400)
@@ -524,7 +526,7 @@ async def post_auth_logout(request: _Request):
     if not _raw_token:
         _raw_token = request.cookies.get("salmalm_token")
     if _raw_token and user and user.get("jti"):
-        token_manager.revoke(_raw_token)
+        await _adb.call(token_manager.revoke, _raw_token)
     # Clear cookie
     resp.delete_cookie(key="salmalm_token", path="/")
     return resp
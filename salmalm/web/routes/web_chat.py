@@ -462,6 +462,7 @@ class WebChatMixin:
             from salmalm.core import get_session
 
             session = get_session(session_id)
+            session.hydrate()
             ua = [(i, m) for i, m in enumerate(session.messages) if m.get("role") in ("user", "assistant")]
             if int(message_index) < len(ua):
                 real_idx = ua[int(message_index)][0]
@@ -729,6 +730,7 @@ async def post_alternatives_switch(request: _Request, _u=_Depends(_auth)):
     if content:
         from salmalm.core import get_session
         session = get_session(session_id)
+        session.hydrate()
         ua = [(i, m) for i, m in enumerate(session.messages) if m.get("role") in ("user", "assistant")]
         if int(message_index) < len(ua):
             real_idx = ua[int(message_index)][0]
@@ -42,10 +42,19 @@ def _populate_export_zip(zf, inc_sessions, inc_data, inc_vault, export_user, _js
             ).fetchall()
         else:
             rows = conn.execute("SELECT session_id, messages, title FROM session_store").fetchall()
+        from salmalm.core.session_store import load_session_messages
+
         zf.writestr(
             "sessions.json",
             _json.dumps(
-                [{"id": r[0], "data": r[1], "title": r[2] if len(r) > 2 else ""} for r in rows],
+                [
+                    {
+                        "id": r[0],
+                        "data": _json.dumps(load_session_messages(conn, r[0]), ensure_ascii=False),
+                        "title": r[2] if len(r) > 2 else "",
+                    }
+                    for r in rows
+                ],
                 ensure_ascii=False,
                 indent=2,
             ),
@@ -272,16 +281,18 @@ class WebFilesMixin:
         fmt = params.get("format", ["json"])[0]
         from salmalm.core import _get_db
 
+        from salmalm.core.session_store import load_session_messages
+
         conn = _get_db()
         row = conn.execute(
-            "SELECT messages, updated_at FROM session_store WHERE session_id=?",
+            "SELECT updated_at FROM session_store WHERE session_id=?",
             (sid,),
         ).fetchone()
         if not row:
             self._json({"error": "Session not found"}, 404)
             return
-        msgs = json.loads(row[0])
-        updated_at = row[1]
+        msgs = load_session_messages(conn, sid)
+        updated_at = row[0]
         if fmt == "md":
             lines = [
                 "# SalmAlm Chat Export",
@@ -510,12 +521,13 @@ router = _APIRouter()
 async def get_session_export(request: _Request, session_id: str, format: str = _Query("json"), _u=_Depends(_auth)):
     import json as _json
     from salmalm.core import _get_db
+    from salmalm.core.session_store import load_session_messages
     conn = _get_db()
-    row = conn.execute("SELECT messages, updated_at FROM session_store WHERE session_id=?", (session_id,)).fetchone()
+    row = conn.execute("SELECT updated_at FROM session_store WHERE session_id=?", (session_id,)).fetchone()
     if not row:
         return _JSON(content={"error": "Session not found"}, status_code=404)
-    msgs = _json.loads(row[0])
-    updated_at = row[1]
+    msgs = load_session_messages(conn, session_id)
+    updated_at = row[0]
     if format == "md":
         lines = ["# SalmAlm Chat Export", f"Session: {session_id}", f"Date: {updated_at}", ""]
         for msg in msgs:
@@ -46,6 +46,7 @@ def _systemd_restart_after_upgrade() -> None:
 class ManageMixin:
     GET_ROUTES = {
         "/api/backup": "_get_backup",
+        "/api/cache": "_get_api_cache",
     }
     POST_ROUTES = {
         "/api/do-update": "_post_api_do_update",
@@ -65,6 +66,7 @@ class ManageMixin:
         "/api/paste/detect": "_post_api_paste_detect",
         "/api/vault": "_post_api_vault",
         "/api/cooldowns/reset": "_post_api_cooldowns_reset",
+        "/api/cache/purge": "_post_api_cache_purge",
         "/api/backup/restore": "_post_api_backup_restore",
         "/api/presence": "_post_api_presence",
         "/api/node/execute": "_post_api_node_execute",
@@ -79,6 +81,29 @@ class ManageMixin:
         reset_cooldowns()
         self._json({"ok": True, "message": "All cooldowns cleared"})
 
+    def _get_api_cache(self):
+        """GET /api/cache — LLM response cache stats and most recent entries."""
+        if not self._require_auth("admin"):
+            return
+        from salmalm.core import response_cache
+
+        self._json({"stats": response_cache.stats(), "entries": response_cache.inspect()})
+
+    def _post_api_cache_purge(self):
+        """POST /api/cache/purge — Drop response cache entries (optionally by model/intent, or expired only)."""
+        if not self._require_auth("admin"):
+            return
+        from salmalm.core import response_cache
+
+        body = self._body
+        removed = response_cache.purge(
+            model=body.get("model") or None,
+            intent=body.get("intent") or None,
+            expired_only=bool(body.get("expired_only")),
+        )
+        audit_log("cache_purge", f"removed={removed}")
+        self._json({"ok": True, "removed": removed})
+
     def _get_backup(self):
         """GET /api/backup — download ~/SalmAlm as zip."""
         if not self._require_auth("admin"):
@@ -981,6 +1006,36 @@ async def post_cooldowns_reset(_u=_Depends(_auth)):
     reset_cooldowns()
     return _JSON(content={"ok": True, "message": "All cooldowns cleared"})
 
+
+@router.get("/api/cache")
+async def get_cache(_u=_Depends(_auth)):
+    from salmalm.core import response_cache
+    if _u.get("role") != "admin":
+        return _JSON(content={"error": "Admin access required"}, status_code=403)
+    stats = await _asyncio.to_thread(response_cache.stats)
+    entries = await _asyncio.to_thread(response_cache.inspect)
+    return _JSON(content={"stats": stats, "entries": entries})
+
+
+@router.post("/api/cache/purge")
+async def post_cache_purge(request: _Request, _u=_Depends(_auth)):
+    from salmalm.core import audit_log, response_cache
+    if _u.get("role") != "admin":
+        return _JSON(content={"error": "Admin access required"}, status_code=403)
+    try:
+        body = await request.json()
+    except Exception:
+        body = {}
+    removed = await _asyncio.to_thread(
+        response_cache.purge,
+        model=body.get("model") or None,
+        intent=body.get("intent") or None,
+        expired_only=bool(body.get("expired_only")),
+    )
+    audit_log("cache_purge", f"removed={removed}")
+    return _JSON(content={"ok": True, "removed": removed})
+
+
 @router.post("/api/backup/restore")
 async def post_backup_restore(request: _Request, _u=_Depends(_auth)):
     import zipfile, io
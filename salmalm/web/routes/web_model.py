@@ -321,8 +321,9 @@ router = _APIRouter()
 
 @router.get("/api/usage/models")
 async def get_usage_models(_u=_Depends(_auth)):
+    from salmalm.db.aio import audit_db
     from salmalm.features.edge_cases import usage_tracker
-    return _JSON(content={"breakdown": usage_tracker.model_breakdown()})
+    return _JSON(content={"breakdown": await audit_db.read(lambda conn: usage_tracker.model_breakdown(conn=conn))})
 
 @router.get("/api/models")
 async def get_models(request: _Request, _u=_Depends(_auth)):
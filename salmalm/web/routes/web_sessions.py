@@ -5,11 +5,6 @@ import json
 import re as _re
 from salmalm.core import audit_log
 
-# Precompiled regex for title extraction (used in hot session-list loops)
-_RE_BOLD = _re.compile(r'\*\*([^*]+)\*\*')
-_RE_ITALIC = _re.compile(r'\*([^*]+)\*')
-_RE_CODE = _re.compile(r'`([^`]+)`')
-
 
 class WebSessionsMixin:
     GET_ROUTES = {
@@ -32,81 +27,31 @@ class WebSessionsMixin:
     """Mixin providing sessions route handlers."""
 
     def _get_api_sessions(self):
-        """Get api sessions."""
+        """GET /api/sessions — sidebar list (``?limit=&before=`` pages, ``?since=`` changes)."""
         _auth_user = self._require_auth("user")
         if not _auth_user:
             return
+        import urllib.parse as _up
+
         from salmalm.core import _get_db
+        from salmalm.core.session_store import list_sessions
 
-        conn = _get_db()
+        qs = _up.parse_qs(_up.urlparse(self.path).query)
+        try:
+            limit = max(1, min(int(qs["limit"][0]), 500)) if "limit" in qs else None
+        except ValueError:
+            self._json({"error": "Invalid limit"}, 400)
+            return
         # User-scoped session list (user_id=0 or NULL = legacy/local = show all)
-        _uid = _auth_user.get("id", 0)
-        if _uid and _uid > 0:
-            rows = conn.execute(
-                "SELECT session_id, updated_at, title, parent_session_id FROM session_store "
-                "WHERE user_id=? OR user_id IS NULL ORDER BY updated_at DESC",
-                (_uid,),
-            ).fetchall()
-        else:
-            rows = conn.execute(
-                "SELECT session_id, updated_at, title, parent_session_id FROM session_store ORDER BY updated_at DESC"
-            ).fetchall()
-        # Prefixes that are internal/ephemeral — never show in UI
-        _HIDDEN_PREFIXES = ("agent_", "subagent_", "subagent-", "cron-", "test_msg_", "e2e-", "save_test")
-
-        sessions = []
-        for r in rows:
-            sid = r[0]
-            # Hide internal agent/cron/test sessions from the sidebar
-            if any(sid.startswith(p) for p in _HIDDEN_PREFIXES):
-                continue
-            stored_title = r[2] if len(r) > 2 else ""
-            parent_sid = r[3] if len(r) > 3 else None
-            if stored_title:
-                title = stored_title
-                msg_count = 0
-            else:
-                try:
-                    _row = conn.execute(
-                        "SELECT messages FROM session_store WHERE session_id=?",
-                        (sid,),
-                    ).fetchone()
-                    if _row is None:
-                        title = stored_title or ""
-                        msg_count = 0
-                        continue
-                    msgs = json.loads(_row[0])
-                    title = ""
-                    for m in msgs:
-                        if m.get("role") == "user" and isinstance(m.get("content"), str):
-                            _raw = m["content"].strip()
-                            # Skip file upload info lines as title
-                            if _raw.startswith("[") and ("uploaded" in _raw or "📎" in _raw or "🖼" in _raw):
-                                continue
-                            # Strip markdown formatting (precompiled at module level)
-                            _raw = _RE_BOLD.sub(r'\1', _raw)
-                            _raw = _RE_ITALIC.sub(r'\1', _raw)
-                            _raw = _RE_CODE.sub(r'\1', _raw)
-                            _raw = _raw.replace("*", "").replace("`", "")
-                            title = _raw[:60]
-                            break
-                    msg_count = len([m for m in msgs if m.get("role") in ("user", "assistant")])
-                except Exception as e:  # noqa: broad-except
-                    title = sid
-                    msg_count = 0
-            # Skip ghost sessions: no title and no user/assistant messages
-            if not stored_title and msg_count == 0 and sid != "web":
-                continue
-            entry = {
-                "id": sid,
-                "title": title or sid,
-                "updated_at": r[1],
-                "messages": msg_count,
-            }
-            if parent_sid:
-                entry["parent_session_id"] = parent_sid
-            sessions.append(entry)
-        self._json({"sessions": sessions})
+        self._json(
+            list_sessions(
+                _get_db(),
+                user_id=_auth_user.get("id", 0),
+                limit=limit,
+                before=qs.get("before", [None])[0],
+                since=qs.get("since", [None])[0],
+            )
+        )
 
     def _get_api_sessions_last(self):
         """GET /api/sessions/{id}/last — return last assistant message for recovery."""
@@ -170,11 +115,14 @@ class WebSessionsMixin:
 
         sid = f"imported_{uuid.uuid4().hex[:8]}"
         from salmalm.core import _get_db
+        from salmalm.core.session_store import _index_values
 
+        first, count = _index_values(messages)
         conn = _get_db()
         conn.execute(
-            "INSERT OR REPLACE INTO session_store (session_id, messages, title, updated_at) VALUES (?, ?, ?, datetime('now'))",
-            (sid, json.dumps(messages, ensure_ascii=False), title),
+            "INSERT OR REPLACE INTO session_store (session_id, messages, title, updated_at, first_user_text, message_count) "
+            "VALUES (?, ?, ?, datetime('now'), ?, ?)",
+            (sid, json.dumps(messages, ensure_ascii=False), title, first, count),
         )
         conn.commit()
         audit_log("session_import", sid, detail_dict={"title": title, "msg_count": len(messages)})
@@ -356,16 +304,17 @@ class WebSessionsMixin:
             return
         sid = m.group(1)
         from salmalm.core import _get_db
+        from salmalm.core.session_store import load_session_messages
 
         conn = _get_db()
         row = conn.execute(
-            "SELECT messages FROM session_store WHERE session_id=?", (sid,)
+            "SELECT 1 FROM session_store WHERE session_id=?", (sid,)
         ).fetchone()
         if not row:
             self._json({"messages": []})
             return
         try:
-            raw_msgs = json.loads(row[0]) if row[0] else []
+            raw_msgs = load_session_messages(conn, sid)
         except (json.JSONDecodeError, TypeError):
             self._json({"messages": []})
             return
@@ -390,80 +339,44 @@ class WebSessionsMixin:
 
 # ── FastAPI router ────────────────────────────────────────────────────────────
 import asyncio as _asyncio
+from typing import Optional as _Optional
 from fastapi import APIRouter as _APIRouter, Request as _Request, Depends as _Depends, Query as _Query
 from fastapi.responses import JSONResponse as _JSON, Response as _Response, HTMLResponse as _HTML, StreamingResponse as _SR, RedirectResponse as _RR
 from salmalm.web.fastapi_deps import require_auth as _auth, optional_auth as _optauth
 from salmalm.web.schemas import CreateSessionRequest, SessionListResponse, SessionInfo
+from salmalm.db.aio import audit_db as _adb
 
 router = _APIRouter()
 
+
+async def _owned(session_id: str, uid) -> bool:
+    """Session exists and belongs to *uid* (or has no owner)."""
+    row = await _adb.fetchone(
+        "SELECT 1 FROM session_store WHERE session_id=? AND (user_id=? OR user_id IS NULL)",
+        (session_id, uid),
+    )
+    return row is not None
+
 @router.get("/api/sessions")
-async def get_sessions(_u=_Depends(_auth)):
-    import json as _json, re as _re
-    from salmalm.core import _get_db
-    conn = _get_db()
-    _uid = _u.get("id", 0)
-    if _uid and _uid > 0:
-        rows = conn.execute("SELECT session_id, updated_at, title, parent_session_id FROM session_store WHERE user_id=? OR user_id IS NULL ORDER BY updated_at DESC", (_uid,)).fetchall()
-    else:
-        rows = conn.execute("SELECT session_id, updated_at, title, parent_session_id FROM session_store ORDER BY updated_at DESC").fetchall()
-    _HIDDEN_PREFIXES = ("agent_", "subagent_", "subagent-", "cron-", "test_msg_", "e2e-", "save_test")
-    sessions = []
-    for r in rows:
-        sid = r[0]
-        if any(sid.startswith(p) for p in _HIDDEN_PREFIXES):
-            continue
-        stored_title = r[2] if len(r) > 2 else ""
-        parent_sid = r[3] if len(r) > 3 else None
-        if stored_title:
-            title = stored_title
-            msg_count = 0
-        else:
-            try:
-                _row2 = conn.execute("SELECT messages FROM session_store WHERE session_id=?", (sid,)).fetchone()
-                if _row2 is None:
-                    title = stored_title or ""
-                    msg_count = 0
-                    continue
-                msgs = _json.loads(_row2[0])
-                title = ""
-                for m in msgs:
-                    if m.get("role") == "user" and isinstance(m.get("content"), str):
-                        _raw = m["content"].strip()
-                        if _raw.startswith("[") and ("uploaded" in _raw or "📎" in _raw or "🖼" in _raw):
-                            continue
-                        _raw = _RE_BOLD.sub(r'\1', _raw)
-                        _raw = _RE_ITALIC.sub(r'\1', _raw)
-                        _raw = _RE_CODE.sub(r'\1', _raw).replace("*", "").replace("`", "")
-                        title = _raw[:60]
-                        break
-                msg_count = len([m for m in msgs if m.get("role") in ("user", "assistant")])
-            except Exception:
-                title = sid
-                msg_count = 0
-        if not stored_title and msg_count == 0 and sid != "web":
-            continue
-        entry = {"id": sid, "title": title or sid, "updated_at": r[1], "messages": msg_count}
-        if parent_sid:
-            entry["parent_session_id"] = parent_sid
-        sessions.append(entry)
-    return _JSON(content={"sessions": sessions})
+async def get_sessions(
+    limit: _Optional[int] = _Query(None, ge=1, le=500),
+    before: _Optional[str] = _Query(None),
+    since: _Optional[str] = _Query(None),
+    _u=_Depends(_auth),
+):
+    from salmalm.core.session_store import list_sessions
+    result = await _adb.read(list_sessions, user_id=_u.get("id", 0), limit=limit, before=before, since=since)
+    return _JSON(content=result)
 
 @router.get("/api/sessions/{session_id}/messages")
 async def get_session_messages(session_id: str, _u=_Depends(_auth)):
-    import json as _json
-    from salmalm.core import _get_db
+    from salmalm.core.session_store import load_session_messages
     from fastapi import HTTPException as _HTTPException
     uid = _u.get("id") or _u.get("uid") or _u.get("username")
-    conn = _get_db()
-    row = conn.execute(
-        "SELECT messages FROM session_store WHERE session_id=? AND (user_id=? OR user_id IS NULL)",
-        (session_id, uid)
-    ).fetchone()
-    if not row:
+    if not await _owned(session_id, uid):
         raise _HTTPException(status_code=404, detail="Session not found or access denied")
     try:
-        raw_msgs = _json.loads(row[0]) if row[0] else []
+        raw_msgs = await _adb.read(load_session_messages, session_id)
     except Exception:
         return _JSON(content={"messages": []})
     out = []
@@ -483,14 +396,9 @@ async def get_session_messages(session_id: str, _u=_Depends(_auth)):
 @router.get("/api/sessions/{session_id}/last")
 async def get_session_last(session_id: str, _u=_Depends(_auth)):
     from fastapi import HTTPException as _HTTPException
-    from salmalm.core import get_session, _get_db
+    from salmalm.core import get_session
     uid = _u.get("id") or _u.get("uid") or _u.get("username")
-    _conn = _get_db()
-    _row = _conn.execute(
-        "SELECT 1 FROM session_store WHERE session_id=? AND (user_id=? OR user_id IS NULL)",
-        (session_id, uid)
-    ).fetchone()
-    if not _row:
+    if not await _owned(session_id, uid):
         raise _HTTPException(status_code=404, detail="Session not found or access denied")
     sess = get_session(session_id)
     last_msg = None
@@ -507,15 +415,9 @@ async def get_session_last(session_id: str, _u=_Depends(_auth)):
 @router.get("/api/sessions/{session_id}/summary")
 async def get_session_summary(session_id: str, _u=_Depends(_auth)):
     from fastapi import HTTPException as _HTTPException
-    from salmalm.core import _get_db
     from salmalm.features.edge_cases import get_summary_card
     uid = _u.get("id") or _u.get("uid") or _u.get("username")
-    _conn = _get_db()
-    _row = _conn.execute(
-        "SELECT 1 FROM session_store WHERE session_id=? AND (user_id=? OR user_id IS NULL)",
-        (session_id, uid)
-    ).fetchone()
-    if not _row:
+    if not await _owned(session_id, uid):
         raise _HTTPException(status_code=404, detail="Session not found or access denied")
     card = get_summary_card(session_id)
     return _JSON(content={"summary": card})
@@ -523,29 +425,20 @@ async def get_session_summary(session_id: str, _u=_Depends(_auth)):
 @router.get("/api/sessions/{session_id}/alternatives")
 async def get_session_alternatives(session_id: str, msg_index: int = _Query(0), _u=_Depends(_auth)):
     from fastapi import HTTPException as _HTTPException
-    from salmalm.core import _get_db
     from salmalm.features.edge_cases import conversation_fork
     uid = _u.get("id") or _u.get("uid") or _u.get("username")
-    _conn = _get_db()
-    _row = _conn.execute(
-        "SELECT 1 FROM session_store WHERE session_id=? AND (user_id=? OR user_id IS NULL)",
-        (session_id, uid)
-    ).fetchone()
-    if not _row:
+    if not await _owned(session_id, uid):
         raise _HTTPException(status_code=404, detail="Session not found or access denied")
     alts = conversation_fork.get_alternatives(session_id, msg_index)
     return _JSON(content={"alternatives": alts})
 
 @router.post("/api/sessions/create")
 async def post_sessions_create(req: CreateSessionRequest, _u=_Depends(_auth)):
-    from salmalm.core import _get_db
     sid = req.session_id or ""
     if not sid:
         return _JSON(content={"ok": False, "error": "Missing session_id"}, status_code=400)
-    conn = _get_db()
     try:
-        conn.execute('INSERT OR IGNORE INTO session_store (session_id, messages, updated_at, title) VALUES (?, ?, datetime("now"), ?)', (sid, "[]", "New Chat"))
-        conn.commit()
+        await _adb.execute('INSERT OR IGNORE INTO session_store (session_id, messages, updated_at, title) VALUES (?, ?, datetime("now"), ?)', (sid, "[]", "New Chat"))
     except Exception:
         pass
     return _JSON(content={"ok": True, "session_id": sid})
@@ -553,7 +446,7 @@ async def post_sessions_create(req: CreateSessionRequest, _u=_Depends(_auth)):
 @router.post("/api/sessions/delete")
 async def post_sessions_delete(request: _Request, _u=_Depends(_auth)):
     from salmalm.security.crypto import log
-    from salmalm.core import _sessions, _get_db
+    from salmalm.core import _sessions
     from salmalm.core.session_store import _SESSIONS_DIR
     from salmalm.core import audit_log
     body = await request.json()
@@ -561,18 +454,12 @@ async def post_sessions_delete(request: _Request, _u=_Depends(_auth)):
     if not sid:
         return _JSON(content={"ok": False, "error": "Missing session_id"}, status_code=400)
     uid = _u.get("id") or _u.get("uid") or _u.get("username")
-    conn = _get_db()
     # Ownership check: only delete if session belongs to this user (or is legacy/local)
-    _row = conn.execute(
-        "SELECT 1 FROM session_store WHERE session_id=? AND (user_id=? OR user_id IS NULL)",
-        (sid, uid)
-    ).fetchone()
-    if not _row:
+    if not await _owned(sid, uid):
         return _JSON(content={"ok": False, "error": "Session not found or access denied"}, status_code=403)
     if sid in _sessions:
         del _sessions[sid]
-    conn.execute("DELETE FROM session_store WHERE session_id=? AND (user_id=? OR user_id IS NULL)", (sid, uid))
-    conn.commit()
+    await _adb.execute("DELETE FROM session_store WHERE session_id=? AND (user_id=? OR user_id IS NULL)", (sid, uid))
     _json_path = _SESSIONS_DIR / f"{sid}.json"
     try:
         if _json_path.exists():
@@ -585,17 +472,16 @@ async def post_sessions_delete(request: _Request, _u=_Depends(_auth)):
 @router.post("/api/sessions/clear")
 async def post_sessions_clear(request: _Request, _u=_Depends(_auth)):
     from salmalm.security.crypto import log
-    from salmalm.core import _sessions, _get_db, audit_log
+    from salmalm.core import _sessions, audit_log
     from salmalm.core.session_store import _SESSIONS_DIR
     body = await request.json()
     keep = body.get("keep", "web")
     uid = _u.get("id") or _u.get("uid") or _u.get("username")
-    conn = _get_db()
     # Only delete sessions belonging to this user (or legacy null-owner sessions)
-    rows = conn.execute(
+    rows = await _adb.fetchall(
         "SELECT session_id FROM session_store WHERE session_id != ? AND (user_id=? OR user_id IS NULL)",
         (keep, uid)
-    ).fetchall()
+    )
     deleted = 0
     for r in rows:
         sid = r[0]
@@ -608,53 +494,46 @@ async def post_sessions_clear(request: _Request, _u=_Depends(_auth)):
         except Exception:
             pass
         deleted += 1
-    conn.execute(
+    await _adb.execute(
         "DELETE FROM session_store WHERE session_id != ? AND (user_id=? OR user_id IS NULL)",
         (keep, uid)
     )
-    conn.commit()
     audit_log("session_clear", keep, detail_dict={"deleted": deleted, "kept": keep})
     return _JSON(content={"ok": True, "deleted": deleted})
 
 @router.post("/api/sessions/import")
 async def post_sessions_import(request: _Request, _u=_Depends(_auth)):
     import json as _json, uuid
-    from salmalm.core import _get_db, audit_log
+    from salmalm.core import audit_log
     body = await request.json()
     messages = body.get("messages", [])
     title = body.get("title", "Imported Chat")
     if not messages or not isinstance(messages, list):
         return _JSON(content={"ok": False, "error": "messages array required"}, status_code=400)
+    from salmalm.core.session_store import _index_values
     sid = f"imported_{uuid.uuid4().hex[:8]}"
-    conn = _get_db()
-    conn.execute("INSERT OR REPLACE INTO session_store (session_id, messages, title, updated_at) VALUES (?, ?, ?, datetime('now'))",
-                 (sid, _json.dumps(messages, ensure_ascii=False), title))
-    conn.commit()
+    first, count = _index_values(messages)
+    await _adb.execute("INSERT OR REPLACE INTO session_store (session_id, messages, title, updated_at, first_user_text, message_count) "
+                       "VALUES (?, ?, ?, datetime('now'), ?, ?)",
+                       (sid, _json.dumps(messages, ensure_ascii=False), title, first, count))
     audit_log("session_import", sid, detail_dict={"title": title, "msg_count": len(messages)})
     return _JSON(content={"ok": True, "session_id": sid})
 
 @router.post("/api/sessions/rename")
 async def post_sessions_rename(request: _Request, _u=_Depends(_auth)):
-    from salmalm.core import _get_db
     body = await request.json()
     sid = body.get("session_id", "")
     title = body.get("title", "").strip()[:60]
     if not sid or not title:
         return _JSON(content={"ok": False, "error": "Missing session_id or title"}, status_code=400)
     uid = _u.get("id") or _u.get("uid") or _u.get("username")
-    conn = _get_db()
     # Ownership check before rename
-    _row = conn.execute(
-        "SELECT 1 FROM session_store WHERE session_id=? AND (user_id=? OR user_id IS NULL)",
-        (sid, uid)
-    ).fetchone()
-    if not _row:
+    if not await _owned(sid, uid):
         return _JSON(content={"ok": False, "error": "Session not found or access denied"}, status_code=403)
-    conn.execute(
+    await _adb.execute(
         "UPDATE session_store SET title=? WHERE session_id=? AND (user_id=? OR user_id IS NULL)",
         (title, sid, uid)
     )
-    conn.commit()
     return _JSON(content={"ok": True})
 
 @router.post("/api/sessions/rollback")
@@ -466,14 +466,16 @@ async def get_api_ws_status(_u=_Depends(_auth)):
 
 @router.get("/api/usage/daily")
 async def get_api_usage_daily(_u=_Depends(_auth)):
+    from salmalm.db.aio import audit_db
     from salmalm.features.edge_cases import usage_tracker
-    return _JSON({"report": usage_tracker.daily_report()})
+    return _JSON({"report": await audit_db.read(lambda conn: usage_tracker.daily_report(conn=conn))})
 
 
 @router.get("/api/usage/monthly")
 async def get_api_usage_monthly(_u=_Depends(_auth)):
+    from salmalm.db.aio import audit_db
     from salmalm.features.edge_cases import usage_tracker
-    return _JSON({"report": usage_tracker.monthly_report()})
+    return _JSON({"report": await audit_db.read(lambda conn: usage_tracker.monthly_report(conn=conn))})
 
 
 @router.get("/api/doctor")
@@ -192,6 +192,7 @@ from fastapi import APIRouter as _APIRouter, Request as _Request, Depends as _De
 from fastapi.responses import JSONResponse as _JSON, Response as _Response, HTMLResponse as _HTML, StreamingResponse as _SR, RedirectResponse as _RR
 from salmalm.web.fastapi_deps import require_auth as _auth, optional_auth as _optauth
 from salmalm.web.schemas import UserCreate, UserResponse, SuccessResponse
+from salmalm.db.aio import auth_db as _adb
 
 router = _APIRouter()
 
@@ -207,7 +208,7 @@ async def get_users(request: _Request):
     if not user or user.get("role") != "admin":
         return _JSON(content={"error": "Admin access required"}, status_code=403)
     from salmalm.features.users import user_manager
-    return _JSON(content={"users": user_manager.get_all_users_with_stats(),
+    return _JSON(content={"users": await _adb.call(user_manager.get_all_users_with_stats),
                           "multi_tenant": user_manager.multi_tenant_enabled,
                           "registration_mode": user_manager.get_registration_mode()})
 
@@ -215,7 +216,7 @@ async def get_users(request: _Request):
 async def get_users_quota(_u=_Depends(_auth)):
     from salmalm.features.users import user_manager
     uid = _u.get("uid") or _u.get("id", 0)
-    return _JSON(content={"quota": user_manager.get_quota(uid)})
+    return _JSON(content={"quota": await _adb.call(user_manager.get_quota, uid)})
 
 @router.get("/api/users/settings")
 async def get_users_settings(_u=_Depends(_auth)):
@@ -271,8 +272,8 @@ async def post_users_quota_set(request: _Request, _u=_Depends(_auth)):
     uid = body.get("user_id")
     if not uid:
         return _JSON(content={"error": "user_id required"}, status_code=400)
-    user_manager.set_quota(uid, daily_limit=body.get("daily_limit"), monthly_limit=body.get("monthly_limit"))
-    return _JSON(content={"ok": True, "quota": user_manager.get_quota(uid)})
+    await _adb.call(user_manager.set_quota, uid, daily_limit=body.get("daily_limit"), monthly_limit=body.get("monthly_limit"))
+    return _JSON(content={"ok": True, "quota": await _adb.call(user_manager.get_quota, uid)})
 
 @router.post("/api/users/settings")
 async def post_users_settings(request: _Request, _u=_Depends(_auth)):
@@ -24,12 +24,41 @@ from salmalm.security.crypto import log
 
 AUTH_DB = DATA_DIR / "auth.db"
 
+# Seconds between checks of the shared revocation generation (other processes'
+# revocations become visible within this window; 0 = check on every verify).
+_SYNC_INTERVAL = float(os.environ.get("SALMALM_REVOCATION_SYNC", "1"))
+
+
+class _Revocations:
+    """In-memory mirror of ``revoked_tokens`` / ``user_revocations`` for one auth.db.
+
+    ``generation`` tracks ``revocation_generation.generation`` in the DB, which
+    every revocation bumps; another process's change is picked up by reloading
+    when the two differ.
+    """
+
+    def __init__(self) -> None:
+        """Init  ."""
+        self.lock = threading.Lock()
+        self.jtis: Dict[str, float] = {}  # jti -> token expires_at
+        self.users: Dict[int, float] = {}  # user_id -> revoked_after (epoch)
+        self.generation = -1
+        self.checked_at = 0.0
+
+
+_revocations: Dict[str, _Revocations] = {}  # str(AUTH_DB) -> mirror, shared by all TokenManagers
+
+
 class TokenManager:
     """Token creation/verification using HMAC-SHA256 with jti revocation support.
 
     Each token gets a unique jti (JWT ID). Tokens can be revoked by storing
     their jti in a SQLite table. Expired revocation entries are cleaned up
     automatically.
+
+    Revocations are mirrored in memory (see :class:`_Revocations`), so
+    ``verify`` is an HMAC plus dict lookups; the DB is only consulted to
+    check the revocation generation every ``SALMALM_REVOCATION_SYNC`` seconds.
     """
 
     _SECRET_DIR = DATA_DIR / ".token_keys"
@@ -46,6 +75,7 @@ class TokenManager:
             self._load_or_create_keys()
         self._revoked_lock = threading.Lock()
         self._ensure_revocation_table()
+        self._sync(self._revocations_for(), force=True)
 
     def _load_or_create_keys(self):
         """Load key ring from disk, or migrate from legacy single-key file."""
@@ -129,6 +159,11 @@ class TokenManager:
                 user_id INTEGER PRIMARY KEY,
                 revoked_after TEXT NOT NULL
             )""")
+            conn.execute("""CREATE TABLE IF NOT EXISTS revocation_generation (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                generation INTEGER NOT NULL
+            )""")
+            conn.execute("INSERT OR IGNORE INTO revocation_generation (id, generation) VALUES (1, 0)")
             conn.commit()
             conn.close()
         except Exception as e:  # noqa: broad-except
@@ -208,15 +243,20 @@ class TokenManager:
         exp = payload.get("exp", 0)
         if not jti:
             return False  # Legacy token without jti
+        rev = self._revocations_for()
+        with rev.lock:
+            rev.jtis[jti] = exp  # effective in this process even if the DB write fails
         try:
             with self._revoked_lock:
                 conn = get_connection(AUTH_DB)
-                conn.execute(
-                    "INSERT OR IGNORE INTO revoked_tokens (jti, revoked_at, expires_at) VALUES (?, ?, ?)",
-                    (jti, time.time(), exp),
-                )
-                conn.commit()
-                conn.close()
+                try:
+                    conn.execute(
+                        "INSERT OR IGNORE INTO revoked_tokens (jti, revoked_at, expires_at) VALUES (?, ?, ?)",
+                        (jti, time.time(), exp),
+                    )
+                    self._bump_generation(conn, rev)
+                finally:
+                    conn.close()
             return True
         except Exception as _e:  # noqa: broad-except
             log.debug("[TOKEN] revoke DB write failed: %s", _e)
@@ -228,16 +268,20 @@ class TokenManager:
         Inserts a revocation timestamp into user_revocations. Any token with
         iat <= revoked_after for this user_id will be rejected by verify().
         """
+        import datetime as _dt
+
+        now = _dt.datetime.now(_dt.timezone.utc)
+        rev = self._revocations_for()
+        with rev.lock:
+            rev.users[int(user_id)] = now.timestamp()
         try:
             conn = get_connection(AUTH_DB)
             try:
-                import datetime as _dt
-                revoked_after = _dt.datetime.now(_dt.timezone.utc).isoformat()
                 conn.execute(
                     "INSERT OR REPLACE INTO user_revocations (user_id, revoked_after) VALUES (?, ?)",
-                    (user_id, revoked_after),
+                    (user_id, now.isoformat()),
                 )
-                conn.commit()
+                self._bump_generation(conn, rev)
             finally:
                 conn.close()
         except Exception as e:
@@ -245,39 +289,91 @@ class TokenManager:
 
     def _is_revoked(self, jti: str) -> bool:
         """Check if a jti has been revoked."""
-        try:
-            conn = get_connection(AUTH_DB)
-            row = conn.execute("SELECT 1 FROM revoked_tokens WHERE jti=?", (jti,)).fetchone()
-            conn.close()
-            return row is not None
-        except Exception as e:  # noqa: broad-except
-            return False
+        return jti in self._revocations().jtis
 
     def _is_user_revoked(self, user_id: int, token_iat: int) -> bool:
         """Check if all tokens for user_id issued at or before token_iat have been revoked."""
         try:
-            conn = get_connection(AUTH_DB)
-            import datetime as _dt
-            row = conn.execute(
-                "SELECT revoked_after FROM user_revocations WHERE user_id=?", (user_id,)
-            ).fetchone()
-            conn.close()
-            if row:
-                revoked_ts = _dt.datetime.fromisoformat(row[0]).timestamp()
-                return token_iat <= revoked_ts
-        except Exception:
-            pass
-        return False
+            revoked_ts = self._revocations().users.get(int(user_id))
+        except (TypeError, ValueError):
+            return False
+        return revoked_ts is not None and token_iat <= revoked_ts
+
+    # ── in-memory revocation mirror ──
+
+    @staticmethod
+    def _revocations_for() -> _Revocations:
+        """The mirror for the current AUTH_DB (created empty on first use)."""
+        key = str(AUTH_DB)
+        rev = _revocations.get(key)
+        if rev is None:
+            rev = _revocations.setdefault(key, _Revocations())
+        return rev
+
+    def _revocations(self) -> _Revocations:
+        """The current mirror, reloaded first if another process changed the DB."""
+        rev = self._revocations_for()
+        if time.monotonic() - rev.checked_at >= _SYNC_INTERVAL:
+            self._sync(rev)
+        return rev
+
+    @staticmethod
+    def _sync(rev: _Revocations, force: bool = False) -> None:
+        """Reload the mirror from auth.db if its generation moved (or *force*)."""
+        import datetime as _dt
+
+        with rev.lock:
+            if not force and time.monotonic() - rev.checked_at < _SYNC_INTERVAL:
+                return  # another thread synced while this one waited for the lock
+            rev.checked_at = time.monotonic()
+            try:
+                conn = get_connection(AUTH_DB)
+                try:
+                    row = conn.execute("SELECT generation FROM revocation_generation WHERE id=1").fetchone()
+                    generation = row[0] if row else 0
+                    if generation == rev.generation and not force:
+                        return
+                    jtis = dict(
+                        conn.execute(
+                            "SELECT jti, expires_at FROM revoked_tokens WHERE expires_at >= ?", (time.time(),)
+                        ).fetchall()
+                    )
+                    users = {}
+                    for uid, after in conn.execute("SELECT user_id, revoked_after FROM user_revocations"):
+                        users[int(uid)] = _dt.datetime.fromisoformat(after).timestamp()
+                finally:
+                    conn.close()
+            except Exception as e:  # noqa: broad-except
+                log.debug("[TOKEN] revocation sync failed, keeping in-memory state: %s", e)
+                return
+            # Keep local revocations whose DB write failed
+            jtis.update({j: exp for j, exp in rev.jtis.items() if j not in jtis})
+            for uid, ts in rev.users.items():
+                users[uid] = max(ts, users.get(uid, ts))
+            rev.jtis, rev.users, rev.generation = jtis, users, generation
 
+    @staticmethod
+    def _bump_generation(conn, rev: _Revocations) -> None:
+        """Bump the DB generation and commit; adopt it if no other writer got in between."""
+        conn.execute("UPDATE revocation_generation SET generation = generation + 1 WHERE id=1")
+        row = conn.execute("SELECT generation FROM revocation_generation WHERE id=1").fetchone()
+        conn.commit()
+        with rev.lock:
+            if row and row[0] == rev.generation + 1:
+                rev.generation = row[0]
 
     def cleanup_expired(self) -> int:
         """Remove revocation entries for tokens that have expired anyway."""
         try:
             conn = get_connection(AUTH_DB)
-            cursor = conn.execute("DELETE FROM revoked_tokens WHERE expires_at < ?", (time.time(),))
+            now = time.time()
+            cursor = conn.execute("DELETE FROM revoked_tokens WHERE expires_at < ?", (now,))
             conn.commit()
             deleted = cursor.rowcount
             conn.close()
+            rev = self._revocations_for()
+            with rev.lock:
+                rev.jtis = {j: exp for j, exp in rev.jtis.items() if exp >= now}
             return deleted
         except Exception as e:  # noqa: broad-except
             return 0
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Per-call overhead of auth/quota DB lookups with and without connection pooling.
+
+Runs the token revocation lookups (``revoked_tokens`` by jti,
+``user_revocations`` by uid), ``DailyQuotaManager.get_usage`` (cache
+cleared) and the ``daily_quota`` upsert against a scratch data directory, once with a fresh ``sqlite3.connect`` per call
+(``SALMALM_DB_POOL=0`` behaviour) and once with pooled connections.
+
+Usage:
+  python scripts/bench_db_pool.py [--calls 5000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+os.environ.setdefault("SALMALM_HOME", tempfile.mkdtemp(prefix="salmalm-bench-"))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from salmalm.db import connection  # noqa: E402
+from salmalm.web.auth import DailyQuotaManager  # noqa: E402
+from salmalm.web.token_manager import AUTH_DB, TokenManager  # noqa: E402
+
+
+def _lookup(sql: str, params: tuple):
+    conn = connection.get_connection(AUTH_DB)
+    row = conn.execute(sql, params).fetchone()
+    conn.close()
+    return row
+
+
+def _upsert_quota() -> None:
+    conn = connection.get_connection(AUTH_DB)
+    conn.execute(
+        """INSERT INTO daily_quota (user_id, date, tokens) VALUES ('bench', '2024-01-01', 1)
+           ON CONFLICT(user_id, date) DO UPDATE SET tokens = tokens + excluded.tokens"""
+    )
+    conn.commit()
+    conn.close()
+
+
+def _per_call_us(fn, calls: int) -> float:
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - t0) / calls * 1e6
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--calls", type=int, default=5000)
+    args = ap.parse_args()
+
+    TokenManager(secret=b"x" * 32)  # creates the revocation tables
+    quota = DailyQuotaManager()
+    ops = {
+        "revoked_tokens lookup": lambda: _lookup("SELECT 1 FROM revoked_tokens WHERE jti=?", ("jti-bench",)),
+        "user_revocations lookup": lambda: _lookup(
+            "SELECT revoked_after FROM user_revocations WHERE user_id=?", (1,)
+        ),
+        "DailyQuotaManager.get_usage": lambda: (quota._cache.clear(), quota.get_usage("bench")),
+        "daily_quota upsert": _upsert_quota,
+    }
+    print(f"{'operation':<32}{'fresh µs':>10}{'pooled µs':>11}{'speedup':>9}")
+    for name, fn in ops.items():
+        connection._POOL_ENABLED = False
+        fresh = _per_call_us(fn, args.calls)
+        connection._POOL_ENABLED = True
+        pooled = _per_call_us(fn, args.calls)
+        print(f"{name:<32}{fresh:>10.1f}{pooled:>11.1f}{fresh / pooled:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
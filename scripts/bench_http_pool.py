@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""Per-request latency of provider-style POSTs with and without the keep-alive pool.
+
+Starts a local HTTPS stub (self-signed certificate via ``openssl``), then
+sends the same small JSON POST with ``urllib.request.urlopen`` (new TCP +
+TLS connection per call) and with ``salmalm.utils.http_pool.urlopen``.
+Pass ``--url`` to time a real endpoint instead (any status is accepted).
+
+Usage:
+  python scripts/bench_http_pool.py [--calls 200] [--url https://api.example.com/v1/models]
+"""
+
+from __future__ import annotations
+
+import argparse
+import http.server
+import json
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from salmalm.utils import http_pool  # noqa: E402
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # headers and body are written separately
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        raw = json.dumps({"ok": True}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+
+def _local_stub() -> tuple:
+    """HTTPS stub on 127.0.0.1 and an unverified client context for it."""
+    tmp = Path(tempfile.mkdtemp(prefix="salmalm-bench-"))
+    cert, key = tmp / "c.pem", tmp / "k.pem"
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-keyout", str(key), "-out", str(cert), "-subj", "/CN=localhost"],
+        capture_output=True, check=True,
+    )
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    sctx = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    sctx.load_cert_chain(cert, key)
+    server.socket = sctx.wrap_socket(server.socket, server_side=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    cctx = ssl.create_default_context()
+    cctx.check_hostname = False
+    cctx.verify_mode = ssl.CERT_NONE
+    return f"https://127.0.0.1:{server.server_address[1]}/v1/chat", cctx
+
+
+def _post(opener, url: str, **kw) -> None:
+    req = urllib.request.Request(url, data=b'{"x": 1}', headers={"Content-Type": "application/json"}, method="POST")
+    try:
+        with opener(req, timeout=10, **kw) as resp:
+            resp.read()
+    except urllib.error.HTTPError as e:
+        e.read()
+
+
+def _per_call_ms(fn, calls: int) -> float:
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - t0) / calls * 1000
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--calls", type=int, default=200)
+    ap.add_argument("--url", default="")
+    args = ap.parse_args()
+
+    if args.url:
+        url, ctx = args.url, http_pool.ssl_context()
+    else:
+        url, ctx = _local_stub()
+        http_pool._ssl_context = ctx
+    fresh = _per_call_ms(lambda: _post(urllib.request.urlopen, url, context=ctx), args.calls)
+    pooled = _per_call_ms(lambda: _post(http_pool.urlopen, url), args.calls)
+    print(f"{'':<10}{'ms/call':>10}")
+    print(f"{'urlopen':<10}{fresh:>10.2f}")
+    print(f"{'pooled':<10}{pooled:>10.2f}   ({fresh / pooled:.1f}x)")
+    print("pool:", http_pool.llm_pool.stats())
+
+
+if __name__ == "__main__":
+    main()
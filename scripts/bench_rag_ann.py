@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Recall/latency benchmark: IVF-flat ANN vs exact brute-force RAG search.
+
+Generates clustered unit vectors (a stand-in for real embeddings), builds
+the ANN index in a throwaway rag.db and reports recall@k and per-query
+latency for several nprobe values.
+
+Usage:
+  python scripts/bench_rag_ann.py [--n 20000] [--dims 256] [--queries 100] [--k 8]
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from salmalm.features.rag import RAGEngine  # noqa: E402
+from salmalm.features.rag_ann import IVFIndex  # noqa: E402
+from salmalm.features.rag_vectors import VectorBlock, normalize  # noqa: E402
+
+
+def _clustered(n: int, dims: int, clusters: int, rng: random.Random):
+    centers = [[rng.gauss(0, 1) for _ in range(dims)] for _ in range(clusters)]
+    for _ in range(n):
+        c = rng.choice(centers)
+        yield normalize([x + rng.gauss(0, 0.6) for x in c])
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--n", type=int, default=20000)
+    ap.add_argument("--dims", type=int, default=256)
+    ap.add_argument("--queries", type=int, default=100)
+    ap.add_argument("--k", type=int, default=8)
+    ap.add_argument("--clusters", type=int, default=200)
+    args = ap.parse_args()
+
+    rng = random.Random(42)
+    rows = VectorBlock(args.dims)
+    for i, v in enumerate(_clustered(args.n, args.dims, args.clusters, rng)):
+        rows.add(i, v)
+    rows.freeze()
+    queries = list(_clustered(args.queries, args.dims, args.clusters, rng))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = RAGEngine(db_path=Path(tmp) / "rag.db", config_path=Path(tmp) / "rag.json")
+        engine._ensure_db()
+        t0 = time.perf_counter()
+        ann = IVFIndex.build(engine._conn, rows, {"minVectors": 1})
+        print(f"build: {time.perf_counter() - t0:.2f}s  nlist={ann.nlist}  n={args.n}  dims={args.dims}")
+
+        t0 = time.perf_counter()
+        truth = [{cid for _, cid in rows.top_k(q, args.k)} for q in queries]
+        exact_ms = (time.perf_counter() - t0) * 1000 / len(queries)
+        print(f"exact:        {exact_ms:8.2f} ms/query  recall@{args.k}=1.000")
+
+        for nprobe in (1, 2, 4, 8, 16, 32):
+            if nprobe > ann.nlist:
+                break
+            t0 = time.perf_counter()
+            found = [{cid for _, cid in ann.search(q, args.k, nprobe=nprobe)} for q in queries]
+            ms = (time.perf_counter() - t0) * 1000 / len(queries)
+            recall = sum(len(f & t) for f, t in zip(found, truth)) / sum(len(t) for t in truth)
+            print(f"nprobe={nprobe:<4}  {ms:8.2f} ms/query  recall@{args.k}={recall:.3f}  speedup={exact_ms / ms:.1f}x")
+        engine.close()
+
+
+if __name__ == "__main__":
+    main()
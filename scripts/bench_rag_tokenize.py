@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""Throughput benchmark: RAG tokenizer before and after memoization.
+
+Tokenizes synthetic mixed Korean/English chunks with the original
+(per-call regex, uncached stemming/jamo) tokenizer and with
+``RAGEngine._tokenize``, checks that both emit the same tokens, and
+reports tokens/second for a cold and a warm word cache.
+
+Usage:
+  python scripts/bench_rag_tokenize.py [--chunks 5000] [--repeat 3]
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from salmalm.features import rag  # noqa: E402
+from salmalm.features import rag_utils  # noqa: E402
+from salmalm.features.rag import RAGEngine, _STOP_WORDS  # noqa: E402
+
+_EN = (
+    "the server configuration failed while running database migrations because "
+    "users reported errors searching memory files and saving settings quickly"
+).split()
+_KO = "서버 설정을 변경하고 데이터베이스를 검색했습니다 사용자가 오류를 보고한 파일에서 메모리 저장 실행 문제".split()
+
+
+def _legacy_decompose(text: str) -> str:
+    result = []
+    for ch in text:
+        code = ord(ch)
+        if 0xAC00 <= code <= 0xD7A3:
+            offset = code - 0xAC00
+            result.append(rag_utils._CHO[offset // (21 * 28)])
+            result.append(rag_utils._JUNG[(offset % (21 * 28)) // 28])
+            if offset % 28:
+                result.append(rag_utils._JONG[offset % 28])
+        else:
+            result.append(ch)
+    return "".join(result)
+
+
+def _legacy_tokenize(text: str) -> list:
+    text_lower = text.lower()
+    unigrams = []
+    for t in re.findall(r"[\w가-힣]+", text_lower):
+        if len(t) <= 1 or t in _STOP_WORDS:
+            continue
+        if re.match(r"^[a-z]+$", t):
+            stemmed = rag_utils.simple_stem(t)
+            unigrams.append(stemmed)
+            if stemmed != t:
+                unigrams.append(t)
+        else:
+            unigrams.append(t)
+    bigrams = [f"{unigrams[i]}_{unigrams[i + 1]}" for i in range(len(unigrams) - 1)]
+    char_trigrams = []
+    clean = re.sub(r"\s+", "", text_lower)
+    for i in range(len(clean) - 2):
+        tri = clean[i : i + 3]
+        if re.match(r"^[\w가-힣]{3}$", tri):
+            char_trigrams.append(f"c3:{tri}")
+    jamo_tokens = [f"j:{_legacy_decompose(kw)}" for kw in re.findall(r"[가-힣]+", text_lower) if len(kw) >= 2]
+    return unigrams + bigrams + char_trigrams + jamo_tokens
+
+
+def _chunks(n: int, rng: random.Random) -> list:
+    out = []
+    for _ in range(n):
+        lines = []
+        for _ in range(5):
+            words = [rng.choice(_KO if rng.random() < 0.5 else _EN) for _ in range(rng.randint(6, 14))]
+            lines.append(" ".join(words) + rng.choice([".", ",", "!", ""]))
+        out.append("\n".join(lines))
+    return out
+
+
+def _run(fn, chunks: list) -> tuple:
+    t0 = time.perf_counter()
+    total = sum(len(fn(c)) for c in chunks)
+    return total, time.perf_counter() - t0
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--chunks", type=int, default=5000)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    chunks = _chunks(args.chunks, random.Random(42))
+    for c in chunks[:200]:
+        assert RAGEngine._tokenize(c) == _legacy_tokenize(c), "token stream differs from the legacy tokenizer"
+
+    rag._word_units.cache_clear()
+    rag._jamo_token.cache_clear()
+    tokens, cold = _run(RAGEngine._tokenize, chunks)
+    print(f"chunks={len(chunks)}  tokens/chunk={tokens / len(chunks):.0f}")
+
+    legacy = min(_run(_legacy_tokenize, chunks)[1] for _ in range(args.repeat))
+    warm = min(_run(RAGEngine._tokenize, chunks)[1] for _ in range(args.repeat))
+    print(f"{'variant':<16}{'tokens/s':>14}{'speedup':>10}")
+    for name, secs in (("legacy", legacy), ("cached (cold)", cold), ("cached (warm)", warm)):
+        print(f"{name:<16}{tokens / secs:>14,.0f}{legacy / secs:>9.1f}x")
+    info = rag._word_units.cache_info()
+    print(f"word cache: {info.currsize} entries, hit rate {info.hits / max(1, info.hits + info.misses):.1%}")
+
+
+if __name__ == "__main__":
+    main()
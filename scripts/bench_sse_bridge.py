@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""SSE bridge throughput: old executor-polled queue vs. the loop-native channel.
+
+Replays what ``salmalm.web.asgi._handle_sse_stream`` does without a network:
+a sync producer thread writes SSE token events, an async consumer drains
+them the way the StreamingResponse body iterator does.
+
+* ``burst``: one stream writing as fast as it can (tokens/sec per stream).
+* ``paced``: many concurrent streams, each token 5 ms apart like a real
+  provider; reports wall time and how many streams made progress at once.
+
+Usage:
+  python scripts/bench_sse_bridge.py [--tokens 20000] [--streams 64]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import queue
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from salmalm.web import asgi  # noqa: E402
+
+_EVENT = b'event: chunk\ndata: {"text": "tok", "streaming": true}\n\n'
+
+
+class _LegacyQueue:
+    """The previous bridge: SimpleQueue, consumer polls it in the default executor."""
+
+    def __init__(self):
+        self._q = queue.SimpleQueue()
+
+    def write(self, data):
+        self._q.put(data)
+
+    def close(self):
+        self._q.put(None)
+
+
+async def _legacy_stream(produce):
+    loop = asyncio.get_running_loop()
+    q = _LegacyQueue()
+    fut = loop.run_in_executor(None, produce, q)
+    n = 0
+    while (chunk := await loop.run_in_executor(None, q._q.get)) is not None:
+        n += len(chunk)
+    await fut
+    return n
+
+
+async def _channel_stream(produce):
+    loop = asyncio.get_running_loop()
+    ch = asgi._SSEChannel()
+    ch.bind(loop)
+    fut = loop.run_in_executor(asgi._sse_executor, produce, ch)
+    n = 0
+    while (chunk := await ch.get()) is not None:
+        n += len(chunk)
+    await fut
+    return n
+
+
+_live_peak = [0]
+
+
+def _producer(tokens, pace, live):
+    def produce(w):
+        live.append(1)
+        _live_peak[0] = max(_live_peak[0], len(live))
+        for _ in range(tokens):
+            w.write(_EVENT)
+            if pace:
+                time.sleep(pace)
+        live.pop()
+        w.close()
+
+    return produce
+
+
+async def _run(kind, streams, tokens, pace):
+    live: list = []
+    _live_peak[0] = 0
+    run = _legacy_stream if kind == "legacy" else _channel_stream
+    t0 = time.perf_counter()
+    await asyncio.gather(*(run(_producer(tokens, pace, live)) for _ in range(streams)))
+    return time.perf_counter() - t0, _live_peak[0]
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--tokens", type=int, default=20000)
+    ap.add_argument("--streams", type=int, default=64)
+    args = ap.parse_args()
+
+    print(f"{'':<8}{'burst tok/s':>14}{'paced wall s':>15}{'concurrent':>12}")
+    for kind in ("legacy", "channel"):
+        burst, _ = asyncio.run(_run(kind, 1, args.tokens, 0))
+        paced, peak = asyncio.run(_run(kind, args.streams, 200, 0.005))
+        print(f"{kind:<8}{args.tokens / burst:>14,.0f}{paced:>15.2f}{peak:>12}")
+    print(f"(paced: {args.streams} streams x 200 tokens, 5 ms apart; ideal wall ~1.0 s)")
+
+
+if __name__ == "__main__":
+    main()
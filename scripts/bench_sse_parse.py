@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""CPU time to parse one long Anthropic stream: old str splitter vs. _SSEParser.
+
+Replays a recorded SSE capture (``--file``, raw response body) or a
+synthetic 200k-token stream with extended thinking and a large tool call,
+fed in 4 KiB reads through ``salmalm.core.llm_stream._iter_sse_events``.
+The old path (decoded str buffer split line by line, ``+=`` accumulators)
+is reproduced here for comparison.
+
+Usage:
+  python scripts/bench_sse_parse.py [--tokens 200000] [--file capture.sse]
+"""
+
+from __future__ import annotations
+
+import argparse
+import codecs
+import io
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from salmalm.core import llm_stream  # noqa: E402
+
+
+def _synthetic(tokens: int) -> bytes:
+    def ev(obj):
+        return f"event: {obj['type']}\ndata: {json.dumps(obj, ensure_ascii=False)}\n\n"
+
+    out = [ev({"type": "message_start", "message": {"usage": {"input_tokens": 1200}}})]
+    words = ["생각", " the", " token", " 살림", " stream", " ok"]
+    for i in range(tokens // 2):
+        out.append(ev({"type": "content_block_delta", "index": 0,
+                       "delta": {"type": "thinking_delta", "thinking": words[i % 6]}}))
+    out.append(ev({"type": "content_block_start", "index": 1, "content_block": {"type": "tool_use", "id": "t1", "name": "write"}}))
+    out.append(ev({"type": "content_block_delta", "index": 1, "delta": {"type": "input_json_delta", "partial_json": '{"text": "'}}))
+    for i in range(tokens // 4):
+        out.append(ev({"type": "content_block_delta", "index": 1,
+                       "delta": {"type": "input_json_delta", "partial_json": words[i % 6]}}))
+    out.append(ev({"type": "content_block_delta", "index": 1, "delta": {"type": "input_json_delta", "partial_json": '"}'}}))
+    out.append(ev({"type": "content_block_stop", "index": 1}))
+    for i in range(tokens // 4):
+        out.append(ev({"type": "content_block_delta", "index": 2, "delta": {"type": "text_delta", "text": words[i % 6]}}))
+    out.append(ev({"type": "message_delta", "usage": {"output_tokens": tokens}}))
+    return "".join(out).encode()
+
+
+def _legacy(resp) -> int:
+    """The previous implementation: str buffer + split("\\n", 1), += accumulators."""
+    decoder = codecs.getincrementaldecoder("utf-8")("replace")
+    buffer, accum = "", {"content": "", "thinking": "", "tool_json": ""}
+    events = 0
+    while chunk := resp.read(4096):
+        buffer += decoder.decode(chunk)
+        while "\n" in buffer:
+            line, buffer = buffer.split("\n", 1)
+            line = line.strip()
+            if not line.startswith("data: "):
+                continue
+            try:
+                event = json.loads(line[6:])
+            except json.JSONDecodeError:
+                continue
+            events += 1
+            delta = event.get("delta", {})
+            dt = delta.get("type")
+            if dt == "text_delta":
+                accum["content"] += delta["text"]
+            elif dt == "thinking_delta":
+                accum["thinking"] += delta["thinking"]
+            elif dt == "input_json_delta":
+                accum["tool_json"] += delta["partial_json"]
+    return events
+
+
+def _current(resp) -> int:
+    state = llm_stream._anthropic_state()
+    events = sum(1 for _ in llm_stream._iter_sse_events(resp, state))
+    llm_stream._anthropic_end(state, "anthropic/bench")
+    return events
+
+
+def _cpu(fn, raw: bytes) -> float:
+    t0 = time.process_time()
+    fn(io.BytesIO(raw))
+    return time.process_time() - t0
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--tokens", type=int, default=200_000)
+    ap.add_argument("--file", default="")
+    args = ap.parse_args()
+
+    raw = Path(args.file).read_bytes() if args.file else _synthetic(args.tokens)
+    print(f"stream: {len(raw) / 1e6:.1f} MB")
+    legacy, current = _cpu(_legacy, raw), _cpu(_current, raw)
+    print(f"{'legacy':<10}{legacy:>8.2f} s CPU")
+    print(f"{'parser':<10}{current:>8.2f} s CPU   ({legacy / current:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""TokenManager.verify throughput with the in-memory revocation mirror.
+
+Compares verifies per second for:
+
+  - ``mirror``      — default: HMAC + dict lookups, generation checked once a second
+  - ``sync=0``      — ``SALMALM_REVOCATION_SYNC=0``: one generation read per verify
+  - ``sql lookups`` — the previous behaviour: two SQLite queries per verify
+
+Usage:
+  python scripts/bench_token_verify.py [--seconds 2] [--revoked 10000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+os.environ.setdefault("SALMALM_HOME", tempfile.mkdtemp(prefix="salmalm-bench-"))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from salmalm.db import get_connection  # noqa: E402
+from salmalm.web import token_manager as tm_mod  # noqa: E402
+from salmalm.web.token_manager import TokenManager  # noqa: E402
+
+
+def _sql_is_revoked(jti: str) -> bool:
+    conn = get_connection(tm_mod.AUTH_DB)
+    row = conn.execute("SELECT 1 FROM revoked_tokens WHERE jti=?", (jti,)).fetchone()
+    conn.close()
+    return row is not None
+
+
+def _sql_is_user_revoked(user_id: int, token_iat: int) -> bool:
+    conn = get_connection(tm_mod.AUTH_DB)
+    row = conn.execute("SELECT revoked_after FROM user_revocations WHERE user_id=?", (user_id,)).fetchone()
+    conn.close()
+    return row is not None
+
+
+def _rate(tm: TokenManager, token: str, seconds: float) -> float:
+    n, t0 = 0, time.perf_counter()
+    while time.perf_counter() - t0 < seconds:
+        for _ in range(100):
+            assert tm.verify(token) is not None
+        n += 100
+    return n / (time.perf_counter() - t0)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--seconds", type=float, default=2.0)
+    ap.add_argument("--revoked", type=int, default=10000, help="revoked jtis preloaded into the table")
+    args = ap.parse_args()
+
+    tm = TokenManager(secret=b"x" * 32)
+    conn = get_connection(tm_mod.AUTH_DB)
+    exp = time.time() + 3600
+    conn.executemany(
+        "INSERT OR IGNORE INTO revoked_tokens VALUES (?, ?, ?)",
+        ((f"bench-{i}", time.time(), exp) for i in range(args.revoked)),
+    )
+    conn.execute("UPDATE revocation_generation SET generation = generation + 1")
+    conn.commit()
+    conn.close()
+    token = tm.create({"uid": 1, "usr": "bench", "role": "user"})
+
+    results = {"mirror": _rate(tm, token, args.seconds)}
+    tm_mod._SYNC_INTERVAL = 0.0
+    results["sync=0"] = _rate(tm, token, args.seconds)
+    tm._is_revoked, tm._is_user_revoked = _sql_is_revoked, _sql_is_user_revoked
+    results["sql lookups"] = _rate(tm, token, args.seconds)
+
+    base = results["sql lookups"]
+    print(f"{'mode':<14}{'verifies/s':>12}{'vs sql':>9}")
+    for mode, rate in results.items():
+        print(f"{mode:<14}{rate:>12,.0f}{rate / base:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""SSE bridge between sync chat handlers and the ASGI event loop (salmalm.web.asgi)."""
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from salmalm.web.asgi import _SSEChannel, _handle_sse_stream  # noqa: E402
+
+
+class _FakeHandler:
+    """Just what _handle_sse_stream touches on a FastHandler."""
+
+    def __init__(self, produce, session="sse-test"):
+        self.wfile = _SSEChannel()
+        self._body = {"session": session}
+        self._produce = produce
+
+    def _post_api_chat(self):
+        self._produce(self.wfile)
+
+
+class TestSSEChannel:
+    def test_writes_are_coalesced_into_batches(self):
+        async def main():
+            ch = _SSEChannel()
+            ch.bind(asyncio.get_running_loop())
+
+            def produce():
+                for i in range(200):
+                    ch.write(b"data: %d\n\n" % i)
+                ch.close()
+
+            threading.Thread(target=produce).start()
+            batches = []
+            while (batch := await ch.get()) is not None:
+                batches.append(batch)
+            return batches
+
+        batches = asyncio.run(main())
+        assert b"".join(batches) == b"".join(b"data: %d\n\n" % i for i in range(200))
+        assert len(batches) < 200
+
+    def test_full_buffer_blocks_producer_until_read(self):
+        async def main():
+            ch = _SSEChannel(max_buffer=10)
+            ch.bind(asyncio.get_running_loop())
+            done = threading.Event()
+
+            def produce():
+                ch.write(b"x" * 10)
+                ch.write(b"y")  # blocks: buffer is full
+                done.set()
+                ch.close()
+
+            threading.Thread(target=produce).start()
+            await asyncio.sleep(0.1)
+            assert not done.is_set()
+            assert await ch.get() == b"x" * 10
+            assert await ch.get() == b"y"
+            assert await ch.get() is None
+
+        asyncio.run(main())
+
+    def test_disconnect_fails_blocked_and_later_writes(self):
+        async def main():
+            ch = _SSEChannel(max_buffer=1)
+            ch.bind(asyncio.get_running_loop())
+            errors = []
+
+            def produce():
+                ch.write(b"a")
+                try:
+                    ch.write(b"b")
+                except BrokenPipeError as e:
+                    errors.append(e)
+
+            t = threading.Thread(target=produce)
+            t.start()
+            await asyncio.sleep(0.05)
+            ch.disconnect()
+            await asyncio.to_thread(t.join, 2)
+            with pytest.raises(BrokenPipeError):
+                ch.write(b"c")
+            return errors
+
+        assert len(asyncio.run(main())) == 1
+
+    def test_unbound_channel_buffers_for_getvalue(self):
+        ch = _SSEChannel()
+        ch.write(b"self.addEventListener")
+        ch.write(b"(...)")
+        assert ch.getvalue() == b"self.addEventListener(...)"
+        assert ch.getvalue() == b""
+
+
+class TestHandleSSEStream:
+    def test_stream_yields_handler_output(self):
+        def produce(wfile):
+            for i in range(3):
+                wfile.write(b"event: chunk\ndata: %d\n\n" % i)
+
+        async def main():
+            resp = await _handle_sse_stream(_FakeHandler(produce))
+            return b"".join([chunk async for chunk in resp.body_iterator])
+
+        body = asyncio.run(main())
+        assert body == b"".join(b"event: chunk\ndata: %d\n\n" % i for i in range(3))
+
+    def test_client_disconnect_stops_producer_and_aborts_session(self):
+        from salmalm.features.abort import abort_controller
+
+        stopped = threading.Event()
+
+        def produce(wfile):
+            try:
+                while True:
+                    wfile.write(b"data: tok\n\n")
+                    time.sleep(0.005)
+            except BrokenPipeError:
+                stopped.set()
+
+        async def main():
+            resp = await _handle_sse_stream(_FakeHandler(produce, session="sse-disc"))
+            it = resp.body_iterator
+            await it.__anext__()
+            await it.aclose()  # what the server does when the client goes away
+
+        abort_controller.clear("sse-disc")
+        asyncio.run(main())
+        assert stopped.wait(2)
+        assert abort_controller.is_aborted("sse-disc")
+        abort_controller.clear("sse-disc")
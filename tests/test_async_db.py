@@ -0,0 +1,173 @@
+"""Async DB facade (salmalm.db.aio) and the event-loop lag monitor."""
+
+import asyncio
+import sqlite3
+import threading
+import time
+from unittest import mock
+
+import pytest
+
+from salmalm.core import core as _core
+from salmalm.db.aio import AsyncDB, audit_db
+from salmalm.monitoring.loop_lag import LoopLagMonitor
+
+
+@pytest.fixture
+def adb(tmp_path):
+    db = AsyncDB.for_path(tmp_path / "t.db", readers=2, name="test-db")
+    yield db
+    db.close()
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+class TestAsyncDB:
+    def test_read_write_roundtrip(self, adb):
+        async def go():
+            await adb.execute("CREATE TABLE t (k TEXT PRIMARY KEY, v INTEGER)")
+            assert await adb.executemany("INSERT INTO t VALUES (?, ?)", [("a", 1), ("b", 2)]) == 2
+            assert await adb.execute("UPDATE t SET v=v+10 WHERE k=?", ("a",)) == 1
+            rows = await adb.fetchall("SELECT k, v FROM t ORDER BY k")
+            one = await adb.fetchone("SELECT v FROM t WHERE k=?", ("b",))
+            missing = await adb.fetchone("SELECT v FROM t WHERE k=?", ("z",))
+            return [tuple(r) for r in rows], one[0], missing
+
+        assert _run(go()) == ([("a", 11), ("b", 2)], 2, None)
+
+    def test_writes_run_on_one_thread_in_order(self, adb):
+        seen = []
+
+        def insert(conn, i):
+            seen.append(threading.get_ident())
+            conn.execute("INSERT INTO t VALUES (?)", (i,))
+
+        async def go():
+            await adb.execute("CREATE TABLE t (i INTEGER)")
+            await asyncio.gather(*(adb.write(insert, i) for i in range(20)))
+            return await adb.fetchall("SELECT i FROM t ORDER BY rowid")
+
+        rows = _run(go())
+        assert [r[0] for r in rows] == list(range(20))
+        assert len(set(seen)) == 1 and seen[0] != threading.get_ident()
+
+    def test_failed_write_rolls_back(self, adb):
+        def half(conn):
+            conn.execute("INSERT INTO t VALUES (1)")
+            raise ValueError("boom")
+
+        async def go():
+            await adb.execute("CREATE TABLE t (i INTEGER)")
+            with pytest.raises(ValueError):
+                await adb.write(half)
+            return await adb.fetchall("SELECT i FROM t")
+
+        assert _run(go()) == []
+
+    def test_errors_reach_the_caller(self, adb):
+        with pytest.raises(sqlite3.OperationalError):
+            _run(adb.fetchall("SELECT * FROM nope"))
+
+    def test_slow_read_does_not_stall_loop(self, adb):
+        monitor = LoopLagMonitor(interval=0.01)
+
+        def slow(conn):
+            time.sleep(0.3)
+            return conn.execute("SELECT 1").fetchone()[0]
+
+        async def go():
+            monitor.start()
+            await asyncio.sleep(0.02)
+            result = await asyncio.gather(adb.read(slow), adb.read(slow))
+            monitor.stop()
+            return result
+
+        assert _run(go()) == [1, 1]
+        assert monitor.samples > 10
+        assert monitor.max < 0.1
+
+    def test_monitor_sees_blocking_call(self):
+        monitor = LoopLagMonitor(interval=0.01)
+
+        async def go():
+            monitor.start()
+            await asyncio.sleep(0.02)
+            time.sleep(0.2)  # blocking call on the loop
+            await asyncio.sleep(0.02)
+            monitor.stop()
+
+        _run(go())
+        assert monitor.max >= 0.15
+
+
+class TestGroupCommit:
+    def _blocked(self, adb):
+        """Hold the writer on one job so the next submits queue up behind it."""
+        gate = threading.Event()
+        adb.submit(lambda conn: conn.execute("CREATE TABLE t (i INTEGER)")).result()
+        first = adb.submit(lambda conn: gate.wait(5))
+        return gate, first
+
+    def test_queued_writes_share_one_commit(self, adb):
+        gate, first = self._blocked(adb)
+        commits = adb.write_stats()["commits"]
+        futs = [adb.submit(lambda conn, i=i: conn.execute("INSERT INTO t VALUES (?)", (i,)).rowcount) for i in range(10)]
+        gate.set()
+        assert [f.result(5) for f in futs] == [1] * 10
+        first.result(5)
+        stats = adb.write_stats()
+        assert stats["commits"] - commits <= 2
+        assert stats["p99"] > 0
+
+    def test_failed_job_rolls_back_alone(self, adb):
+        gate, _first = self._blocked(adb)
+
+        def bad(conn):
+            conn.execute("INSERT INTO t VALUES (99)")
+            raise ValueError("boom")
+
+        ok1 = adb.submit(lambda conn: conn.execute("INSERT INTO t VALUES (1)"))
+        failed = adb.submit(bad)
+        ok2 = adb.submit(lambda conn: conn.execute("INSERT INTO t VALUES (2)"))
+        gate.set()
+        ok1.result(5), ok2.result(5)
+        with pytest.raises(ValueError):
+            failed.result(5)
+        rows = _run(adb.fetchall("SELECT i FROM t ORDER BY i"))
+        assert [r[0] for r in rows] == [1, 2]
+
+    def test_nested_submit_runs_inline(self, adb):
+        def outer(conn):
+            conn.execute("CREATE TABLE n (i INTEGER)")
+            return adb.submit(lambda c: c.execute("INSERT INTO n VALUES (1)").rowcount).result(1)
+
+        assert adb.submit(outer).result(5) == 1
+
+    def test_metrics_exported(self, adb):
+        from salmalm.monitoring.metrics import metrics
+
+        adb.submit(lambda conn: conn.execute("SELECT 1")).result(5)
+        text = metrics.render_text()
+        assert 'salmalm_db_write_latency_p99_seconds{db="test-db"}' in text
+        assert "salmalm_db_lock_wait_seconds_bucket" in text
+
+
+class TestAuditDB:
+    def test_session_routes_use_facade(self, tmp_path):
+        from salmalm.web.routes import web_sessions
+
+        with mock.patch.object(_core, "AUDIT_DB", tmp_path / "audit.db"):
+            async def go():
+                await audit_db.execute(
+                    "INSERT INTO session_store (session_id, messages, updated_at, title) VALUES (?,?,?,?)",
+                    ("adb-1", '[{"role": "user", "content": "hi"}]', "2024-01-01", "t"),
+                )
+                listed = await web_sessions.get_sessions(limit=None, before=None, since=None, _u={"id": 0})
+                msgs = await web_sessions.get_session_messages("adb-1", _u={"id": 0})
+                return listed.body, msgs.body
+
+            listed, msgs = _run(go())
+        assert b'"adb-1"' in listed
+        assert b'"hi"' in msgs
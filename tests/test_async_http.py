@@ -182,6 +182,29 @@ class TestAsyncHTTPClientRequestBuild(unittest.TestCase):
         self.assertEqual(captured['host'], 'example.com')
         self.assertEqual(captured['port'], 8080)
 
+    def test_host_header_keeps_port_and_ipv6_brackets(self):
+        writers = []
+
+        async def fake_open_connection(host, port, **kw):
+            writers.append((host, port, _FakeWriter()))
+            return _FakeReader(b'HTTP/1.1 204 No Content\r\n\r\n'), writers[-1][2]
+
+        client = AsyncHTTPClient(keep_alive=False)
+
+        async def run():
+            orig = asyncio.open_connection
+            asyncio.open_connection = fake_open_connection
+            try:
+                await client.get('http://example.com:8080/x', timeout=5)
+                await client.get('http://user:pw@[::1]:9000/x', timeout=5)
+            finally:
+                asyncio.open_connection = orig
+
+        _run(run())
+        self.assertIn(b'Host: example.com:8080\r\n', writers[0][2].data)
+        self.assertEqual(writers[1][:2], ('::1', 9000))
+        self.assertIn(b'Host: [::1]:9000\r\n', writers[1][2].data)
+
     def test_post_json_content_type(self):
         """post_json sets Content-Type header."""
         sent_data = {}
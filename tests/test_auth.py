@@ -5,6 +5,7 @@ import os
 import tempfile
 import time
 import unittest
+import unittest.mock
 from pathlib import Path
 
 _test_dir = tempfile.mkdtemp()
@@ -61,6 +62,74 @@ class TestTokenManager(unittest.TestCase):
         self.assertIsNone(self.tm.verify('singlestring'))
 
 
+class TestRevocationMirror(unittest.TestCase):
+
+    def setUp(self):
+        import salmalm.web.token_manager as tm_mod
+        self.tm_mod = tm_mod
+        self._patch = unittest.mock.patch.object(tm_mod, 'AUTH_DB', Path(tempfile.mkdtemp()) / 'rev.db')
+        self._patch.start()
+        self.tm = TokenManager(secret=b'test_secret_32bytes_padding_here')
+
+    def tearDown(self):
+        self._patch.stop()
+
+    def test_revoke_is_visible_without_db(self):
+        token = self.tm.create({'user': 'alice'})
+        self.assertTrue(self.tm.revoke(token))
+        with unittest.mock.patch.object(self.tm_mod, 'get_connection', side_effect=AssertionError('DB hit')):
+            self.assertIsNone(self.tm.verify(token))
+            self.assertIsNotNone(self.tm.verify(self.tm.create({'user': 'alice'})))
+
+    def test_revoke_all_for_user(self):
+        old = self.tm.create({'uid': 7}, expires_in=60)
+        self.tm.revoke_all_for_user(7)
+        self.assertIsNone(self.tm.verify(old))
+        other = self.tm.create({'uid': 8}, expires_in=60)
+        self.assertIsNotNone(self.tm.verify(other))
+
+    def test_other_process_revocation_is_picked_up(self):
+        token = self.tm.create({'user': 'bob'})
+        other = TokenManager(secret=b'test_secret_32bytes_padding_here')
+        self.tm_mod._revocations.clear()  # simulate a separate process: no shared memory
+        self.assertIsNotNone(self.tm.verify(token))
+        other.revoke(token)
+        self.tm_mod._revocations.clear()
+        rev = self.tm._revocations_for()
+        self.tm._sync(rev)
+        self.assertIsNone(self.tm.verify(token))
+        self.assertGreater(rev.generation, 0)
+
+    def test_stale_mirror_reloads_on_generation_change(self):
+        token = self.tm.create({'user': 'carol'})
+        rev = self.tm._revocations_for()
+        from salmalm.db import get_connection
+        conn = get_connection(self.tm_mod.AUTH_DB)
+        conn.execute("INSERT INTO revoked_tokens VALUES (?, ?, ?)",
+                     (self.tm.verify(token)['jti'], time.time(), time.time() + 60))
+        conn.execute("UPDATE revocation_generation SET generation = generation + 1")
+        conn.commit()
+        conn.close()
+        self.assertIsNotNone(self.tm.verify(token))  # within the sync interval
+        rev.checked_at = 0.0
+        self.assertIsNone(self.tm.verify(token))
+
+    def test_sync_skips_when_refreshed_while_waiting(self):
+        rev = self.tm._revocations_for()
+        rev.checked_at = time.monotonic()  # another thread synced while this one waited on rev.lock
+        with unittest.mock.patch.object(self.tm_mod, 'get_connection', side_effect=AssertionError('DB hit')):
+            self.tm._sync(rev)
+        with unittest.mock.patch.object(self.tm_mod, 'get_connection', wraps=self.tm_mod.get_connection) as conn:
+            self.tm._sync(rev, force=True)
+        conn.assert_called_once()
+
+    def test_cleanup_prunes_memory(self):
+        rev = self.tm._revocations_for()
+        rev.jtis['gone'] = time.time() - 10
+        self.tm.cleanup_expired()
+        self.assertNotIn('gone', rev.jtis)
+
+
 class TestRateLimiter(unittest.TestCase):
 
     def setUp(self):
@@ -69,7 +69,7 @@ class TestLLMInternals(unittest.TestCase):
         from salmalm.core.llm import track_usage
         track_usage('test/model2', 0, 0)
 
-    @patch('salmalm.core.llm.common.urllib.request.urlopen')
+    @patch('salmalm.utils.http_pool.urlopen')
     def test_call_anthropic_mock(self, mock_urlopen):
         from salmalm.core.llm import call_llm
         mock_resp = MagicMock()
@@ -90,7 +90,7 @@ class TestLLMInternals(unittest.TestCase):
         finally:
             loop.close()
 
-    @patch('salmalm.core.llm.common.urllib.request.urlopen')
+    @patch('salmalm.utils.http_pool.urlopen')
     def test_call_google_mock(self, mock_urlopen):
         from salmalm.core.llm import call_llm
         mock_resp = MagicMock()
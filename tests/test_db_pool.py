@@ -0,0 +1,94 @@
+"""Pooled SQLite connections (salmalm.db.connection)."""
+
+import os
+import threading
+from unittest import mock
+
+import pytest
+
+from salmalm.db import connection
+from salmalm.db.connection import db_conn, get_connection, get_pool
+
+
+@pytest.fixture
+def path(tmp_path):
+    p = tmp_path / "pool.db"
+    with db_conn(p) as conn:
+        conn.execute("CREATE TABLE t (i INTEGER)")
+    return p
+
+
+class TestPool:
+    def test_close_returns_connection_for_reuse(self, path):
+        a = get_connection(path)
+        a.close()
+        b = get_connection(path)
+        assert b is a
+        assert b.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        b.close()
+        assert get_pool(path).reused >= 1
+
+    def test_nested_checkouts_are_distinct(self, path):
+        a = get_connection(path)
+        b = get_connection(path)
+        assert a is not b
+        a.close()
+        b.close()
+
+    def test_close_rolls_back_uncommitted(self, path):
+        conn = get_connection(path)
+        conn.execute("INSERT INTO t VALUES (1)")
+        conn.close()
+        conn = get_connection(path)
+        assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+        conn.close()
+
+    def test_double_close_is_harmless(self, path):
+        conn = get_connection(path)
+        conn.close()
+        conn.close()
+        a, b = get_connection(path), get_connection(path)
+        assert a is not b
+        a.close()
+        b.close()
+
+    def test_replaced_file_reopens(self, path):
+        conn = get_connection(path)
+        conn.close()
+        os.remove(path)
+        fresh = get_connection(path)
+        assert fresh is not conn
+        fresh.execute("CREATE TABLE u (i INTEGER)")
+        fresh.commit()
+        fresh.close()
+        assert get_pool(path).replaced >= 1
+
+    def test_threads_get_their_own_connections(self, path):
+        main = get_connection(path)
+        main.close()
+        seen = []
+
+        def worker():
+            c = get_connection(path)
+            seen.append(c)
+            c.close()
+
+        t = threading.Thread(target=worker)
+        t.start()
+        t.join()
+        assert seen[0] is not main
+
+    def test_idle_list_is_bounded(self, path):
+        conns = [get_connection(path) for _ in range(connection._MAX_IDLE + 2)]
+        for c in conns:
+            c.close()
+        assert len(get_pool(path)._idle()) == connection._MAX_IDLE
+
+    def test_memory_and_disabled_are_not_pooled(self, path):
+        mem = get_connection(":memory:")
+        assert not isinstance(mem, connection.PooledConnection)
+        mem.close()
+        with mock.patch.object(connection, "_POOL_ENABLED", False):
+            a = get_connection(path)
+            assert not isinstance(a, connection.PooledConnection)
+            a.close()
@@ -48,7 +48,7 @@ def test_check_config_integrity():
 def test_run_all():
     d = Doctor()
     results = d.run_all()
-    assert len(results) == 11
+    assert len(results) == 12
     assert all('status' in r for r in results)
 
 
@@ -69,3 +69,12 @@ def test_format_report():
 def test_singleton():
     assert doctor is not None
     assert isinstance(doctor, Doctor)
+
+
+def test_session_startup_reports_boot_restore(monkeypatch):
+    from salmalm.core import session_store
+    stats = {"sessions": 3, "bytes": 2_000_000, "scan_seconds": 0.002, "seconds": 0.0125, "at": 0}
+    monkeypatch.setattr(session_store, "_restore_stats", stats)
+    result = Doctor().check_session_startup()
+    assert result['status'] == 'ok'
+    assert '3 files (2.0 MB) in 12.5 ms at startup (scan 2.0 ms)' in result['message']
@@ -197,7 +197,7 @@ class TestGeminiStreamGoogle(unittest.TestCase):
 
     @patch('salmalm.core.llm_stream.check_cost_cap')
     @patch('salmalm.core.llm_stream.vault')
-    @patch('urllib.request.urlopen')
+    @patch('salmalm.utils.http_pool.urlopen')
     @patch('salmalm.core.llm_stream._lazy_track_usage')
     def test_stream_success(self, mock_track, mock_urlopen, mock_vault, mock_cap):
         from salmalm.core.llm import stream_google
@@ -0,0 +1,161 @@
+"""Keep-alive provider connection pool (salmalm.utils.http_pool) against a local stub server."""
+from __future__ import annotations
+
+import json
+import threading
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from salmalm.utils.http_pool import HTTPSPool
+
+
+class _Stub:
+    """JSON, chunked-SSE and error endpoints; records the client port of each request."""
+
+    def __init__(self):
+        self.peers = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                stub.peers.append(self.client_address[1])
+                if self.path == "/sse":
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/event-stream")
+                    self.send_header("Transfer-Encoding", "chunked")
+                    self.end_headers()
+                    for i in range(3):
+                        self._chunk(f"data: {{\"i\": {i}}}\n\n".encode())
+                    self._chunk(b"data: [DONE]\n\n")
+                    self.wfile.write(b"0\r\n\r\n")
+                    return
+                status = 429 if self.path == "/err" else 200
+                raw = json.dumps({"path": self.path}).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(raw)))
+                self.end_headers()
+                self.wfile.write(raw)
+                if self.path == "/drop":
+                    self.close_connection = True  # closes without a Connection: close header
+
+            def _chunk(self, data: bytes):
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub():
+    s = _Stub()
+    yield s
+    s.close()
+
+
+def _post(pool, url, **kw):
+    req = urllib.request.Request(url, data=b"{}", headers={"Content-Type": "application/json"}, method="POST")
+    return pool.urlopen(req, **kw)
+
+
+class TestHTTPSPool:
+    def test_sequential_requests_share_one_connection(self, stub):
+        pool = HTTPSPool("test")
+        for _ in range(5):
+            with _post(pool, stub.url + "/json") as resp:
+                assert json.loads(resp.read()) == {"path": "/json"}
+        assert len(set(stub.peers)) == 1
+        assert pool.stats()["opened"] == 1
+        assert pool.stats()["reused"] == 4
+        pool.close()
+
+    def test_stream_read_to_done_is_reused(self, stub):
+        pool = HTTPSPool("test")
+        with _post(pool, stub.url + "/sse") as resp:
+            for line in resp:
+                if line.startswith(b"data: [DONE]"):
+                    break  # the tail is drained on close
+        with _post(pool, stub.url + "/json") as resp:
+            resp.read()
+        assert len(set(stub.peers)) == 1
+        pool.close()
+
+    def test_abandoned_stream_is_not_reused(self, stub):
+        pool = HTTPSPool("test")
+        with pytest.raises(RuntimeError):
+            with _post(pool, stub.url + "/sse") as resp:
+                resp.readline()
+                raise RuntimeError("client went away")
+        with _post(pool, stub.url + "/json") as resp:
+            resp.read()
+        assert len(set(stub.peers)) == 2
+        assert pool.stats()["idle"] == 1
+        pool.close()
+
+    def test_http_error_matches_urlopen(self, stub):
+        pool = HTTPSPool("test")
+        with pytest.raises(urllib.error.HTTPError) as exc:
+            _post(pool, stub.url + "/err")
+        assert exc.value.code == 429
+        assert json.loads(exc.value.read()) == {"path": "/err"}
+        with _post(pool, stub.url + "/json") as resp:
+            resp.read()
+        assert len(set(stub.peers)) == 1  # error body was read, connection kept
+        pool.close()
+
+    def test_idle_connections_are_evicted(self, stub):
+        pool = HTTPSPool("test", idle_timeout=0)
+        for _ in range(2):
+            with _post(pool, stub.url + "/json") as resp:
+                resp.read()
+        assert len(set(stub.peers)) == 2
+        assert pool.stats()["evicted"] == 1
+        pool.close()
+
+    def test_server_closed_connection_is_retried(self, stub):
+        pool = HTTPSPool("test")
+        with _post(pool, stub.url + "/drop") as resp:
+            resp.read()
+        with _post(pool, stub.url + "/json") as resp:
+            assert json.loads(resp.read()) == {"path": "/json"}
+        assert pool.stats()["opened"] == 2
+        pool.close()
+
+    def test_max_per_host_bounds_kept_connections(self, stub):
+        pool = HTTPSPool("test", max_per_host=1)
+        a = _post(pool, stub.url + "/json")
+        b = _post(pool, stub.url + "/json")  # over the limit: one-off connection
+        a.read()
+        b.read()
+        assert pool.stats()["idle"] == 1
+        with _post(pool, stub.url + "/json") as resp:
+            resp.read()
+        assert pool.stats()["reused"] == 1
+        pool.close()
+
+    def test_metrics_exported(self, stub):
+        from salmalm.monitoring.metrics import metrics
+
+        pool = HTTPSPool("test-metrics")
+        for _ in range(2):
+            with _post(pool, stub.url + "/json") as resp:
+                resp.read()
+        text = metrics.render_text()
+        assert 'salmalm_http_pool_reuse_ratio{pool="test-metrics"} 0.5' in text
+        assert 'salmalm_http_connect_seconds_count{pool="test-metrics"' in text
+        pool.close()
@@ -0,0 +1,232 @@
+"""llm_stream: async provider streaming against a local chunked-SSE stub, and the SSE parser."""
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import pytest
+
+from salmalm.core import llm_stream
+from salmalm.utils.async_http import AsyncHTTPClient
+
+_OPENAI = [
+    {"choices": [{"delta": {"content": "Hel"}}]},
+    {"choices": [{"delta": {"content": "lo 안녕"}}]},
+    {"choices": [{"delta": {"tool_calls": [{"index": 0, "id": "call_1", "function": {"name": "web_search"}}]}}]},
+    {"choices": [{"delta": {"tool_calls": [{"index": 0, "function": {"arguments": '{"q": "x"}'}}]}}]},
+    {"choices": [{"delta": {}, "finish_reason": "tool_calls"}], "usage": {"prompt_tokens": 7, "completion_tokens": 3}},
+]
+_ANTHROPIC = [
+    {"type": "message_start", "message": {"usage": {"input_tokens": 11}}},
+    {"type": "content_block_delta", "delta": {"type": "text_delta", "text": "Hi"}},
+    {"type": "content_block_delta", "delta": {"type": "text_delta", "text": " there"}},
+    {"type": "content_block_start", "content_block": {"type": "tool_use", "id": "tu_1", "name": "exec"}},
+    {"type": "content_block_delta", "delta": {"type": "input_json_delta", "partial_json": '{"cmd": "ls"}'}},
+    {"type": "content_block_stop"},
+    {"type": "message_delta", "usage": {"output_tokens": 5}},
+]
+_GOOGLE = [
+    {"candidates": [{"content": {"parts": [{"text": "Good"}]}}]},
+    {"candidates": [{"content": {"parts": [{"text": " day"}]}}],
+     "usageMetadata": {"promptTokenCount": 4, "candidatesTokenCount": 2}},
+]
+
+
+class _Stub:
+    """Provider-shaped SSE endpoints, written in small chunks split mid-line."""
+
+    def __init__(self):
+        self.peers = []
+        self.disconnected = threading.Event()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                stub.peers.append(self.client_address[1])
+                if self.path == "/err":
+                    raw = b'{"error": "rate limited"}'
+                    self.send_response(429)
+                    self.send_header("Content-Length", str(len(raw)))
+                    self.end_headers()
+                    self.wfile.write(raw)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                if self.path == "/slow":
+                    self._slow()
+                    return
+                events = {"/openai": _OPENAI, "/anthropic": _ANTHROPIC, "/google": _GOOGLE}[self.path]
+                body = "".join(f"data: {json.dumps(e, ensure_ascii=False)}\n\n" for e in events)
+                if self.path == "/openai":
+                    body += "data: [DONE]\n\n"
+                raw = body.encode()
+                for i in range(0, len(raw), 7):  # splits lines and multibyte characters
+                    self._chunk(raw[i:i + 7])
+                self.wfile.write(b"0\r\n\r\n")
+
+            def _slow(self):
+                try:
+                    self._chunk(b'data: {"choices": [{"delta": {"content": "first"}}]}\n\n')
+                    deadline = time.time() + 5
+                    while time.time() < deadline:
+                        time.sleep(0.05)
+                        self._chunk(b": ping\n\n")
+                except OSError:
+                    stub.disconnected.set()
+
+            def _chunk(self, data: bytes):
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub():
+    s = _Stub()
+    paths = {"openai": "/openai", "anthropic": "/anthropic", "google": "/google"}
+    orig_apost, orig_urlopen = llm_stream._apost, llm_stream._urlopen
+
+    def _route(req):
+        return req._replace(url=s.url + s.path_override.get(req.provider, paths.get(req.provider, "/openai")))
+
+    s.path_override = {}
+    with patch.object(llm_stream, "_aclient", AsyncHTTPClient()), \
+            patch.object(llm_stream, "_apost", lambda req: orig_apost(_route(req))), \
+            patch.object(llm_stream, "_urlopen", lambda req: orig_urlopen(_route(req))), \
+            patch.object(llm_stream, "vault") as vault, \
+            patch.object(llm_stream, "check_cost_cap"), \
+            patch.object(llm_stream, "_lazy_track_usage"):
+        vault.get.return_value = "test-key"
+        yield s
+    s.close()
+
+
+_MSGS = [{"role": "user", "content": "hi"}]
+
+
+async def _collect(agen):
+    return [e async for e in agen]
+
+
+class TestAsyncStreams:
+    def test_openai_matches_sync_stream(self, stub):
+        events = asyncio.run(_collect(llm_stream.astream_openai(_MSGS, model="openai/gpt-4o")))
+        assert events == list(llm_stream.stream_openai(_MSGS, model="openai/gpt-4o"))
+        end = events[-1]
+        assert end["type"] == "message_end"
+        assert end["content"] == "Hello 안녕"
+        assert end["tool_calls"] == [{"id": "call_1", "name": "web_search", "arguments": {"q": "x"}}]
+        assert end["usage"] == {"input": 7, "output": 3}
+
+    def test_anthropic_matches_sync_stream(self, stub):
+        model = "anthropic/claude-sonnet-4-20250514"
+        events = asyncio.run(_collect(llm_stream.astream_anthropic(_MSGS, model=model)))
+        assert events == list(llm_stream.stream_anthropic(_MSGS, model=model))
+        assert [e["text"] for e in events if e["type"] == "text_delta"] == ["Hi", " there"]
+        end = events[-1]
+        assert end["tool_calls"] == [{"id": "tu_1", "name": "exec", "arguments": {"cmd": "ls"}}]
+        assert end["usage"]["input"] == 11 and end["usage"]["output"] == 5
+
+    def test_google_events(self, stub):
+        events = asyncio.run(_collect(llm_stream.astream_google(_MSGS, model="google/gemini-2.5-flash")))
+        assert [e["text"] for e in events if e["type"] == "text_delta"] == ["Good", " day"]
+        assert events[-1]["content"] == "Good day"
+        assert events[-1]["usage"] == {"input": 4, "output": 2}
+
+    def test_connection_reused_across_streams(self, stub):
+        async def main():
+            for _ in range(3):
+                await _collect(llm_stream.astream_openai(_MSGS, model="openai/gpt-4o"))
+
+        asyncio.run(main())
+        assert len(stub.peers) == 3
+        assert len(set(stub.peers)) == 1
+
+    def test_proxied_request_uses_sync_transport(self, stub):
+        async def no_direct(req):
+            raise AssertionError("direct connection while a proxy is configured")
+
+        with patch.object(llm_stream.http_pool, "_via_proxy", return_value=True), \
+                patch.object(llm_stream, "_apost", no_direct):
+            events = asyncio.run(_collect(llm_stream.astream_openai(_MSGS, model="openai/gpt-4o")))
+        assert events == list(llm_stream.stream_openai(_MSGS, model="openai/gpt-4o"))
+        assert events[-1]["content"] == "Hello 안녕"
+
+    def test_http_error_event(self, stub):
+        stub.path_override["openai"] = "/err"
+        events = asyncio.run(_collect(llm_stream.astream_openai(_MSGS, model="openai/gpt-4o")))
+        assert events == [{"type": "error", "error": '❌ openai HTTP 429: {"error": "rate limited"}'}]
+
+    def test_cancel_closes_connection(self, stub):
+        stub.path_override["openai"] = "/slow"
+        first = []
+
+        async def consume():
+            async for event in llm_stream.astream_openai(_MSGS, model="openai/gpt-4o"):
+                first.append(event)
+
+        async def main():
+            task = asyncio.create_task(consume())
+            while not first:
+                await asyncio.sleep(0.01)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(main())
+        assert first[0] == {"type": "text_delta", "text": "first"}
+        assert stub.disconnected.wait(2)
+
+
+class TestAbortCancelsCall:
+    def test_set_abort_from_other_thread_cancels_bound_task(self):
+        from salmalm.features.abort import AbortController
+
+        ctl = AbortController()
+
+        async def main():
+            task = asyncio.ensure_future(asyncio.sleep(10))
+            ctl.bind_task("s1", task)
+            threading.Thread(target=ctl.set_abort, args=("s1",)).start()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            ctl.unbind_task("s1", task)
+
+        asyncio.run(main())
+        assert ctl.is_aborted("s1")
+        assert ctl._tasks == {}
+
+
+class TestSSEParser:
+    def test_payloads_split_at_every_byte(self):
+        raw = 'event: x\r\ndata: {"t": "안녕"}\r\n\r\ndata:{"t": 2}\n: ping\ndata: [DONE]\n'.encode()
+        parser = llm_stream._SSEParser()
+        out = []
+        for i in range(len(raw)):
+            out += parser.feed(raw[i:i + 1])
+        assert out == ['{"t": "안녕"}', '{"t": 2}', "[DONE]"]
+
+    def test_unterminated_tail_is_kept(self):
+        parser = llm_stream._SSEParser()
+        assert parser.feed(b"data: a\ndata: b") == ["a"]
+        assert parser.feed(b"c\n") == ["bc"]
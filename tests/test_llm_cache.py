@@ -0,0 +1,176 @@
+"""Two-tier LLM response cache (salmalm.core.llm_cache)."""
+from __future__ import annotations
+
+import time
+from unittest.mock import patch
+
+import pytest
+
+from salmalm.core import llm_cache as rc
+from salmalm.core.llm_cache import ResponseCache
+
+_MSGS = [{"role": "system", "content": "You are helpful."}, {"role": "user", "content": "hello there"}]
+
+
+@pytest.fixture
+def db(tmp_path):
+    return tmp_path / "cache.db"
+
+
+class TestKeys:
+    def test_whitespace_and_field_order_share_an_entry(self):
+        cache = ResponseCache(ttl=60)
+        cache.put("m", _MSGS, "hi!")
+        variant = [{"content": "  You are   helpful. \n", "role": "system"}, {"role": "user", "content": "hello   there"}]
+        assert cache.get("m", variant) == "hi!"
+        assert cache.stats()["normalized_hits"] == 1
+        assert cache.get("m", _MSGS) == "hi!"
+        assert cache.stats()["normalized_hits"] == 1
+
+    def test_line_breaks_and_indentation_are_kept(self):
+        assert rc.normalize_text("  a   b \n    c\t\td  \n") == "a b\n    c d"
+        fenced = "```\nx  =  1\n```"
+        assert rc.normalize_text(fenced) == fenced
+        cache = ResponseCache(ttl=60)
+
+        def key(text):
+            return cache.key("m", [{"role": "user", "content": text}], intent="chat").key
+
+        assert key("if x:\n    y()\nz()") != key("if x:\n    y()\n    z()")
+        assert key("if x:\n    y()\nz()") != key("if x: y() z()")
+
+    def test_code_intent_is_not_whitespace_normalized(self):
+        cache = ResponseCache(ttl=60)
+
+        def key(text, intent):
+            return cache.key("m", [{"role": "user", "content": text}], intent=intent).key
+
+        assert key("a  =  1", "chat") == key("a = 1", "chat")
+        assert key("a  =  1", "code") != key("a = 1", "code")
+
+    def test_earlier_context_is_part_of_the_key(self):
+        cache = ResponseCache(ttl=60)
+        history = [{"role": "user", "content": str(i)} for i in range(6)]
+        cache.put("m", history + _MSGS, "a")
+        assert cache.get("m", [{"role": "user", "content": "x"}] + history[1:] + _MSGS) is None
+
+    def test_model_and_max_tokens_are_part_of_the_key(self):
+        cache = ResponseCache(ttl=60)
+        cache.put("m", _MSGS, "a", max_tokens=100)
+        assert cache.get("other", _MSGS, max_tokens=100) is None
+        assert cache.get("m", _MSGS, max_tokens=200) is None
+        assert cache.get("m", _MSGS, max_tokens=100) == "a"
+
+
+class TestIntentTTL:
+    def test_search_intent_is_capped(self):
+        cache = ResponseCache(ttl=3600)
+        assert cache.key("m", [{"role": "user", "content": "latest news"}]).intent == "search"
+        assert cache.ttl_for("search") == rc.INTENT_TTL["search"]
+        assert cache.ttl_for("chat") == 3600
+
+    def test_memory_intent_is_never_cached(self):
+        cache = ResponseCache(ttl=3600)
+        msgs = [{"role": "user", "content": "remember my birthday"}]
+        cache.put("m", msgs, "ok")
+        assert cache.get("m", msgs) is None
+
+    def test_default_ttl_follows_runtime_setting(self):
+        from salmalm import constants
+
+        cache = ResponseCache()
+        with patch.object(constants, "CACHE_TTL", 0):
+            cache.put("m", _MSGS, "a")
+        assert cache.get("m", _MSGS) is None
+
+
+class TestTiers:
+    def test_memory_tier_bounded_by_bytes(self):
+        cache = ResponseCache(ttl=60, max_bytes=25)
+        for c in "abc":
+            cache.put("m", [{"role": "user", "content": c}], c * 10)
+        assert cache.get("m", [{"role": "user", "content": "a"}]) is None
+        assert cache.get("m", [{"role": "user", "content": "c"}]) == "c" * 10
+        assert cache.stats()["memory"]["bytes"] == 20
+
+    def test_disk_tier_survives_restart_and_promotes(self, db):
+        ResponseCache(ttl=60, db_path=db).put("m", _MSGS, "persisted")
+        cache = ResponseCache(ttl=60, db_path=db)
+        assert cache.get("m", _MSGS) == "persisted"
+        assert cache.get("m", _MSGS) == "persisted"
+        stats = cache.stats()
+        assert stats["hits"] == {"memory": 1, "disk": 1}
+        assert stats["bytes_saved"] == 2 * len("persisted")
+
+    def test_expired_disk_entry_is_a_miss(self, db):
+        cache = ResponseCache(ttl=0.05, db_path=db)
+        cache.put("m", _MSGS, "soon gone")
+        time.sleep(0.1)
+        assert ResponseCache(ttl=60, db_path=db).get("m", _MSGS) is None
+
+    def test_disk_tier_evicts_least_recently_hit(self, db):
+        cache = ResponseCache(ttl=60, db_path=db, disk_max_bytes=250)
+        for i in range(5):
+            cache.put("m", [{"role": "user", "content": f"q{i}"}], str(i) * 100)
+        fresh = ResponseCache(ttl=60, db_path=db)
+        assert fresh.get("m", [{"role": "user", "content": "q0"}]) is None
+        assert fresh.get("m", [{"role": "user", "content": "q4"}]) == "4" * 100
+        assert cache.stats()["disk"]["bytes"] <= 250
+        assert cache.stats()["evictions"]["disk"] >= 3
+
+
+class TestAdmin:
+    def test_inspect_and_purge(self, db):
+        cache = ResponseCache(ttl=60, db_path=db)
+        cache.put("m1", _MSGS, "one")
+        cache.put("m2", _MSGS, "two")
+        entries = {e["model"]: e for e in cache.inspect()}
+        assert entries["m1"]["tier"] == "memory+disk"
+        assert entries["m2"]["preview"] == "two"
+        assert cache.purge(model="m1") == 1
+        assert ResponseCache(ttl=60, db_path=db).get("m1", _MSGS) is None
+        assert cache.get("m2", _MSGS) == "two"
+        cache.clear()
+        assert cache.stats()["disk"]["entries"] == 0
+
+    def test_admin_routes(self):
+        from salmalm.web import WebHandler
+
+        class FakeHandler(WebHandler):
+            def __init__(self, body=None):
+                self._body = body or {}
+                self.data = None
+
+            def _require_auth(self, role):
+                return True
+
+            def _json(self, data, status=200):
+                self.data = data
+
+        cache = ResponseCache(ttl=60)
+        cache.put("m", _MSGS, "x")
+        with patch("salmalm.core.response_cache", cache):
+            h = FakeHandler()
+            h._get_api_cache()
+            assert h.data["stats"]["memory"]["entries"] == 1
+            assert h.data["entries"][0]["model"] == "m"
+            h = FakeHandler({"model": "m"})
+            h._post_api_cache_purge()
+            assert h.data == {"ok": True, "removed": 1}
+
+
+class TestCallLLM:
+    def test_alias_and_sanitized_call_hits_on_repeat(self):
+        from salmalm.core.llm import common
+
+        cache = ResponseCache(ttl=60)
+        reply = {"content": "pong", "tool_calls": [], "usage": {"input": 1, "output": 1}}
+        with patch.object(common, "response_cache", cache), \
+                patch.object(common, "_resolve_api_key", return_value="k"), \
+                patch.object(common, "track_usage"), \
+                patch("salmalm.core.llm.dispatcher._call_provider", return_value=dict(reply)) as call:
+            first = common.call_llm([{"role": "user", "content": "ping"}], model="sonnet")
+            second = common.call_llm([{"role": "user", "content": "ping"}], model="sonnet")
+        assert call.call_count == 1
+        assert first["content"] == second["content"] == "pong"
+        assert second["cached"] is True
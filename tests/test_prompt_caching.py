@@ -298,7 +298,7 @@ def test_streaming_has_cache_headers():
         captured['body'] = json.loads(req.data.decode('utf-8'))
         raise Exception("stop here")
 
-    with patch('urllib.request.urlopen', fake_urlopen):
+    with patch('salmalm.utils.http_pool.urlopen', fake_urlopen):
         with patch('salmalm.core.llm_stream.vault') as mock_vault:
             mock_vault.get.return_value = 'fake-key'
             try:
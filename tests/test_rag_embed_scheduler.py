@@ -0,0 +1,185 @@
+"""Tests for the concurrent embedding scheduler against a local stub server."""
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+import pytest
+
+from salmalm.features import rag_embeddings
+from salmalm.features.rag_embeddings import (
+    EmbeddingHTTPError, EmbeddingScheduler, KeepAlivePool, _parse_retry_after, batch_embed,
+)
+
+
+class _Stub:
+    """OpenAI/Google-shaped embedding server with scripted 429s."""
+
+    def __init__(self, delay: float = 0.0, rate_limit_first: int = 0, retry_after: str = "0.05"):
+        self.delay = delay
+        self.rate_limit_first = rate_limit_first
+        self.retry_after = retry_after
+        self.requests = []
+        self.peers = set()
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with stub.lock:
+                    stub.requests.append((self.path, body))
+                    stub.peers.add(self.client_address)
+                    limited = len(stub.requests) <= stub.rate_limit_first
+                    stub.active += 1
+                    stub.max_active = max(stub.max_active, stub.active)
+                try:
+                    time.sleep(stub.delay)
+                    if limited:
+                        self._send(429, {"error": "slow down"}, {"Retry-After": stub.retry_after})
+                    elif "batchEmbedContents" in self.path:
+                        texts = [r["content"]["parts"][0]["text"] for r in body["requests"]]
+                        self._send(200, {"embeddings": [{"values": _vec(t)} for t in texts]})
+                    else:
+                        data = [{"index": i, "embedding": _vec(t)} for i, t in enumerate(body["input"])]
+                        self._send(200, {"data": list(reversed(data))})
+                finally:
+                    with stub.lock:
+                        stub.active -= 1
+
+            def _send(self, status, payload, headers=None):
+                raw = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(raw)))
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(raw)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def _vec(text: str):
+    return [float(len(text)), float(sum(map(ord, text)) % 97), 1.0]
+
+
+@pytest.fixture
+def stub():
+    s = _Stub()
+    pool = KeepAlivePool()
+    with mock.patch.object(rag_embeddings, "_http", pool):
+        yield s
+    pool.close()
+    s.close()
+
+
+def _cfg(stub, **kw):
+    return {"endpoints": {"openai": stub.url + "/v1/embeddings",
+                          "google": stub.url + "/v1/models/m:batchEmbedContents"}, **kw}
+
+
+class TestEmbeddingScheduler:
+    def test_batches_run_concurrently_on_reused_connections(self, stub):
+        stub.delay = 0.05
+        texts = [f"chunk {i}" for i in range(1000)]
+        sched = EmbeddingScheduler("openai", "k", _cfg(stub, concurrency=4, batchSize=50))
+        out = sched.embed(texts)
+        assert out == [_vec(t) for t in texts]
+        assert len(stub.requests) == 20
+        assert stub.max_active > 1
+        assert len(stub.peers) <= 4  # keep-alive: one connection per concurrent worker
+        assert rag_embeddings._http.opened <= 4
+
+    def test_batches_bounded_by_token_budget(self, stub):
+        texts = [f"{i:04d} " + "word " * 400 for i in range(10)]  # ~500 estimated tokens each
+        with mock.patch.dict(rag_embeddings._MAX_BATCH_TOKENS, {"openai": 1200}):
+            out = EmbeddingScheduler("openai", "k", _cfg(stub)).embed(texts)
+        assert out == [_vec(t) for t in texts]
+        assert len(stub.requests) == 5
+
+    def test_full_size_chunks_stay_under_openai_cap(self):
+        from salmalm.core.cost import estimate_tokens
+        from salmalm.features.rag_utils import MAX_CHUNK_CHARS
+
+        sched = EmbeddingScheduler("openai", "k")
+        texts = ["x" * MAX_CHUNK_CHARS] * 5000
+        spans = sched._spans(texts)
+        assert spans[0][0] == 0 and spans[-1][1] == len(texts)
+        assert all(sum(estimate_tokens(t) for t in texts[s:e]) <= 250_000 for s, e in spans)
+        assert all(e - s <= 2048 for s, e in spans)
+
+    def test_google_uses_batch_endpoint(self, stub):
+        texts = [f"g{i}" for i in range(250)]
+        out = EmbeddingScheduler("google", "k", _cfg(stub)).embed(texts)
+        assert out == [_vec(t) for t in texts]
+        assert len(stub.requests) == 3  # provider max = 100 per request
+
+    def test_retry_after_honoured(self, stub):
+        stub.rate_limit_first = 2
+        stub.retry_after = "0.2"
+        t0 = time.monotonic()
+        out = EmbeddingScheduler("openai", "k", _cfg(stub)).embed(["a", "b"])
+        assert out == [_vec("a"), _vec("b")]
+        assert time.monotonic() - t0 >= 0.35
+        assert len(stub.requests) == 3
+
+    def test_gives_up_after_max_retries(self, stub):
+        stub.rate_limit_first = 100
+        stub.retry_after = "0"
+        out = EmbeddingScheduler("openai", "k", _cfg(stub, maxRetries=2)).embed(["a"])
+        assert out == [None]
+        assert len(stub.requests) == 3
+
+    def test_client_error_not_retried(self):
+        def bad(texts, key, endpoint=None):
+            bad.calls += 1
+            raise EmbeddingHTTPError(400, "bad request")
+        bad.calls = 0
+        with mock.patch.dict(rag_embeddings._EMBED_FNS, {"openai": bad}):
+            assert EmbeddingScheduler("openai", "k").embed(["a"]) == [None]
+        assert bad.calls == 1
+
+    def test_parse_retry_after(self):
+        assert _parse_retry_after("3") == 3.0
+        assert _parse_retry_after(None) is None
+        assert _parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+
+class TestBatchEmbed:
+    @pytest.fixture
+    def conn(self):
+        c = sqlite3.connect(":memory:")
+        c.execute("""CREATE TABLE rag_embeddings (chunk_hash TEXT PRIMARY KEY, embedding BLOB NOT NULL,
+                     provider TEXT, dimensions INTEGER, created_at TEXT)""")
+        yield c
+        c.close()
+
+    def test_writes_cache_and_skips_cached(self, stub, conn):
+        with mock.patch.object(rag_embeddings, "_get_api_key", lambda p: "k"):
+            texts = [f"text {i}" for i in range(30)] + ["text 0"]
+            first = batch_embed(texts, "openai", conn, _cfg(stub, batchSize=10))
+            assert all(r is not None for r in first)
+            assert conn.execute("SELECT COUNT(*) FROM rag_embeddings").fetchone()[0] == 30
+            assert len(stub.requests) == 3  # the duplicate is embedded once
+            again = batch_embed(texts + ["new one"], "openai", conn, _cfg(stub, batchSize=10))
+        assert len(stub.requests) == 4
+        assert stub.requests[-1][1]["input"] == ["new one"]
+        assert again[0][1] == "openai"
@@ -0,0 +1,187 @@
+"""Tests for the parallel, resumable RAG bulk ingestion pipeline."""
+from __future__ import annotations
+
+import json
+from unittest import mock
+
+import pytest
+
+from salmalm.features.rag import RAGEngine
+from salmalm.features import rag_ingest
+from salmalm.features.rag_ingest import IngestPipeline
+
+
+def _make_engine(tmp_path, name: str, files, ingest=None) -> RAGEngine:
+    cfg_path = tmp_path / f"{name}.json"
+    cfg_path.write_text(json.dumps({"ingest": ingest or {}}))
+    e = RAGEngine(db_path=tmp_path / f"{name}.db", config_path=cfg_path)
+    e._get_indexable_files = lambda: files
+    e._get_session_files = lambda: []
+    return e
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    files = []
+    for i in range(12):
+        f = src / f"doc{i}.md"
+        f.write_text("\n".join(f"topic{i % 4} 데이터베이스 shared line {j} about item{i}" for j in range(9)))
+        files.append((f"doc{i}.md", f))
+    return files
+
+
+def _snapshot(engine: RAGEngine):
+    rows = engine._conn.execute(
+        "SELECT source, line_start, text, token_count FROM chunks ORDER BY source, line_start"
+    ).fetchall()
+    postings = engine._conn.execute(
+        "SELECT c.source, c.line_start, t.term, p.tf FROM postings p JOIN chunks c ON c.id = p.chunk_id "
+        "JOIN terms t ON t.id = p.term_id "
+        "ORDER BY 1, 2, 3"
+    ).fetchall()
+    df = dict(engine._conn.execute("SELECT term, df FROM doc_freq").fetchall())
+    return [tuple(r) for r in rows], [tuple(r) for r in postings], df
+
+
+def _assert_consistent(engine: RAGEngine):
+    from_postings = dict(engine._conn.execute(
+        "SELECT t.term, COUNT(*) FROM postings p JOIN terms t ON t.id = p.term_id GROUP BY t.term").fetchall())
+    assert dict(engine._conn.execute("SELECT term, df FROM doc_freq").fetchall()) == from_postings
+    assert engine._df == from_postings
+    assert engine._doc_count == engine._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+
+class TestIngestPipeline:
+    def test_rebuild_matches_incremental_index(self, tmp_path, corpus):
+        bulk = _make_engine(tmp_path, "bulk", corpus, {"batchChunks": 5})
+        bulk.reindex(force=True)
+        one_by_one = _make_engine(tmp_path, "single", corpus)
+        one_by_one._ensure_db()
+        for label, f in corpus:
+            one_by_one.index_file(label, f)
+        assert _snapshot(bulk) == _snapshot(one_by_one)
+        _assert_consistent(bulk)
+        assert bulk.search("topic1 item1", max_results=3)[0]["source"] == "doc1.md"
+        bulk.close()
+        one_by_one.close()
+
+    def test_process_pool_matches_inline(self, tmp_path, corpus):
+        inline = _make_engine(tmp_path, "inline", corpus, {"workers": 1})
+        inline.reindex(force=True)
+        pooled = _make_engine(tmp_path, "pooled", corpus, {"workers": 2, "parallelMinFiles": 1, "batchChunks": 7})
+        pooled.reindex(force=True)
+        assert pooled.get_stats()["ingest"]["workers"] == 2
+        assert _snapshot(pooled) == _snapshot(inline)
+        inline.close()
+        pooled.close()
+
+    def test_progress_reported(self, tmp_path, corpus):
+        e = _make_engine(tmp_path, "p", corpus)
+        assert e.get_stats()["ingest"] == {"state": "idle"}
+        e.reindex(force=True)
+        prog = e.get_stats()["ingest"]
+        assert prog["state"] == "done"
+        assert prog["files_total"] == prog["files_done"] == len(corpus)
+        assert prog["chunks"] == e._doc_count
+        e.close()
+
+    def test_resume_after_interruption(self, tmp_path, corpus):
+        e = _make_engine(tmp_path, "r", corpus, {"batchChunks": 1})
+        real_write = IngestPipeline._write_batch
+        calls = []
+
+        def flaky(self, conn, batch):
+            if len(calls) == 3:
+                raise KeyboardInterrupt
+            calls.append(1)
+            return real_write(self, conn, batch)
+
+        with mock.patch.object(IngestPipeline, "_write_batch", flaky), pytest.raises(KeyboardInterrupt):
+            e.reindex(force=True)
+        assert e.get_stats()["ingest"]["state"] == "interrupted"
+        assert e._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0] == 0
+        committed = {r[0] for r in e._conn.execute("SELECT DISTINCT source FROM ingest_chunks")}
+        assert len(committed) == 3
+
+        # One committed source changes before the restart
+        changed = sorted(committed)[0]
+        dict(corpus)[changed].write_text("rewritten content line for the resumed run\n" * 3)
+
+        with mock.patch.object(rag_ingest, "prepare_source", wraps=rag_ingest.prepare_source) as prep:
+            e.reindex(force=True)
+        assert prep.call_count == len(corpus) - 2
+        assert e.get_stats()["ingest"]["resumed"] is True
+
+        fresh = _make_engine(tmp_path, "fresh", corpus)
+        fresh.reindex(force=True)
+        assert _snapshot(e) == _snapshot(fresh)
+        _assert_consistent(e)
+        e.close()
+        fresh.close()
+
+    def test_live_index_served_until_swap(self, tmp_path, corpus):
+        e = _make_engine(tmp_path, "s", corpus, {"batchChunks": 1})
+        e.reindex(force=True)
+        before = _snapshot(e)
+        real_write = IngestPipeline._write_batch
+        seen = []
+
+        def write_and_search(self, conn, batch):
+            seen.append((e._doc_count, e.search("topic1 item1", max_results=1)[0]["source"]))
+            return real_write(self, conn, batch)
+
+        dict(corpus)["doc0.md"].write_text("brand new wording for the rebuilt index\n" * 3)
+        with mock.patch.object(IngestPipeline, "_write_batch", write_and_search):
+            e.reindex(force=True)
+        assert seen and all(s == (len(before[0]), "doc1.md") for s in seen)
+        assert _snapshot(e) != before
+        _assert_consistent(e)
+        assert not e._conn.execute("SELECT 1 FROM sqlite_master WHERE name LIKE 'ingest_%'").fetchone()
+        e.close()
+
+    def test_plain_reindex_rebuilds_only_when_empty(self, tmp_path, corpus):
+        e = _make_engine(tmp_path, "b", corpus)
+        e.reindex()
+        assert e.get_stats()["ingest"]["state"] == "done"
+        e.close()
+
+        again = _make_engine(tmp_path, "b", corpus)
+        with mock.patch.object(rag_ingest, "prepare_source") as prep:
+            again.reindex()
+        prep.assert_not_called()
+        assert again.get_stats()["ingest"] == {"state": "idle"}
+        assert set(again._mtimes) == {label for label, _ in corpus}
+        again.close()
+
+    def test_completed_run_rebuilds_from_scratch(self, tmp_path, corpus):
+        e = _make_engine(tmp_path, "c", corpus)
+        e.reindex(force=True)
+        e.reindex(force=True)
+        assert e.get_stats()["ingest"]["resumed"] is False
+        assert e.get_stats()["ingest"]["files_skipped"] == 0
+        _assert_consistent(e)
+        e.close()
+
+    def test_concurrent_reindex_is_skipped(self, tmp_path, corpus):
+        e = _make_engine(tmp_path, "l", corpus)
+        e._ensure_db()
+        with e._ingest_lock:
+            e.reindex(force=True)
+        assert e._doc_count == 0
+        e.close()
+
+    def test_failed_source_is_retried(self, tmp_path, corpus):
+        e = _make_engine(tmp_path, "r", corpus)
+        e.reindex(force=True)
+        label, f = corpus[0]
+        f.write_text("rewritten contents about zephyr\n")
+        mtime = f.stat().st_mtime
+        with mock.patch.object(e, "_index_text", side_effect=OSError("disk full")):
+            e._reindex_changed(corpus, [])
+        assert e._mtimes[label] != mtime
+        e._reindex_changed(corpus, [])
+        assert e._mtimes[label] == mtime
+        assert e._conn.execute("SELECT 1 FROM chunks WHERE source=? AND text LIKE '%zephyr%'", (label,)).fetchone()
+        e.close()
@@ -186,6 +186,24 @@ class TestHybridSearch:
         results = engine.search("alpha", max_results=3, min_score=0.0)
         assert len(results) > 0
 
+    def test_vector_search_scores_posting_candidates_only(self, engine, tmp_dir):
+        """Chunks sharing no query term are never decoded; text is read for the top-k only."""
+        (tmp_dir / "hit.md").write_text("kestrel falcon raptor\n" * 5)
+        (tmp_dir / "miss.md").write_text("teapot saucer kettle\n" * 5)
+        engine._ensure_db()
+        engine.index_file("hit.md", tmp_dir / "hit.md")
+        engine.index_file("miss.md", tmp_dir / "miss.md")
+        statements = []
+        engine._conn.set_trace_callback(statements.append)
+        try:
+            results = engine._vector_search(["kestrel", "falcon"], max_results=1)
+        finally:
+            engine._conn.set_trace_callback(None)
+        assert [r["source"] for r in results] == ["hit.md"]
+        assert results[0]["score"] > 0 and "kestrel" in results[0]["text"]
+        assert any("FROM postings" in s for s in statements)
+        assert not any("FROM chunks c JOIN tfidf_vectors" in s for s in statements)
+
 
 # ── 6. Session Indexing ──
 
@@ -280,6 +298,49 @@ class TestTokenizer:
         assert 'the' not in tokens
         assert 'is' not in tokens
 
+    def test_tokenize_matches_reference(self):
+        texts = [
+            "",
+            "a",
+            "Hello worlds, 한국어 처리 testing! ab_cd 데이터베이스를",
+            "The running dogs ate 3 apples\n\t and 사과를  먹었다.",
+            "x y z — é ñ 中文字符 ㄱㄴ 가 나다 CamelCase snake_case_word",
+            "  \n\n  trailing   spaces\t",
+        ]
+        for text in texts:
+            assert RAGEngine._tokenize(text) == _reference_tokenize(text), text
+
+    def test_jamo_table_matches_arithmetic(self):
+        import salmalm.features.rag_utils as ru
+        text = "".join(chr(c) for c in range(0xAC00, 0xD7A4)) + "abc\U0001F600한"
+        fast = ru.decompose_jamo(text)
+        with mock.patch.object(ru, "_USE_JAMO_TABLE", False):
+            assert ru.decompose_jamo(text) == fast
+
+
+def _reference_tokenize(text):
+    """Pre-memoization tokenizer, kept to pin the token stream."""
+    import re
+    from salmalm.features.rag import _STOP_WORDS
+    text_lower = text.lower()
+    unigrams = []
+    for t in re.findall(r"[\w가-힣]+", text_lower):
+        if len(t) <= 1 or t in _STOP_WORDS:
+            continue
+        if re.match(r"^[a-z]+$", t):
+            stemmed = simple_stem(t)
+            unigrams.append(stemmed)
+            if stemmed != t:
+                unigrams.append(t)
+        else:
+            unigrams.append(t)
+    bigrams = [f"{unigrams[i]}_{unigrams[i + 1]}" for i in range(len(unigrams) - 1)]
+    clean = re.sub(r"\s+", "", text_lower)
+    trigrams = [f"c3:{clean[i:i + 3]}" for i in range(len(clean) - 2)
+                if re.match(r"^[\w가-힣]{3}$", clean[i:i + 3])]
+    jamo = [f"j:{decompose_jamo(kw)}" for kw in re.findall(r"[가-힣]+", text_lower) if len(kw) >= 2]
+    return unigrams + bigrams + trigrams + jamo
+
 
 # ── 9. Build Context ──
 
@@ -318,3 +379,408 @@ class TestStats:
         stats = engine.get_stats()
         assert stats['total_chunks'] > 0
         assert stats['unique_terms'] > 0
+
+
+# ── 11. Inverted Index (postings) ──
+
+def _brute_force_bm25(engine, query_tokens):
+    from salmalm.features.rag import BM25_K1, BM25_B
+    scores = {}
+    from salmalm.features.rag_terms import unpack_ids
+    for cid, tokens, dl in engine._conn.execute("SELECT id, tokens, token_count FROM chunks"):
+        tf_map = {}
+        for tid in unpack_ids(tokens):
+            t = engine._terms.term(engine._conn, tid)
+            tf_map[t] = tf_map.get(t, 0) + 1
+        score = 0.0
+        for qt in query_tokens:
+            if qt in tf_map:
+                tf = tf_map[qt]
+                score += engine._idf(qt) * (tf * (BM25_K1 + 1)) / (
+                    tf + BM25_K1 * (1 - BM25_B + BM25_B * dl / engine._avg_dl))
+        if score > 0:
+            scores[cid] = score
+    return scores
+
+
+class TestPostingsIndex:
+    def _index_corpus(self, engine, tmp_dir):
+        f = tmp_dir / "corpus.md"
+        f.write_text("\n".join(
+            f"note {i} about {'python' if i % 3 == 0 else 'rust'} and {'database' if i % 4 == 0 else 'network'} work"
+            for i in range(60)))
+        engine._ensure_db()
+        engine.index_file("corpus.md", f)
+        return f
+
+    def test_postings_written_on_index(self, engine, tmp_dir):
+        self._index_corpus(engine, tmp_dir)
+        n = engine._conn.execute(
+            "SELECT COUNT(*) FROM postings p JOIN terms t ON t.id = p.term_id WHERE t.term='python'").fetchone()[0]
+        assert n > 0
+
+    def test_reindex_source_replaces_postings(self, engine, tmp_dir):
+        f = self._index_corpus(engine, tmp_dir)
+        f.write_text("completely different content here\n" * 6)
+        engine.index_file("corpus.md", f)
+        assert engine._conn.execute(
+            "SELECT COUNT(*) FROM postings p JOIN terms t ON t.id = p.term_id WHERE t.term='python'").fetchone()[0] == 0
+        orphans = engine._conn.execute(
+            "SELECT COUNT(*) FROM postings WHERE chunk_id NOT IN (SELECT id FROM chunks)").fetchone()[0]
+        assert orphans == 0
+
+    @pytest.mark.parametrize("max_score", [True, False])
+    def test_bm25_matches_brute_force(self, engine, tmp_dir, max_score):
+        self._index_corpus(engine, tmp_dir)
+        engine._config = dict(load_rag_config(tmp_dir / "rag.json"), bm25={"maxScore": max_score})
+        q = RAGEngine._tokenize("python database")
+        expected = _brute_force_bm25(engine, q)
+        top = sorted(expected.values(), reverse=True)[:5]
+        results = engine._bm25_search(q, 5, 0.0)
+        assert [round(r["score"], 9) for r in results] == [round(s, 9) for s in top]
+        for r in results:
+            assert abs(expected[r["chunk_id"]] - r["score"]) < 1e-9
+
+    def test_backfill_legacy_db(self, engine, tmp_dir):
+        self._index_corpus(engine, tmp_dir)
+        engine._conn.execute("DELETE FROM postings")
+        engine._conn.commit()
+        engine.close()
+        engine._ensure_db()
+        assert engine._conn.execute("SELECT COUNT(*) FROM postings").fetchone()[0] > 0
+        assert engine._bm25_search(["python"], 3, 0.0)
+
+
+# ── 12. Binary embeddings + matrix search ──
+
+def _fake_embed(texts, api_key, endpoint=None):
+    out = []
+    for t in texts:
+        h = [ord(c) for c in t.lower()]
+        out.append([float(sum(1 for c in h if c % 8 == i)) + 0.1 for i in range(8)])
+    return out
+
+
+@pytest.fixture
+def embed_engine(engine):
+    from salmalm.features import rag_embeddings
+    with mock.patch.object(rag_embeddings, "_get_api_key", lambda p: "k" if p == "openai" else None), \
+            mock.patch.dict(rag_embeddings._EMBED_FNS, {"openai": _fake_embed}):
+        yield engine
+
+
+class TestBinaryEmbeddings:
+    def test_pack_roundtrip_normalized(self):
+        from salmalm.features.rag_embeddings import pack_embedding, unpack_embedding
+        vec = unpack_embedding(pack_embedding([3.0, 4.0]))
+        assert abs(vec[0] - 0.6) < 1e-6 and abs(vec[1] - 0.8) < 1e-6
+        legacy = unpack_embedding(json.dumps([3.0, 4.0]))
+        assert list(legacy) == list(vec)
+
+    def test_embeddings_stored_as_blobs(self, embed_engine, tmp_dir):
+        f = tmp_dir / "doc.md"
+        f.write_text("\n".join(f"embedding line {i} with text" for i in range(12)))
+        embed_engine._ensure_db()
+        embed_engine.index_file("doc.md", f)
+        types = {r[0] for r in embed_engine._conn.execute("SELECT typeof(embedding) FROM rag_embeddings")}
+        assert types == {"blob"}
+
+    def test_migrate_legacy_json_rows(self, engine):
+        from salmalm.features.rag_embeddings import migrate_embeddings
+        engine._ensure_db()
+        engine._conn.execute(
+            "INSERT INTO rag_embeddings (chunk_hash, embedding, provider, dimensions) VALUES ('h', '[1.0, 0.0]', 'openai', 2)")
+        engine._conn.commit()
+        assert migrate_embeddings(engine._conn) == 1
+        assert engine._conn.execute("SELECT typeof(embedding) FROM rag_embeddings").fetchone()[0] == "blob"
+        assert migrate_embeddings(engine._conn) == 0
+
+    @pytest.mark.parametrize("use_numpy", [True, False])
+    def test_matrix_search_matches_brute_force(self, embed_engine, tmp_dir, use_numpy):
+        from salmalm.features import rag_vectors
+        from salmalm.features.rag_utils import cosine_similarity_vec
+        if use_numpy and not rag_vectors._HAS_NUMPY:
+            pytest.skip("numpy not installed")
+        f = tmp_dir / "doc.md"
+        f.write_text("\n".join(f"{w} topic {i}" for i, w in enumerate(
+            ["alpha", "bravo", "charlie", "delta", "echo", "foxtrot"] * 5)))
+        embed_engine._ensure_db()
+        embed_engine.index_file("doc.md", f)
+        q = _fake_embed(["bravo delta"], "k")[0]
+        expected = sorted(
+            ((cosine_similarity_vec(q, _fake_embed([text], "k")[0]), cid)
+             for cid, text in embed_engine._conn.execute("SELECT id, text FROM chunks")),
+            reverse=True)[:4]
+        with mock.patch.object(rag_vectors, "_HAS_NUMPY", use_numpy):
+            results = embed_engine._embedding_search("bravo delta", 4)
+        assert [r["chunk_id"] for r in results] == [cid for _, cid in expected]
+        for r, (sim, _) in zip(results, expected):
+            assert abs(r["score"] - sim) < 1e-5
+
+    def test_matrix_reloads_after_index_write(self, embed_engine, tmp_dir):
+        f = tmp_dir / "doc.md"
+        f.write_text("first version of the document\n" * 6)
+        embed_engine._ensure_db()
+        embed_engine.index_file("doc.md", f)
+        embed_engine._embedding_search("document", 3)
+        before = len(embed_engine._emb_matrix)
+        g = tmp_dir / "other.md"
+        g.write_text("\n".join(f"another file line {i}" for i in range(10)))
+        embed_engine.index_file("other.md", g)
+        embed_engine._embedding_search("document", 3)
+        assert len(embed_engine._emb_matrix) > before
+
+    def test_matrix_applies_source_changes_without_reload(self, embed_engine, tmp_dir):
+        from salmalm.features.rag_vectors import EmbeddingMatrix
+        f = tmp_dir / "doc.md"
+        f.write_text("\n".join(f"alpha note {i}" for i in range(6)))
+        g = tmp_dir / "other.md"
+        g.write_text("\n".join(f"bravo line {i}" for i in range(6)))
+        embed_engine._ensure_db()
+        embed_engine.index_file("doc.md", f)
+        embed_engine.index_file("other.md", g)
+        embed_engine._embedding_search("alpha", 3)
+        f.write_text("\n".join(f"charlie entry {i}" for i in range(6)))
+        embed_engine.index_file("doc.md", f)
+        with mock.patch.object(EmbeddingMatrix, "load", side_effect=AssertionError("full reload")):
+            embed_engine._embedding_search("charlie", 3)
+        live = {cid for (cid,) in embed_engine._conn.execute("SELECT id FROM chunks")}
+        block = embed_engine._emb_matrix.largest_block()
+        assert set(block.ids) == live
+        fresh = EmbeddingMatrix.load(embed_engine._conn).largest_block()
+        q = _fake_embed(["charlie entry"], "k")[0]
+        assert block.top_k(q, 4) == fresh.top_k(q, 4)
+
+
+# ── 13. ANN (IVF-flat) index ──
+
+class TestANNIndex:
+    def _rows(self, n=300, dims=16, seed=3):
+        import random
+        from salmalm.features.rag_vectors import VectorBlock, normalize
+        rng = random.Random(seed)
+        rows = VectorBlock(dims)
+        for i in range(n):
+            rows.add(i + 1, normalize([rng.gauss(0, 1) for _ in range(dims)]))
+        rows.freeze()
+        return rows
+
+    def test_full_probe_matches_exact(self, engine):
+        from salmalm.features.rag_ann import IVFIndex
+        engine._ensure_db()
+        rows = self._rows()
+        ann = IVFIndex.build(engine._conn, rows, {"minVectors": 1, "nlist": 8, "nprobe": 8})
+        assert ann is not None and len(ann) == 300
+        for i in range(5):
+            q = list(rows.data[i * 16:(i + 1) * 16])
+            assert [c for _, c in ann.search(q, 5)] == [c for _, c in rows.top_k(q, 5)]
+
+    def test_partial_probe_recall(self, engine):
+        from salmalm.features.rag_ann import IVFIndex
+        engine._ensure_db()
+        rows = self._rows(n=600)
+        ann = IVFIndex.build(engine._conn, rows, {"minVectors": 1, "nlist": 16, "nprobe": 6})
+        hits = total = 0
+        for i in range(20):
+            q = list(rows.data[i * 16:(i + 1) * 16])
+            truth = {c for _, c in rows.top_k(q, 5)}
+            hits += len(truth & {c for _, c in ann.search(q, 5)})
+            total += len(truth)
+        assert hits / total >= 0.6
+
+    def test_small_corpus_uses_exact(self, engine):
+        from salmalm.features.rag_ann import IVFIndex
+        engine._ensure_db()
+        assert IVFIndex.build(engine._conn, self._rows(n=50), {"minVectors": 100}) is None
+        assert IVFIndex.build(engine._conn, self._rows(n=50), {"minVectors": 1, "enabled": False}) is None
+
+    def test_persisted_centroids_reused_and_extended(self, engine):
+        from salmalm.features.rag_ann import IVFIndex
+        engine._ensure_db()
+        IVFIndex.build(engine._conn, self._rows(n=300), {"minVectors": 1, "nlist": 8})
+        before = engine._conn.execute("SELECT centroid FROM ann_centroids ORDER BY list_id").fetchall()
+        with mock.patch("salmalm.features.rag_ann.train_centroids", side_effect=AssertionError("retrained")):
+            ann = IVFIndex.build(engine._conn, self._rows(n=320), {"minVectors": 1, "nlist": 8})
+        after = engine._conn.execute("SELECT centroid FROM ann_centroids ORDER BY list_id").fetchall()
+        assert [bytes(r[0]) for r in before] == [bytes(r[0]) for r in after]
+        assert len(ann) == 320
+        assert engine._conn.execute("SELECT COUNT(*) FROM ann_assign").fetchone()[0] == 320
+
+    def test_rebuild_reuses_unchanged_lists(self, engine):
+        from salmalm.features.rag_ann import IVFIndex
+        engine._ensure_db()
+        cfg = {"minVectors": 1, "nlist": 8}
+        first = IVFIndex.build(engine._conn, self._rows(n=300), cfg)
+        more = self._rows(n=301)
+        second = IVFIndex.build(engine._conn, more, cfg, prev=first)
+        changed = [i for i, b in second._lists.items() if b is not first._lists.get(i)]
+        assert len(changed) == 1
+        assert 301 in second._lists[changed[0]].ids
+        assert len(second) == 301
+
+    def test_engine_uses_ann_and_drops_removed_chunks(self, embed_engine, tmp_dir):
+        embed_engine._config = dict(load_rag_config(tmp_dir / "rag.json"), ann={"minVectors": 1, "nlist": 2})
+        f = tmp_dir / "doc.md"
+        f.write_text("\n".join(f"{w} topic {i}" for i, w in enumerate(["alpha", "bravo", "charlie"] * 6)))
+        embed_engine._ensure_db()
+        embed_engine.index_file("doc.md", f)
+        assert embed_engine._embedding_search("bravo", 3)
+        assert embed_engine._ann is not None
+        assert embed_engine._conn.execute("SELECT COUNT(*) FROM ann_assign").fetchone()[0] > 0
+        f.write_text("short replacement text\n")
+        embed_engine.index_file("doc.md", f)
+        stale = embed_engine._conn.execute(
+            "SELECT COUNT(*) FROM ann_assign WHERE chunk_id NOT IN (SELECT id FROM chunks)").fetchone()[0]
+        assert stale == 0
+
+
+# ── 14. Incremental corpus statistics ──
+
+class TestIncrementalStats:
+    def _assert_consistent(self, engine):
+        from_postings = dict(engine._conn.execute(
+            "SELECT t.term, COUNT(*) FROM postings p JOIN terms t ON t.id = p.term_id GROUP BY t.term").fetchall())
+        stored = dict(engine._conn.execute("SELECT term, df FROM doc_freq").fetchall())
+        assert stored == from_postings
+        assert engine._df == from_postings
+        n, avg = engine._conn.execute("SELECT COUNT(*), AVG(token_count) FROM chunks").fetchone()
+        assert engine._doc_count == n
+        assert abs(engine._avg_dl - (avg or 1.0)) < 1e-9
+
+    def test_edit_applies_df_delta(self, engine, tmp_dir):
+        a, b = tmp_dir / "a.md", tmp_dir / "b.md"
+        a.write_text("\n".join(f"alpha shared line {i}" for i in range(12)))
+        b.write_text("\n".join(f"bravo shared line {i}" for i in range(7)))
+        engine._ensure_db()
+        engine.index_file("a.md", a)
+        engine.index_file("b.md", b)
+        self._assert_consistent(engine)
+        a.write_text("\n".join(f"charlie other words {i}" for i in range(5)))
+        engine.index_file("a.md", a)
+        self._assert_consistent(engine)
+        assert "alpha" not in engine._df
+
+    def test_same_chunk_count_invalidates_only_touched_terms(self, engine, tmp_dir):
+        a = tmp_dir / "a.md"
+        a.write_text("alpha bravo charlie delta\n")
+        b = tmp_dir / "b.md"
+        b.write_text("echo foxtrot golf hotel\n")
+        engine._ensure_db()
+        engine.index_file("a.md", a)
+        engine.index_file("b.md", b)
+        engine._idf("echo")
+        engine._idf("alpha")
+        a.write_text("alpha bravo charlie india\n")
+        engine.index_file("a.md", a)
+        assert "echo" in engine._idf_cache
+        assert "alpha" in engine._idf_cache  # unchanged df, memo kept
+        assert "delta" not in engine._df
+        self._assert_consistent(engine)
+
+    def test_emptied_source_is_removed(self, engine, tmp_dir):
+        a = tmp_dir / "a.md"
+        a.write_text("some indexed content here\n")
+        engine._ensure_db()
+        engine.index_file("a.md", a)
+        a.write_text("")
+        engine.index_file("a.md", a)
+        assert engine._doc_count == 0
+        self._assert_consistent(engine)
+
+    def test_reindex_touches_only_changed_and_vanished(self, engine, tmp_dir):
+        a, b = tmp_dir / "a.md", tmp_dir / "b.md"
+        a.write_text("alpha content line\n")
+        b.write_text("bravo content line\n")
+        files = [("a.md", a), ("b.md", b)]
+        engine._get_indexable_files = lambda: list(files)
+        engine.reindex()
+        assert engine._doc_count == 2
+        a.write_text("alpha changed content\n")
+        os.utime(a, (a.stat().st_atime, a.stat().st_mtime + 5))
+        files.pop()  # b.md vanished
+        engine._last_check = 0
+        with mock.patch.object(engine, "_index_text", wraps=engine._index_text) as spy:
+            engine.reindex()
+        assert [c.args[0] for c in spy.call_args_list] == ["a.md"]
+        sources = {r[0] for r in engine._conn.execute("SELECT DISTINCT source FROM chunks")}
+        assert sources == {"a.md"}
+        self._assert_consistent(engine)
+
+
+# ── 15. Compact term-id storage ──
+
+def _to_legacy_format(engine):
+    """Rewrite an index into the pre-dictionary JSON / string-postings layout."""
+    from salmalm.features.rag_terms import unpack_ids, unpack_tf
+    conn = engine._conn
+    term = lambda tid: engine._terms.term(conn, tid)  # noqa: E731
+    for cid, blob in conn.execute("SELECT id, tokens FROM chunks").fetchall():
+        conn.execute("UPDATE chunks SET tokens=? WHERE id=?", (json.dumps([term(t) for t in unpack_ids(blob)]), cid))
+    for cid, blob in conn.execute("SELECT chunk_id, vector FROM tfidf_vectors").fetchall():
+        vec = {term(t): tf for t, tf in zip(*unpack_tf(blob))}
+        conn.execute("UPDATE tfidf_vectors SET vector=? WHERE chunk_id=?", (json.dumps(vec), cid))
+    conn.execute("CREATE TABLE postings_legacy (term TEXT NOT NULL, chunk_id INTEGER NOT NULL, "
+                 "tf INTEGER NOT NULL, PRIMARY KEY (term, chunk_id)) WITHOUT ROWID")
+    conn.execute("INSERT INTO postings_legacy SELECT t.term, p.chunk_id, p.tf FROM postings p "
+                 "JOIN terms t ON t.id = p.term_id")
+    conn.execute("DROP TABLE postings")
+    conn.execute("ALTER TABLE postings_legacy RENAME TO postings")
+    conn.execute("CREATE INDEX idx_postings_chunk ON postings(chunk_id)")
+    conn.execute("DELETE FROM terms")
+    conn.commit()
+    conn.execute("VACUUM")
+
+
+class TestCompactStorage:
+    def _index(self, engine, tmp_dir):
+        f = tmp_dir / "doc.md"
+        f.write_text("\n".join(f"데이터베이스 python note {i} about rust and network tuning" for i in range(80)))
+        engine._ensure_db()
+        engine.index_file("doc.md", f)
+
+    def test_packed_columns(self, engine, tmp_dir):
+        self._index(engine, tmp_dir)
+        types = engine._conn.execute(
+            "SELECT DISTINCT typeof(c.tokens), typeof(v.vector) FROM chunks c JOIN tfidf_vectors v ON v.chunk_id = c.id"
+        ).fetchall()
+        assert [tuple(t) for t in types] == [("blob", "blob")]
+        assert engine._conn.execute("SELECT COUNT(*) FROM terms").fetchone()[0] == len(engine._df)
+
+    def test_pack_roundtrip(self):
+        from salmalm.features.rag_terms import pack_ids, pack_tf, unpack_ids, unpack_tf
+        assert list(unpack_ids(pack_ids([3, 1, 3]))) == [3, 1, 3]
+        ids, tfs = unpack_tf(pack_tf({7: 0.5, 2: 0.25}))
+        assert list(ids) == [7, 2] and list(tfs) == [0.5, 0.25]
+
+    def test_migrates_legacy_db(self, engine, tmp_dir):
+        self._index(engine, tmp_dir)
+        before = engine._search("python network", 5)
+        _to_legacy_format(engine)
+        legacy_pages = engine._conn.execute("PRAGMA page_count").fetchone()[0]
+        engine.close()
+        engine._terms.reset()
+
+        engine._ensure_db()
+        assert "term_id" in [r[1] for r in engine._conn.execute("PRAGMA table_info(postings)")]
+        assert engine._conn.execute("SELECT COUNT(*) FROM chunks WHERE typeof(tokens)='text'").fetchone()[0] == 0
+        assert engine._conn.execute("PRAGMA page_count").fetchone()[0] < legacy_pages
+        assert engine._search("python network", 5) == before
+        self._assert_consistent(engine)
+
+    def test_rollback_resets_term_cache(self, engine, tmp_dir):
+        self._index(engine, tmp_dir)
+        f = tmp_dir / "more.md"
+        f.write_text("brandnewterm appears here for sure\n" * 3)
+        real_insert = engine._insert_chunks
+
+        def insert_then_fail(*args):
+            real_insert(*args)
+            assert engine._terms.lookup(engine._conn, ["brandnewterm"])  # visible inside the transaction
+            raise RuntimeError("boom")
+
+        with mock.patch.object(engine, "_insert_chunks", insert_then_fail), pytest.raises(RuntimeError):
+            engine._index_text("more.md", f.read_text(), 1.0)
+        assert engine._terms.lookup(engine._conn, ["brandnewterm"]) == {}
+        self._assert_consistent(engine)
+
+    _assert_consistent = TestIncrementalStats._assert_consistent
@@ -0,0 +1,133 @@
+"""Tests for the shared retrieval-result cache (RAG + TF-IDF memory search)."""
+from __future__ import annotations
+
+from unittest import mock
+
+import pytest
+
+from salmalm.core.retrieval_cache import RetrievalCache, next_generation, normalize_query, retrieval_cache
+from salmalm.features.rag import RAGEngine, rag_query_for
+
+
+@pytest.fixture
+def engine(tmp_path):
+    e = RAGEngine(db_path=tmp_path / "rag.db", config_path=tmp_path / "rag.json")
+    e._get_indexable_files = lambda: []
+    e._get_session_files = lambda: []
+    e._ensure_db()
+    f = tmp_path / "notes.md"
+    f.write_text("\n".join(f"python database tuning note {i}" for i in range(15)))
+    e.index_file("notes.md", f)
+    yield e
+    e.close()
+
+
+class TestRetrievalCache:
+    def test_normalize(self):
+        assert normalize_query("  Hello \n World ") == "hello world"
+
+    def test_hit_and_miss(self):
+        c = RetrievalCache()
+        assert c.get("ns", "q", 1) is None
+        c.put("ns", "Q ", 1, [1])
+        assert c.get("ns", "q", 1) == [1]
+        assert c.get("ns", "q", 2) is None
+        assert c.stats()["hits"] == 1
+
+    def test_lru_eviction(self):
+        c = RetrievalCache(max_size=2)
+        c.put("ns", "a", 1, "A")
+        c.put("ns", "b", 1, "B")
+        c.get("ns", "a", 1)
+        c.put("ns", "c", 1, "C")
+        assert c.get("ns", "b", 1) is None
+        assert c.get("ns", "a", 1) == "A"
+
+    def test_ttl_expiry(self):
+        c = RetrievalCache(ttl=10)
+        with mock.patch("salmalm.core.retrieval_cache.time.time", return_value=1000.0):
+            c.put("ns", "a", 1, "A")
+        with mock.patch("salmalm.core.retrieval_cache.time.time", return_value=1011.0):
+            assert c.get("ns", "a", 1) is None
+
+    def test_generations_unique(self):
+        assert next_generation() != next_generation()
+
+
+class TestRAGSearchCache:
+    def test_second_caller_reuses_results(self, engine):
+        retrieval_cache.clear()
+        with mock.patch.object(engine, "_search", wraps=engine._search) as spy:
+            first = engine.search("python database", max_results=6, min_score=0.0)
+            second = engine.search("Python  database", max_results=3, min_score=0.0)
+        assert spy.call_count == 1
+        assert second == first[:3]
+
+    def test_larger_request_recomputes(self, engine):
+        retrieval_cache.clear()
+        with mock.patch.object(engine, "_search", wraps=engine._search) as spy:
+            engine.search("python", max_results=3)
+            engine.search("python", max_results=20)
+        assert spy.call_count == 2
+
+    def test_index_write_invalidates(self, engine, tmp_path):
+        retrieval_cache.clear()
+        engine.search("python", max_results=3)
+        g = tmp_path / "more.md"
+        g.write_text("python extra content line\n" * 3)
+        engine.index_file("more.md", g)
+        with mock.patch.object(engine, "_search", wraps=engine._search) as spy:
+            engine.search("python", max_results=3)
+        assert spy.call_count == 1
+
+    def test_results_are_copies(self, engine):
+        retrieval_cache.clear()
+        r = engine.search("python", max_results=3, min_score=0.0)
+        r[0]["text"] = "mutated"
+        assert engine.search("python", max_results=3, min_score=0.0)[0]["text"] != "mutated"
+
+    def test_ranking_config_change_invalidates(self, engine):
+        retrieval_cache.clear()
+        engine.search("python", max_results=3)
+        engine._config = {**engine.config, "hybrid": {"enabled": False}}
+        with mock.patch.object(engine, "_search", wraps=engine._search) as spy:
+            engine.search("python", max_results=3)
+            engine.search("python", max_results=3)
+        assert spy.call_count == 1
+
+    def test_one_retrieval_pass_per_turn(self, engine):
+        from types import SimpleNamespace
+
+        from salmalm.core import engine_pipeline
+        retrieval_cache.clear()
+        session = SimpleNamespace(messages=[{"role": "system", "content": "SYS"}], hydrate=lambda: None)
+        with mock.patch("salmalm.features.rag.rag_engine", engine), \
+                mock.patch.object(engine, "_bm25_search", wraps=engine._bm25_search) as bm25, \
+                mock.patch.object(engine, "_vector_search", wraps=engine._vector_search) as vec:
+            for turn, text in enumerate(["python database tuning", "more on tuning notes"], 1):
+                session.messages.append({"role": "user", "content": text})
+                engine_pipeline._prepare_context(session, text, None, None)
+                assert bm25.call_count == turn and vec.call_count == turn
+                session.messages.append({"role": "assistant", "content": "ok"})
+        assert "[Retrieved relevant information]" in session.messages[0]["content"]
+        assert any(m.get("_recall") for m in session.messages)
+
+
+class TestTFIDFSearchCache:
+    def test_cached_until_rebuild(self):
+        from salmalm.core.search import TFIDFSearch
+        s = TFIDFSearch(watch=False)
+        s._built = True
+        s._last_index_time = 10**12
+        s._add_file("a.md", "python database")
+        s._add_file("b.md", "rust network")
+        for doc_id in s._docs:
+            s._recompute_sums(doc_id)
+        s._generation = next_generation()
+        retrieval_cache.clear()
+        with mock.patch.object(s, "_search", wraps=s._search) as spy:
+            s.search("python", 5)
+            s.search("python", 2)
+            s._generation = next_generation()
+            s.search("python", 2)
+        assert spy.call_count == 2
@@ -0,0 +1,87 @@
+"""Memory-budgeted LRU session cache."""
+
+from salmalm.core.session_cache import SessionCache, estimate_session_bytes
+
+
+class _S:
+    def __init__(self, sid, text=""):
+        self.id = sid
+        self.messages = [{"role": "user", "content": text}] if text else []
+
+
+def test_estimate_memoized_and_tracks_growth():
+    s = _S("a", "x" * 1000)
+    first = estimate_session_bytes(s)
+    assert estimate_session_bytes(s) == first
+    s.messages.append({"role": "assistant", "content": [{"type": "text", "text": "y" * 500}]})
+    assert estimate_session_bytes(s) >= first + 500
+
+
+def test_lru_eviction_by_bytes_with_write_back():
+    evicted = []
+    size = estimate_session_bytes(_S("probe", "x" * 10_000))
+    cache = SessionCache(budget_bytes=size * 3, on_evict=evicted.append)
+    for sid in "abc":
+        cache[sid] = _S(sid, "x" * 10_000)
+    cache.get("a")  # a becomes most recently used
+    cache["d"] = _S("d", "x" * 10_000)
+    assert [s.id for s in evicted] == ["b"]
+    assert "b" not in cache and "a" in cache
+    assert cache.bytes <= cache.budget_bytes
+    assert cache.stats()["evictions"] == 1
+
+
+def test_in_place_growth_accounted_on_touch():
+    evicted = []
+    cache = SessionCache(budget_bytes=50_000, on_evict=evicted.append)
+    cache["a"] = _S("a", "x")
+    cache["b"] = _S("b", "x")
+    cache["b"].messages.append({"role": "user", "content": "z" * 60_000})
+    cache.get("b")
+    # b is over budget on its own but is never evicted while in use
+    assert [s.id for s in evicted] == ["a"]
+    assert "b" in cache
+
+
+def test_contains_does_not_touch_and_expire_stops_at_fresh():
+    cache = SessionCache(budget_bytes=10**9)
+    for sid in "abc":
+        cache[sid] = _S(sid)
+    assert "a" in cache
+    assert cache.keys() == ["a", "b", "c"]
+    removed = cache.expire(lambda s: s.id in ("a", "c"))
+    assert [s.id for s in removed] == ["a"]
+    assert cache.keys() == ["b", "c"]
+    del cache["b"]
+    assert len(cache) == 1
+
+
+def test_pinned_and_persisting_sessions_are_not_evicted():
+    import threading
+
+    evicted = []
+    size = estimate_session_bytes(_S("probe", "x" * 10_000))
+    cache = SessionCache(budget_bytes=size * 2, on_evict=evicted.append)
+    for sid in "ab":
+        cache[sid] = _S(sid, "x" * 10_000)
+    cache.pin("a")
+    held = threading.Lock()
+    cache.peek("b")._persist_lock = held
+    held.acquire()
+    cache["c"] = _S("c", "x" * 10_000)
+    # Both cold sessions are in use: run over budget rather than drop them
+    assert evicted == [] and len(cache) == 3
+    assert cache.keys()[-1] == "c"
+    held.release()
+    cache.unpin("a")
+    cache["d"] = _S("d", "x" * 10_000)
+    assert {s.id for s in evicted} == {"a", "b"}
+    assert cache.bytes <= cache.budget_bytes
+
+
+def test_estimate_refreshes_on_in_place_replacement():
+    s = _S("a", "x" * 1000)
+    first = estimate_session_bytes(s)
+    s.messages[0] = {"role": "user", "content": "x" * 5000}
+    s._revision = 1  # what Session._persist does
+    assert estimate_session_bytes(s) >= first + 4000
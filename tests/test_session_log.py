@@ -0,0 +1,410 @@
+"""Append-only session message log (session_messages)."""
+
+import json
+from unittest import mock
+
+import pytest
+
+from salmalm.core import core as _core
+from salmalm.core import session_store as ss
+from salmalm.db.aio import audit_db
+
+_save_to_disk = ss.save_session_to_disk  # the db fixture mocks it out
+
+@pytest.fixture
+def db(tmp_path):
+    """Point the thread-local audit DB at a fresh file."""
+    old = getattr(_core._thread_local, "audit_conn", None)
+    _core._thread_local.audit_conn = None
+    with mock.patch.object(_core, "AUDIT_DB", tmp_path / "audit.db"), \
+            mock.patch.object(ss, "save_session_to_disk"), \
+            mock.patch.object(ss, "_audit_log"), \
+            mock.patch("salmalm.core.prompt.build_system_prompt", return_value="SYS"):
+        conn = _core._get_db()
+        yield conn
+        conn.close()
+    _core._thread_local.audit_conn = old
+    for sid in [k for k in ss._sessions if "log-" in k]:
+        del ss._sessions[sid]
+
+
+def _rows(conn, sid, live_only=True):
+    q = "SELECT seq, role, message, deleted FROM session_messages WHERE session_id=?"
+    if live_only:
+        q += " AND deleted=0"
+    return conn.execute(q + " ORDER BY seq", (sid,)).fetchall()
+
+
+def _new(sid):
+    s = ss.Session(sid)
+    s.add_system("SYS")
+    with ss._session_lock:
+        ss._sessions[sid] = s
+    return s
+
+
+class TestAppendOnly:
+    def test_each_persist_appends_one_row(self, db):
+        s = _new("log-a")
+        s.add_user("hello")
+        s.add_assistant("hi")
+        s.add_user("again")
+        rows = _rows(db, "log-a")
+        assert [(r[0], r[1]) for r in rows] == [(0, "user"), (1, "assistant"), (2, "user")]
+        assert json.loads(rows[2][2]) == {"role": "user", "content": "again"}
+        # The legacy blob is no longer written
+        assert db.execute("SELECT messages FROM session_store WHERE session_id='log-a'").fetchone()[0] == "[]"
+
+    def test_persist_without_changes_writes_nothing(self, db):
+        s = _new("log-b")
+        s.add_user("one")
+        changes = lambda: audit_db.submit(lambda conn: conn.total_changes).result()  # noqa: E731
+        before = changes()
+        s._persist()
+        # Only the session_store UPSERT (on the writer thread's connection)
+        assert changes() - before == 1
+
+    def test_images_replaced_and_system_skipped(self, db):
+        s = _new("log-c")
+        s.messages.append({"role": "user", "content": [
+            {"type": "text", "text": "look"},
+            {"type": "image", "source": {"data": "x" * 1000}},
+        ]})
+        s._persist()
+        (row,) = _rows(db, "log-c")
+        content = json.loads(row[2])["content"]
+        assert content[1] == {"type": "text", "text": "[Image was attached to this message]"}
+
+    def test_restore_loads_window(self, db):
+        s = _new("log-d")
+        for i in range(ss._PERSIST_MESSAGE_LIMIT + 10):
+            s.add_user(f"m{i}")
+        del ss._sessions["log-d"]
+        restored = ss.get_session("log-d")
+        texts = [m["content"] for m in restored.messages if m["role"] == "user"]
+        assert len(texts) == ss._ACTIVE_WINDOW
+        assert texts[-1] == f"m{ss._PERSIST_MESSAGE_LIMIT + 9}"
+        # Older messages hydrate on demand, in order, without any writes
+        before = db.total_changes
+        restored.hydrate()
+        texts = [m["content"] for m in restored.messages if m["role"] == "user"]
+        assert texts == [f"m{i}" for i in range(10, ss._PERSIST_MESSAGE_LIMIT + 10)]
+        assert not restored._is_dirty()
+        assert db.total_changes == before
+        # Appending after restore continues the sequence without rewrites
+        restored.add_user("next")
+        assert _rows(db, "log-d")[-1][0] == ss._PERSIST_MESSAGE_LIMIT + 10
+        assert len(_rows(db, "log-d", live_only=False)) == ss._PERSIST_MESSAGE_LIMIT + 11
+
+    def test_code_turn_after_restore_sees_full_history(self, db):
+        from salmalm.core import engine_pipeline
+        from salmalm.core.loop_helpers import trim_history
+
+        s = _new("log-code")
+        for i in range(15):
+            s.add_user(f"q{i}")
+            s.add_assistant(f"a{i}")
+        del ss._sessions["log-code"]
+        restored = ss.get_session("log-code")
+        assert len([m for m in restored.messages if m["role"] != "system"]) == ss._ACTIVE_WINDOW
+        restored.add_user("refactor the parser")
+        with mock.patch("salmalm.features.rag.inject_rag_context", side_effect=lambda msgs, sp, **kw: sp), \
+                mock.patch("salmalm.core.memory.memory_manager.auto_recall", return_value=""):
+            engine_pipeline._prepare_context(restored, "refactor the parser", None, None)
+        trim_history(restored, {"intent": "code"})
+        texts = [m["content"] for m in restored.messages if m["role"] != "system"]
+        assert texts[0] == "q0" and texts[-1] == "refactor the parser"
+        assert len(texts) == 31
+
+    def test_legacy_blob_migrated(self, db):
+        blob = [{"role": "user", "content": "old"}, {"role": "assistant", "content": "reply"}]
+        db.execute(
+            "INSERT INTO session_store (session_id, messages, updated_at) VALUES (?,?,?)",
+            ("log-e", json.dumps(blob), "2024-01-01"),
+        )
+        db.commit()
+        assert ss.load_session_messages(db, "log-e") == blob
+        s = ss.get_session("log-e")
+        s.add_user("new")
+        assert [json.loads(r[2])["content"] for r in _rows(db, "log-e")] == ["old", "reply", "new"]
+        assert ss.load_session_messages(db, "log-e")[-1]["content"] == "new"
+
+    def test_persist_timeout_resyncs_next_time(self, db):
+        from concurrent.futures import Future
+
+        s = _new("log-t")
+        s.add_user("one")
+        with mock.patch.object(ss, "_WRITE_TIMEOUT", 0.01), mock.patch.object(audit_db, "submit", return_value=Future()):
+            s.add_user("stalled")
+        assert s._next_seq is None
+        s.add_assistant("after")
+        assert [json.loads(r[2])["content"] for r in _rows(db, "log-t")] == ["one", "stalled", "after"]
+
+
+class TestTombstones:
+    def test_rollback_tombstones_seq_range(self, db):
+        s = _new("log-f")
+        for i in range(3):
+            s.add_user(f"q{i}")
+            s.add_assistant(f"a{i}")
+        assert ss.rollback_session("log-f", 1)["ok"]
+        assert [json.loads(r[2])["content"] for r in _rows(db, "log-f")] == ["q0", "a0", "q1", "a1"]
+        assert [r[0] for r in _rows(db, "log-f", live_only=False) if r[3]] == [4, 5]
+        s.add_user("q2b")
+        assert _rows(db, "log-f")[-1][0] == 6
+
+    def test_edit_in_place_is_detected(self, db):
+        s = _new("log-g")
+        s.add_user("typo")
+        s.add_assistant("answer")
+        s.messages[1]["content"] = "fixed"
+        s.messages = s.messages[:2]
+        s._persist()
+        assert [json.loads(r[2])["content"] for r in _rows(db, "log-g")] == ["fixed"]
+
+    def test_purge_removes_tombstones(self, db):
+        s = _new("log-h")
+        s.add_user("a")
+        s.add_assistant("b")
+        ss.rollback_session("log-h", 1)
+        assert ss.purge_message_log(db) == 2
+        assert _rows(db, "log-h", live_only=False) == []
+
+    def test_delete_session_row_drops_log(self, db):
+        s = _new("log-i")
+        s.add_user("a")
+        db.execute("DELETE FROM session_store WHERE session_id='log-i'")
+        db.commit()
+        assert _rows(db, "log-i", live_only=False) == []
+
+
+def _contents(msgs):
+    return [m["content"] for m in msgs if m["role"] != "system"]
+
+
+def _branch(sid, index):
+    result = ss.branch_session(sid, index)
+    assert result["ok"]
+    return result["new_session_id"]
+
+
+class TestBranch:
+    def _parent(self, sid):
+        s = _new(sid)
+        for i in range(3):
+            s.add_user(f"q{i}")
+            s.add_assistant(f"a{i}")
+        return s
+
+    def test_branch_is_a_pointer(self, db):
+        parent = self._parent("log-j")
+        counts = "SELECT (SELECT COUNT(*) FROM session_messages), (SELECT COUNT(*) FROM session_store)"
+        msgs_before, rows_before = db.execute(counts).fetchone()
+        # messages[0] is the system prompt; index 4 = "a1"
+        new_id = _branch("log-j", 4)
+        try:
+            # one row inserted and pointed, no messages copied
+            assert db.execute(counts).fetchone() == (msgs_before, rows_before + 1)
+            assert new_id not in ss._sessions
+            assert _rows(db, new_id, live_only=False) == []
+            assert db.execute("SELECT parent_session_id, fork_seq FROM session_store WHERE session_id=?",
+                              (new_id,)).fetchone() == ("log-j", 3)
+            assert db.execute("SELECT first_user_text, message_count FROM session_store WHERE session_id=?",
+                              (new_id,)).fetchone() == ("q0", 4)
+            assert _contents(ss.load_session_messages(db, new_id)) == ["q0", "a0", "q1", "a1"]
+            branch = ss.get_session(new_id)
+            assert _contents(branch.messages) == ["q0", "a0", "q1", "a1"]
+            # Structural sharing with the in-memory parent: same content, own dicts
+            assert branch.messages[1]["content"] is parent.messages[1]["content"]
+            assert branch.messages[1] is not parent.messages[1]
+            branch.add_user("diverge")
+            assert [r[0] for r in _rows(db, new_id)] == [4]
+            assert _contents(ss.load_session_messages(db, new_id))[-1] == "diverge"
+            assert len(_rows(db, "log-j")) == 6
+            assert (ss.list_sessions(db)["sessions"][0]["messages"]) == 5
+        finally:
+            ss._sessions.pop(new_id, None)
+
+    def test_parent_rollback_copies_inherited_rows(self, db):
+        self._parent("log-m")
+        new_id = _branch("log-m", 6)
+        try:
+            assert ss.rollback_session("log-m", 2)["ok"]
+            assert _contents(ss.load_session_messages(db, "log-m")) == ["q0", "a0"]
+            assert _contents(ss.load_session_messages(db, new_id)) == ["q0", "a0", "q1", "a1", "q2", "a2"]
+            assert db.execute("SELECT fork_seq FROM session_store WHERE session_id=?", (new_id,)).fetchone()[0] is None
+        finally:
+            ss._sessions.pop(new_id, None)
+
+    def test_parent_append_does_not_copy(self, db):
+        parent = self._parent("log-n")
+        new_id = _branch("log-n", 2)
+        parent.add_user("more")
+        assert _rows(db, new_id, live_only=False) == []
+        assert _contents(ss.load_session_messages(db, new_id)) == ["q0", "a0"]
+
+    def test_branch_rollback_lowers_fork_point(self, db):
+        self._parent("log-o")
+        new_id = _branch("log-o", 6)
+        try:
+            ss.get_session(new_id)
+            assert ss.rollback_session(new_id, 2)["ok"]
+            assert db.execute("SELECT fork_seq FROM session_store WHERE session_id=?", (new_id,)).fetchone()[0] == 1
+            assert _rows(db, new_id, live_only=False) == []
+            assert _contents(ss.load_session_messages(db, new_id)) == ["q0", "a0"]
+            assert len(_rows(db, "log-o")) == 6
+        finally:
+            ss._sessions.pop(new_id, None)
+
+    def test_deleting_parents_keeps_nested_branches(self, db):
+        self._parent("log-q")
+        mid = _branch("log-q", 4)
+        try:
+            ss.get_session(mid).add_user("mid")
+            leaf = _branch(mid, 5)
+            assert _contents(ss.load_session_messages(db, leaf)) == ["q0", "a0", "q1", "a1", "mid"]
+            db.execute("DELETE FROM session_store WHERE session_id=?", (mid,))
+            db.commit()
+            assert db.execute("SELECT parent_session_id, fork_seq FROM session_store WHERE session_id=?",
+                              (leaf,)).fetchone() == ("log-q", 3)
+            assert _contents(ss.load_session_messages(db, leaf)) == ["q0", "a0", "q1", "a1", "mid"]
+            db.execute("DELETE FROM session_store WHERE session_id='log-q'")
+            db.commit()
+            assert _contents(ss.load_session_messages(db, leaf)) == ["q0", "a0", "q1", "a1", "mid"]
+            assert [r[0] for r in _rows(db, leaf)] == [0, 1, 2, 3, 4]
+        finally:
+            ss._sessions.pop(mid, None)
+
+    def test_purge_keeps_inherited_rows(self, db):
+        self._parent("log-r")
+        new_id = _branch("log-r", 2)
+        with mock.patch.object(ss, "_LOG_RETAIN", 2):
+            ss.purge_message_log(db)
+        assert [r[0] for r in _rows(db, "log-r")] == [0, 1, 4, 5]
+        assert _contents(ss.load_session_messages(db, new_id)) == ["q0", "a0"]
+
+
+class TestSessionIndex:
+    def test_columns_maintained_on_append(self, db):
+        s = _new("log-k")
+        s.add_user("[📎 file uploaded] a.txt")
+        s.add_user("**Deploy** the `api`")
+        s.add_assistant("ok")
+        row = db.execute(
+            "SELECT first_user_text, message_count, hidden FROM session_store WHERE session_id='log-k'"
+        ).fetchone()
+        assert row == ("Deploy the api", 3, 0)
+        ss.rollback_session("log-k", 1)
+        assert db.execute("SELECT message_count FROM session_store WHERE session_id='log-k'").fetchone()[0] == 1
+
+    def test_hidden_and_ghost_sessions_excluded(self, db):
+        _new("log-l").add_user("visible")
+        _new("agent_log-x").add_user("internal")
+        db.execute(
+            "INSERT INTO session_store (session_id, messages, updated_at) VALUES ('log-ghost', '[]', '2024-01-01')"
+        )
+        db.commit()
+        ids = [e["id"] for e in ss.list_sessions(db)["sessions"]]
+        assert "log-l" in ids
+        assert "agent_log-x" not in ids
+        assert "log-ghost" not in ids
+
+    def test_backfills_rows_written_outside_persist(self, db):
+        blob = [{"role": "user", "content": "imported question"}, {"role": "assistant", "content": "a"}]
+        db.execute(
+            "INSERT INTO session_store (session_id, messages, updated_at, title) VALUES (?,?,?,'')",
+            ("log-imp", json.dumps(blob), "2024-01-02"),
+        )
+        db.commit()
+        # Listing is read-only; the migration backfill indexes the row
+        writes = db.total_changes
+        assert "log-imp" not in [e["id"] for e in ss.list_sessions(db)["sessions"]]
+        assert db.total_changes == writes
+        assert ss.backfill_session_index(db) == 1
+        assert ss.backfill_session_index(db) == 0
+        (entry,) = [e for e in ss.list_sessions(db)["sessions"] if e["id"] == "log-imp"]
+        assert entry["title"] == "imported question"
+        assert entry["messages"] == 2
+
+    def test_keyset_pagination_and_since(self, db):
+        for i in range(7):
+            db.execute(
+                "INSERT INTO session_store (session_id, messages, updated_at, title) VALUES (?,?,?,?)",
+                (f"log-p{i}", "[]", f"2024-01-0{1 + i % 3}", f"t{i}"),
+            )
+        db.commit()
+        seen, before = [], None
+        while True:
+            page = ss.list_sessions(db, limit=3, before=before)
+            seen += [e["id"] for e in page["sessions"]]
+            before = page["next_before"]
+            if not before:
+                break
+        full = [e["id"] for e in ss.list_sessions(db)["sessions"]]
+        assert seen == full
+        assert len(set(seen)) == 7
+        changed = ss.list_sessions(db, since="2024-01-02")
+        assert {e["id"] for e in changed["sessions"]} == {"log-p2", "log-p5"}
+        assert changed["latest"] == "2024-01-03"
+
+
+class TestHeadTrim:
+    def test_trim_tombstones_head_without_rewrite(self, db):
+        s = _new("log-t")
+        for i in range(6):
+            s.add_user(f"m{i}")
+        sys_msgs = [m for m in s.messages if m["role"] == "system"]
+        s.messages = sys_msgs + [m for m in s.messages if m["role"] != "system"][-2:]
+        s.add_user("m6")
+        rows = _rows(db, "log-t", live_only=False)
+        assert [r[0] for r in rows if not r[3]] == [4, 5, 6]
+        assert [r[0] for r in rows if r[3]] == [0, 1, 2, 3]
+        assert len(rows) == 7  # nothing re-inserted
+
+
+class TestDiskSnapshots:
+    @pytest.fixture
+    def disk(self, db, tmp_path):
+        with mock.patch.object(ss, "_SESSIONS_DIR", tmp_path / "sessions"), \
+                mock.patch.object(ss, "_disk_manifest", {}), \
+                mock.patch.object(ss, "_restore_stats", {}):
+            yield tmp_path / "sessions"
+
+    def test_save_is_compact_and_indexed(self, disk):
+        s = _new("log-d1")
+        s.add_user("hello")
+        _save_to_disk("log-d1")
+        text = (disk / "log-d1.json").read_text(encoding="utf-8")
+        assert "\n" not in text and '"role":"user"' in text
+        assert ss._disk_manifest["log-d1"][1] == len(text.encode())
+
+    def test_startup_indexes_without_parsing(self, disk):
+        disk.mkdir()
+        (disk / "log-d2.json").write_text(json.dumps({"messages": [{"role": "user", "content": "old"}]}))
+        (disk / "log-bad.json").write_text("{not json")
+        with mock.patch.object(ss, "_load_disk_snapshot") as load:
+            ss.restore_all_sessions_from_disk()
+        load.assert_not_called()
+        assert set(ss._disk_manifest) == {"log-d2", "log-bad"}
+        assert ss._restore_stats["sessions"] == 2
+        assert "log-d2" not in ss._sessions
+
+    def test_first_access_hydrates_from_disk(self, disk):
+        disk.mkdir()
+        (disk / "log-d3.json").write_text(
+            json.dumps({"messages": [{"role": "user", "content": "old"}], "metadata": {"k": 1}})
+        )
+        ss.restore_all_sessions_from_disk()
+        s = ss.get_session("log-d3")
+        assert _contents(s.messages) == ["old"]
+        assert s.metadata == {"k": 1}
+        assert ss.get_session("log-d3") is s
+
+    def test_sqlite_row_wins_over_snapshot(self, disk):
+        s = _new("log-d4")
+        s.add_user("new")
+        disk.mkdir()
+        (disk / "log-d4.json").write_text(json.dumps({"messages": [{"role": "user", "content": "old"}]}))
+        ss.restore_all_sessions_from_disk()
+        del ss._sessions["log-d4"]
+        assert "new" in _contents(ss.get_session("log-d4").messages)
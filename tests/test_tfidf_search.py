@@ -0,0 +1,141 @@
+"""Tests for the incremental TF-IDF memory search index."""
+from __future__ import annotations
+
+import math
+from unittest import mock
+
+import pytest
+
+from salmalm.core import search as search_mod
+from salmalm.core.search import TFIDFSearch
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    mem_dir = tmp_path / "memory"
+    mem_dir.mkdir()
+    (tmp_path / "MEMORY.md").write_text("python database decisions\nuse sqlite wal mode\n")
+    (mem_dir / "2026-01-01.md").write_text("rust network tuning\npython asyncio notes\nsqlite backups\n")
+    (mem_dir / "2026-01-02.md").write_text("gardening tomatoes\nwater daily\n")
+    with mock.patch.object(search_mod, "MEMORY_FILE", tmp_path / "MEMORY.md"), \
+            mock.patch.object(search_mod, "MEMORY_DIR", mem_dir), \
+            mock.patch.object(search_mod, "WORKSPACE_DIR", tmp_path):
+        yield tmp_path
+
+
+def _brute_force(s: TFIDFSearch, query: str, k: int = 10) -> list:
+    """The original full-scan cosine, recomputing every norm."""
+    docs = list(s._docs.values())
+    n = len(docs)
+    df = {}
+    for d in docs:
+        for t in d[3]:
+            df[t] = df.get(t, 0) + 1
+    idf = {t: math.log(n / (1 + c)) for t, c in df.items()}
+    qtf = {}
+    for t in s._tokenize(query):
+        qtf[t] = qtf.get(t, 0) + 1
+    qvec = {t: c * idf.get(t, 0) for t, c in qtf.items()}
+    qnorm = math.sqrt(sum(v * v for v in qvec.values()))
+    out = []
+    for label, lineno, chunk, tf, *_ in docs:
+        dvec = {t: c * idf.get(t, 0) for t, c in tf.items()}
+        dot = sum(qvec.get(t, 0) * v for t, v in dvec.items())
+        dnorm = math.sqrt(sum(v * v for v in dvec.values()))
+        if qnorm and dnorm and dot / (qnorm * dnorm) > 0.05:
+            out.append((dot / (qnorm * dnorm), label, lineno, chunk))
+    out.sort(key=lambda x: -x[0])
+    return out[:k]
+
+
+def _assert_same(a: list, b: list) -> None:
+    assert [(x[1], x[2]) for x in a] == [(x[1], x[2]) for x in b]
+    for x, y in zip(a, b):
+        assert x[0] == pytest.approx(y[0], rel=1e-9)
+
+
+class TestIncrementalTFIDF:
+    def test_matches_full_scan(self, workspace):
+        s = TFIDFSearch(watch=False)
+        s._index_files()
+        for q in ("python sqlite", "rust", "tomatoes water"):
+            _assert_same(s._search(q, 10), _brute_force(s, q))
+
+    def test_refresh_matches_rebuild(self, workspace):
+        s = TFIDFSearch(watch=False)
+        s._index_files()
+        f = workspace / "memory" / "2026-01-02.md"
+        f.write_text("python sqlite migration\nrust ownership\n")
+        s.refresh_path(f)
+        new = workspace / "memory" / "2026-01-03.md"
+        new.write_text("sqlite vacuum schedule\n")
+        s.refresh_path(new)
+        (workspace / "memory" / "2026-01-01.md").unlink()
+        s.refresh_path(workspace / "memory" / "2026-01-01.md")
+
+        fresh = TFIDFSearch(watch=False)
+        fresh._index_files()
+        for q in ("python sqlite", "rust", "vacuum", "asyncio"):
+            _assert_same(s._search(q, 10), fresh._search(q, 10))
+            _assert_same(s._search(q, 10), _brute_force(s, q))
+        assert "memory/2026-01-01.md" not in s._files
+
+    def test_refresh_only_touches_edited_file(self, workspace):
+        s = TFIDFSearch(watch=False)
+        s._index_files()
+        f = workspace / "memory" / "2026-01-02.md"
+        f.write_text("gardening peppers\n")
+        with mock.patch.object(TFIDFSearch, "_discover") as discover, \
+                mock.patch.object(s, "_tokenize", wraps=s._tokenize) as tok:
+            s.refresh_path(f)
+        discover.assert_not_called()
+        assert tok.call_count == 1
+
+    def test_refresh_bumps_generation(self, workspace):
+        s = TFIDFSearch(watch=False)
+        s._index_files()
+        gen = s._generation
+        s.refresh_path(workspace / "MEMORY.md")
+        assert s._generation != gen
+
+    def test_unindexed_path_ignored(self, workspace):
+        s = TFIDFSearch(watch=False)
+        s._index_files()
+        gen = s._generation
+        other = workspace / "notes.bin"
+        other.write_text("python")
+        s.refresh_path(other)
+        assert s._generation == gen
+
+    def test_label_for(self, workspace):
+        assert TFIDFSearch._label_for(workspace / "MEMORY.md") == "MEMORY.md"
+        assert TFIDFSearch._label_for(workspace / "memory" / "x.md") == "memory/x.md"
+        assert TFIDFSearch._label_for(workspace / "uploads" / "a.csv") == "uploads/a.csv"
+        assert TFIDFSearch._label_for(workspace / "skills" / "s" / "SKILL.md") == "skills/s/SKILL.md"
+        assert TFIDFSearch._label_for(workspace / "uploads" / "a.exe") is None
+
+    def test_watcher_replaces_periodic_rebuild(self, workspace):
+        s = TFIDFSearch(watch=True)
+        s._index_files()
+        try:
+            assert s._watcher is not None and s._watcher.running
+            s._last_index_time = 0  # would have forced a rebuild before
+            with mock.patch.object(TFIDFSearch, "_discover") as discover:
+                s._index_files()
+            discover.assert_not_called()
+        finally:
+            s._watcher.stop()
+
+    def test_single_shared_watched_instance(self):
+        from salmalm.core import compaction, core, search
+
+        assert core._tfidf is search._tfidf and compaction._tfidf is search._tfidf
+        assert search._tfidf._watch and not TFIDFSearch()._watch
+
+    def test_watcher_event_updates_index(self, workspace):
+        s = TFIDFSearch(watch=False)
+        s._index_files()
+        f = workspace / "memory" / "2026-01-02.md"
+        f.write_text("kubernetes cluster notes\n")
+        s._on_file_change(str(f), "modified")
+        assert s._search("kubernetes", 3)[0][1] == "memory/2026-01-02.md"
@@ -0,0 +1,120 @@
+"""Write-behind usage/cost/quota ledger (salmalm.core.usage_ledger)."""
+
+import time
+from unittest import mock
+
+import pytest
+
+from salmalm.core import usage_ledger as ul
+from salmalm.core.usage_ledger import UsageLedger
+from salmalm.db import get_connection
+
+
+@pytest.fixture
+def audit_path(tmp_path):
+    p = tmp_path / "audit.db"
+    conn = get_connection(p)
+    conn.execute(
+        "CREATE TABLE usage_stats (id INTEGER PRIMARY KEY, ts TEXT, model TEXT, "
+        "input_tokens INTEGER, output_tokens INTEGER, cost REAL, user_id INTEGER)"
+    )
+    conn.execute(
+        "CREATE TABLE usage_detail (id INTEGER PRIMARY KEY, ts TEXT, session_id TEXT, model TEXT, "
+        "input_tokens INTEGER, output_tokens INTEGER, cost REAL)"
+    )
+    conn.commit()
+    conn.close()
+    return p
+
+
+def _count(path, table):
+    conn = get_connection(path)
+    n = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    conn.close()
+    return n
+
+
+def _wait(cond, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if cond():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class TestLedger:
+    def test_flush_writes_both_tables_once(self, audit_path):
+        ledger = UsageLedger(interval=60)
+        for i in range(5):
+            ledger.record_usage(audit_path, "2024-01-01T00:00:00", "m", 10, 5, 0.01, i)
+        assert _count(audit_path, "usage_stats") == 0
+        assert ledger.flush() == 5
+        assert _count(audit_path, "usage_stats") == 5
+        assert _count(audit_path, "usage_detail") == 5
+        assert ledger.stats() == {"pending": 0, "flushes": 1, "flushed_events": 5}
+        ledger.close()
+
+    def test_batch_size_triggers_background_flush(self, audit_path):
+        ledger = UsageLedger(interval=60, batch_size=3)
+        for _ in range(3):
+            ledger.record_usage(audit_path, "t", "m", 1, 1, 0.0)
+        assert _wait(lambda: _count(audit_path, "usage_stats") == 3)
+        ledger.close()
+
+    def test_interval_triggers_background_flush(self, audit_path):
+        ledger = UsageLedger(interval=0.05, batch_size=1000)
+        ledger.record_usage(audit_path, "t", "m", 1, 1, 0.0)
+        assert _wait(lambda: _count(audit_path, "usage_stats") == 1)
+        ledger.close()
+
+    def test_close_flushes(self, audit_path):
+        ledger = UsageLedger(interval=60)
+        ledger.record_usage(audit_path, "t", "m", 1, 1, 0.0)
+        ledger.close()
+        assert _count(audit_path, "usage_stats") == 1
+
+    def test_failed_flush_is_retried_then_dropped(self, tmp_path):
+        ledger = UsageLedger(interval=60)
+        missing = tmp_path / "no_tables.db"
+        ledger.record_usage(missing, "t", "m", 1, 1, 0.0)
+        ledger.flush()
+        assert ledger.stats()["pending"] == 1
+        for _ in range(ul._MAX_RETRIES - 1):
+            ledger.flush()
+        assert ledger.stats()["pending"] == 0
+
+
+class TestQuota:
+    @pytest.fixture
+    def quota(self, tmp_path):
+        import salmalm.web.auth as auth_mod
+
+        ledger = UsageLedger(interval=60)
+        with mock.patch.object(auth_mod, "AUTH_DB", tmp_path / "auth.db"), \
+                mock.patch.object(ul, "usage_ledger", ledger):
+            yield auth_mod.DailyQuotaManager(), ledger
+        ledger.close()
+
+    def test_usage_exact_before_and_after_flush(self, quota):
+        from salmalm.web.auth import DailyQuotaManager
+
+        dq, ledger = quota
+        dq.add_usage("u1", 100)
+        dq.add_usage("u1", 50)
+        assert dq.get_usage("u1") == 150
+        assert DailyQuotaManager().get_usage("u1") == 150  # from DB + pending
+        ledger.flush()
+        assert DailyQuotaManager().get_usage("u1") == 150
+        dq.add_usage("u1", 1)
+        assert dq.get_usage("u1") == 151
+
+    def test_existing_db_count_is_kept(self, quota):
+        from salmalm.web.auth import DailyQuotaManager
+
+        dq, ledger = quota
+        dq.add_usage("u2", 1000)
+        ledger.flush()
+        fresh = DailyQuotaManager()
+        fresh.add_usage("u2", 1)  # not read before: base comes from the DB
+        assert fresh.get_usage("u2") == 1001
@@ -120,6 +120,20 @@ class TestFileWatcher(unittest.TestCase):
         files = fw.get_watched_files()
         self.assertIn(fpath, files)
 
+    def test_watch_single_file(self):
+        fpath = os.path.join(self.tmpdir, 'MEMORY.md')
+        with open(fpath, 'w') as f:
+            f.write('v1')
+        fw = FileWatcher(paths=[fpath], interval=1,
+                         extensions={'.md'}, on_change=self._on_change)
+        fw._initial_scan()
+        self.assertIn(fpath, fw.get_watched_files())
+
+        os.utime(fpath, (time.time() + 1, time.time() + 1))
+        fw._scan()
+        fw._flush_changes()
+        self.assertEqual(self.changes, [(fpath, 'modified')])
+
     def test_rag_file_watcher_init(self):
         mock_rag = type('MockRAG', (), {'index_file': lambda s, l, p: None, 'remove_file': lambda s, p: None})()
         rfw = RAGFileWatcher(rag_engine=mock_rag, paths=[self.tmpdir])